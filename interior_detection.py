@@ -157,20 +157,25 @@ def flood_from_seeds_MASKONLY(h, w, obstacle255, seeds_xy):
     """
     Flood pe mască (MASK_ONLY) cu seeds custom (nu din margini).
     obstacle255>0 blochează. Returnează masca flood-uită (0/255).
+
+    Echivalent cu floodFill MASK_ONLY (4-conectivitate) din fiecare seed, dar
+    într-o singură trecere: etichetăm componentele conexe libere și păstrăm
+    etichetele care conțin cel puțin un seed valid.
     """
-    ff_mask = np.zeros((h+2, w+2), np.uint8)
-    ff_mask[1:h+1, 1:w+1] = (obstacle255 > 0).astype(np.uint8)
-    flags = cv2.FLOODFILL_MASK_ONLY | (255 << 8)
-
-    tmp = np.zeros((h, w, 3), np.uint8)
-    for (sx, sy) in seeds_xy:
-        if 0 <= sx < w and 0 <= sy < h and ff_mask[sy+1, sx+1] == 0:
-            try:
-                cv2.floodFill(tmp, ff_mask, (sx, sy), 0, (0,0,0), (0,0,0), flags)
-            except cv2.error:
-                pass
-
-    return (ff_mask[1:-1, 1:-1] == 255).astype(np.uint8) * 255
+    free = (obstacle255 == 0).astype(np.uint8)
+    n_labels, labels = cv2.connectedComponents(free, connectivity=4)
+    out = np.zeros((h, w), np.uint8)
+    if not len(seeds_xy):
+        return out
+
+    seeds = np.asarray(seeds_xy, dtype=np.int64).reshape(-1, 2)
+    xs, ys = seeds[:, 0], seeds[:, 1]
+    inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    hit = labels[ys[inside], xs[inside]]
+
+    keep = np.zeros(n_labels, dtype=np.uint8)
+    keep[hit[hit > 0]] = 255  # eticheta 0 = obstacole
+    return keep[labels]
 
 # ---------------- Praguri ADAPTIVE din frontieră ----------------
 
@@ -1,4 +1,4 @@
 # new/runner/area/__init__.py
-from .jobs import run_area_for_run, AreaJobResult
+from .jobs import run_area_for_run, prefetch_house_outline_for_run, AreaJobResult
 
-__all__ = ["run_area_for_run", "AreaJobResult"]
\ No newline at end of file
+__all__ = ["run_area_for_run", "prefetch_house_outline_for_run", "AreaJobResult"]
\ No newline at end of file
@@ -8,4 +8,36 @@ STANDARD_WINDOW_HEIGHT_M = 1.25
 
 # Grosimi standard pereți (pentru calcul amprentă)
 WALL_THICKNESS_EXTERIOR_M = 0.30  # 30 cm
-WALL_THICKNESS_INTERIOR_M = 0.15  # 15 cm
\ No newline at end of file
+WALL_THICKNESS_INTERIOR_M = 0.15  # 15 cm
+
+# ------------------------------------------------------------
+# Motor pentru aria casei
+#   "local"       – amprentă / arie netă / camere din raster-ele planului (local_area.py);
+#                   Gemini dacă încrederea locală e în AREA_GEMINI_FALLBACK_CONFIDENCE
+#   "cross_check" – local + Gemini, diferențele se salvează alături (rezultatul rămâne cel local)
+#   "gemini"      – doar Gemini (comportamentul vechi)
+# Override: AREA_MODE=local|cross_check|gemini
+# ------------------------------------------------------------
+AREA_MODE = "local"
+
+# Încrederea locală (local_area._confidence) la care aria vine de la Gemini
+# (în "local" și "cross_check"; estimarea locală rămâne la "local_estimation")
+AREA_GEMINI_FALLBACK_CONFIDENCE = ("low",)
+
+# Amprenta din pereți e tăiată cu masca exterior doar dacă aceasta acoperă
+# cel puțin atât din ea (altfel flood-ul exterior a intrat în casă)
+AREA_EXTERIOR_MIN_AGREEMENT = 0.9
+
+# Regiunile închise mai mici nu sunt camere (nișe, spații între hașuri)
+AREA_MIN_ROOM_M2 = 1.0
+
+# Liniile drepte (orizontale / verticale) mai lungi de atât separă camerele
+# (pereți desenați cu o singură linie)
+AREA_ROOM_LINE_M = 1.0
+
+# Ușile / ferestrele stau în perete: box-ul lărgit cu atât atinge camerele pe care le leagă
+AREA_OPENING_MARGIN_M = 0.15
+
+# Plauzibilitate (încredere)
+AREA_MIN_HOUSE_M2 = 30.0
+AREA_MAX_HOUSE_M2 = 400.0
@@ -6,14 +6,22 @@ import json
 import google.generativeai as genai
 from pathlib import Path
 
-def estimate_house_area_with_gemini(
+from ..perimeter.gemini_measure import image_size, polygon_area, points_in_image
+from .config import AREA_MIN_HOUSE_M2, AREA_MAX_HOUSE_M2
+
+# peste această diferență relativă între metode nu se face media
+METHODS_MAX_DIFF = 0.25
+
+
+def request_house_outline_with_gemini(
     image_path: Path,
-    scale_json_path: Path,
     api_key: str | None = None
 ) -> dict:
     """
-    Estimează aria casei folosind Gemini (geometric + semantic).
-    Returnează dicționarul JSON complet primit de la AI.
+    Cere de la Gemini conturul amprentei în PIXELI + suprafețele citite din etichete.
+    Nu depinde de scară (poate rula în paralel cu etapa scale); aria în m² se
+    calculează local cu house_area_from_pixels.
+    Returnează dicționarul JSON primit de la AI (+ "image_size_px").
     """
     
     # 1. Configurare API
@@ -25,68 +33,47 @@ def estimate_house_area_with_gemini(
         
     genai.configure(api_key=api_key)
 
-    # 2. Citire Scară
-    if not scale_json_path.exists():
-        raise FileNotFoundError(f"Scale file missing: {scale_json_path}")
-        
-    with open(scale_json_path, "r", encoding="utf-8") as f:
-        scale_data = json.load(f)
-
-    # Încercăm diverse chei posibile pentru scară
-    meters_per_pixel = scale_data.get("meters_per_pixel")
-    if meters_per_pixel is None:
-         # Fallback dacă scara e salvată altfel
-         meters_per_pixel = scale_data.get("scale", {}).get("meters_per_pixel")
-         
-    if not meters_per_pixel:
-        raise ValueError(f"Could not find 'meters_per_pixel' in {scale_json_path}")
-
-    # 3. Citire Imagine
+    # 2. Citire Imagine
     if not image_path.exists():
         raise FileNotFoundError(f"Image file missing: {image_path}")
         
     with open(image_path, "rb") as f:
         plan_bytes = f.read()
+    width, height = image_size(image_path)
 
-    # 4. Prompt
+    # 3. Prompt
     prompt = f"""
-Imaginea atașată este un plan arhitectural de casă.
-Scopul tău este să estimezi **suprafața totală a casei în metri pătrați** (Amprenta construită desfășurată pentru acest nivel).
+Imaginea atașată este un plan arhitectural de casă, de {width}×{height} pixeli.
+Toate coordonatele pe care le returnezi sunt în PIXELII ACESTEI imagini
+(origine stânga-sus, x spre dreapta, y în jos). NU converti nimic în metri.
 
-Fă asta în două moduri independente:
+Fă două lucruri independente:
 
-1️⃣ **Metoda bazată pe scară (geometrică)**:
-   - Folosește valoarea scării: **{meters_per_pixel:.6f} m/pixel**.
-   - Estimează dimensiunile exterioare ale clădirii și calculează aria totală (inclusiv camere, pereți, fără curte).
-   - Aceasta este aria brută (Gross Floor Area).
+1️⃣ **Conturul clădirii (geometric, în pixeli)**:
+   - Urmărește fața exterioară a pereților exteriori (amprenta construită pentru acest nivel,
+     inclusiv camere și pereți, fără curte / terase neacoperite).
+   - Returnează poligonul închis ca listă de vârfuri [x, y], în ordine.
 
-2️⃣ **Metoda bazată pe etichete și legende (semantică)**:
+2️⃣ **Etichete și legende (semantic, în m² așa cum sunt scrise)**:
    - Caută texte cu valori de suprafețe: m², „Gesamtfläche”, „Wohnfläche”, „Essen/Wohnen”, etc.
    - Adună toate valorile numerice care par a fi suprafețe de camere.
    - Dacă există o valoare totală (Gesamtfläche / Total), folosește-o prioritar.
 
-3️⃣ **Analiză comparativă și selecție inteligentă**:
-   - Dacă cele două metode diferă cu peste 25%, **NU face media**.
-   - În schimb, alege metoda mai plauzibilă și explică motivul în "verification_notes".
-   - Dacă diferența este rezonabilă (<25%), poți face media sau alege valoarea geometrică dacă planul e clar.
-
-4️⃣ **Rezultat final**:
+3️⃣ **Rezultat**:
    - Returnează DOAR JSON, fără text suplimentar, cu această structură:
 
 {{
-  "scale_meters_per_pixel": {meters_per_pixel:.6f},
-  "surface_estimation": {{
-    "by_scale_m2": <float sau null>,
-    "by_labels_m2": <float sau null>,
-    "final_area_m2": <float>,
-    "method_used": "<string: 'scale', 'labels', 'average' sau 'hybrid'>"
-  }},
+  "image_width_px": {width},
+  "image_height_px": {height},
+  "outline_px": [[<x>, <y>], ...],
+  "by_labels_m2": <float sau null>,
+  "labels_found": ["<string>", ...],
   "confidence": "<string: 'high', 'medium', 'low'>",
   "verification_notes": "<string>"
 }}
 """
 
-    # 5. Apelare Model
+    # 4. Apelare Model
     # Încercăm Pro, apoi Flash
     model_name = "gemini-2.0-flash" # Sau 1.5-pro, în funcție de acces
     try:
@@ -104,7 +91,7 @@ Fă asta în două moduri independente:
         generation_config={"temperature": 0.0, "response_mime_type": "application/json"}
     )
 
-    # 6. Procesare Răspuns
+    # 5. Procesare Răspuns
     reply = response.text.strip()
     
     # Curățare markdown ```json ... ```
@@ -117,8 +104,90 @@ Fă asta în două moduri independente:
         reply = "\n".join(lines)
 
     try:
-        return json.loads(reply)
+        result = json.loads(reply)
     except json.JSONDecodeError:
         # Fallback simplu în caz de eroare de parse
         print(f"⚠️ Gemini Area JSON Decode Error. Raw: {reply}")
-        raise
\ No newline at end of file
+        raise
+
+    # fără dimensiuni raportate, coordonatele sunt în pixelii imaginii trimise
+    result.setdefault("image_width_px", width)
+    result.setdefault("image_height_px", height)
+    result["image_size_px"] = [width, height]
+    return result
+
+
+def house_area_from_pixels(raw: dict, meters_per_pixel: float) -> dict:
+    """
+    Răspunsul în pixeli → structura house_area_gemini.json, la scara dată:
+      by_scale_m2  – aria poligonului (px²) × (m/px)²
+      by_labels_m2 – suprafețele citite din etichete
+    Selecția: diferență ≤ 25% → media; altfel metoda cu valoare plauzibilă
+    (AREA_MIN_HOUSE_M2..AREA_MAX_HOUSE_M2), cu prioritate geometria.
+    """
+    size = tuple(raw.get("image_size_px") or (raw.get("image_width_px"), raw.get("image_height_px")))
+    outline = points_in_image(raw, "outline_px", size)
+    by_scale = polygon_area(outline) * meters_per_pixel ** 2 or None
+    labels = raw.get("by_labels_m2")
+    by_labels = float(labels) if isinstance(labels, (int, float)) and labels > 0 else None
+
+    def plausible(v: float | None) -> bool:
+        return v is not None and AREA_MIN_HOUSE_M2 <= v <= AREA_MAX_HOUSE_M2
+
+    notes = raw.get("verification_notes", "")
+    if by_scale and by_labels:
+        diff = abs(by_scale - by_labels) / max(by_scale, by_labels)
+        if diff <= METHODS_MAX_DIFF:
+            final, method = (by_scale + by_labels) / 2.0, "average"
+        elif plausible(by_scale) or not plausible(by_labels):
+            final, method = by_scale, "scale"
+        else:
+            final, method = by_labels, "labels"
+        notes = f"{notes} | scară {by_scale:.1f} m² vs. etichete {by_labels:.1f} m² ({diff:.0%}) → {method}".strip(" |")
+    elif by_scale:
+        final, method = by_scale, "scale"
+    else:
+        final, method = by_labels or 0.0, "labels"
+
+    return {
+        "scale_meters_per_pixel": meters_per_pixel,
+        "surface_estimation": {
+            "by_scale_m2": round(by_scale, 2) if by_scale else None,
+            "by_labels_m2": by_labels,
+            "final_area_m2": round(final, 2),
+            "method_used": method,
+        },
+        "confidence": raw.get("confidence", "medium"),
+        "verification_notes": notes,
+    }
+
+
+def estimate_house_area_with_gemini(
+    image_path: Path,
+    scale_json_path: Path,
+    api_key: str | None = None,
+    raw: dict | None = None
+) -> dict:
+    """
+    Estimează aria casei folosind Gemini (geometric + semantic): conturul vine în
+    pixeli de la model, scara din scale_json_path se aplică local.
+    raw: răspunsul în pixeli deja obținut; None → apel nou.
+    """
+    if not scale_json_path.exists():
+        raise FileNotFoundError(f"Scale file missing: {scale_json_path}")
+        
+    with open(scale_json_path, "r", encoding="utf-8") as f:
+        scale_data = json.load(f)
+
+    # Încercăm diverse chei posibile pentru scară
+    meters_per_pixel = scale_data.get("meters_per_pixel")
+    if meters_per_pixel is None:
+         # Fallback dacă scara e salvată altfel
+         meters_per_pixel = scale_data.get("scale", {}).get("meters_per_pixel")
+         
+    if not meters_per_pixel:
+        raise ValueError(f"Could not find 'meters_per_pixel' in {scale_json_path}")
+
+    if raw is None:
+        raw = request_house_outline_with_gemini(image_path, api_key)
+    return house_area_from_pixels(raw, float(meters_per_pixel))
@@ -5,7 +5,7 @@ import json
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 
@@ -15,15 +15,24 @@ from ..config.settings import (
     PlanInfo,
 )
 
+from ..plan_index import reused_result
 from .calculator import calculate_areas_for_plan
 from .aggregator import aggregate_multi_plan_areas
 
 # IMPORTUL NOULUI MODUL
-from .gemini_area import estimate_house_area_with_gemini
+from .gemini_area import request_house_outline_with_gemini, house_area_from_pixels
+from .local_area import measure_area_local, read_meters_per_pixel, compare_with_gemini
+from ..count_objects.detection_index import plan_detections
+from .config import AREA_MODE, AREA_GEMINI_FALLBACK_CONFIDENCE
 
 
 STAGE_NAME = "area"
 
+_MODES = ("local", "cross_check", "gemini")
+
+# răspunsul Gemini în pixeli (fără scară); scara se aplică la fiecare rulare
+HOUSE_PIXELS_FILE = "house_area_px.json"
+
 
 @dataclass
 class AreaJobResult:
@@ -34,6 +43,108 @@ class AreaJobResult:
     result_data: dict | None = None
 
 
+def area_mode() -> str:
+    """local | cross_check | gemini (override cu AREA_MODE)."""
+    mode = os.getenv("AREA_MODE", AREA_MODE).strip().lower()
+    return mode if mode in _MODES else AREA_MODE
+
+
+def house_outline_pixels(work_dir: Path, plan: PlanInfo) -> dict:
+    """
+    Conturul Gemini în pixeli: din HOUSE_PIXELS_FILE dacă există deja (prefetch în
+    paralel cu scale, sau o rulare anterioară), altfel apel nou salvat acolo.
+    RETURN: răspunsul brut sau {} dacă nu e disponibil.
+    """
+    cached = work_dir / HOUSE_PIXELS_FILE
+    if cached.exists():
+        with open(cached, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if not os.getenv("GEMINI_API_KEY"):
+        return {}
+    try:
+        print(f"       🤖 Calling Gemini Area Outline for {plan.plan_id}...")
+        raw = request_house_outline_with_gemini(plan.plan_image)
+    except Exception as e:
+        print(f"       ⚠️ Gemini Area Failed: {e}")
+        return {}
+    work_dir.mkdir(parents=True, exist_ok=True)
+    with open(cached, "w", encoding="utf-8") as f:
+        json.dump(raw, f, indent=2, ensure_ascii=False)
+    return raw
+
+
+def _gemini_area(work_dir: Path, plan: PlanInfo, scale_json: Path) -> dict:
+    """Estimarea Gemini (refolosită din index dacă există); {} dacă nu e disponibilă."""
+    # Plan identic cu unul deja procesat → refolosim estimarea Gemini
+    reused_area = reused_result(work_dir, "house_area_gemini.json")
+    if reused_area:
+        with open(reused_area, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        area = float(result.get("surface_estimation", {}).get("final_area_m2", 0.0))
+        print(f"       ♻️ Gemini Area refolosită din index: {area:.2f} m²")
+        return result if area > 0 else {}
+    
+    if not scale_json.exists():
+        return {}
+    
+    raw = house_outline_pixels(work_dir, plan)
+    if not raw:
+        return {}
+    
+    try:
+        # Scara se aplică local pe conturul în pixeli
+        result = house_area_from_pixels(raw, read_meters_per_pixel(scale_json))
+        
+        # Extragem valoarea finală
+        est = result.get("surface_estimation", {})
+        area = float(est.get("final_area_m2", 0.0))
+        
+        # Salvăm rezultatul detaliat al AI-ului (pt. debug/încredere)
+        gemini_out_file = work_dir / "house_area_gemini.json"
+        with open(gemini_out_file, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        
+        print(f"       ✅ Gemini Area: {area:.2f} m² (Method: {est.get('method_used')})")
+        return result if area > 0 else {}
+    
+    except Exception as e:
+        print(f"       ⚠️ Gemini Area Failed: {e}")
+        return {}
+
+
+def prefetch_house_outline_for_run(run_id: str, max_parallel: int = 4) -> int:
+    """
+    Apelurile Gemini în pixeli pentru toate planurile, înainte să existe scara
+    (rulează în paralel cu etapa scale). Doar în modurile care folosesc sigur
+    Gemini (gemini / cross_check); în "local" apelul e doar rezervă.
+    RETURN: numărul de planuri cu contur în pixeli disponibil.
+    """
+    if area_mode() == "local":
+        return 0
+    try:
+        plans: List[PlanInfo] = load_plan_infos(run_id, stage_name=STAGE_NAME)
+    except PlansListError as e:
+        print(f"❌ [{STAGE_NAME}] {e}")
+        return 0
+    
+    todo = [p for p in plans if not reused_result(p.stage_work_dir, "house_area_gemini.json")]
+    if not todo:
+        return 0
+    
+    print(f"📐 [{STAGE_NAME}] prefetch contur în pixeli pentru {len(todo)} planuri (fără scară)", flush=True)
+    
+    def _fetch(p: PlanInfo) -> dict:
+        try:
+            return house_outline_pixels(p.stage_work_dir, p)
+        except Exception as e:
+            print(f"⚠️ [{STAGE_NAME}] prefetch {p.plan_id} eșuat: {e}")
+            return {}
+    
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(todo))) as executor:
+        raws = list(executor.map(_fetch, todo))
+    return sum(1 for r in raws if r)
+
+
 def _run_for_single_plan(
     run_id: str, 
     index: int, 
@@ -43,7 +154,7 @@ def _run_for_single_plan(
 ) -> AreaJobResult:
     """
     Calculează ariile pentru un singur plan.
-    Integrat cu Gemini Area Estimation.
+    Aria casei: motorul local (implicit) sau Gemini, după AREA_MODE.
     """
     work_dir = plan.stage_work_dir
     work_dir.mkdir(parents=True, exist_ok=True)
@@ -68,7 +179,10 @@ def _run_for_single_plan(
     openings_json = measure_dir / "openings_all.json"
     measurements_json = measure_dir / "openings_measurements_gemini.json"
     
-    # Scale File (NECESAR PENTRU GEMINI AREA)
+    # Detecții (opțional: ușile / ferestrele fiecărei camere în aria locală)
+    detections_json = work_dir.parent.parent / "count_objects" / plan.plan_id / "detections_all.json"
+    
+    # Scale File (NECESAR PENTRU ARIA LOCALĂ / GEMINI)
     scale_dir = work_dir.parent.parent / "scale" / plan.plan_id
     scale_json = scale_dir / "scale_result.json"
 
@@ -85,33 +199,61 @@ def _run_for_single_plan(
         )
         
         # ==========================================
-        # 2. CALCULATE HOUSE AREA (GEMINI INTEGRATION)
+        # 2. CALCULATE HOUSE AREA (LOCAL / GEMINI, după AREA_MODE)
         # ==========================================
+        mode = area_mode()
         house_area_m2 = 0.0
-        gemini_area_result = {}
+        area_result = {}
+        area_source = "metadata_fallback"
         
-        # Încercăm întâi cu Gemini folosind scriptul tău
-        if scale_json.exists() and os.getenv("GEMINI_API_KEY"):
+        # Local: amprenta din masca exterior + pereți (fără API)
+        if mode in ("local", "cross_check") and scale_json.exists():
             try:
-                print(f"       🤖 Calling Gemini Area Estimation for {plan.plan_id}...")
-                gemini_area_result = estimate_house_area_with_gemini(
-                    image_path=plan.plan_image,
-                    scale_json_path=scale_json
+                area_result = measure_area_local(
+                    plan.plan_image, read_meters_per_pixel(scale_json), out_dir=work_dir,
+                    detections=plan_detections(detections_json) if detections_json.exists() else None,
+                )
+                house_area_m2 = float(area_result["surface_estimation"]["final_area_m2"])
+                area_source = "local"
+                local = area_result["local"]
+                print(
+                    f"       📐 Local Area: {house_area_m2:.2f} m² brut, {local['net_interior_m2']:.2f} m² net, "
+                    f"{len(local['rooms'])} camere ({area_result['confidence']}, {local['elapsed_s']:.2f}s)"
                 )
-                
-                # Extragem valoarea finală calculată de AI
-                est = gemini_area_result.get("surface_estimation", {})
-                house_area_m2 = float(est.get("final_area_m2", 0.0))
-                
-                # Salvăm rezultatul detaliat al AI-ului (pt. debug/încredere)
-                gemini_out_file = work_dir / "house_area_gemini.json"
-                with open(gemini_out_file, "w", encoding="utf-8") as f:
-                    json.dump(gemini_area_result, f, indent=2, ensure_ascii=False)
-                
-                print(f"       ✅ Gemini Area: {house_area_m2:.2f} m² (Method: {est.get('method_used')})")
-
             except Exception as e:
-                print(f"       ⚠️ Gemini Area Failed: {e}. Falling back to metadata.")
+                print(f"       ⚠️ Local Area Failed: {e}. Falling back to Gemini.")
+                area_result = {}
+        
+        # Încredere locală mică: aria vine de la Gemini (dacă răspunde), localul rămâne ca diagnostic
+        local_low = area_source == "local" and area_result.get("confidence") in AREA_GEMINI_FALLBACK_CONFIDENCE
+        
+        # Gemini: modul vechi, fallback pentru local, sau verificare în cross_check
+        gemini_area_result = {}
+        if mode == "gemini" or mode == "cross_check" or house_area_m2 <= 0 or local_low:
+            gemini_area_result = _gemini_area(work_dir, plan, scale_json)
+        
+        if gemini_area_result and local_low:
+            print(f"       ⚠️ Încredere locală {area_result['confidence']} → aria Gemini")
+            local_estimation = area_result
+            area_result = dict(gemini_area_result)
+            area_result["local_estimation"] = local_estimation
+            house_area_m2 = float(gemini_area_result.get("surface_estimation", {}).get("final_area_m2", 0.0))
+            area_source = "gemini_hybrid"
+        elif gemini_area_result:
+            if house_area_m2 > 0:
+                area_result["gemini_cross_check"] = compare_with_gemini(area_result, gemini_area_result)
+                diff = area_result["gemini_cross_check"]["relative_diff"]["final"]
+                if diff is not None:
+                    print(f"       🔍 Gemini vs local: {diff:+.0%}")
+            else:
+                area_result = gemini_area_result
+                house_area_m2 = float(gemini_area_result.get("surface_estimation", {}).get("final_area_m2", 0.0))
+                area_source = "gemini_hybrid"
+        
+        if area_source == "local" or "local_estimation" in area_result:
+            local_out_file = work_dir / "house_area_local.json"
+            with open(local_out_file, "w", encoding="utf-8") as f:
+                json.dump(area_result.get("local_estimation", area_result), f, indent=2, ensure_ascii=False)
         
         # Fallback: Metadata
         if house_area_m2 <= 0:
@@ -121,7 +263,7 @@ def _run_for_single_plan(
                 house_area_m2 = meta.get("floor_classification", {}).get("estimated_area_m2", 0.0)
                 print(f"       ℹ️ Using Metadata Area: {house_area_m2:.2f} m²")
             else:
-                return AreaJobResult(plan.plan_id, work_dir, False, "Nu am putut determina aria casei (nici Gemini, nici Metadata).")
+                return AreaJobResult(plan.plan_id, work_dir, False, "Nu am putut determina aria casei (nici local, nici Gemini, nici Metadata).")
 
         # ==========================================
         # 3. LOAD OTHER DATA
@@ -156,7 +298,7 @@ def _run_for_single_plan(
             plan_id=plan.plan_id,
             floor_type=floor_type,
             is_single_plan=is_single_plan,
-            house_area_m2=house_area_m2, # Valoarea nouă de la Gemini
+            house_area_m2=house_area_m2, # Local / Gemini / Metadata
             walls_measurements=walls_data,
             openings_all=openings_data,
             stairs_area_m2=stairs_area_m2
@@ -164,10 +306,11 @@ def _run_for_single_plan(
         
         # Add metadata & source info
         result["meta"] = {
-            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "stage": STAGE_NAME,
-            "area_source": "gemini_hybrid" if gemini_area_result else "metadata_fallback",
-            "confidence": gemini_area_result.get("confidence", "unknown")
+            "area_source": area_source,
+            "area_mode": mode,
+            "confidence": area_result.get("confidence", "unknown")
         }
         
         # ==========================================
@@ -0,0 +1,266 @@
+# new/runner/area/local_area.py
+# ------------------------------------------------------------
+# Aria casei calculată local (offline), din raster-ele planului:
+#
+#   - amprenta brută: pereții închiși peste goluri (ca în perimeter.local_walls),
+#     tăiată cu masca exterior din exterior_doors când cele două se potrivesc
+#     (masca exterior mărginește exact clădirea; dacă flood-ul a intrat pe o ușă
+#     rămâne doar amprenta din pereți)
+#   - aria netă interioară: amprenta minus pereți
+#   - camere: regiunile închise (4-conectate) din interior, după ce golurile
+#     ușilor au fost închise; cele sub AREA_MIN_ROOM_M2 sunt nișe / artefacte
+#   - opțional, ușile / ferestrele / scara fiecărei camere, din indexul comun
+#     al detecțiilor (count_objects.detection_index)
+#
+# Rezultatul are aceeași structură ca house_area_gemini.json ("surface_estimation"),
+# deci calculatorul și indexul de planuri îl citesc la fel.
+#
+# Comparare cu estimările Gemini din run-uri înregistrate:
+#   python -m runner.area.local_area RUN_ID [RUN_ID ...]
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..config.settings import get_output_root_for_run
+from ..exterior_doors.flood_blue import shared_exterior_mask
+from ..perimeter.config import WALL_FOOTPRINT_CLOSE_M, WALL_OPENING_BRIDGE_M
+from ..perimeter.local_walls import wall_mask, building_footprint, bridge_openings
+from ..plan_geometry import PlanGeometry, plan_geometry
+from ..count_objects.detection_index import PlanDetections
+from .config import (
+    AREA_EXTERIOR_MIN_AGREEMENT,
+    AREA_MIN_ROOM_M2,
+    AREA_ROOM_LINE_M,
+    AREA_OPENING_MARGIN_M,
+    AREA_MIN_HOUSE_M2,
+    AREA_MAX_HOUSE_M2,
+)
+
+
+def read_meters_per_pixel(scale_json: Path) -> float:
+    """meters_per_pixel din scale_result.json (aceleași chei ca gemini_area)."""
+    with open(scale_json, "r", encoding="utf-8") as f:
+        scale_data = json.load(f)
+    mpp = scale_data.get("meters_per_pixel")
+    if mpp is None:
+        mpp = scale_data.get("scale", {}).get("meters_per_pixel")
+    if not mpp or float(mpp) <= 0:
+        raise ValueError(f"Could not find 'meters_per_pixel' in {scale_json}")
+    return float(mpp)
+
+
+def _fill_outer(mask: np.ndarray) -> np.ndarray:
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    filled = np.zeros_like(mask)
+    cv2.drawContours(filled, contours, -1, 255, thickness=cv2.FILLED)
+    return filled
+
+
+def _confidence(agreement: float, rooms_ratio: float, gross_m2: float) -> tuple[str, float]:
+    score = 1.0
+    if agreement < AREA_EXTERIOR_MIN_AGREEMENT:
+        score -= 0.25
+    if rooms_ratio < 0.85:
+        score -= 0.25
+    if not (AREA_MIN_HOUSE_M2 <= gross_m2 <= AREA_MAX_HOUSE_M2):
+        score -= 0.4
+    score = max(0.0, score)
+    label = "high" if score >= 0.75 else "medium" if score >= 0.5 else "low"
+    return label, round(score, 2)
+
+
+def _save_overlay(geometry: PlanGeometry, footprint: np.ndarray, rooms: np.ndarray, out_path: Path) -> None:
+    overlay = geometry.bgr.copy()
+    rng = np.random.default_rng(7)
+    colors = rng.integers(60, 230, size=(int(rooms.max()) + 1, 3), dtype=np.uint8)
+    colors[0] = 0
+    painted = colors[rooms]
+    inside = rooms > 0
+    overlay[inside] = (0.5 * overlay[inside] + 0.5 * painted[inside]).astype(np.uint8)
+    contours, _ = cv2.findContours(footprint, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    cv2.drawContours(overlay, contours, -1, (255, 0, 0), 3)
+    cv2.imwrite(str(out_path), overlay)
+
+
+def measure_area_local(
+    plan_image: Path,
+    meters_per_pixel: float,
+    geometry: PlanGeometry | None = None,
+    out_dir: Path | None = None,
+    detections: PlanDetections | None = None,
+) -> dict:
+    """
+    Amprenta brută, aria netă interioară și camerele unui plan (fără API).
+    out_dir: dacă e dat, salvează rooms_local.jpg (camere colorate + conturul amprentei).
+    detections: dacă e dat, fiecare cameră primește la "openings" numărul de
+    uși / ferestre / scări care o ating.
+    RETURN: dict în formatul house_area_gemini.json + detaliile locale la "local".
+    """
+    if meters_per_pixel <= 0:
+        raise ValueError(f"meters_per_pixel invalid: {meters_per_pixel}")
+
+    t0 = time.perf_counter()
+    geometry = geometry or plan_geometry(plan_image)
+    m2_per_px = meters_per_pixel ** 2
+
+    walls = wall_mask(geometry)
+    if not cv2.countNonZero(walls):
+        raise ValueError("Nu am găsit pereți în plan")
+
+    # amprenta din pereți, tăiată cu masca exterior dacă se potrivesc
+    footprint, _ = building_footprint(walls, int(round(WALL_FOOTPRINT_CLOSE_M / meters_per_pixel)))
+    walls_px = cv2.countNonZero(footprint)
+    outside = shared_exterior_mask(geometry)
+    refined = cv2.bitwise_and(footprint, _fill_outer(cv2.bitwise_not(outside)))
+    agreement = cv2.countNonZero(refined) / max(walls_px, 1)
+    if agreement >= AREA_EXTERIOR_MIN_AGREEMENT:
+        footprint, footprint_source = refined, "exterior_mask"
+    else:
+        footprint_source = "walls"
+
+    gross_px = cv2.countNonZero(footprint)
+    walls_in = cv2.bitwise_and(walls, footprint)
+    net_px = gross_px - cv2.countNonZero(walls_in)
+
+    # camere: interiorul fără pereți, cu ușile închise; pereții desenați doar cu o
+    # linie subțire lipsesc din masca pereților, deci se adaugă liniile drepte lungi
+    line_px = max(3, int(round(AREA_ROOM_LINE_M / meters_per_pixel)))
+    ink = cv2.bitwise_not(geometry.binary(200))
+    lines = cv2.bitwise_or(
+        cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((1, line_px), np.uint8)),
+        cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((line_px, 1), np.uint8)),
+    )
+    barriers = cv2.bitwise_or(walls, cv2.bitwise_and(lines, footprint))
+    closed_walls = bridge_openings(barriers, WALL_OPENING_BRIDGE_M / meters_per_pixel)
+    free = cv2.bitwise_and(footprint, cv2.bitwise_not(closed_walls))
+    n, labels, stats, centroids = cv2.connectedComponentsWithStats(free, connectivity=4)
+
+    min_room_px = AREA_MIN_ROOM_M2 / m2_per_px
+    keep = np.zeros(n, np.int32)
+    rooms = []
+    for i in np.argsort(-stats[:, cv2.CC_STAT_AREA]):
+        if i == 0 or stats[i, cv2.CC_STAT_AREA] < min_room_px:
+            continue
+        keep[i] = len(rooms) + 1
+        x, y, w, h, area = stats[i]
+        rooms.append({
+            "id": len(rooms) + 1,
+            "area_m2": round(float(area) * m2_per_px, 2),
+            "x1": int(x), "y1": int(y), "x2": int(x + w), "y2": int(y + h),
+            "cx": round(float(centroids[i][0]), 1), "cy": round(float(centroids[i][1]), 1),
+        })
+
+    gross_m2 = gross_px * m2_per_px
+    net_m2 = net_px * m2_per_px
+    rooms_m2 = sum(r["area_m2"] for r in rooms)
+    confidence, score = _confidence(agreement, rooms_m2 / max(net_m2, 1e-9), gross_m2)
+
+    room_map = keep[labels]
+    if detections is not None:
+        margin = int(round(AREA_OPENING_MARGIN_M / meters_per_pixel))
+        membership = detections.room_membership(room_map, margin)
+        for room in rooms:
+            room["openings"] = membership.get(room["id"], {})
+
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        _save_overlay(geometry, footprint, room_map, out_dir / "rooms_local.jpg")
+
+    local = {
+        "engine": "local",
+        "footprint_source": footprint_source,
+        "exterior_agreement": round(agreement, 3),
+        "gross_footprint_m2": round(gross_m2, 2),
+        "net_interior_m2": round(net_m2, 2),
+        "walls_area_m2": round(gross_m2 - net_m2, 2),
+        "rooms_total_m2": round(rooms_m2, 2),
+        "rooms": rooms,
+        "confidence_score": score,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+    }
+    return {
+        "scale_meters_per_pixel": meters_per_pixel,
+        "surface_estimation": {
+            "by_scale_m2": local["gross_footprint_m2"],
+            "by_labels_m2": None,
+            "final_area_m2": local["gross_footprint_m2"],
+            "method_used": "local",
+        },
+        "confidence": confidence,
+        "verification_notes": (
+            f"Local: amprentă {gross_m2:.1f} m² ({footprint_source}), net {net_m2:.1f} m², "
+            f"{len(rooms)} camere = {rooms_m2:.1f} m²"
+        ),
+        "local": local,
+    }
+
+
+def compare_with_gemini(local_result: dict, gemini_result: dict) -> dict:
+    """Diferențele relative local vs. Gemini (pe aria finală și pe metodele Gemini)."""
+    local_m2 = float(local_result["surface_estimation"]["final_area_m2"])
+    est = gemini_result.get("surface_estimation", {}) or {}
+
+    def rel(value) -> float | None:
+        if value in (None, 0) or local_m2 <= 0:
+            return None
+        return round((float(value) - local_m2) / local_m2, 3)
+
+    return {
+        "local_m2": local_m2,
+        "gemini_final_m2": est.get("final_area_m2"),
+        "gemini_by_scale_m2": est.get("by_scale_m2"),
+        "gemini_by_labels_m2": est.get("by_labels_m2"),
+        "gemini_confidence": gemini_result.get("confidence"),
+        "relative_diff": {
+            "final": rel(est.get("final_area_m2")),
+            "by_scale": rel(est.get("by_scale_m2")),
+            "by_labels": rel(est.get("by_labels_m2")),
+        },
+    }
+
+
+def cross_check_runs(run_ids: list[str]) -> dict:
+    """
+    Pentru fiecare plan cu house_area_gemini.json din run-urile date: aria locală
+    (plan.jpg din detections, scara din scale) comparată cu estimarea Gemini.
+    """
+    rows = []
+    for run_id in run_ids:
+        output_root = get_output_root_for_run(run_id)
+        for gemini_json in sorted((output_root / "area").glob("*/house_area_gemini.json")):
+            plan_id = gemini_json.parent.name
+            plan_image = output_root / "detections" / plan_id / "plan.jpg"
+            scale_json = output_root / "scale" / plan_id / "scale_result.json"
+            row = {"run_id": run_id, "plan_id": plan_id}
+            try:
+                gemini = json.loads(gemini_json.read_text(encoding="utf-8"))
+                local = measure_area_local(plan_image, read_meters_per_pixel(scale_json))
+                row.update(compare_with_gemini(local, gemini))
+                row["local_confidence"] = local["confidence"]
+            except Exception as e:
+                row["error"] = str(e)
+            rows.append(row)
+
+    diffs = [abs(r["relative_diff"]["final"]) for r in rows if r.get("relative_diff", {}).get("final") is not None]
+    return {
+        "plans": rows,
+        "compared": len(diffs),
+        "median_abs_rel_diff": round(statistics.median(diffs), 3) if diffs else None,
+        "within_10pct": sum(d <= 0.10 for d in diffs),
+    }
+
+
+if __name__ == "__main__":  # pragma: no cover
+    parser = argparse.ArgumentParser(description="Aria locală vs. Gemini pe run-uri înregistrate")
+    parser.add_argument("run_ids", nargs="+")
+    args = parser.parse_args()
+    print(json.dumps(cross_check_runs(args.run_ids), indent=2, ensure_ascii=False))
@@ -0,0 +1,4 @@
+# new/runner/combined_analysis/__init__.py
+from .jobs import run_combined_analysis_for_run, combined_analysis_enabled, CombinedAnalysisResult
+
+__all__ = ["run_combined_analysis_for_run", "combined_analysis_enabled", "CombinedAnalysisResult"]
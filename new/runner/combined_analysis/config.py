@@ -0,0 +1,19 @@
+# new/runner/combined_analysis/config.py
+from __future__ import annotations
+
+# ------------------------------------------------------------
+# Analiza geometrică combinată: UN singur apel multimodal per plan care întoarce
+# dovezile de scară, pereții (polilinii) și amprenta (poligon), în loc de trei
+# apeluri separate (scale / perimeter / area), fiecare cu upload-ul imaginii.
+# Opțională; override: COMBINED_ANALYSIS=1|0
+# ------------------------------------------------------------
+COMBINED_ANALYSIS = False
+
+COMBINED_MODEL = "gpt-4o"
+COMBINED_MAX_TOKENS = 6000
+COMBINED_MAX_PARALLEL = 4
+
+# Validare: coordonatele pot ieși puțin din imagine (contur pe marginea desenului)
+COMBINED_BOUNDS_TOLERANCE = 0.05
+# Referințele de scară mai scurte (px) sunt prea imprecise
+COMBINED_MIN_REFERENCE_PX = 30
@@ -0,0 +1,211 @@
+# new/runner/combined_analysis/jobs.py
+# ------------------------------------------------------------
+# Analiza combinată: un singur apel per plan în loc de trei (scale / perimeter /
+# area). Câmpurile valide ale răspunsului se scriu în cache-urile pe care etapele
+# le citesc deja:
+#
+#   scale/<plan>/scale_evidence_px.json       (scale.jobs, în locul GPT-4o)
+#   perimeter/<plan>/walls_measurements_px.json
+#   area/<plan>/house_area_px.json
+#
+# Un câmp invalid / lipsă nu se scrie, deci etapa lui face apelul ei obișnuit
+# (fallback per câmp). Răspunsul brut + starea câmpurilor rămân în
+# combined_analysis/<plan>/combined_analysis.json.
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+from ..config.settings import (
+    load_plan_infos,
+    get_output_root_for_run,
+    PlansListError,
+    PlanInfo,
+)
+
+from ..plan_index import reused_result
+from ..scale.jobs import SCALE_EVIDENCE_FILE, STAGE_NAME as SCALE_STAGE
+from ..perimeter.jobs import WALL_PIXELS_FILE, perimeter_mode, STAGE_NAME as PERIMETER_STAGE
+from ..area.jobs import HOUSE_PIXELS_FILE, area_mode, STAGE_NAME as AREA_STAGE
+from .openai_combined import request_combined_analysis, validate_fields, scale_references_in_image
+from .config import COMBINED_ANALYSIS, COMBINED_MAX_PARALLEL
+
+
+STAGE_NAME = "combined_analysis"
+
+RESULT_FILE = "combined_analysis.json"
+
+# câmp → (etapă, cache-ul etapei, rezultatul final al etapei pentru planurile refolosite)
+_FIELDS = {
+    "scale": (SCALE_STAGE, SCALE_EVIDENCE_FILE, "scale_result.json"),
+    "walls": (PERIMETER_STAGE, WALL_PIXELS_FILE, "walls_measurements_gemini.json"),
+    "footprint": (AREA_STAGE, HOUSE_PIXELS_FILE, "house_area_gemini.json"),
+}
+
+
+@dataclass
+class CombinedAnalysisResult:
+    plan_id: str
+    work_dir: Path
+    success: bool
+    message: str
+    fields: dict | None = None
+
+
+def combined_analysis_enabled() -> bool:
+    """Analiza combinată (override cu COMBINED_ANALYSIS=1|0)."""
+    value = os.getenv("COMBINED_ANALYSIS")
+    if value is None:
+        return COMBINED_ANALYSIS
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _wanted_fields(output_root: Path, plan_id: str) -> list[str]:
+    """
+    Câmpurile de cerut: etapa nu e refolosită din index și nu are deja cache-ul.
+    În modurile "local" pereții / amprenta nu cer LLM, deci nu se cer nici aici.
+    """
+    wanted = []
+    for field, (stage, cache_file, final_file) in _FIELDS.items():
+        stage_dir = output_root / stage / plan_id
+        if (stage_dir / cache_file).exists() or reused_result(stage_dir, final_file):
+            continue
+        if field == "walls" and perimeter_mode() == "local":
+            continue
+        if field == "footprint" and area_mode() == "local":
+            continue
+        wanted.append(field)
+    # doar pentru scară nu merită: scara locală din cote rareori are nevoie de LLM
+    return wanted if wanted != ["scale"] else []
+
+
+def _field_payloads(raw: dict) -> dict:
+    """Răspunsul combinat împărțit în formatele cache-urilor fiecărei etape."""
+    size = tuple(raw["image_size_px"])
+    common = {
+        "image_width_px": raw["image_width_px"],
+        "image_height_px": raw["image_height_px"],
+        "image_size_px": raw["image_size_px"],
+        "confidence": raw.get("confidence", "medium"),
+        "verification_notes": raw.get("verification_notes", ""),
+        "source": STAGE_NAME,
+    }
+    return {
+        "scale": {
+            **common,
+            "references": scale_references_in_image(raw, size),
+        },
+        "walls": {
+            **common,
+            "exterior_outline_px": raw.get("exterior_outline_px") or [],
+            "interior_walls_px": raw.get("interior_walls_px") or [],
+            "lengths_px": raw.get("wall_lengths_px") or {},
+            "by_labels_m": raw.get("by_labels_m") or {},
+        },
+        "footprint": {
+            **common,
+            "outline_px": raw.get("footprint_outline_px") or [],
+            "by_labels_m2": raw.get("by_labels_m2"),
+            "labels_found": raw.get("labels_found") or [],
+        },
+    }
+
+
+def _run_for_single_plan(output_root: Path, plan: PlanInfo, wanted: list[str]) -> CombinedAnalysisResult:
+    work_dir = plan.stage_work_dir
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    raw = request_combined_analysis(plan.plan_image)
+    if not raw:
+        return CombinedAnalysisResult(
+            plan_id=plan.plan_id,
+            work_dir=work_dir,
+            success=False,
+            message="fără răspuns → etapele fac apelurile separate",
+        )
+
+    errors = validate_fields(raw, tuple(raw["image_size_px"]))
+    payloads = _field_payloads(raw)
+    fields = {}
+    for field in wanted:
+        if field in errors:
+            fields[field] = f"respins: {errors[field]}"
+            continue
+        stage, cache_file, _ = _FIELDS[field]
+        stage_dir = output_root / stage / plan.plan_id
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        with open(stage_dir / cache_file, "w", encoding="utf-8") as f:
+            json.dump(payloads[field], f, indent=2, ensure_ascii=False)
+        fields[field] = "ok"
+
+    with open(work_dir / RESULT_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "fields": fields,
+            "raw": raw,
+            "meta": {
+                "plan_id": plan.plan_id,
+                "plan_image": str(plan.plan_image),
+                "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+                "stage": STAGE_NAME,
+            },
+        }, f, indent=2, ensure_ascii=False)
+
+    accepted = [k for k, v in fields.items() if v == "ok"]
+    return CombinedAnalysisResult(
+        plan_id=plan.plan_id,
+        work_dir=work_dir,
+        success=bool(accepted),
+        message=f"acceptate: {', '.join(accepted) or '-'}; "
+                + "; ".join(f"{k} {v}" for k, v in fields.items() if v != "ok"),
+        fields=fields,
+    )
+
+
+def run_combined_analysis_for_run(run_id: str, max_parallel: int = COMBINED_MAX_PARALLEL) -> List[CombinedAnalysisResult]:
+    """
+    Punct de intrare pentru analiza combinată. Rulează înainte de scale / prefetch-urile
+    de pixeli (care citesc cache-urile scrise aici); nu face nimic dacă e dezactivată.
+
+    Output-urile se vor regăsi în:
+      new/runner/output/<RUN_ID>/combined_analysis/<plan_id>/combined_analysis.json
+    """
+    if not combined_analysis_enabled():
+        return []
+    try:
+        plans: List[PlanInfo] = load_plan_infos(run_id, stage_name=STAGE_NAME)
+    except PlansListError as e:
+        print(f"❌ [{STAGE_NAME}] {e}")
+        return []
+
+    output_root = get_output_root_for_run(run_id)
+    todo = []
+    for plan in plans:
+        wanted = _wanted_fields(output_root, plan.plan_id)
+        if wanted:
+            todo.append((plan, wanted))
+    if not todo:
+        return []
+
+    print(f"\n🧩 [{STAGE_NAME}] un apel combinat pentru {len(todo)} planuri (RUN_ID={run_id})", flush=True)
+
+    def _run(item: tuple[PlanInfo, list[str]]) -> CombinedAnalysisResult:
+        plan, wanted = item
+        try:
+            return _run_for_single_plan(output_root, plan, wanted)
+        except Exception as e:
+            return CombinedAnalysisResult(plan.plan_id, plan.stage_work_dir, False, f"Eroare: {e}")
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(todo))) as executor:
+        results = list(executor.map(_run, todo))
+
+    for res in results:
+        status = "✅" if res.success else "⚠️"
+        print(f"{status} [{STAGE_NAME}] {res.plan_id} → {res.message}", flush=True)
+    return results
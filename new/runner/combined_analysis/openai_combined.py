@@ -0,0 +1,225 @@
+# new/runner/combined_analysis/openai_combined.py
+from __future__ import annotations
+
+import base64
+import json
+import math
+import os
+from pathlib import Path
+
+from openai import OpenAI
+
+from ..perimeter.gemini_measure import image_size, points_in_image, polygon_area
+from .config import (
+    COMBINED_MODEL,
+    COMBINED_MAX_TOKENS,
+    COMBINED_BOUNDS_TOLERANCE,
+    COMBINED_MIN_REFERENCE_PX,
+)
+
+
+COMBINED_PROMPT = """
+You are analyzing an architectural floor plan (top-down view).
+The image is {width}×{height} pixels. All coordinates and lengths you return are in
+PIXELS of THIS image (origin top-left, x to the right, y down). Do NOT convert to meters.
+
+Do three independent things:
+
+1. SCALE EVIDENCE: find dimension labels (e.g. "12,49", "3,76", "40") or a graphic
+   scale bar. For each one you can read reliably, return the label as written, its
+   real length in METERS and the two end points [x, y] of the segment it measures.
+   Prefer long dimensions (overall building sizes). Empty list if there are none.
+
+2. WALLS:
+   - exterior_outline_px: one closed polygon along the outer face of the exterior walls
+   - interior_walls_px: one polyline per interior wall (walls between rooms), along the wall centre
+   - wall_lengths_px: total lengths in pixels (interior walls, exterior walls, perimeter)
+   - by_labels_m: ONLY if dimension labels allow it, the lengths in METERS derived from
+     the labels (null otherwise)
+
+3. FOOTPRINT:
+   - footprint_outline_px: closed polygon of the built footprint of this level
+     (rooms and walls, without yard / uncovered terraces)
+   - by_labels_m2: total area in m² read from the labels (Gesamtfläche / Wohnfläche /
+     sum of room areas), null if there are no area labels
+   - labels_found: the area labels you used, as written
+
+REMEMBER:
+- Coordinates MUST be inside the image ({width}×{height})
+- Perimeter MUST be ≤ exterior walls length
+- Use empty lists / null for anything you cannot determine; never guess labels
+"""
+
+_POINT = {"type": "array", "items": {"type": "number"}}
+_POLYGON = {"type": "array", "items": _POINT}
+_NUMBER_OR_NULL = {"type": ["number", "null"]}
+
+
+def _object(properties: dict) -> dict:
+    # structured outputs (strict): toate câmpurile obligatorii, fără câmpuri în plus
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+COMBINED_SCHEMA = _object({
+    "image_width_px": {"type": "integer"},
+    "image_height_px": {"type": "integer"},
+    "scale_references": {"type": "array", "items": _object({
+        "label": {"type": "string"},
+        "real_length_meters": {"type": "number"},
+        "p1_px": _POINT,
+        "p2_px": _POINT,
+    })},
+    "exterior_outline_px": _POLYGON,
+    "interior_walls_px": {"type": "array", "items": _POLYGON},
+    "wall_lengths_px": _object({
+        "interior": _NUMBER_OR_NULL,
+        "exterior": _NUMBER_OR_NULL,
+        "perimeter": _NUMBER_OR_NULL,
+    }),
+    "by_labels_m": _object({
+        "interior_meters": _NUMBER_OR_NULL,
+        "exterior_meters": _NUMBER_OR_NULL,
+        "total_perimeter_meters": _NUMBER_OR_NULL,
+        "method_notes": {"type": "string"},
+    }),
+    "footprint_outline_px": _POLYGON,
+    "by_labels_m2": _NUMBER_OR_NULL,
+    "labels_found": {"type": "array", "items": {"type": "string"}},
+    "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+    "verification_notes": {"type": "string"},
+})
+
+
+def request_combined_analysis(plan_image: Path) -> dict | None:
+    """
+    UN singur apel GPT-4o (o singură încărcare a imaginii) pentru dovezile de scară,
+    pereți și amprentă, cu răspuns forțat pe COMBINED_SCHEMA (structured outputs).
+    RETURN: răspunsul brut (+ "image_size_px") sau None dacă API-ul refuză / eșuează.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY lipsește din environment")
+
+    client = OpenAI(api_key=api_key)
+    width, height = image_size(plan_image)
+
+    print(f"       🧩 Analiză combinată (scară + pereți + amprentă) cu {COMBINED_MODEL} ({width}×{height}px)...")
+
+    with open(plan_image, "rb") as f:
+        image_base64 = base64.b64encode(f.read()).decode("utf-8")
+
+    try:
+        response = client.chat.completions.create(
+            model=COMBINED_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert in precise measurements on 2D architectural plans."
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": COMBINED_PROMPT.format(width=width, height=height)},
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": f"data:image/jpeg;base64,{image_base64}", "detail": "high"}
+                        }
+                    ]
+                }
+            ],
+            temperature=0,
+            max_tokens=COMBINED_MAX_TOKENS,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "plan_geometry", "strict": True, "schema": COMBINED_SCHEMA},
+            },
+        )
+    except Exception as e:
+        print(f"       ⚠️  Eroare la apelul OpenAI: {e}")
+        return None
+
+    message = response.choices[0].message
+    if getattr(message, "refusal", None):
+        print(f"       ⚠️  {COMBINED_MODEL} a refuzat analiza: {message.refusal}")
+        return None
+    try:
+        result = json.loads(message.content or "")
+    except json.JSONDecodeError:
+        print(f"       ⚠️  Răspuns invalid (trunchiat?) de la {COMBINED_MODEL}")
+        return None
+    if not isinstance(result, dict):
+        return None
+
+    if not result.get("image_width_px") or not result.get("image_height_px"):
+        result["image_width_px"], result["image_height_px"] = width, height
+    result["image_size_px"] = [width, height]
+    return result
+
+
+# ------------------------------------------------------------
+# Validare pe câmpuri: schema garantează forma JSON-ului, aici se verifică
+# dacă valorile sunt utilizabile. Un câmp invalid nu se folosește, iar etapa
+# lui face apelul ei obișnuit.
+# ------------------------------------------------------------
+
+def _inside(points: list, size: tuple[int, int]) -> bool:
+    tol_x, tol_y = size[0] * COMBINED_BOUNDS_TOLERANCE, size[1] * COMBINED_BOUNDS_TOLERANCE
+    return all(-tol_x <= x <= size[0] + tol_x and -tol_y <= y <= size[1] + tol_y for x, y in points)
+
+
+def _polygon_error(points: list, size: tuple[int, int]) -> str | None:
+    if len(points) < 3:
+        return f"poligon cu {len(points)} vârfuri"
+    if not _inside(points, size):
+        return "coordonate în afara imaginii"
+    if polygon_area(points) < 0.01 * size[0] * size[1]:
+        return "poligon degenerat (arie < 1% din imagine)"
+    return None
+
+
+def scale_references_in_image(raw: dict, size: tuple[int, int]) -> list[dict]:
+    """Referințele de scară utilizabile, cu capetele aduse la pixelii planului și lungimea în px."""
+    sx = size[0] / float(raw.get("image_width_px") or size[0])
+    sy = size[1] / float(raw.get("image_height_px") or size[1])
+    refs = []
+    for ref in raw.get("scale_references") or []:
+        try:
+            p1 = (float(ref["p1_px"][0]) * sx, float(ref["p1_px"][1]) * sy)
+            p2 = (float(ref["p2_px"][0]) * sx, float(ref["p2_px"][1]) * sy)
+            real = float(ref["real_length_meters"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+        length_px = math.dist(p1, p2)
+        if real <= 0 or length_px < COMBINED_MIN_REFERENCE_PX or not _inside([p1, p2], size):
+            continue
+        refs.append({"label": ref.get("label", ""), "real_length_meters": real, "length_px": length_px})
+    return refs
+
+
+def validate_fields(raw: dict, size: tuple[int, int]) -> dict[str, str]:
+    """
+    RETURN: câmp ("scale" | "walls" | "footprint") → motivul respingerii;
+    câmpurile care lipsesc din dict sunt valide.
+    """
+    errors = {}
+
+    if not scale_references_in_image(raw, size):
+        errors["scale"] = "nicio referință de scară utilizabilă"
+
+    outline_error = _polygon_error(points_in_image(raw, "exterior_outline_px", size), size)
+    lengths = raw.get("wall_lengths_px") or {}
+    if outline_error and not (lengths.get("perimeter") or 0) > 0:
+        errors["walls"] = f"contur exterior: {outline_error}"
+    elif not _inside([p for wall in points_in_image(raw, "interior_walls_px", size) for p in wall], size):
+        errors["walls"] = "pereți interiori în afara imaginii"
+
+    footprint_error = _polygon_error(points_in_image(raw, "footprint_outline_px", size), size)
+    if footprint_error and not (raw.get("by_labels_m2") or 0) > 0:
+        errors["footprint"] = f"amprentă: {footprint_error}"
+
+    return errors
@@ -1,6 +1,10 @@
 # new/runner/count_objects/config.py
 from __future__ import annotations
 
+from pathlib import Path
+
+from ..config.settings import RUNNER_ROOT
+
 # Thresholds
 CONF_THRESHOLD = 0.3
 OVERLAP = 30
@@ -16,6 +20,17 @@ DETECTION_OVERLAP_THRESHOLD = 0.4  # 40% overlap între detecții = ignoră
 ROBOFLOW_MAIN_PROJECT = "house-plan-uwkew"
 ROBOFLOW_MAIN_VERSION = 5
 
+# Upload Roboflow (vezi roboflow_upload.py)
+ROBOFLOW_INFER_URL = "https://infer.roboflow.com"    # override: ROBOFLOW_INFER_URL (ex. server local de test)
+ROBOFLOW_DETECT_URL = "https://detect.roboflow.com"  # override: ROBOFLOW_DETECT_URL
+ROBOFLOW_MAX_SIDE = 2048          # latura maximă trimisă; planurile mai mici pleacă neschimbate
+ROBOFLOW_MIN_SCALE = 0.5          # sub această scală nu mai micșorăm, ci împărțim în tile-uri
+ROBOFLOW_TILE_SIZE = 2048         # pixeli (după micșorare)
+ROBOFLOW_TILE_OVERLAP = 256       # ≥ cel mai mare simbol (după micșorare)
+ROBOFLOW_TILE_MERGE_OVERLAP = 0.5 # dubluri între tile-uri (aria intersecției / aria box-ului mai mic)
+ROBOFLOW_JPEG_QUALITY = 90
+ROBOFLOW_UPLOAD_WORKERS = 4       # tile-uri trimise simultan
+
 # Scări - MODEL STANDARD
 ROBOFLOW_STAIRS_PROJECT = "stairs-czdvt"
 ROBOFLOW_STAIRS_VERSION = 2
@@ -51,8 +66,52 @@ COLORS = {
 SCALES = [0.9, 1.0, 1.1]
 ROTATION_ANGLES = [0, 45, 90, 135, 180, 225, 270, 315]
 
+# Template-uri extrase în memorie din detections.json (vezi template_extraction.py)
+TEMPLATE_EXPORT_DEBUG = False  # scrie și PNG-urile pe disc; override: COUNT_OBJECTS_EXPORT_TEMPLATES=1
+
+# Template bank compilat (vezi template_bank.py)
+MATCH_BOUND_GRID = 8         # blocuri (grilă G×G) pentru limita superioară a corelației la scalele ≠ 1.0
+MATCH_BOUND_MARGIN = 1e-3    # marjă peste limită (erorile float ale matchTemplate)
+
+# Bibliotecă persistentă de template-uri între run-uri (vezi template_library.py)
+TEMPLATE_LIBRARY_ENABLED = True  # override: COUNT_OBJECTS_TEMPLATE_LIBRARY=0
+LIBRARY_PATH = RUNNER_ROOT / "cache" / "template_library" / "library_v1.npz"
+LIBRARY_SUPPLEMENT_BELOW = 3     # tipurile cu mai puține detecții în plan primesc și template-uri din bibliotecă
+LIBRARY_TEMPLATES_PER_TYPE = 16  # intrări (cele mai bune după scor) compilate în bank-ul unui tip
+LIBRARY_MAX_PER_TYPE = 200       # intrări păstrate per tip (restul ies după scor)
+LIBRARY_MATCH_COS = 0.98         # descriptor peste prag = aceeași intrare (doar se actualizează contoarele)
+LIBRARY_MAX_AGE_DAYS = 180       # intrări nevăzute de atâta timp sunt eliminate
+# Ce învață biblioteca: doar verdicte independente de ea (altfel se auto-confirmă)
+LIBRARY_MIN_CONFIRM_CONF = 0.7   # confirmări template cu încredere Roboflow ≥ prag (nu rotație / gate / Gemini)
+LIBRARY_REJECT_SOURCES = ("gemini",)  # respingerile care penalizează intrări (rotația / gate-ul folosesc biblioteca)
+LIBRARY_JOURNAL_MAX = 200        # actualizări doar de contoare ținute în jurnal până la rescrierea .npz
+
+# Verificare Gemini (vezi gemini_verification.py)
+GEMINI_VERIFY_MODEL = "gemini-2.0-flash-exp"
+GEMINI_BATCH_SIZE = 8    # candidați per cerere (o listă numerotată de imagini → listă DA/NU)
+
+# Verificator local invariant la rotație (vezi rotation_verifier.py)
+ROTATION_VERIFIER_ENABLED = False  # override: COUNT_OBJECTS_ROTATION_VERIFIER=1
+ROTVERIFY_ACCEPT = 0.90  # similaritate descriptor peste prag → confirmat local
+ROTVERIFY_REJECT = 0.30  # sub prag → respins local; între praguri → gate / Gemini
+ROTVERIFY_SELF_OVERLAP = 0.5  # template decupat din box-ul candidatului (suprapunere reciprocă) → exclus
+
+# Gate local pentru banda Gemini (vezi gemini_gate.py)
+GATE_LOG_PATH = RUNNER_ROOT / "cache" / "gemini_gate" / "decisions.jsonl"   # override: COUNT_OBJECTS_GATE_LOG ("0" = off)
+GATE_LOG_MAX_BYTES = 20 * 1024 * 1024  # peste limită logul e rotit (decisions.jsonl.1, .2, ...)
+GATE_LOG_BACKUPS = 5                   # loguri rotite păstrate (cele mai vechi sunt șterse)
+GATE_MODEL_PATH = Path(__file__).resolve().parent / "models" / "gemini_gate.json"
+GATE_ACCEPT_PROB = 0.95  # p(DA) peste prag → acceptat local (precizia contează mai mult)
+GATE_REJECT_PROB = 0.05  # p(DA) sub prag → respins local; între praguri → Gemini
+
 # Paralelizare
-MAX_GEMINI_WORKERS = 5
-MAX_TEMPLATE_WORKERS = 16
-MAX_DETECTION_WORKERS = 8
-MAX_TYPE_WORKERS = 4
\ No newline at end of file
+MAX_GEMINI_WORKERS = 5   # cereri (batch-uri) Gemini simultane
+MAX_TYPE_WORKERS = 4     # thread-uri de coordonare per plan (nu fac muncă CPU)
+
+# Executor CPU comun (vezi executor.py) – tot template matching-ul rulează aici
+CPU_WORKERS = 0          # 0 = os.cpu_count(); override: COUNT_OBJECTS_CPU_WORKERS
+OPENCV_NUM_THREADS = 1   # paralelizăm la nivel de task; override: COUNT_OBJECTS_OPENCV_THREADS
+
+# Indexul spațial al detecțiilor (vezi detection_index.py), comun etapelor din aval
+DETECTION_INDEX_MAX_PLANS = 16   # planuri ținute în memorie (LRU)
+OPENING_MATCH_TOLERANCE_PX = 15  # același obiect în două fișiere: fiecare coordonată la < prag
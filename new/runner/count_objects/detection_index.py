@@ -0,0 +1,207 @@
+# new/runner/count_objects/detection_index.py
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .config import DETECTION_INDEX_MAX_PLANS, OPENING_MATCH_TOLERANCE_PX
+from .spatial_index import Box, BoxIndex, overlap_ratio
+
+# detections_all.json (ieșirea count_objects) încărcat O SINGURĂ DATĂ per plan și
+# indexat pe grilă (BoxIndex), comun etapelor din aval (measure_objects,
+# exterior_doors, area):
+#   - tipul standard, statusul și box-ul fiecărei detecții sunt normalizate aici
+#   - interogări fără scanare liniară: suprapunere, potrivire cu toleranță,
+#     distanța până la o mască (pereți / exterior), apartenența la camere
+#   - flag-ul exterior (din exterior_doors.json) se atașează pe detecții
+# Registrul e per proces (ca plan_geometry): aceeași cale + semnătură = același obiect.
+
+KINDS = ("door", "double_door", "window", "double_window", "stairs")
+
+
+def standard_kind(obj_type: str) -> str | None:
+    """Tipul brut din detecții → door | double_door | window | double_window | stairs."""
+    t = (obj_type or "").lower().replace("-", "_")
+    if "stair" in t:
+        return "stairs"
+    if "door" in t:
+        return "double_door" if "double" in t else "door"
+    if "window" in t:
+        return "double_window" if "double" in t else "window"
+    return None
+
+
+@dataclass
+class Detection:
+    idx: int                     # poziția în detections_all.json
+    type: str                    # tipul brut (lowercase)
+    kind: str | None             # tipul standard (standard_kind)
+    status: str
+    box: Box
+    exterior: bool | None = None  # doar uși, după attach_exterior()
+
+    @property
+    def width_px(self) -> int:
+        return abs(self.box[2] - self.box[0])
+
+    @property
+    def height_px(self) -> int:
+        return abs(self.box[3] - self.box[1])
+
+
+def _signature(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+class PlanDetections:
+    """Detecțiile acceptate (fără "rejected") ale unui plan, cu index spațial."""
+
+    def __init__(self, raw: list[dict], signature: tuple[int, int] | None = None) -> None:
+        self.signature = signature
+        self.items: list[Detection] = []
+        self.rejected = 0
+        self._index = BoxIndex()
+        self._by_kind: dict[str, list[Detection]] = {k: [] for k in KINDS}
+
+        for i, det in enumerate(raw):
+            status = str(det.get("status", "")).lower()
+            if status == "rejected":
+                self.rejected += 1
+                continue
+            try:
+                box = (int(det["x1"]), int(det["y1"]), int(det["x2"]), int(det["y2"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            typ = str(det.get("type", "")).lower()
+            d = Detection(idx=i, type=typ, kind=standard_kind(typ), status=status, box=box)
+            # indicii din BoxIndex = poziția în self.items
+            self._index.insert(box, typ)
+            self.items.append(d)
+            if d.kind:
+                self._by_kind[d.kind].append(d)
+
+    @classmethod
+    def from_json(cls, path: Path) -> "PlanDetections":
+        path = Path(path)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), _signature(path))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def of_kind(self, *kinds: str) -> list[Detection]:
+        """Detecțiile de tipurile date, în ordinea din fișier."""
+        if len(kinds) == 1:
+            return list(self._by_kind.get(kinds[0], ()))
+        wanted = set(kinds)
+        return [d for d in self.items if d.kind in wanted]
+
+    # ------------------------------------------------------------------
+    # Interogări spațiale
+    # ------------------------------------------------------------------
+
+    def overlapping(self, box: Box, min_ratio: float = 0.0, kinds: tuple[str, ...] | None = None) -> list[tuple[Detection, float]]:
+        """Detecțiile cu overlap_ratio(box, detecție) > min_ratio, descrescător după ratio."""
+        found = []
+        for i in self._index.candidates(box):
+            d = self.items[i]
+            if kinds and d.kind not in kinds:
+                continue
+            r = overlap_ratio(box, d.box)
+            if r > min_ratio:
+                found.append((d, r))
+        return sorted(found, key=lambda t: -t[1])
+
+    def matching(self, box: Box, tolerance: int = OPENING_MATCH_TOLERANCE_PX) -> list[Detection]:
+        """Detecțiile cu fiecare coordonată la < tolerance px de box (același obiect)."""
+        x1, y1, x2, y2 = box
+        search = (x1 - tolerance, y1 - tolerance, x2 + tolerance, y2 + tolerance)
+        return [
+            self.items[i] for i in self._index.candidates(search)
+            if all(abs(a - b) < tolerance for a, b in zip(self.items[i].box, box))
+        ]
+
+    def attach_exterior(self, exterior_doors: list[dict], tolerance: int = OPENING_MATCH_TOLERANCE_PX) -> int:
+        """
+        Flag-ul exterior din exterior_doors.json pe ușile din index: fiecare ușă ia
+        statusul primei intrări care se potrivește (toleranță ±tolerance px).
+        RETURN: numărul de uși cu status.
+        """
+        doors = self.of_kind("door", "double_door")
+        for d in doors:
+            d.exterior = None
+        for entry in exterior_doors:
+            box = tuple(int(v) for v in entry["bbox"])
+            for d in self.matching(box, tolerance):
+                if d.exterior is None and d.kind in ("door", "double_door"):
+                    d.exterior = entry.get("status") == "exterior"
+        return sum(1 for d in doors if d.exterior is not None)
+
+    def mask_distances(self, dist_map: np.ndarray, detections: list[Detection] | None = None) -> dict[int, float]:
+        """
+        Distanța minimă de la fiecare box la masca din care s-a calculat dist_map
+        (cv2.distanceTransform pe negativul măștii: pereți, exterior...), un lookup
+        per detecție. Box în afara imaginii → inf.
+        RETURN: Detection.idx → distanță (px).
+        """
+        H, W = dist_map.shape[:2]
+        out = {}
+        for d in self.items if detections is None else detections:
+            x1, y1, x2, y2 = d.box
+            x1, x2 = max(0, min(x1, W - 1)), max(0, min(x2, W - 1))
+            y1, y2 = max(0, min(y1, H - 1)), max(0, min(y2, H - 1))
+            out[d.idx] = float(dist_map[y1:y2, x1:x2].min()) if x2 > x1 and y2 > y1 else float("inf")
+        return out
+
+    def room_membership(self, rooms: np.ndarray, margin: int = 0) -> dict[int, dict[str, int]]:
+        """
+        rooms: raster cu id-ul camerei per pixel (0 = în afara camerelor).
+        O detecție aparține fiecărei camere atinse de box-ul ei lărgit cu margin
+        (o ușă stă în perete, deci atinge ambele camere pe care le leagă).
+        RETURN: id cameră → {tip standard: număr}.
+        """
+        H, W = rooms.shape[:2]
+        out: dict[int, dict[str, int]] = {}
+        for d in self.items:
+            if not d.kind:
+                continue
+            x1, y1, x2, y2 = d.box
+            patch = rooms[max(0, y1 - margin):min(H, y2 + margin), max(0, x1 - margin):min(W, x2 + margin)]
+            for room_id in np.unique(patch):
+                if room_id:
+                    counts = out.setdefault(int(room_id), {})
+                    counts[d.kind] = counts.get(d.kind, 0) + 1
+        return out
+
+
+_REGISTRY: "OrderedDict[Path, PlanDetections]" = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def plan_detections(detections_all_json: Path) -> PlanDetections:
+    """Indexul comun pentru detections_all.json (construit la prima cerere)."""
+    path = Path(detections_all_json).resolve()
+    signature = _signature(path)
+    with _registry_lock:
+        index = _REGISTRY.get(path)
+        if index is not None and index.signature == signature:
+            _REGISTRY.move_to_end(path)
+            return index
+    index = PlanDetections.from_json(path)
+    with _registry_lock:
+        _REGISTRY[path] = index
+        while len(_REGISTRY) > DETECTION_INDEX_MAX_PLANS:
+            _REGISTRY.popitem(last=False)
+    return index
+
+
+def clear_plan_detections() -> None:
+    """Golește registrul (ex. între run-uri)."""
+    with _registry_lock:
+        _REGISTRY.clear()
@@ -7,7 +7,7 @@ import shutil
 import cv2
 from pathlib import Path
 from typing import Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
 from .config import (
     CONF_THRESHOLD,
@@ -17,12 +17,23 @@ from .config import (
     GEMINI_THRESHOLD_MAX,
     ROBOFLOW_MAIN_PROJECT,
     ROBOFLOW_MAIN_VERSION,
-    MAX_TYPE_WORKERS
+    MAX_TYPE_WORKERS,
+    DETECTION_OVERLAP_THRESHOLD,
+    LIBRARY_MIN_CONFIRM_CONF,
+    LIBRARY_REJECT_SOURCES,
 )
+from ..plan_geometry import plan_geometry
 from .roboflow_api import infer_roboflow
-from .preprocessing import load_templates
+from .template_bank import TemplateBank, decision_for
+from .template_extraction import TYPE_FOLDERS, banks_from_detections, png_gray
+from .template_library import get_library, update_library
+from .prefilter import PrefilterPlan, build_prefilter_plan, next_wave
+from .executor import submit_cpu
+from .spatial_index import BoxIndex
 from .template_matching import process_detections_parallel
 from .gemini_verification import verify_candidates_parallel
+from .gemini_gate import decision_record, gate_verdict, load_gate_model, log_decisions
+from .rotation_verifier import rotation_verifier_enabled, verifier_for_bank
 from .stairs_detection import process_stairs
 from .visualization import draw_results, export_to_json
 
@@ -61,30 +72,8 @@ def _fetch_roboflow_data(plan_image: Path, roboflow_config: dict):
     return stairs_result, main_result
 
 
-def _process_object_type(
-    label: str,
-    folder: Path,
-    preds_filtered: list,
-    gray_image,
-    img_width: int,
-    img_height: int,
-    used_boxes: list,
-    temp_dir: Path,
-    has_stairs: bool = False
-) -> dict:
-    """Procesează un tip de obiect (door/window/etc) complet."""
-    print(f"\n       {'='*50}")
-    print(f"       {label.upper()}")
-    print(f"       {'='*50}")
-    
-    templates = load_templates(folder)
-    if not templates:
-        print(f"       [WARN] No templates for {label}")
-        return {"confirm": [], "oblique": [], "reject": []}
-    
-    print(f"       Loaded {len(templates)} template variations")
-    
-    # Filtrează predicții relevante
+def _relevant_predictions(label: str, preds_filtered: list) -> list:
+    """Predicțiile Roboflow care aparțin tipului label."""
     relevant = []
     for p in preds_filtered:
         cls = _norm_class(str(p.get("class", "")))
@@ -96,115 +85,350 @@ def _process_object_type(
             relevant.append(p)
         elif label == "double-window" and ("double" in cls and "window" in cls):
             relevant.append(p)
+    return relevant
+
+
+def _match_prefiltered(
+    plan: PrefilterPlan,
+    banks: dict[str, TemplateBank],
+    gray_image,
+    img_width: int,
+    img_height: int,
+    executor: ThreadPoolExecutor
+) -> list[dict]:
+    """
+    Template matching în valuri, doar pe candidații rămași după pre-filtrare.
+    Un candidat al cărui suprimator (anterior în ordinea de commit) e confirmat
+    de template nu mai e potrivit – commit-ul l-ar fi sărit oricum.
+    """
+    decided: dict[int, bool] = {}
+    processed: list[dict] = []
+    n_waves = n_pruned = 0
     
-    print(f"       Found {len(relevant)} relevant predictions")
-    
-    if not relevant:
-        return {"confirm": [], "oblique": [], "reject": []}
-    
-    # Procesare PARALELĂ a tuturor detecțiilor
-    print(f"       🔄 Template matching (parallel)...")
-    t0 = time.time()
-    
-    processed = process_detections_parallel(
-        relevant,
-        gray_image,
-        templates,
-        used_boxes,
-        img_width,
-        img_height,
-        has_stairs=has_stairs
-    )
-    
-    print(f"       ✅ Template matching done in {time.time()-t0:.2f}s")
-    
-    # Clasificare rezultate
-    results = {"confirm": [], "oblique": [], "reject": []}
-    candidates_for_gemini = []
+    while len(decided) < len(plan.entries):
+        wave, suppressed = next_wave(plan, decided)
+        for pos in suppressed:
+            decided[pos] = False
+            e = plan.entries[pos]
+            processed.append({
+                "idx": e.idx, "label": e.label, "bbox": e.bbox, "conf": e.conf,
+                "best_sim": 0.0, "combined": 0.0,
+                "skip": True, "skip_reason": "prefilter_overlap"
+            })
+        n_pruned += len(suppressed)
+        if not wave:
+            continue
+        n_waves += 1
+        
+        by_label: dict[str, list[int]] = {}
+        for pos in wave:
+            by_label.setdefault(plan.entries[pos].label, []).append(pos)
+        
+        futures = {
+            label: executor.submit(
+                process_detections_parallel,
+                [plan.entries[pos].pred for pos in positions],
+                gray_image, banks[label], img_width, img_height
+            )
+            for label, positions in by_label.items()
+        }
+        for label, positions in by_label.items():
+            try:
+                results = futures[label].result()
+            except Exception as e:
+                print(f"       [ERR] Template matching {label}: {e}")
+                results = []
+            # rezultatele vin în ordinea listei trimise (idx 1..n)
+            for res in results:
+                pos = positions[res["idx"] - 1]
+                res["idx"] = plan.entries[pos].idx
+                res["label"] = label
+                decided[pos] = not res["skip"] and decision_for(res["conf"], res["best_sim"]) == "confirm"
+                processed.append(res)
+
+        # detecțiile fără rezultat (eroare la matching) sunt decise ca skip,
+        # altfel ar reintra în fiecare val următor
+        for pos in wave:
+            if pos in decided:
+                continue
+            decided[pos] = False
+            e = plan.entries[pos]
+            processed.append({
+                "idx": e.idx, "label": e.label, "bbox": e.bbox, "conf": e.conf,
+                "best_sim": 0.0, "combined": 0.0,
+                "skip": True, "skip_reason": "error"
+            })
+
+    matched = len(plan.entries) - n_pruned
+    stats = plan.stats()
+    print(f"       [PREFILTER] {stats['candidates']} candidați → {matched} la template matching "
+          f"(scară: -{stats['stairs_suppressed']}, overlap: -{n_pruned}, valuri: {n_waves})")
+    return processed
+
+
+def _commit_order(entries: list[dict], type_rank: dict[str, int]) -> list[dict]:
+    """Ordinea deterministă de commit: confidence desc, apoi tipul (EXPORTS), apoi idx."""
+    return sorted(entries, key=lambda r: (-r["conf"], type_rank[r["label"]], r["idx"]))
+
+
+def _commit_template_phase(
+    processed: list[dict],
+    type_rank: dict[str, int],
+    accepted: BoxIndex,
+    gray_image,
+    all_results: dict,
+    plan_name: str = ""
+) -> dict[str, list[dict]]:
+    """
+    Runda 1 de commit (secvențială, ordonată după confidence):
+      - skip dacă se suprapune cu un box deja acceptat
+      - confirmările din template intră imediat în index
+      - candidații Gemini doar se verifică (intră în index în runda 2)
+    Returnează candidații Gemini grupați pe tip. Deciziile din scor sunt logate
+    (gemini_gate) pentru antrenarea gate-ului local.
+    """
+    candidates: dict[str, list[dict]] = {label: [] for label in type_rank}
+    records = []
     
-    for res in processed:
-        if res["skip"]:
-            skip_reason = res.get("skip_reason", "unknown")
-            print(f"       #{res['idx']} skip → {skip_reason}")
+    for res in _commit_order([r for r in processed if not r["skip"]], type_rank):
+        label = res["label"]
+        tag = f"{label} #{res['idx']}"
+        
+        ratio, _ = accepted.max_overlap(res["bbox"])
+        if ratio > DETECTION_OVERLAP_THRESHOLD:
+            print(f"       {tag} skip → detection_overlap_{ratio:.2f}")
             continue
         
-        print(f"       #{res['idx']} conf={res['conf']:.2f}, sim={res['best_sim']:.3f}, combined={res['combined']:.3f}")
+        print(f"       {tag} conf={res['conf']:.2f}, sim={res['best_sim']:.3f}, combined={res['combined']:.3f}")
         
         if res["combined"] >= GEMINI_THRESHOLD_MAX and res["best_sim"] > TEMPLATE_SIMILARITY:
-            results["confirm"].append(res["bbox"])
-            used_boxes.append(res["bbox"])
+            accepted.insert(res["bbox"], label)
+            all_results[label]["confirm"].append(res["bbox"])
+            records.append(decision_record(
+                label, res["conf"], res["best_sim"], res["bbox"], "template", "confirm",
+                plan=plan_name, sim_exact=res.get("sim_exact", True),
+            ))
             print(f"       ✅ CONFIRMED (template)")
         
         elif res["combined"] < GEMINI_THRESHOLD_MIN:
-            results["reject"].append(res["bbox"])
+            all_results[label]["reject"].append(res["bbox"])
+            records.append(decision_record(
+                label, res["conf"], res["best_sim"], res["bbox"], "template", "reject",
+                plan=plan_name, sim_exact=res.get("sim_exact", True),
+            ))
             print(f"       ❌ REJECTED (low score)")
         
         else:
-            # Salvează crop pentru Gemini
+            # Crop-ul pentru Gemini rămâne în memorie (encodat direct în cerere)
             x1, y1, x2, y2 = res["bbox"]
-            crop = gray_image[y1:y2, x1:x2]
-            tmp_path = temp_dir / f"maybe_{label}_{res['idx']}.jpg"
-            cv2.imwrite(str(tmp_path), crop)
-            
-            candidates_for_gemini.append({
+            candidates[label].append({
                 "idx": res["idx"],
                 "bbox": res["bbox"],
-                "tmp_path": tmp_path,
+                "conf": res["conf"],
+                "sim": res["best_sim"],
+                "crop": gray_image[y1:y2, x1:x2].copy(),
                 "label": label
             })
             print(f"       🔍 → Gemini verification")
     
-    # Verificare Gemini PARALELIZAT
-    if candidates_for_gemini:
-        print(f"\n       🧠 Gemini verification ({len(candidates_for_gemini)} candidates)...")
+    for res in processed:
+        if res["skip"]:
+            print(f"       {res['label']} #{res['idx']} skip → {res.get('skip_reason', 'unknown')}")
+    
+    log_decisions(records)
+    return candidates
+
+
+def _verify_object_type(
+    label: str,
+    bank: TemplateBank,
+    candidates: list[dict],
+    plan_name: str = ""
+) -> dict:
+    """
+    Verificare pentru candidații unui tip, în ordine:
+      1) verificatorul local invariant la rotație (dacă e activat)
+      2) gate-ul local învățat
+      3) Gemini – doar pentru cazurile rămase nesigure
+    RETURN: {idx: bool}.
+    """
+    if not candidates:
+        return {}
+    
+    verifier = verifier_for_bank(bank) if rotation_verifier_enabled() else None
+    gate = load_gate_model()
+    verdicts: dict = {}
+    records = []
+    to_gemini = []
+    n_rotation = 0
+    for cand in candidates:
+        if verifier is not None and len(verifier):
+            verdict, rot_sim = verifier.verdict(cand["crop"], exclude_box=cand["bbox"])
+            if verdict is not None:
+                verdicts[cand["idx"]] = verdict
+                cand["verified_by"] = "rotation"
+                n_rotation += 1
+                records.append(decision_record(
+                    label, cand["conf"], cand["sim"], cand["bbox"], "rotation",
+                    "confirm" if verdict else "reject", plan=plan_name
+                ))
+                print(f"       {label} #{cand['idx']} rotation verifier: sim={rot_sim:.3f} → {'DA' if verdict else 'NU'}")
+                continue
         
-        try:
-            sample_template = next(folder.glob("*.png"))
-        except StopIteration:
-            print(f"       [WARN] No templates for Gemini verification")
-            for cand in candidates_for_gemini:
-                results["reject"].append(cand["bbox"])
-            return results
+        rec = decision_record(label, cand["conf"], cand["sim"], cand["bbox"], "gate", "", plan=plan_name)
+        verdict, p = gate_verdict(gate, rec)
+        if verdict is None:
+            to_gemini.append((cand, rec, p))
+            continue
+        verdicts[cand["idx"]] = verdict
+        cand["verified_by"] = "gate"
+        rec.update(decision="confirm" if verdict else "reject", gate_p=round(p, 4))
+        records.append(rec)
+    
+    if verifier is not None or gate is not None:
+        print(f"       [LOCAL] {label}: {n_rotation} rotație, "
+              f"{len(candidates) - n_rotation - len(to_gemini)} gate, {len(to_gemini)} → Gemini")
+    
+    if to_gemini:
+        sample_template = bank.sample_image()
+        if sample_template is None:
+            print(f"       [WARN] No templates for Gemini verification ({label})")
+            log_decisions(records)
+            return verdicts
         
+        print(f"\n       🧠 {label}: Gemini verification ({len(to_gemini)} candidates)...")
         t0 = time.time()
-        gemini_results = verify_candidates_parallel(
-            candidates_for_gemini,
-            sample_template,
-            temp_dir
-        )
-        print(f"       ✅ Gemini done in {time.time()-t0:.2f}s")
+        gemini = verify_candidates_parallel([c for c, _, _ in to_gemini], sample_template)
+        print(f"       ✅ {label}: Gemini done in {time.time()-t0:.2f}s")
+        
+        for cand, rec, p in to_gemini:
+            ok = bool(gemini.get(cand["idx"], False))
+            verdicts[cand["idx"]] = ok
+            cand["verified_by"] = "gemini"
+            rec.update(stage="gemini", decision="confirm" if ok else "reject", gemini=ok,
+                       gate_p=None if p is None else round(p, 4))
+            records.append(rec)
+    
+    log_decisions(records)
+    return verdicts
+
+
+def _commit_gemini_phase(
+    candidates: dict[str, list[dict]],
+    verdicts: dict[str, dict],
+    type_rank: dict[str, int],
+    accepted: BoxIndex,
+    all_results: dict
+) -> None:
+    """Runda 2 de commit: confirmările Gemini, în aceeași ordine deterministă."""
+    flat = [c for label in candidates for c in candidates[label]]
+    for cand in _commit_order(flat, type_rank):
+        label = cand["label"]
+        tag = f"{label} #{cand['idx']}"
         
-        for cand in candidates_for_gemini:
-            is_valid = gemini_results.get(cand["idx"], False)
-            if is_valid:
-                results["oblique"].append(cand["bbox"])
-                used_boxes.append(cand["bbox"])
-                print(f"       #{cand['idx']} 🔄 GEMINI CONFIRMED")
-            else:
-                results["reject"].append(cand["bbox"])
-                print(f"       #{cand['idx']} ❌ REJECTED (Gemini)")
+        if not verdicts.get(label, {}).get(cand["idx"], False):
+            all_results[label]["reject"].append(cand["bbox"])
+            print(f"       {tag} ❌ REJECTED (Gemini)")
+            continue
+        
+        ok, ratio = accepted.try_insert(cand["bbox"], DETECTION_OVERLAP_THRESHOLD, label)
+        if ok:
+            all_results[label]["oblique"].append(cand["bbox"])
+            print(f"       {tag} 🔄 GEMINI CONFIRMED")
+        else:
+            print(f"       {tag} skip → detection_overlap_{ratio:.2f}")
+
+
+def _update_template_library(
+    plan_bgr,
+    processed: list[dict],
+    all_results: dict,
+    candidates: dict[str, list[dict]],
+    verdicts: dict[str, dict],
+    plan_name: str = ""
+) -> None:
+    """
+    Rezultatele verificării → biblioteca persistentă de template-uri, doar din
+    verdicte independente de bibliotecă (altfel intrările s-ar auto-confirma):
+      - confirmările template cu încredere Roboflow ≥ LIBRARY_MIN_CONFIRM_CONF devin /
+        întăresc intrări (nu cele din rotație / gate / Gemini, din banda nesigură)
+      - candidații respinși de LIBRARY_REJECT_SOURCES penalizează intrările care le seamănă
+    Crop-urile sunt pregătite ca în template_extraction (png_gray + equalizeHist).
+    Erorile nu afectează rezultatul detecției.
+    """
+    def crops(bboxes):
+        out = []
+        for x1, y1, x2, y2 in bboxes:
+            crop = plan_bgr[y1:y2, x1:x2]
+            if crop.size:
+                out.append(cv2.equalizeHist(png_gray(crop)))
+        return out
+    
+    conf_by_box = {(r["label"], tuple(r["bbox"])): r["conf"] for r in processed if not r["skip"]}
+    try:
+        outcomes = {}
+        for label, res in all_results.items():
+            confirmed = [b for b in res["confirm"]
+                         if conf_by_box.get((label, tuple(b)), 0.0) >= LIBRARY_MIN_CONFIRM_CONF]
+            rejected = [c["bbox"] for c in candidates.get(label, [])
+                        if not verdicts.get(label, {}).get(c["idx"], False)
+                        and c.get("verified_by") in LIBRARY_REJECT_SOURCES]
+            outcomes[label] = {
+                "confirmed": crops(confirmed),
+                "rejected": crops(rejected),
+            }
+        stats = update_library(outcomes, source=plan_name)
+        if stats:
+            print(f"       [LIBRARY] actualizată: {stats}")
+    except Exception as e:
+        print(f"       [LIBRARY] Nu pot actualiza biblioteca de template-uri: {e}")
+
+
+def _load_banks(
+    plan_image: Path,
+    plan_bgr,
+    detections_json: Path | None,
+    exports_dir: Path | None
+) -> dict[str, TemplateBank]:
+    """
+    Template-urile per tip: extrase în memorie din detections.json (implicit) sau,
+    pentru rulări vechi fără detections.json, din folderul de exporturi.
+    """
+    if detections_json is not None and detections_json.exists():
+        print(f"       [TEMPLATES] Extracție în memorie din {detections_json.name}")
+        library = get_library()
+        return submit_cpu(banks_from_detections, plan_image, detections_json, plan_bgr, None, library).result()
+    
+    if exports_dir is not None and exports_dir.exists():
+        print(f"       [TEMPLATES] Folder exporturi (legacy): {exports_dir}")
+        futures = {label: submit_cpu(TemplateBank.from_folder, exports_dir / folder)
+                   for label, folder in TYPE_FOLDERS.items()}
+        return {label: f.result() for label, f in futures.items()}
     
-    return results
+    raise FileNotFoundError("Lipsesc atât detections.json cât și exports_dir pentru template-uri")
 
 
 def run_hybrid_detection(
     plan_image: Path,
-    exports_dir: Path,
+    exports_dir: Path | None,
     output_dir: Path,
     roboflow_config: dict,
     total_plans: int = 1,
+    detections_json: Path | None = None,
 ) -> Tuple[bool, str]:
     """
     Rulează detecția hybrid cu PARALELIZARE MAXIMĂ + excludere zone scări.
+    
+    Template-urile vin din detections_json (extrase în memorie); exports_dir e
+    folosit doar ca fallback pentru rulări fără detections.json.
     """
     output_dir.mkdir(parents=True, exist_ok=True)
-    temp_dir = output_dir / "temp"
     
+    # crop-urile pentru Gemini nu mai trec prin disc; curățăm doar temp-ul rulărilor vechi
+    temp_dir = output_dir / "temp"
     if temp_dir.exists():
         shutil.rmtree(temp_dir)
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    
-    print(f"       [CLEANUP] Temp folder ready: {temp_dir}")
+        print(f"       [CLEANUP] Removed stale temp folder: {temp_dir}")
     
     try:
         # ==========================================
@@ -246,26 +470,22 @@ def run_hybrid_detection(
         # ==========================================
         # STEP 2: PREPROCESARE IMAGINE
         # ==========================================
-        img = cv2.imread(str(plan_image))
-        if img is None:
+        # decodare + gri egalizat comune cu celelalte etape (plan_geometry)
+        geometry = plan_geometry(plan_image)
+        try:
+            img = geometry.bgr
+        except ValueError:
             return False, f"Cannot read image: {plan_image}"
         
-        gray = cv2.equalizeHist(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+        gray = geometry.gray_eq
         img_height, img_width = img.shape[:2]
         
-        EXPORTS = {
-            "door": exports_dir / "door",
-            "double-door": exports_dir / "double_door",
-            "window": exports_dir / "window",
-            "double-window": exports_dir / "double_window"
-        }
+        banks = _load_banks(plan_image, img, detections_json, exports_dir)
         
         # ==========================================
-        # IMPORTANT: Marchează zona scării ca ocupată
+        # IMPORTANT: Zona scării e exclusă (verificare statică, mai strictă)
         # ==========================================
-        used_boxes = []
-        has_stairs = False
-        
+        stairs_box = None
         if stairs_bbox:
             stairs_box = (
                 stairs_bbox["x1"],
@@ -273,43 +493,59 @@ def run_hybrid_detection(
                 stairs_bbox["x2"],
                 stairs_bbox["y2"]
             )
-            used_boxes.append(stairs_box)
-            has_stairs = True
             print(f"       [STAIRS] Zona scării marcată ca exclusă: {stairs_box}")
         
         # ==========================================
-        # STEP 3: PROCESARE TIPURI OBIECTE - PARALEL
+        # STEP 3: PROCESARE TIPURI OBIECTE
+        #   a) pre-filtrare vectorizată (scară, NMS amânat) + template matching
+        #      PARALEL în valuri (fără stare comună)
+        #   b) commit determinist ordonat după confidence (BoxIndex)
+        #   c) Gemini – PARALEL pe tipuri
+        #   d) commit determinist al confirmărilor Gemini
+        # Aceleași intrări → aceleași numărători, indiferent de nr. de workers.
         # ==========================================
-        print(f"\n       [STEP] Processing object types (parallel: {len(EXPORTS)} types)...")
+        print(f"\n       [STEP] Processing object types (parallel: {len(banks)} types)...")
         t0 = time.time()
         
-        all_results = {}
+        type_rank = {label: i for i, label in enumerate(banks)}
+        all_results = {label: {"confirm": [], "oblique": [], "reject": []} for label in banks}
+        accepted = BoxIndex()
         
-        def process_type(label_folder_pair):
-            """Helper pentru procesare paralelă."""
-            label, folder = label_folder_pair
-            return label, _process_object_type(
-                label,
-                folder,
-                preds_filtered,
-                gray,
-                img_width,
-                img_height,
-                used_boxes,
-                temp_dir,
-                has_stairs=has_stairs
+        # Thread-urile de aici doar coordonează (așteaptă template matching / Gemini);
+        # munca CPU merge în executorul comun.
+        with ThreadPoolExecutor(max_workers=MAX_TYPE_WORKERS, thread_name_prefix="count_objects_type") as executor:
+            relevant_by_label = {}
+            for label, bank in banks.items():
+                if not bank.n_unique:
+                    print(f"       [WARN] No templates for {label}")
+                    relevant_by_label[label] = []
+                    continue
+                relevant_by_label[label] = _relevant_predictions(label, preds_filtered)
+                print(f"       {label}: {bank.n_unique} unique templates (din {bank.n_source}), "
+                      f"{len(relevant_by_label[label])} relevant predictions")
+            
+            plan = build_prefilter_plan(relevant_by_label, img_width, img_height, stairs_box)
+            processed = [
+                {"idx": e.idx, "label": e.label, "bbox": e.bbox, "conf": e.conf,
+                 "best_sim": 0.0, "combined": 0.0,
+                 "skip": True, "skip_reason": f"stairs_overlap_{ratio:.2f}"}
+                for e, ratio in plan.stairs_skipped
+            ]
+            processed += _match_prefiltered(plan, banks, gray, img_width, img_height, executor)
+            
+            candidates = _commit_template_phase(
+                processed, type_rank, accepted, gray, all_results, str(plan_image)
             )
-        
-        # Procesează toate tipurile în paralel
-        with ThreadPoolExecutor(max_workers=MAX_TYPE_WORKERS) as executor:
-            futures = {
-                executor.submit(process_type, (label, folder)): label
-                for label, folder in EXPORTS.items()
-            }
             
-            for future in as_completed(futures):
-                label, results = future.result()
-                all_results[label] = results
+            verdict_futures = {
+                label: executor.submit(_verify_object_type, label, banks[label], cands, str(plan_image))
+                for label, cands in candidates.items()
+                if cands
+            }
+            verdicts = {label: f.result() for label, f in verdict_futures.items()}
+        
+        _commit_gemini_phase(candidates, verdicts, type_rank, accepted, all_results)
+        _update_template_library(img, processed, all_results, candidates, verdicts, str(plan_image))
         
         print(f"\n       ✅ All types processed in {time.time()-t0:.2f}s")
         
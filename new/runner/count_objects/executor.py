@@ -0,0 +1,134 @@
+# new/runner/count_objects/executor.py
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+import cv2
+
+from .config import CPU_WORKERS, OPENCV_NUM_THREADS
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Un SINGUR executor CPU per proces pentru count_objects.
+#
+# Reguli:
+#   - tot ce e CPU (template matching, crop-uri, NMS) rulează aici
+#   - thread-urile de coordonare (per plan / per tip de obiect / Gemini) NU
+#     sunt în acest pool: ele doar trimit task-uri și așteaptă rezultatul
+#   - un task din pool nu trimite și nu așteaptă alte task-uri în același pool
+#     (ar putea bloca toate worker-ele) → vezi in_cpu_worker()
+#
+# OpenCV are propriul thread pool; cu paralelizare la nivel de task îl limităm
+# (OPENCV_NUM_THREADS), altfel thread-urile se înmulțesc pe aceleași core-uri.
+# cv2.setNumThreads e global per proces, deci limita e activă doar cât rulează
+# task-uri în pool; după ultimul task valoarea anterioară e restaurată
+# (celelalte etape își păstrează paralelismul OpenCV).
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+_local = threading.local()
+
+_cv_lock = threading.Lock()
+_cv_active = 0                   # task-uri din pool în execuție
+_cv_previous: int | None = None  # cv2.getNumThreads() dinaintea primului task
+
+
+def _resolve_workers() -> int:
+    env = os.getenv("COUNT_OBJECTS_CPU_WORKERS")
+    if env:
+        return max(1, int(env))
+    if CPU_WORKERS:
+        return max(1, CPU_WORKERS)
+    return os.cpu_count() or 4
+
+
+def _worker_init() -> None:
+    _local.in_pool = True
+
+
+def opencv_threads_limit() -> int:
+    """Thread-urile interne OpenCV cât rulează task-uri în pool."""
+    env = os.getenv("COUNT_OBJECTS_OPENCV_THREADS")
+    return int(env) if env else OPENCV_NUM_THREADS
+
+
+@contextmanager
+def limited_opencv_threads():
+    """
+    Limitează OpenCV la opencv_threads_limit() cât timp e activ cel puțin un
+    task din pool; la ieșirea ultimului se restaurează valoarea anterioară.
+    """
+    global _cv_active, _cv_previous
+    with _cv_lock:
+        if _cv_active == 0:
+            _cv_previous = cv2.getNumThreads()
+            cv2.setNumThreads(opencv_threads_limit())
+        _cv_active += 1
+    try:
+        yield
+    finally:
+        with _cv_lock:
+            _cv_active -= 1
+            if _cv_active == 0 and _cv_previous is not None:
+                cv2.setNumThreads(_cv_previous)
+                _cv_previous = None
+
+
+def _run_limited(fn: Callable[..., R], args: tuple, kwargs: dict) -> R:
+    with limited_opencv_threads():
+        return fn(*args, **kwargs)
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Executorul CPU comun (creat la prima utilizare)."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = _resolve_workers()
+            _executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="count_objects_cpu",
+                initializer=_worker_init,
+            )
+            print(f"       [CPU] executor comun: {workers} workers, OpenCV threads={opencv_threads_limit()} (în task-uri)")
+        return _executor
+
+
+def in_cpu_worker() -> bool:
+    """True dacă thread-ul curent e un worker al executorului comun."""
+    return getattr(_local, "in_pool", False)
+
+
+def submit_cpu(fn: Callable[..., R], *args, **kwargs) -> Future:
+    """
+    Trimite un task CPU. Apelat dintr-un worker al pool-ului, rulează inline
+    (evităm deadlock-ul „task care așteaptă task în același pool").
+    """
+    if in_cpu_worker():
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:  # noqa: BLE001 – propagăm prin Future
+            fut.set_exception(e)
+        return fut
+    return get_cpu_executor().submit(_run_limited, fn, args, kwargs)
+
+
+def map_cpu(fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+    """Aplică fn pe items în executorul comun; rezultatele păstrează ordinea."""
+    futures = [submit_cpu(fn, item) for item in items]
+    return [f.result() for f in futures]
+
+
+def shutdown_cpu_executor() -> None:
+    """Oprește executorul (ex. la finalul unui proces de test / benchmark)."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -0,0 +1,286 @@
+# new/runner/count_objects/gemini_gate.py
+# ------------------------------------------------------------
+# Gate local pentru banda de verificare Gemini.
+#
+# 1) Fiecare decizie din count_objects e logată ca JSONL:
+#    (label, conf, sim, combined, w, h, aspect, stage, decision, gemini)
+#    Logul e rotit la GATE_LOG_MAX_BYTES (se păstrează GATE_LOG_BACKUPS fișiere).
+# 2) Offline se antrenează o regresie logistică pe deciziile verificate de
+#    Gemini (eticheta = verdictul Gemini) și se salvează ca JSON (fără pickle;
+#    modelul comun din runner/logistic_model.py).
+# 3) La rulare, candidații din bandă merg la Gemini DOAR dacă modelul e nesigur
+#    (GATE_REJECT_PROB < p < GATE_ACCEPT_PROB). Fără model → totul merge la Gemini.
+#
+# Deciziile luate de gate sunt logate cu gemini=None, deci nu intră în antrenare.
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from ..logistic_model import LogisticModel, fit_logistic, load_model, save_model
+from .config import (
+    GATE_LOG_PATH,
+    GATE_LOG_MAX_BYTES,
+    GATE_LOG_BACKUPS,
+    GATE_MODEL_PATH,
+    GATE_ACCEPT_PROB,
+    GATE_REJECT_PROB,
+)
+
+MODEL_VERSION = 2  # v2: formatul comun LogisticModel (clase + coeficienți simetrici)
+
+LABELS = ["door", "double-door", "window", "double-window"]
+
+# ordinea feature-urilor din vectorul de intrare
+FEATURE_NAMES = ["conf", "sim", "combined", "log_w", "log_h", "log_aspect"] + [f"is_{l}" for l in LABELS]
+
+_log_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# Log decizii
+# ------------------------------------------------------------
+
+def gate_log_path() -> Path | None:
+    """Path-ul logului JSONL (None = logare dezactivată)."""
+    env = os.getenv("COUNT_OBJECTS_GATE_LOG")
+    if env == "0":
+        return None
+    return Path(env) if env else GATE_LOG_PATH
+
+
+def decision_record(
+    label: str,
+    conf: float,
+    sim: float,
+    bbox: tuple[int, int, int, int],
+    stage: str,
+    decision: str,
+    gemini: bool | None = None,
+    gate_p: float | None = None,
+    plan: str = "",
+    sim_exact: bool = True,
+) -> dict:
+    """
+    stage: "template" (confirm / reject din scor) | "rotation" (verificator local)
+           | "gate" (decis local) | "gemini"
+    decision: "confirm" | "reject"
+    sim_exact: False dacă sim e doar limita inferioară de la ieșirea anticipată
+               (confirmări / respingeri din template; nu intră în antrenarea gate-ului)
+    """
+    x1, y1, x2, y2 = bbox
+    w, h = max(1, x2 - x1), max(1, y2 - y1)
+    return {
+        "label": label,
+        "conf": round(float(conf), 4),
+        "sim": round(float(sim), 4),
+        "combined": round(0.6 * float(conf) + 0.4 * float(sim), 4),
+        "w": int(w),
+        "h": int(h),
+        "aspect": round(w / h, 4),
+        "stage": stage,
+        "decision": decision,
+        "gemini": gemini,
+        "gate_p": None if gate_p is None else round(float(gate_p), 4),
+        "sim_exact": bool(sim_exact),
+        "plan": plan,
+        "ts": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+    }
+
+
+def log_files(path: Path) -> list[Path]:
+    """Logul și rotațiile lui existente, de la cel mai vechi la cel curent."""
+    rotated = [path.with_name(f"{path.name}.{i}") for i in range(GATE_LOG_BACKUPS, 0, -1)]
+    return [p for p in rotated + [path] if p.exists()]
+
+
+def _rotate(path: Path) -> None:
+    """decisions.jsonl → .1 → .2 ...; peste GATE_LOG_BACKUPS cel mai vechi e șters."""
+    if GATE_LOG_BACKUPS <= 0:
+        path.unlink(missing_ok=True)
+        return
+    path.with_name(f"{path.name}.{GATE_LOG_BACKUPS}").unlink(missing_ok=True)
+    for i in range(GATE_LOG_BACKUPS - 1, 0, -1):
+        src = path.with_name(f"{path.name}.{i}")
+        if src.exists():
+            os.replace(src, path.with_name(f"{path.name}.{i + 1}"))
+    os.replace(path, path.with_name(f"{path.name}.1"))
+
+
+def log_decisions(records: list[dict], path: Path | None = None) -> None:
+    """
+    Adaugă înregistrările în logul JSONL (thread-safe; erorile nu opresc detecția).
+    Logul curent e rotit când depășește GATE_LOG_MAX_BYTES.
+    """
+    path = path or gate_log_path()
+    if path is None or not records:
+        return
+    try:
+        with _log_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists() and path.stat().st_size >= GATE_LOG_MAX_BYTES:
+                _rotate(path)
+            with open(path, "a", encoding="utf-8") as f:
+                for r in records:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"       [GATE] Nu pot scrie logul de decizii ({path}): {e}")
+
+
+def load_decisions(paths: list[Path]) -> list[dict]:
+    """Citește înregistrările verificate de Gemini (gemini != None) din unul sau mai multe loguri."""
+    records: list[dict] = []
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    r = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if (r.get("stage") == "gemini" and isinstance(r.get("gemini"), bool)
+                        and r.get("sim_exact", True)):
+                    records.append(r)
+    return records
+
+
+# ------------------------------------------------------------
+# Model
+# ------------------------------------------------------------
+
+def feature_vector(record: dict) -> np.ndarray:
+    """Înregistrare (vezi decision_record) → vector numeric."""
+    return np.array(
+        [
+            float(record["conf"]),
+            float(record["sim"]),
+            float(record["combined"]),
+            math.log(max(1, record["w"])),
+            math.log(max(1, record["h"])),
+            math.log(max(1e-3, record["aspect"])),
+        ] + [1.0 if record["label"] == l else 0.0 for l in LABELS],
+        dtype=np.float64,
+    )
+
+
+@dataclass
+class GateModel:
+    """Regresie logistică binară p(Gemini spune DA), vezi LogisticModel."""
+    model: LogisticModel
+
+    @property
+    def trained_on(self) -> int:
+        return self.model.trained_on
+
+    def predict_proba(self, record: dict) -> float:
+        return self.model.predict_proba(feature_vector(record))["1"]
+
+
+def load_gate_model(path: str | Path = GATE_MODEL_PATH) -> GateModel | None:
+    """Modelul gate dacă există (cache după mtime). Altfel None – totul merge la Gemini."""
+    model = load_model(path, MODEL_VERSION, FEATURE_NAMES, "Toți candidații merg la Gemini.")
+    return None if model is None else GateModel(model)
+
+
+def gate_verdict(
+    model: GateModel | None,
+    record: dict,
+    accept_prob: float = GATE_ACCEPT_PROB,
+    reject_prob: float = GATE_REJECT_PROB,
+) -> tuple[bool | None, float | None]:
+    """
+    RETURN: (True/False dacă modelul e sigur, None → Gemini; probabilitatea).
+    """
+    if model is None:
+        return None, None
+    p = model.predict_proba(record)
+    if p >= accept_prob:
+        return True, p
+    if p <= reject_prob:
+        return False, p
+    return None, p
+
+
+def train_gate_model(log_paths: list[Path], out_path: str | Path = GATE_MODEL_PATH) -> GateModel:
+    """Antrenează modelul gate din deciziile verificate de Gemini și îl salvează ca JSON."""
+    records = load_decisions(log_paths)
+    if not records:
+        raise ValueError(f"Nu am găsit decizii Gemini în {', '.join(map(str, log_paths))}")
+
+    X = np.vstack([feature_vector(r) for r in records])
+    y = np.array([1 if r["gemini"] else 0 for r in records])
+    if len(set(y.tolist())) < 2:
+        raise ValueError("Am nevoie de verdicte Gemini atât DA cât și NU pentru antrenare")
+
+    model = GateModel(fit_logistic(X, y))
+    out_path = save_model(model.model, out_path, MODEL_VERSION, FEATURE_NAMES)
+    print(f"✅ Model gate antrenat pe {len(y)} decizii Gemini ({int(y.sum())} DA) → {out_path}")
+    return model
+
+
+def evaluate_gate(
+    model: GateModel,
+    records: list[dict],
+    accept_prob: float = GATE_ACCEPT_PROB,
+    reject_prob: float = GATE_REJECT_PROB,
+) -> dict:
+    """
+    Replay offline pe decizii înregistrate (fără rețea): câte apeluri Gemini
+    ar fi rămas și cât de corecte sunt deciziile locale față de Gemini.
+    """
+    tp = fp = tn = fn = deferred = 0
+    for r in records:
+        verdict, _ = gate_verdict(model, r, accept_prob, reject_prob)
+        if verdict is None:
+            deferred += 1
+        elif verdict and r["gemini"]:
+            tp += 1
+        elif verdict:
+            fp += 1
+        elif r["gemini"]:
+            fn += 1
+        else:
+            tn += 1
+
+    n = len(records)
+    decided = n - deferred
+    return {
+        "records": n,
+        "gemini_calls": deferred,
+        "call_reduction": round(n / deferred, 2) if deferred else None,
+        "local_accept_precision": round(tp / (tp + fp), 4) if tp + fp else None,
+        "local_reject_precision": round(tn / (tn + fn), 4) if tn + fn else None,
+        "local_agreement": round((tp + tn) / decided, 4) if decided else None,
+    }
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gate local pentru verificarea Gemini (count_objects)")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("logs", nargs="*", help="Loguri JSONL (default: GATE_LOG_PATH)")
+    parser.add_argument("--model", default=str(GATE_MODEL_PATH), help="Path JSON pentru model")
+    args = parser.parse_args()
+
+    logs = [Path(p) for p in args.logs] or log_files(GATE_LOG_PATH)
+    if args.command == "train":
+        train_gate_model(logs, args.model)
+    else:
+        gate = load_gate_model(args.model)
+        if gate is None:
+            raise SystemExit(f"Model inexistent / invalid: {args.model}")
+        print(json.dumps(evaluate_gate(gate, load_decisions(logs)), indent=2))
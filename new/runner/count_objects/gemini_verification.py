@@ -1,26 +1,102 @@
 # new/runner/count_objects/gemini_verification.py
 from __future__ import annotations
 
+import json
 import os
+import threading
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import cv2
+import numpy as np
 import google.generativeai as genai
 
-from .preprocessing import preprocess_for_ai
-from .config import MAX_GEMINI_WORKERS
+from .preprocessing import preprocess_array_for_ai, encode_jpeg
+from .config import MAX_GEMINI_WORKERS, GEMINI_BATCH_SIZE, GEMINI_VERIFY_MODEL
+
+# Un singur model Gemini per proces (configurat o dată, refolosit de toate planurile).
+_model = None
+_model_lock = threading.Lock()
 
 
 def _init_gemini():
-    """Inițializează modelul Gemini."""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise RuntimeError("GEMINI_API_KEY missing in environment")
-    genai.configure(api_key=api_key)
-    return genai.GenerativeModel("gemini-2.0-flash-exp")
+    """Modelul Gemini comun (creat la primul apel)."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY missing in environment")
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel(GEMINI_VERIFY_MODEL)
+        return _model
+
+
+@lru_cache(maxsize=32)
+def _encoded_template(template_path: str, mtime: float) -> bytes:
+    """Template-ul preprocesat + JPEG, o singură dată per tip (mtime invalidează)."""
+    img = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise ValueError(f"Imagine invalidă: {template_path}")
+    return encode_jpeg(preprocess_array_for_ai(img))
 
 
-def ask_gemini_single(gemini_model, template_path: Path, candidate_path: Path, label: str, temp_dir: Path) -> bool:
-    """Verifică cu Gemini dacă obiectul candidat e același tip dar rotit."""
+def _encoded_candidate(cand: dict) -> bytes:
+    """Crop-ul candidat din memorie ("crop"); fallback pe fișier ("tmp_path")."""
+    crop = cand.get("crop")
+    if crop is None:
+        crop = cv2.imread(str(cand["tmp_path"]), cv2.IMREAD_GRAYSCALE)
+        if crop is None:
+            raise ValueError(f"Imagine invalidă: {cand['tmp_path']}")
+    return encode_jpeg(preprocess_array_for_ai(crop))
+
+
+def _parse_answers(text: str, n: int) -> list[bool] | None:
+    """Răspuns JSON {"answers": ["DA"/"NU", ...]} → listă de n bool; None dacă nu se potrivește."""
+    reply = (text or "").strip()
+    if reply.startswith("```"):
+        lines = [l for l in reply.splitlines() if not l.strip().startswith("```")]
+        reply = "\n".join(lines).strip()
+    try:
+        data = json.loads(reply)
+    except json.JSONDecodeError:
+        return None
+
+    answers = data.get("answers") if isinstance(data, dict) else data
+    if not isinstance(answers, list) or len(answers) != n:
+        return None
+    return [a is True or str(a).strip().upper() in ("DA", "YES", "TRUE") for a in answers]
+
+
+def ask_gemini_batch(gemini_model, template_bytes: bytes, candidate_bytes: list[bytes], label: str) -> list[bool] | None:
+    """
+    O singură cerere pentru mai mulți candidați: template + listă numerotată de imagini.
+    RETURN: verdict per candidat (în ordine) sau None dacă răspunsul e invalid.
+    """
+    n = len(candidate_bytes)
+    prompt = (
+        f"Ești expert în interpretarea planurilor arhitecturale 2D. "
+        f"Prima imagine arată un {label} standard, drept (neînclinat). "
+        f"Urmează {n} imagini numerotate 1..{n}, extrase dintr-un plan tehnic. "
+        f"Pentru FIECARE, determină dacă reprezintă același tip de obiect, "
+        f"dar rotit față de orizontală/verticală (ex. 30–60°). "
+        f"Răspunde DOAR JSON: {{\"answers\": [\"DA\" sau \"NU\", ...]}} cu exact {n} elemente, în ordine."
+    )
+
+    parts: list = [prompt, "Template:", {"mime_type": "image/jpeg", "data": template_bytes}]
+    for i, data in enumerate(candidate_bytes, 1):
+        parts += [f"Imaginea {i}:", {"mime_type": "image/jpeg", "data": data}]
+
+    response = gemini_model.generate_content(
+        parts,
+        generation_config={"temperature": 0.0, "response_mime_type": "application/json"}
+    )
+    return _parse_answers(response.text, n)
+
+
+def ask_gemini_single(gemini_model, template_bytes: bytes, candidate_bytes: bytes, label: str) -> bool:
+    """Verifică un singur candidat (fallback când răspunsul batch nu poate fi citit)."""
     try:
         prompt = (
             f"Ești expert în interpretarea planurilor arhitecturale 2D. "
@@ -30,52 +106,71 @@ def ask_gemini_single(gemini_model, template_path: Path, candidate_path: Path, l
             f"dar rotit față de orizontală/verticală (ex. 30–60°). "
             f"Răspunde strict 'DA' sau 'NU'."
         )
-        
-        temp_proc = preprocess_for_ai(template_path, temp_dir)
-        cand_proc = preprocess_for_ai(candidate_path, temp_dir)
-        
+
         response = gemini_model.generate_content([
             prompt,
-            {"mime_type": "image/jpeg", "data": open(temp_proc, "rb").read()},
-            {"mime_type": "image/jpeg", "data": open(cand_proc, "rb").read()},
+            {"mime_type": "image/jpeg", "data": template_bytes},
+            {"mime_type": "image/jpeg", "data": candidate_bytes},
         ])
-        
+
         text = (response.text or "").strip().upper()
         return "DA" in text
-    
+
     except Exception as e:
         print(f"       [Gemini ERR] {e}")
         return False
 
 
-def verify_candidates_parallel(candidates: list[dict], template_path: Path, temp_dir: Path) -> dict:
-    """Verifică mai mulți candidați în paralel cu Gemini."""
+def verify_candidates_parallel(
+    candidates: list[dict],
+    template: "Path | np.ndarray",
+    temp_dir: Path | None = None,
+    batch_size: int = GEMINI_BATCH_SIZE
+) -> dict:
+    """
+    Verifică mai mulți candidați cu Gemini, în batch-uri (O(candidați / batch) cereri).
+    Batch-urile rulează în paralel; un batch cu răspuns invalid cade pe cereri individuale.
+    template: imaginea template-ului (din TemplateBank) sau path către un PNG.
+    temp_dir: păstrat pentru compatibilitate (totul se face în memorie).
+    """
     if not candidates:
         return {}
-    
+
     gemini_model = _init_gemini()
-    results = {}
-    
-    def verify_one(cand):
-        """Helper pentru verificare paralelă."""
+    if isinstance(template, np.ndarray):
+        template_bytes = encode_jpeg(preprocess_array_for_ai(template))
+    else:
+        template_path = Path(template)
+        template_bytes = _encoded_template(str(template_path), template_path.stat().st_mtime)
+
+    batch_size = max(1, batch_size)
+    batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+
+    def verify_batch(batch: list[dict]) -> list[tuple[int, bool]]:
+        """Helper pentru verificare paralelă (un batch = o cerere)."""
+        label = batch[0]["label"]
+        try:
+            encoded = [_encoded_candidate(c) for c in batch]
+        except Exception as e:
+            print(f"       [ERR] Gemini batch {[c['idx'] for c in batch]}: {e}")
+            return [(c["idx"], False) for c in batch]
+
+        verdicts = None
         try:
-            is_valid = ask_gemini_single(
-                gemini_model,
-                template_path,
-                cand["tmp_path"],
-                cand["label"],
-                temp_dir
-            )
-            return (cand["idx"], is_valid)
+            verdicts = ask_gemini_batch(gemini_model, template_bytes, encoded, label)
         except Exception as e:
-            print(f"       [ERR] Gemini #{cand['idx']}: {e}")
-            return (cand["idx"], False)
-    
-    with ThreadPoolExecutor(max_workers=MAX_GEMINI_WORKERS) as executor:
-        futures = {executor.submit(verify_one, cand): cand for cand in candidates}
-        
-        for future in as_completed(futures):
-            idx, is_valid = future.result()
-            results[idx] = is_valid
-    
-    return results
\ No newline at end of file
+            print(f"       [Gemini ERR] batch: {e}")
+
+        if verdicts is None:
+            print(f"       [Gemini] răspuns batch invalid → {len(batch)} cereri individuale")
+            verdicts = [ask_gemini_single(gemini_model, template_bytes, data, label) for data in encoded]
+
+        return [(c["idx"], v) for c, v in zip(batch, verdicts)]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(MAX_GEMINI_WORKERS, len(batches))) as executor:
+        for batch_result in executor.map(verify_batch, batches):
+            results.update(batch_result)
+
+    print(f"       [Gemini] {len(candidates)} candidați în {len(batches)} cereri (batch={batch_size})")
+    return results
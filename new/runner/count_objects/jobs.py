@@ -13,7 +13,9 @@ from ..config.settings import (
     PlanInfo,
 )
 
+from ..plan_index import reused_result
 from .detector import run_hybrid_detection
+from .detection_index import plan_detections
 
 
 STAGE_NAME = "count_objects"
@@ -38,6 +40,15 @@ def _run_for_single_plan(
     work_dir = plan.stage_work_dir
     work_dir.mkdir(parents=True, exist_ok=True)
     
+    if reused_result(work_dir, "detections_all.json"):
+        plan_detections(work_dir / "detections_all.json")
+        return CountObjectsJobResult(
+            plan_id=plan.plan_id,
+            work_dir=work_dir,
+            success=True,
+            message="Refolosit din indexul de planuri (fără Roboflow / Gemini)"
+        )
+    
     detections_dir = work_dir.parent.parent / "detections" / plan.plan_id
     plan_jpg = detections_dir / "plan.jpg"
     
@@ -49,14 +60,17 @@ def _run_for_single_plan(
             message=f"Nu găsesc plan.jpg în {detections_dir}"
         )
     
+    # template-urile se extrag în memorie din detections.json;
+    # exports/ (PNG-uri) există doar pentru rulări vechi sau în modul debug
+    detections_json = detections_dir / "export_objects" / "detections.json"
     exports_dir = detections_dir / "export_objects" / "exports"
     
-    if not exports_dir.exists():
+    if not detections_json.exists() and not exports_dir.exists():
         return CountObjectsJobResult(
             plan_id=plan.plan_id,
             work_dir=work_dir,
             success=False,
-            message=f"Nu găsesc exports_dir în {exports_dir}"
+            message=f"Nu găsesc detections.json sau exports_dir în {detections_dir / 'export_objects'}"
         )
     
     roboflow_config = {
@@ -86,9 +100,14 @@ def _run_for_single_plan(
             exports_dir=exports_dir,
             output_dir=work_dir,
             roboflow_config=roboflow_config,
-            total_plans=total_plans  # NOU
+            total_plans=total_plans,  # NOU
+            detections_json=detections_json
         )
         
+        # indexul spațial se construiește o dată aici; etapele din aval îl refolosesc
+        if success:
+            plan_detections(work_dir / "detections_all.json")
+        
         return CountObjectsJobResult(
             plan_id=plan.plan_id,
             work_dir=work_dir,
@@ -0,0 +1,138 @@
+# new/runner/count_objects/prefilter.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .config import STAIRS_OVERLAP_THRESHOLD, DETECTION_OVERLAP_THRESHOLD
+
+# Pre-filtrare vectorizată a predicțiilor Roboflow, ÎNAINTE de template matching / Gemini.
+#
+# Tot ce se elimină aici ar fi fost oricum „skip" în commit-ul din detector,
+# deci numărătorile finale nu se schimbă:
+#   - suprimare zona scării: overlap(box, scară) > STAIRS_OVERLAP_THRESHOLD
+#   - NMS class-aware „amânat": un box e suprimat doar dacă un box anterior în
+#     ordinea de commit (confidence desc, tip, idx) cu overlap > DETECTION_OVERLAP_THRESHOLD
+#     a fost CONFIRMAT de template. Box-urile se potrivesc în valuri: un val conține
+#     doar candidații ai căror suprimatori sunt deja decişi.
+#
+# Overlap-ul e aria intersecției raportată la aria box-ului curent (ca overlap()).
+
+
+def boxes_from_predictions(preds: list[dict], img_width: int, img_height: int) -> np.ndarray:
+    """(N, 4) int64 x1,y1,x2,y2 – aceeași rotunjire ca process_detections_parallel."""
+    if not preds:
+        return np.zeros((0, 4), dtype=np.int64)
+    xywh = np.array(
+        [[int(p.get("x", 0)), int(p.get("y", 0)), int(p.get("width", 0)), int(p.get("height", 0))] for p in preds],
+        dtype=np.int64,
+    )
+    x, y, w, h = xywh.T
+    return np.stack([
+        np.maximum(0, x - w // 2),
+        np.maximum(0, y - h // 2),
+        np.minimum(img_width, x + w // 2),
+        np.minimum(img_height, y + h // 2),
+    ], axis=1)
+
+
+def overlap_matrix(boxes: np.ndarray, others: np.ndarray | None = None) -> np.ndarray:
+    """M[i, j] = aria(boxes[i] ∩ others[j]) / aria(boxes[i])."""
+    others = boxes if others is None else others
+    a = boxes[:, None, :].astype(np.float64)
+    b = others[None, :, :].astype(np.float64)
+    dx = np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+    dy = np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+    inter = np.clip(dx, 0, None) * np.clip(dy, 0, None)
+    area = ((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(area[:, None] > 0, inter / area[:, None], 0.0)
+
+
+@dataclass
+class PrefilterEntry:
+    """O predicție atribuită unui tip (o predicție poate aparține mai multor tipuri)."""
+    label: str
+    idx: int                      # 1-based în lista tipului (ca înainte: maybe_{label}_{idx}.jpg)
+    pred: dict
+    bbox: tuple[int, int, int, int]
+    conf: float
+    suppressors: list[int] = field(default_factory=list)  # poziții anterioare în ordinea de commit
+
+
+@dataclass
+class PrefilterPlan:
+    """Intrările ordonate pentru commit + ce s-a eliminat înainte de matching."""
+    entries: list[PrefilterEntry]
+    stairs_skipped: list[tuple[PrefilterEntry, float]]
+    n_predictions: int
+
+    def stats(self) -> dict:
+        return {
+            "predictions": self.n_predictions,
+            "candidates": len(self.entries) + len(self.stairs_skipped),
+            "stairs_suppressed": len(self.stairs_skipped),
+            "with_suppressors": sum(1 for e in self.entries if e.suppressors),
+        }
+
+
+def build_prefilter_plan(
+    relevant_by_label: dict[str, list[dict]],
+    img_width: int,
+    img_height: int,
+    stairs_box: tuple | None = None,
+) -> PrefilterPlan:
+    """
+    relevant_by_label: predicțiile relevante per tip, în ordinea EXPORTS (dă rangul tipului).
+    """
+    type_rank = {label: i for i, label in enumerate(relevant_by_label)}
+    flat: list[PrefilterEntry] = []
+    for label, preds in relevant_by_label.items():
+        boxes = boxes_from_predictions(preds, img_width, img_height)
+        conf = np.array([float(p.get("confidence", 0.0)) for p in preds], dtype=np.float64)
+        for i, (p, box, c) in enumerate(zip(preds, boxes, conf), 1):
+            flat.append(PrefilterEntry(label, i, p, tuple(int(v) for v in box), float(c)))
+
+    n_predictions = len({id(e.pred) for e in flat})
+    if not flat:
+        return PrefilterPlan([], [], n_predictions)
+
+    boxes = np.array([e.bbox for e in flat], dtype=np.int64)
+
+    # 1) zona scării
+    stairs_skipped: list[tuple[PrefilterEntry, float]] = []
+    keep = np.ones(len(flat), dtype=bool)
+    if stairs_box is not None:
+        ratios = overlap_matrix(boxes, np.array([stairs_box], dtype=np.int64))[:, 0]
+        keep = ratios <= STAIRS_OVERLAP_THRESHOLD
+        stairs_skipped = [(e, float(r)) for e, r, k in zip(flat, ratios, keep) if not k]
+
+    # 2) ordinea de commit + graful de suprimare (o singură matrice N×N)
+    kept = [e for e, k in zip(flat, keep) if k]
+    order = sorted(range(len(kept)), key=lambda i: (-kept[i].conf, type_rank[kept[i].label], kept[i].idx))
+    entries = [kept[i] for i in order]
+    if entries:
+        ordered_boxes = np.array([e.bbox for e in entries], dtype=np.int64)
+        over = overlap_matrix(ordered_boxes) > DETECTION_OVERLAP_THRESHOLD
+        over &= np.tri(len(entries), k=-1, dtype=bool)   # doar box-uri anterioare în ordine
+        for pos, row in enumerate(over):
+            entries[pos].suppressors = np.flatnonzero(row).tolist()
+
+    return PrefilterPlan(entries, stairs_skipped, n_predictions)
+
+
+def next_wave(plan: PrefilterPlan, decided: dict[int, bool]) -> tuple[list[int], list[int]]:
+    """
+    decided: poziție → confirmat de template (True) / nu (False).
+    RETURN: (val de potrivit acum, poziții suprimate fără matching).
+    """
+    wave, suppressed = [], []
+    for pos, e in enumerate(plan.entries):
+        if pos in decided:
+            continue
+        if any(decided.get(s) is True for s in e.suppressors):
+            suppressed.append(pos)
+        elif all(s in decided for s in e.suppressors):
+            wave.append(pos)
+    return wave, suppressed
@@ -6,11 +6,10 @@ import numpy as np
 from pathlib import Path
 
 
-def preprocess_for_ai(img_path: Path, temp_dir: Path, size: int = 128) -> str:
-    """Preprocesează imagine pentru comparație AI."""
-    img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
-    if img is None:
-        raise ValueError(f"Imagine invalidă: {img_path}")
+def preprocess_array_for_ai(img: np.ndarray, size: int = 128) -> np.ndarray:
+    """Preprocesare în memorie (grayscale → binar size×size) pentru comparația AI."""
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     
     img = cv2.equalizeHist(img)
     img = cv2.convertScaleAbs(img, alpha=1.4, beta=15)
@@ -20,12 +19,38 @@ def preprocess_for_ai(img_path: Path, temp_dir: Path, size: int = 128) -> str:
     
     img = cv2.resize(img, (size, size))
     _, img = cv2.threshold(img, 180, 255, cv2.THRESH_BINARY)
+    return img
+
+
+def encode_jpeg(img: np.ndarray, quality: int = 90) -> bytes:
+    """Encodează o imagine ca JPEG, fără fișier temporar."""
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Encodare JPEG eșuată")
+    return buf.tobytes()
+
+
+def preprocess_for_ai(img_path: Path, temp_dir: Path, size: int = 128) -> str:
+    """Preprocesează imagine pentru comparație AI (variantă pe disc)."""
+    img = cv2.imread(str(img_path), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise ValueError(f"Imagine invalidă: {img_path}")
     
     processed_path = temp_dir / f"proc_{img_path.name}"
-    cv2.imwrite(str(processed_path), img)
+    cv2.imwrite(str(processed_path), preprocess_array_for_ai(img, size))
     return str(processed_path)
 
 
+def rotate_variants(base: np.ndarray, name: str) -> list[dict]:
+    """Cele 4 rotații (pe același canvas) ale unui template deja egalizat."""
+    out = []
+    for ang in [0, 90, 180, 270]:
+        M = cv2.getRotationMatrix2D((base.shape[1]/2, base.shape[0]/2), ang, 1.0)
+        rotated = cv2.warpAffine(base, M, (base.shape[1], base.shape[0]), borderValue=255)
+        out.append({"name": name, "image": rotated})
+    return out
+
+
 def load_templates(root_dir: Path) -> list[dict]:
     """Încarcă template-uri și le rotește în 4 direcții."""
     templates = []
@@ -37,11 +62,6 @@ def load_templates(root_dir: Path) -> list[dict]:
         if img is None:
             continue
         
-        base = cv2.equalizeHist(img)
-        
-        for ang in [0, 90, 180, 270]:
-            M = cv2.getRotationMatrix2D((img.shape[1]/2, img.shape[0]/2), ang, 1.0)
-            rotated = cv2.warpAffine(base, M, (img.shape[1], img.shape[0]), borderValue=255)
-            templates.append({"name": f.name, "image": rotated})
+        templates += rotate_variants(cv2.equalizeHist(img), f.name)
     
-    return templates
\ No newline at end of file
+    return templates
@@ -6,45 +6,46 @@ import requests
 from pathlib import Path
 
 from .config import CONF_THRESHOLD, OVERLAP
+from .roboflow_upload import detections_result, infer_prepared, roboflow_urls
 
 
-def infer_roboflow(
-    image_path: Path,
+def post_roboflow(
+    img_bytes: bytes,
     api_key: str,
     workspace: str,
     project: str,
     version: int,
     confidence: float = CONF_THRESHOLD,
-    overlap: int = OVERLAP
-) -> dict:
+    overlap: int = OVERLAP,
+    filename: str = "plan.jpg",
+    max_retries: int = 5,
+    timeout: int = 60
+) -> list[dict]:
     """
-    Apel Roboflow pentru detecții YOLO (modele cu versiune standard).
-    Funcționează pentru TOATE modelele standard (doors/windows/stairs).
+    Un singur request de inferență pentru o imagine JPEG deja pregătită.
+    infer.roboflow.com, cu fallback pe detect.roboflow.com (URL-urile: roboflow_urls()).
     """
-    max_retries = 5
-    timeout = 60
     conf_percent = int(confidence * 100)
-    
+    infer_base, detect_base = roboflow_urls()
+
     # 1) Încearcă infer.roboflow.com
-    infer_url = f"https://infer.roboflow.com/{workspace}/{project}/{version}"
+    infer_url = f"{infer_base}/{workspace}/{project}/{version}"
     infer_url += f"?confidence={conf_percent}&overlap={overlap}"
-    
+
     headers = {
         "Authorization": f"Key {api_key}",
         "Accept": "application/json",
         "Content-Type": "image/jpeg",
     }
-    
-    img_bytes = image_path.read_bytes()
-    
+
     for attempt in range(1, max_retries + 1):
         try:
             r = requests.post(infer_url, headers=headers, data=img_bytes, timeout=timeout)
             if r.status_code == 200:
                 data = r.json()
-                if isinstance(data, dict) and "predictions" in data:
-                    return data
-                return {"predictions": data.get("predictions", [])}
+                if isinstance(data, dict):
+                    return data.get("predictions", []) or []
+                return []
             elif r.status_code in (401, 403, 404, 405):
                 print(f"       [INFO] infer.roboflow.com → {r.status_code}, trying detect")
                 break
@@ -53,21 +54,46 @@ def infer_roboflow(
         except Exception as e:
             print(f"       [ERR] infer attempt {attempt}: {e}")
         time.sleep(1.2)
-    
+
     # 2) Fallback pe detect.roboflow.com
-    detect_url = f"https://detect.roboflow.com/{project}/{version}"
+    detect_url = f"{detect_base}/{project}/{version}"
     params = {"api_key": api_key, "confidence": conf_percent, "overlap": overlap}
-    
+
     for attempt in range(1, max_retries + 1):
         try:
-            with open(image_path, "rb") as f:
-                files = {"file": (image_path.name, f, "image/jpeg")}
-                r = requests.post(detect_url, params=params, files=files, timeout=timeout)
-            
+            files = {"file": (filename, img_bytes, "image/jpeg")}
+            r = requests.post(detect_url, params=params, files=files, timeout=timeout)
+
             if r.status_code == 200:
-                return {"predictions": r.json().get("predictions", [])}
+                return r.json().get("predictions", []) or []
         except Exception as e:
             print(f"       [ERR] detect attempt {attempt}: {e}")
         time.sleep(1.2)
-    
-    raise RuntimeError("Failed to get predictions from Roboflow")
\ No newline at end of file
+
+    raise RuntimeError("Failed to get predictions from Roboflow")
+
+
+def infer_roboflow(
+    image_path: Path,
+    api_key: str,
+    workspace: str,
+    project: str,
+    version: int,
+    confidence: float = CONF_THRESHOLD,
+    overlap: int = OVERLAP
+) -> dict:
+    """
+    Apel Roboflow pentru detecții YOLO (modele cu versiune standard).
+    Funcționează pentru TOATE modelele standard (doors/windows/stairs).
+
+    Planul e micșorat / împărțit în tile-uri înainte de upload (vezi roboflow_upload.py);
+    predicțiile se întorc în coordonatele planului complet. "upload" = bytes / latență.
+    """
+    def post(img_bytes: bytes) -> list[dict]:
+        return post_roboflow(
+            img_bytes, api_key, workspace, project, version,
+            confidence=confidence, overlap=overlap, filename=Path(image_path).name
+        )
+
+    preds, stats = infer_prepared(Path(image_path), post)
+    return detections_result(preds, stats)
@@ -0,0 +1,255 @@
+# new/runner/count_objects/roboflow_upload.py
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .config import (
+    ROBOFLOW_INFER_URL,
+    ROBOFLOW_DETECT_URL,
+    ROBOFLOW_MAX_SIDE,
+    ROBOFLOW_MIN_SCALE,
+    ROBOFLOW_TILE_SIZE,
+    ROBOFLOW_TILE_OVERLAP,
+    ROBOFLOW_JPEG_QUALITY,
+    ROBOFLOW_TILE_MERGE_OVERLAP,
+    ROBOFLOW_UPLOAD_WORKERS,
+)
+from ..plan_geometry import plan_geometry
+from .prefilter import overlap_matrix
+
+# Pregătirea imaginii pentru Roboflow (în loc de upload-ul planului la rezoluție completă).
+#
+# Planurile sunt randate la până la 450 DPI (mulți MB); modelul lucrează oricum la o
+# rezoluție mult mai mică, deci upload-ul e în mare parte timp pierdut:
+#   - plan mic (latura ≤ ROBOFLOW_MAX_SIDE): fișierul original, neschimbat
+#   - plan mare: micșorat la ROBOFLOW_MAX_SIDE, dacă asta nu coboară sub ROBOFLOW_MIN_SCALE
+#     (simbolurile mici ar deveni prea mici pentru model)
+#   - plan foarte mare: micșorat la ROBOFLOW_MIN_SCALE și împărțit în tile-uri de
+#     ROBOFLOW_TILE_SIZE cu suprapunere ROBOFLOW_TILE_OVERLAP (≥ cel mai mare simbol),
+#     trimise în paralel
+# Predicțiile sunt aduse înapoi în coordonatele planului complet. Din tile-uri:
+# box-urile tăiate de o margine interioară se elimină (tile-ul vecin le vede întregi),
+# iar dublurile din zona de suprapunere se unesc (NMS pe clasă, păstrează confidence max).
+
+
+@dataclass
+class UploadTile:
+    data: bytes                 # JPEG trimis
+    x0: int                     # offset-ul tile-ului în imaginea micșorată
+    y0: int
+    width: int                  # dimensiunea tile-ului (pixeli micșorați)
+    height: int
+
+
+@dataclass
+class UploadPlan:
+    tiles: list[UploadTile]
+    scale: float                # pixeli trimiși / pixeli plan
+    full_width: int
+    full_height: int
+    scaled_width: int
+    scaled_height: int
+
+
+@dataclass
+class UploadStats:
+    """Raport per plan: cât s-a trimis și cât a durat."""
+    original_bytes: int
+    bytes_sent: int = 0
+    tiles: int = 0
+    scale: float = 1.0
+    prepare_s: float = 0.0
+    request_s: list[float] = field(default_factory=list)
+    total_s: float = 0.0
+    full_width: int = 0         # planul complet (coordonatele predicțiilor)
+    full_height: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "original_bytes": self.original_bytes,
+            "bytes_sent": self.bytes_sent,
+            "tiles": self.tiles,
+            "scale": round(self.scale, 4),
+            "prepare_s": round(self.prepare_s, 3),
+            "request_s": [round(t, 3) for t in self.request_s],
+            "total_s": round(self.total_s, 3),
+        }
+
+
+def detections_result(preds: list[dict], stats: UploadStats, response: dict | None = None) -> dict:
+    """
+    Formatul detections.json: cheile top-level ale răspunsului Roboflow (time,
+    inference_id...), "image" cu dimensiunea planului complet (nu a tile-ului
+    trimis), predicțiile unite și raportul "upload".
+    """
+    result = {k: v for k, v in (response or {}).items() if k != "predictions"}
+    result["image"] = {"width": stats.full_width, "height": stats.full_height}
+    result["predictions"] = preds
+    result["upload"] = stats.as_dict()
+    return result
+
+
+def roboflow_urls() -> tuple[str, str]:
+    """(infer, detect) – override cu ROBOFLOW_INFER_URL / ROBOFLOW_DETECT_URL (ex. server local)."""
+    infer = os.getenv("ROBOFLOW_INFER_URL", ROBOFLOW_INFER_URL).rstrip("/")
+    detect = os.getenv("ROBOFLOW_DETECT_URL", ROBOFLOW_DETECT_URL).rstrip("/")
+    return infer, detect
+
+
+def _tile_starts(length: int, tile: int, overlap: int) -> list[int]:
+    """Începuturile tile-urilor pe o axă (ultimul e lipit de margine)."""
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def _encode(img: np.ndarray) -> bytes:
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, ROBOFLOW_JPEG_QUALITY])
+    if not ok:
+        raise ValueError("Encodare JPEG eșuată")
+    return buf.tobytes()
+
+
+def prepare_upload(
+    image_path: Path,
+    max_side: int = ROBOFLOW_MAX_SIDE,
+    min_scale: float = ROBOFLOW_MIN_SCALE,
+    tile_size: int = ROBOFLOW_TILE_SIZE,
+    tile_overlap: int = ROBOFLOW_TILE_OVERLAP,
+) -> UploadPlan:
+    """Decide scala / tile-urile și encodează ce se trimite (vezi comentariul de sus)."""
+    image_path = Path(image_path)
+    img = plan_geometry(image_path).bgr  # decodarea rămâne pentru etapele următoare
+    h, w = img.shape[:2]
+
+    if max(h, w) <= max_side:
+        return UploadPlan([UploadTile(image_path.read_bytes(), 0, 0, w, h)], 1.0, w, h, w, h)
+
+    scale = max(max_side / max(h, w), min_scale)
+    sw, sh = max(1, round(w * scale)), max(1, round(h * scale))
+    scaled = cv2.resize(img, (sw, sh), interpolation=cv2.INTER_AREA)
+
+    tiles = []
+    for y0 in _tile_starts(sh, tile_size, tile_overlap):
+        for x0 in _tile_starts(sw, tile_size, tile_overlap):
+            part = scaled[y0:y0 + tile_size, x0:x0 + tile_size]
+            tiles.append(UploadTile(_encode(part), x0, y0, part.shape[1], part.shape[0]))
+    return UploadPlan(tiles, scale, w, h, sw, sh)
+
+
+def _cut_by_inner_edge(pred: dict, tile: UploadTile, plan: UploadPlan, overlap: int, margin: float = 2.0) -> bool:
+    """Box atins de o margine de tile care nu e margine de plan (și mai mic decât suprapunerea)."""
+    x, y = float(pred.get("x", 0)), float(pred.get("y", 0))
+    w, h = float(pred.get("width", 0)), float(pred.get("height", 0))
+    if w >= overlap or h >= overlap:
+        return False
+    return (
+        (tile.x0 > 0 and x - w / 2 <= margin)
+        or (tile.y0 > 0 and y - h / 2 <= margin)
+        or (tile.x0 + tile.width < plan.scaled_width and x + w / 2 >= tile.width - margin)
+        or (tile.y0 + tile.height < plan.scaled_height and y + h / 2 >= tile.height - margin)
+    )
+
+
+def to_full_resolution(pred: dict, tile: UploadTile, scale: float) -> dict:
+    """Predicție în coordonatele tile-ului → coordonatele planului complet."""
+    out = dict(pred)
+    out["x"] = (float(pred.get("x", 0)) + tile.x0) / scale
+    out["y"] = (float(pred.get("y", 0)) + tile.y0) / scale
+    out["width"] = float(pred.get("width", 0)) / scale
+    out["height"] = float(pred.get("height", 0)) / scale
+    return out
+
+
+def merge_tile_predictions(
+    per_tile: list[list[dict]],
+    plan: UploadPlan,
+    overlap: int = ROBOFLOW_TILE_OVERLAP,
+    merge_overlap: float = ROBOFLOW_TILE_MERGE_OVERLAP,
+) -> list[dict]:
+    """
+    Predicțiile tuturor tile-urilor, în coordonate complete:
+    elimină box-urile tăiate de margini interioare, apoi NMS pe clasă între tile-uri
+    (overlap = aria intersecției / aria box-ului mai mic, ca în prefilter).
+    """
+    if len(plan.tiles) == 1:
+        return [to_full_resolution(p, plan.tiles[0], plan.scale) for p in per_tile[0]]
+
+    preds, tile_of = [], []
+    for ti, (tile, tile_preds) in enumerate(zip(plan.tiles, per_tile)):
+        for p in tile_preds:
+            if _cut_by_inner_edge(p, tile, plan, overlap):
+                continue
+            preds.append(to_full_resolution(p, tile, plan.scale))
+            tile_of.append(ti)
+    if not preds:
+        return []
+
+    boxes = np.array([
+        [p["x"] - p["width"] / 2, p["y"] - p["height"] / 2, p["x"] + p["width"] / 2, p["y"] + p["height"] / 2]
+        for p in preds
+    ], dtype=np.float64)
+    m = overlap_matrix(boxes)
+    m = np.maximum(m, m.T)
+    classes = [str(p.get("class", "")) for p in preds]
+    order = sorted(range(len(preds)), key=lambda i: -float(preds[i].get("confidence", 0.0)))
+
+    kept: list[int] = []
+    for i in order:
+        if any(
+            classes[k] == classes[i] and tile_of[k] != tile_of[i] and m[i, k] > merge_overlap
+            for k in kept
+        ):
+            continue
+        kept.append(i)
+    return [preds[i] for i in sorted(kept)]
+
+
+def infer_prepared(
+    image_path: Path,
+    post,
+    workers: int = ROBOFLOW_UPLOAD_WORKERS,
+) -> tuple[list[dict], UploadStats]:
+    """
+    post(jpeg_bytes) → lista de predicții pentru imaginea trimisă (apelul HTTP efectiv).
+    RETURN: predicțiile în coordonatele planului complet + statistici de upload.
+    """
+    t_start = time.perf_counter()
+    stats = UploadStats(original_bytes=Path(image_path).stat().st_size)
+
+    plan = prepare_upload(image_path)
+    stats.prepare_s = time.perf_counter() - t_start
+    stats.tiles = len(plan.tiles)
+    stats.scale = plan.scale
+    stats.full_width, stats.full_height = plan.full_width, plan.full_height
+    stats.bytes_sent = sum(len(t.data) for t in plan.tiles)
+
+    def send(tile: UploadTile) -> tuple[list[dict], float]:
+        t0 = time.perf_counter()
+        tile_preds = post(tile.data)
+        return tile_preds, time.perf_counter() - t0
+
+    if len(plan.tiles) == 1:
+        results = [send(plan.tiles[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(plan.tiles))) as executor:
+            results = list(executor.map(send, plan.tiles))
+
+    stats.request_s = [dt for _, dt in results]
+    preds = merge_tile_predictions([p for p, _ in results], plan)
+    stats.total_s = time.perf_counter() - t_start
+
+    print(f"       [ROBOFLOW] {stats.tiles} imagine(i), scală {plan.scale:.2f}: "
+          f"{stats.bytes_sent / 1e6:.2f} MB trimiși (original {stats.original_bytes / 1e6:.2f} MB), "
+          f"{stats.total_s:.2f}s")
+    return preds, stats
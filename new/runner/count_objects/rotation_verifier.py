@@ -0,0 +1,299 @@
+# new/runner/count_objects/rotation_verifier.py
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .config import (
+    ROTATION_VERIFIER_ENABLED,
+    ROTVERIFY_ACCEPT,
+    ROTVERIFY_REJECT,
+    ROTVERIFY_SELF_OVERLAP,
+)
+from .spatial_index import overlap_ratio
+from .template_bank import TemplateBank, decision_for, decisive_similarity, reject_similarity
+
+# Verificator local, invariant la rotație, pentru simbolurile oblice.
+#
+# Descriptor (tip Fourier–Mellin, fără partea de scală):
+#   crop → „cerneală" (255 - gri) → pad la pătrat (centrat) → resize DESC_SIZE
+#   → warpPolar în jurul centrului (rânduri = unghi, coloane = rază)
+#   → |FFT| pe axa unghiului: o rotație e o translație circulară pe unghi,
+#     iar magnitudinea FFT nu depinde de translație
+#   → primele DESC_HARMONICS armonici × DESC_RADII raze, zero-mean, normă 1
+#
+# Un candidat se compară cu TOATE template-urile printr-un singur produs
+# matricial (o comparație per template), în loc de 8 unghiuri × 3 scale
+# de matchTemplate sau de o cerere Gemini.
+
+DESC_SIZE = 64
+DESC_RADII = 24
+DESC_ANGLES = 64
+DESC_HARMONICS = 12
+
+
+def _square_ink(img: np.ndarray) -> np.ndarray:
+    """Gri → cerneală float32 pe un pătrat centrat (păstrează proporțiile la rotație)."""
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    ink = 255.0 - img.astype(np.float32)
+    h, w = ink.shape
+    side = max(h, w)
+    canvas = np.zeros((side, side), dtype=np.float32)
+    y0, x0 = (side - h) // 2, (side - w) // 2
+    canvas[y0:y0 + h, x0:x0 + w] = ink
+    return cv2.resize(canvas, (DESC_SIZE, DESC_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def rotation_descriptor(img: np.ndarray) -> np.ndarray:
+    """Descriptor invariant la rotație (vector float32, normă 1; zero pentru imagini goale)."""
+    if img.size == 0:
+        return np.zeros(DESC_HARMONICS * DESC_RADII, dtype=np.float32)
+
+    ink = _square_ink(img)
+    c = DESC_SIZE / 2.0
+    polar = cv2.warpPolar(
+        ink, (DESC_RADII, DESC_ANGLES), (c, c), c,
+        cv2.WARP_POLAR_LINEAR | cv2.INTER_LINEAR,
+    )
+    spectrum = np.abs(np.fft.rfft(polar, axis=0))[:DESC_HARMONICS]
+    desc = np.log1p(spectrum).astype(np.float32).ravel()
+    desc -= desc.mean()
+    norm = float(np.linalg.norm(desc))
+    return desc / norm if norm > 1e-6 else np.zeros_like(desc)
+
+
+class RotationVerifier:
+    """Descriptorii template-urilor unui tip, într-o singură matrice (N, D)."""
+
+    def __init__(self, descriptors: np.ndarray, boxes: list[tuple | None] | None = None) -> None:
+        self.descriptors = descriptors
+        # box-ul din plan al fiecărui template (None pentru bibliotecă / exporturi vechi)
+        self.boxes = boxes if boxes is not None else [None] * len(descriptors)
+
+    @classmethod
+    def from_images(cls, images: list[np.ndarray], boxes: list[tuple | None] | None = None) -> "RotationVerifier":
+        boxes = boxes if boxes is not None else [None] * len(images)
+        pairs = [(rotation_descriptor(im), b) for im, b in zip(images, boxes)]
+        pairs = [(d, b) for d, b in pairs if np.any(d)]
+        if not pairs:
+            return cls(np.zeros((0, DESC_HARMONICS * DESC_RADII), dtype=np.float32))
+        return cls(np.stack([d for d, _ in pairs]), [b for _, b in pairs])
+
+    @classmethod
+    def from_bank(cls, bank: TemplateBank) -> "RotationVerifier":
+        # rotațiile de 90° din bank au același descriptor → păstrăm una singură per sursă
+        images, boxes = [], []
+        for g in bank.groups:
+            seen = set()
+            for name, im in zip(g.names, g.images):
+                if name not in seen:
+                    seen.add(name)
+                    images.append(im)
+                    boxes.append(bank.source_boxes.get(name))
+        return cls.from_images(images, boxes)
+
+    def __len__(self) -> int:
+        return len(self.descriptors)
+
+    def _others(self, exclude_box) -> np.ndarray:
+        """Masca template-urilor care NU provin din exclude_box (crop-ul candidatului însuși)."""
+        keep = np.ones(len(self.descriptors), dtype=bool)
+        if exclude_box is None:
+            return keep
+        for i, b in enumerate(self.boxes):
+            if b is not None and min(overlap_ratio(b, exclude_box), overlap_ratio(exclude_box, b)) >= ROTVERIFY_SELF_OVERLAP:
+                keep[i] = False
+        return keep
+
+    def similarity(self, crop: np.ndarray, exclude_box=None) -> float:
+        """
+        Cosinusul maxim între crop și template-uri (0 dacă nu există template-uri).
+        exclude_box: box-ul crop-ului în plan – template-urile decupate din el nu contează
+        (altfel un candidat s-ar confirma cu propria imagine).
+        """
+        if not len(self.descriptors) or crop.size == 0:
+            return 0.0
+        descs = self.descriptors[self._others(exclude_box)]
+        if not len(descs):
+            return 0.0
+        return float(np.max(descs @ rotation_descriptor(crop)))
+
+    def verdict(
+        self,
+        crop: np.ndarray,
+        accept: float = ROTVERIFY_ACCEPT,
+        reject: float = ROTVERIFY_REJECT,
+        exclude_box=None,
+    ) -> tuple[bool | None, float]:
+        """(True / False dacă e sigur, None → pasul următor; similaritatea)."""
+        sim = self.similarity(crop, exclude_box)
+        if sim >= accept:
+            return True, sim
+        if sim <= reject:
+            return False, sim
+        return None, sim
+
+
+_VERIFIERS: "weakref.WeakKeyDictionary[TemplateBank, RotationVerifier]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def verifier_for_bank(bank: TemplateBank) -> RotationVerifier:
+    """Verificatorul unui bank (construit o dată, ținut cât trăiește bank-ul)."""
+    with _lock:
+        v = _VERIFIERS.get(bank)
+    if v is None:
+        v = RotationVerifier.from_bank(bank)
+        with _lock:
+            _VERIFIERS[bank] = v
+    return v
+
+
+def rotation_verifier_enabled() -> bool:
+    env = os.getenv("COUNT_OBJECTS_ROTATION_VERIFIER")
+    if env is not None:
+        return env not in ("0", "", "false", "False")
+    return ROTATION_VERIFIER_ENABLED
+
+
+# ------------------------------------------------------------
+# Raport precision / recall față de calea hibridă
+# ------------------------------------------------------------
+
+def precision_recall_report(
+    plan_image: Path,
+    detections_json: Path,
+    template_plan: tuple[Path, Path] | None = None,
+    accept: float = ROTVERIFY_ACCEPT,
+    reject: float = ROTVERIFY_REJECT,
+) -> dict:
+    """
+    Pentru fiecare (tip, predicție) din planul etichetat compară verificatorul cu
+    două referințe:
+      - "vs_hybrid": decizia template din calea hibridă (confirm = pozitiv,
+        reject = negativ); banda Gemini e raportată separat (ce ar decide local)
+      - "vs_class": clasa Roboflow a predicției corespunde tipului (pozitiv) sau nu
+
+    Template-urile verificatorului nu includ niciodată crop-ul evaluat:
+      - implicit leave-one-out: template-urile din planul evaluat, fără cele
+        decupate din box-ul predicției (exact ca la rulare, vezi similarity)
+      - template_plan=(plan.jpg, detections.json): template-urile vin dintr-un alt
+        plan (held-out), planul evaluat nu contribuie deloc
+    """
+    from .detector import _relevant_predictions  # evităm import circular
+    from .template_extraction import banks_from_detections
+
+    gray = cv2.imread(str(plan_image), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError(f"Imagine invalidă: {plan_image}")
+    gray = cv2.equalizeHist(gray)
+    preds = json.loads(Path(detections_json).read_text(encoding="utf-8")).get("predictions", [])
+
+    # calea hibridă: template-urile planului (ca în producție); verificatorul: vezi mai sus
+    hybrid_banks = banks_from_detections(plan_image, detections_json)
+    held_out = template_plan is not None
+    verifier_banks = banks_from_detections(*template_plan) if held_out else hybrid_banks
+
+    rows = []
+    t_hybrid = t_verifier = 0.0
+    for label, bank in sorted(hybrid_banks.items()):
+        if not bank.n_unique:
+            continue
+        verifier = verifier_for_bank(verifier_banks[label])
+        if not len(verifier):
+            continue
+        relevant = {id(p) for p in _relevant_predictions(label, preds)}
+        for p in preds:
+            x, y = int(p.get("x", 0)), int(p.get("y", 0))
+            w, h = int(p.get("width", 0)), int(p.get("height", 0))
+            conf = float(p.get("confidence", 0.0))
+            box = (max(0, x - w // 2), max(0, y - h // 2), x + w // 2, y + h // 2)
+            crop = gray[box[1]:box[3], box[0]:box[2]]
+            if crop.size == 0:
+                continue
+
+            t0 = time.perf_counter()
+            sim, _ = bank.bounded_similarity(
+                crop, stop_above=decisive_similarity(conf), stop_below=reject_similarity(conf)
+            )
+            t_hybrid += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            rot_sim = verifier.similarity(crop, exclude_box=None if held_out else box)
+            t_verifier += time.perf_counter() - t0
+
+            rows.append({
+                "type": label,
+                "class": p.get("class"),
+                "conf": round(conf, 3),
+                "hybrid": decision_for(conf, sim),
+                "same_class": id(p) in relevant,
+                "rot_sim": round(rot_sim, 4),
+            })
+
+    def _stats(a: float, r: float, positive, negative) -> dict:
+        pos = [x for x in rows if positive(x)]
+        neg = [x for x in rows if negative(x)]
+        rest = [x for x in rows if not positive(x) and not negative(x)]
+        tp = sum(1 for x in pos if x["rot_sim"] >= a)
+        fp = sum(1 for x in neg if x["rot_sim"] >= a)
+        tn = sum(1 for x in neg if x["rot_sim"] <= r)
+        fn = sum(1 for x in pos if x["rot_sim"] <= r)
+        stats = {
+            "accept": a,
+            "reject": r,
+            "positives": len(pos),
+            "negatives": len(neg),
+            "accept_precision": round(tp / (tp + fp), 4) if tp + fp else None,
+            "accept_recall": round(tp / len(pos), 4) if pos else None,
+            "reject_precision": round(tn / (tn + fn), 4) if tn + fn else None,
+            "reject_recall": round(tn / len(neg), 4) if neg else None,
+        }
+        if rest:
+            stats["band_decided_locally"] = sum(1 for x in rest if x["rot_sim"] >= a or x["rot_sim"] <= r)
+            stats["band_total"] = len(rest)
+        return stats
+
+    def _hybrid(a: float, r: float) -> dict:
+        return _stats(a, r, lambda x: x["hybrid"] == "confirm", lambda x: x["hybrid"] == "reject")
+
+    def _class(a: float, r: float) -> dict:
+        return _stats(a, r, lambda x: x["same_class"], lambda x: not x["same_class"])
+
+    sweep = [round(float(a), 2) for a in np.arange(0.5, 1.0, 0.05)]
+    return {
+        "evaluation": "held_out" if held_out else "leave_one_out",
+        "pairs": len(rows),
+        "hybrid_seconds": round(t_hybrid, 3),
+        "verifier_seconds": round(t_verifier, 3),
+        "vs_hybrid": _hybrid(accept, reject),
+        "vs_class": _class(accept, reject),
+        "sweep_vs_class": [_class(a, reject) for a in sweep],
+        "rows": rows,
+    }
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precision / recall verificator rotații vs calea hibridă")
+    parser.add_argument("plan_image")
+    parser.add_argument("detections_json")
+    parser.add_argument("--templates-from", nargs=2, metavar=("PLAN_IMAGE", "DETECTIONS_JSON"),
+                        help="template-uri dintr-un plan held-out (implicit: leave-one-out pe planul evaluat)")
+    parser.add_argument("--rows", action="store_true", help="Afișează și rândurile individuale")
+    args = parser.parse_args()
+
+    template_plan = tuple(Path(p) for p in args.templates_from) if args.templates_from else None
+    report = precision_recall_report(Path(args.plan_image), Path(args.detections_json), template_plan)
+    if not args.rows:
+        report.pop("rows")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
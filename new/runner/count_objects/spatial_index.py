@@ -0,0 +1,101 @@
+# new/runner/count_objects/spatial_index.py
+from __future__ import annotations
+
+import threading
+from typing import Iterator, Tuple
+
+Box = Tuple[int, int, int, int]
+
+# Latura unei celule din grilă (px). Uși / ferestre au tipic 40–250 px,
+# deci un box atinge puține celule, iar o interogare verifică doar vecinii.
+DEFAULT_CELL_SIZE = 128
+
+
+def overlap_ratio(a: Box, b: Box) -> float:
+    """Aria intersecției raportată la aria lui a (aceeași definiție ca overlap())."""
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+
+    dx = min(ax2, bx2) - max(ax1, bx1)
+    dy = min(ay2, by2) - max(ay1, by1)
+    if dx <= 0 or dy <= 0:
+        return 0.0
+
+    area_a = (ax2 - ax1) * (ay2 - ay1)
+    return (dx * dy) / area_a if area_a > 0 else 0.0
+
+
+class BoxIndex:
+    """
+    Index spațial pe grilă pentru box-urile acceptate.
+
+    - insert / query în ~O(1) (doar celulele atinse de box), în loc de scanare liniară
+    - try_insert(): verificare + inserare atomică (sub lock)
+    - iterarea păstrează ordinea inserării (commit-ul e determinist)
+    """
+
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE) -> None:
+        self.cell_size = max(1, int(cell_size))
+        self._boxes: list[Box] = []
+        self._labels: list[str] = []
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        self._lock = threading.RLock()
+
+    def _cells(self, box: Box) -> Iterator[tuple[int, int]]:
+        x1, y1, x2, y2 = box
+        cs = self.cell_size
+        for cx in range(int(x1) // cs, int(max(x1, x2 - 1)) // cs + 1):
+            for cy in range(int(y1) // cs, int(max(y1, y2 - 1)) // cs + 1):
+                yield cx, cy
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._boxes)
+
+    def __iter__(self) -> Iterator[Box]:
+        with self._lock:
+            return iter(list(self._boxes))
+
+    def items(self) -> list[tuple[str, Box]]:
+        with self._lock:
+            return list(zip(self._labels, self._boxes))
+
+    def insert(self, box: Box, label: str = "") -> int:
+        box = tuple(int(v) for v in box)  # type: ignore[assignment]
+        with self._lock:
+            idx = len(self._boxes)
+            self._boxes.append(box)
+            self._labels.append(label)
+            for cell in self._cells(box):
+                self._grid.setdefault(cell, []).append(idx)
+            return idx
+
+    def candidates(self, box: Box) -> list[int]:
+        """Indicii box-urilor care împart cel puțin o celulă cu box."""
+        with self._lock:
+            found: set[int] = set()
+            for cell in self._cells(box):
+                found.update(self._grid.get(cell, ()))
+            return sorted(found)
+
+    def max_overlap(self, box: Box) -> tuple[float, Box | None]:
+        """Cel mai mare overlap_ratio(box, existent) și box-ul respectiv."""
+        best, best_box = 0.0, None
+        with self._lock:
+            for i in self.candidates(box):
+                r = overlap_ratio(box, self._boxes[i])
+                if r > best:
+                    best, best_box = r, self._boxes[i]
+        return best, best_box
+
+    def try_insert(self, box: Box, threshold: float, label: str = "") -> tuple[bool, float]:
+        """
+        Inserează box-ul doar dacă nu se suprapune peste threshold cu unul existent.
+        Verificarea și inserarea sunt atomice.
+        """
+        with self._lock:
+            ratio, _ = self.max_overlap(box)
+            if ratio > threshold:
+                return False, ratio
+            self.insert(box, label)
+            return True, ratio
@@ -0,0 +1,572 @@
+# new/runner/count_objects/template_bank.py
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..config.settings import RUNNER_ROOT
+from .config import (
+    SCALES,
+    ROTATION_ANGLES,
+    TEMPLATE_SIMILARITY,
+    GEMINI_THRESHOLD_MIN,
+    GEMINI_THRESHOLD_MAX,
+    MATCH_BOUND_GRID,
+    MATCH_BOUND_MARGIN,
+)
+
+# Cache pe disc pentru bank-uri compilate (cheie = hash-ul conținutului template-urilor)
+BANK_CACHE_DIR = RUNNER_ROOT / "cache" / "template_banks"
+BANK_VERSION = 2
+BANK_CACHE_MAX = 32  # bank-uri ținute în memorie într-un worker cald
+
+
+def rotate_crop(crop: np.ndarray, angle: int) -> np.ndarray:
+    """Rotește crop-ul pe canvas extins (identic cu _match_single_rotation)."""
+    h, w = crop.shape
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+
+    cos, sin = abs(M[0, 0]), abs(M[0, 1])
+    new_w, new_h = int(h * sin + w * cos), int(h * cos + w * sin)
+
+    M[0, 2] += (new_w / 2) - (w / 2)
+    M[1, 2] += (new_h / 2) - (h / 2)
+
+    return cv2.warpAffine(crop, M, (new_w, new_h), borderValue=255)
+
+
+def decision_for(conf: float, sim: float) -> str:
+    """
+    Decizia din _process_object_type pentru un candidat:
+    "confirm" | "gemini" | "reject".
+    """
+    combined = (0.6 * conf) + (0.4 * sim)
+    if combined >= GEMINI_THRESHOLD_MAX and sim > TEMPLATE_SIMILARITY:
+        return "confirm"
+    if combined < GEMINI_THRESHOLD_MIN:
+        return "reject"
+    return "gemini"
+
+
+def decisive_similarity(conf: float) -> float | None:
+    """
+    Cea mai mică similaritate peste care decizia devine "confirm" și nu se mai
+    poate schimba (best_sim e un maxim, deci doar crește). None → pragul e
+    inaccesibil (> 1) și căutarea merge până la capăt.
+
+    Doar pragul de confirmare permite ieșirea anticipată: candidații din banda
+    Gemini / respinși au mereu maximul real (sim e feature în gemini_gate).
+    """
+    bound = max((GEMINI_THRESHOLD_MAX - 0.6 * conf) / 0.4, np.nextafter(TEMPLATE_SIMILARITY, 1.0))
+    if bound > 1.0:
+        return None
+    return float(max(bound, 0.0))
+
+
+def reject_similarity(conf: float) -> float | None:
+    """
+    Similaritatea sub care decizia e sigur "reject" (combined < GEMINI_THRESHOLD_MIN).
+    Dacă limita superioară a maximului e sub ea, căutarea se oprește.
+    None → respingerea din scor e imposibilă la acest confidence.
+    """
+    bound = (GEMINI_THRESHOLD_MIN - 0.6 * conf) / 0.4
+    return float(bound) if bound > 0.0 else None
+
+
+# ------------------------------------------------------------
+# Limita superioară a TM_CCOEFF_NORMED (scalele ≠ 1.0)
+#
+# Imaginea care alunecă („small") e împărțită într-o grilă de blocuri k. Pentru
+# fereastra W de la poziția p (cu media μ scăzută) și small S (normalizat):
+#     ncc(p) = Σ_k <S_k, (W-μ)_k> / (|S|·|W-μ|) ≤ Σ_k |S_k|·|(W-μ)_k| / (|S|·|W-μ|)
+# (Cauchy–Schwarz pe fiecare bloc). Energiile blocurilor ferestrei vin din
+# imagini integrale (sumă + sumă de pătrate), pentru toate pozițiile deodată.
+# Limita e sigură (≥ scorul real), deci un template a cărui limită nu bate
+# maximul curent nu mai trece prin matchTemplate – rezultatul rămâne exact.
+# ------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _block_edges(n: int) -> np.ndarray:
+    return np.unique(np.linspace(0, n, min(MATCH_BOUND_GRID, n) + 1).round().astype(np.int64))
+
+
+def _block_norms(images: np.ndarray) -> np.ndarray:
+    """
+    (N, h, w) → (N, K): |S_k| / |S| pe blocurile grilei, S = imagine cu media scăzută.
+    Imaginile constante primesc 1 pe toate blocurile (limită fără valoare, dar sigură).
+    """
+    n, h, w = images.shape
+    ey, ex = _block_edges(h), _block_edges(w)
+    flat = images.astype(np.float64)
+    flat = flat - flat.reshape(n, -1).mean(axis=1)[:, None, None]
+    sq = flat * flat
+    norms = np.stack([
+        sq[:, ey[a]:ey[a + 1], ex[b]:ex[b + 1]].sum(axis=(1, 2))
+        for a in range(len(ey) - 1) for b in range(len(ex) - 1)
+    ], axis=1)
+    total = norms.sum(axis=1)
+    out = np.sqrt(norms / np.where(total > 1e-9, total, 1.0)[:, None])
+    out[total <= 1e-9] = 1.0
+    return out
+
+
+def _window_energies(i1: np.ndarray, i2: np.ndarray, shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    i1, i2: imagini integrale (..., H+1, W+1) ale sumei și sumei de pătrate.
+    shape: (h, w) al imaginii care alunecă.
+    RETURN: (sqrt energii pe blocuri (..., K, P), sqrt energia ferestrei (..., P)),
+            energii calculate cu media ferestrei scăzută.
+    """
+    h, w = shape
+    py, px = i1.shape[-2] - h, i1.shape[-1] - w   # poziții = (H-h+1) × (W-w+1)
+    ey, ex = _block_edges(h), _block_edges(w)
+    # colțurile tuturor blocurilor, pentru toate pozițiile: (..., A+1, B+1, py, px)
+    rows = ey[:, None, None, None] + np.arange(py)[None, None, :, None]
+    cols = ex[None, :, None, None] + np.arange(px)[None, None, None, :]
+
+    def block_sums(ii: np.ndarray) -> np.ndarray:
+        g = ii[..., rows, cols]
+        return g[..., 1:, 1:, :, :] - g[..., :-1, 1:, :, :] - g[..., 1:, :-1, :, :] + g[..., :-1, :-1, :, :]
+
+    s1, s2 = block_sums(i1), block_sums(i2)                    # (..., A, B, py, px)
+    n = float(h * w)
+    mu = s1.sum(axis=(-4, -3)) / n                             # (..., py, px)
+    energy = s2.sum(axis=(-4, -3)) - n * mu * mu
+    nk = (np.diff(ey)[:, None] * np.diff(ex)[None, :]).astype(np.float64)[:, :, None, None]
+    e = s2 - 2.0 * mu[..., None, None, :, :] * s1 + nk * (mu * mu)[..., None, None, :, :]
+    lead = e.shape[:-4]
+    blocks = np.sqrt(np.maximum(e, 0.0)).reshape(*lead, -1, py * px)
+    return blocks, np.sqrt(np.maximum(energy, 0.0)).reshape(*lead, py * px)
+
+
+def _ratio_bound(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """max peste poziții din num / den; ferestre (aproape) constante → 1."""
+    flat = den < 1e-6
+    ratio = np.where(flat, 1.0, num / np.where(flat, 1.0, den))
+    return np.minimum(ratio.max(axis=-1), 1.0) + MATCH_BOUND_MARGIN
+
+
+def _integrals(img: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Imaginile integrale (sumă, sumă de pătrate) în float64."""
+    return cv2.integral2(img, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+
+@dataclass
+class TemplateGroup:
+    """Template-uri unice cu aceeași dimensiune (h, w)."""
+    shape: tuple[int, int]
+    names: list[str]
+    images: np.ndarray                 # (N, h, w) uint8
+    stack: np.ndarray = field(init=False)     # (N, h*w) float32, zero-mean / normă 1
+    constant: np.ndarray = field(init=False)  # (N,) bool – template fără varianță
+
+    def __post_init__(self) -> None:
+        flat = self.images.reshape(len(self.images), -1).astype(np.float32)
+        flat -= flat.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(flat, axis=1)
+        self.constant = norms < 1e-6
+        norms[self.constant] = 1.0
+        self.stack = flat / norms[:, None]
+        self._blocks: np.ndarray | None = None
+        self._windows: dict[tuple[int, int], tuple[np.ndarray, np.ndarray]] = {}
+
+    def upper_bounds(self, resized: np.ndarray, scale: float) -> np.ndarray:
+        """
+        Limită superioară (N,) a max TM_CCOEFF_NORMED între crop-ul redimensionat
+        și fiecare template, pe toate pozițiile (vezi comentariul de mai sus).
+        scale > 1: template-ul alunecă peste crop; scale < 1: crop-ul peste template.
+        """
+        h, w = self.shape
+        rh, rw = resized.shape[:2]
+        if scale > 1.0:
+            if rh < h or rw < w:
+                return np.ones(len(self.names)) + MATCH_BOUND_MARGIN
+            if self._blocks is None:
+                self._blocks = _block_norms(self.images)
+            blocks, energy = _window_energies(*_integrals(resized), (h, w))
+            num = self._blocks @ blocks                       # (N, P)
+            bounds = _ratio_bound(num, energy[None, :])
+        else:
+            if rh > h or rw > w:
+                return np.ones(len(self.names)) + MATCH_BOUND_MARGIN
+            # ferestrele template-urilor depind doar de forma crop-ului (aceeași la o scală dată)
+            windows = self._windows.get((rh, rw))
+            if windows is None:
+                pairs = [_integrals(im) for im in self.images]
+                windows = _window_energies(
+                    np.stack([a for a, _ in pairs]), np.stack([b for _, b in pairs]), (rh, rw)
+                )
+                self._windows[(rh, rw)] = windows
+            blocks, energy = windows
+            crop_blocks = _block_norms(resized[None])[0]       # (K,)
+            num = np.einsum("k,nkp->np", crop_blocks, blocks)
+            bounds = _ratio_bound(num, energy)
+        bounds[self.constant] = 1.0 + MATCH_BOUND_MARGIN
+        return bounds
+
+
+class TemplateBank:
+    """
+    Template-uri compilate o singură dată per folder de exporturi:
+      - cele 4 rotații din load_templates, deduplicate (doar variantele identice,
+        deci maximul e exact cel din match_with_rotation)
+      - grupate pe dimensiune → la scala 1.0 toate scorurile unui grup ies dintr-un
+        singur produs matricial (echivalent TM_CCOEFF_NORMED pe imagini egale)
+      - fiecare rotație a crop-ului e calculată o singură dată (nu per template × scală)
+      - scalele 0.9 / 1.1: grosier → fin; limita pe blocuri (upper_bounds) pentru toate
+        template-urile, apoi matchTemplate în ordinea limitelor, doar cât o limită
+        mai poate bate maximul curent (branch and bound, rezultat exact)
+    """
+
+    def __init__(
+        self,
+        groups: list[TemplateGroup],
+        n_source: int,
+        source_boxes: dict[str, tuple[int, int, int, int]] | None = None,
+    ) -> None:
+        self.groups = groups
+        self.n_source = n_source
+        # nume template → box-ul din plan din care a fost decupat (doar template-urile
+        # extrase din planul curent; verificatorul exclude crop-ul candidatului însuși)
+        self.source_boxes = source_boxes or {}
+
+    @property
+    def n_unique(self) -> int:
+        return sum(len(g.names) for g in self.groups)
+
+    def __len__(self) -> int:
+        return self.n_unique
+
+    @classmethod
+    def merge(cls, *banks: "TemplateBank") -> "TemplateBank":
+        """
+        Un singur bank din mai multe (ex. template-urile planului + biblioteca persistentă).
+        Grupurile sunt doar concatenate pe dimensiune, fără recompilare; dublurile între bank-uri nu se mai elimină.
+        """
+        by_shape: dict[tuple[int, int], list[TemplateGroup]] = {}
+        for b in banks:
+            for g in b.groups:
+                by_shape.setdefault(tuple(g.shape), []).append(g)
+
+        groups: list[TemplateGroup] = []
+        for shape, parts in by_shape.items():
+            if len(parts) == 1:
+                groups.append(parts[0])
+                continue
+            groups.append(TemplateGroup(
+                shape=shape,
+                names=[n for g in parts for n in g.names],
+                images=np.concatenate([g.images for g in parts]),
+            ))
+        return cls(
+            groups,
+            n_source=sum(b.n_source for b in banks),
+            source_boxes={k: v for b in banks for k, v in b.source_boxes.items()},
+        )
+
+    def sample_image(self) -> np.ndarray | None:
+        """Un template reprezentativ (prima variantă a primei surse, după nume) – ex. pentru Gemini."""
+        best: tuple[str, np.ndarray] | None = None
+        for g in self.groups:
+            for name, im in zip(g.names, g.images):
+                if best is None or name < best[0]:
+                    best = (name, im)
+        return None if best is None else best[1]
+
+    # ------------------------------------------------------------------
+    # Compilare
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def compile(cls, templates: list[dict]) -> "TemplateBank":
+        """Compilează lista întoarsă de load_templates()."""
+        by_shape: dict[tuple[int, int], list[tuple[str, np.ndarray]]] = {}
+        seen: set[bytes] = set()
+        for t in templates:
+            img = np.ascontiguousarray(t["image"], dtype=np.uint8)
+            key = hashlib.sha1(img.tobytes() + bytes(str(img.shape), "ascii")).digest()
+            if key in seen:
+                continue
+            seen.add(key)
+            by_shape.setdefault(img.shape[:2], []).append((t["name"], img))
+
+        groups: list[TemplateGroup] = []
+        for shape, items in by_shape.items():
+            group = TemplateGroup(
+                shape=shape,
+                names=[n for n, _ in items],
+                images=np.stack([im for _, im in items]),
+            )
+            # template-urile constante dau același scor (media e scăzută) → unul singur
+            keep = [i for i in range(len(items)) if not group.constant[i]]
+            keep += [i for i in range(len(items)) if group.constant[i]][:1]
+            keep.sort()
+            if len(keep) < len(items):
+                group = TemplateGroup(
+                    shape=shape,
+                    names=[items[i][0] for i in keep],
+                    images=group.images[keep],
+                )
+            groups.append(group)
+
+        source_boxes = {t["name"]: tuple(t["box"]) for t in templates if t.get("box") is not None}
+        return cls(groups, n_source=len(templates), source_boxes=source_boxes)
+
+    @classmethod
+    def from_folder(cls, folder: Path, use_disk_cache: bool = True) -> "TemplateBank":
+        """
+        Bank pentru un folder de exporturi; cache în proces + pe disc
+        (același set de template-uri între run-uri nu se recompilează).
+        """
+        from .preprocessing import load_templates
+
+        folder = Path(folder)
+        files = sorted(folder.glob("*.png")) if folder.exists() else []
+        digest = hashlib.sha1(f"v{BANK_VERSION}".encode())
+        for f in files:
+            digest.update(f.name.encode())
+            digest.update(f.read_bytes())
+        key = digest.hexdigest()
+
+        with _CACHE_LOCK:
+            bank = _BANK_CACHE.get(key)
+        if bank is not None:
+            return bank
+
+        cache_file = BANK_CACHE_DIR / f"{key}.npz"
+        if use_disk_cache and cache_file.exists():
+            try:
+                bank = cls.load(cache_file)
+            except Exception:
+                bank = None
+
+        if bank is None:
+            bank = cls.compile(load_templates(folder))
+            if use_disk_cache and bank.groups:
+                try:
+                    bank.save(cache_file)
+                except Exception:
+                    pass
+
+        with _CACHE_LOCK:
+            _BANK_CACHE[key] = bank
+            while len(_BANK_CACHE) > BANK_CACHE_MAX:
+                _BANK_CACHE.pop(next(iter(_BANK_CACHE)))
+        return bank
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"g{i}": g.images for i, g in enumerate(self.groups)}
+        meta = {
+            "version": BANK_VERSION,
+            "n_source": self.n_source,
+            "names": [g.names for g in self.groups],
+        }
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, meta=np.array(json.dumps(meta)), **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "TemplateBank":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != BANK_VERSION:
+                raise ValueError("versiune bank incompatibilă")
+            groups = [
+                TemplateGroup(shape=tuple(data[f"g{i}"].shape[1:3]), names=names, images=data[f"g{i}"])
+                for i, names in enumerate(meta["names"])
+            ]
+        return cls(groups, n_source=int(meta["n_source"]))
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def best_similarity(self, crop: np.ndarray, scales: list[float] = SCALES) -> float:
+        """Același scor ca match_with_rotation(crop, templates) – maximul real."""
+        return self.bounded_similarity(crop, scales=scales)[0]
+
+    def bounded_similarity(
+        self,
+        crop: np.ndarray,
+        stop_above: float | None = None,
+        stop_below: float | None = None,
+        scales: list[float] = SCALES,
+    ) -> tuple[float, bool]:
+        """
+        Ca best_similarity, cu ieșire anticipată când decizia e deja sigură:
+          - stop_above: maximul a atins pragul (vezi decisive_similarity)
+          - stop_below: limita superioară a maximului e sub prag (vezi reject_similarity)
+
+        Returns:
+            (similaritate, exact) – exact=False: căutarea s-a oprit anticipat,
+            valoarea e doar o limită inferioară a maximului (decizia e aceeași).
+        """
+        if not self.groups or crop.size == 0:
+            return 0.0, True
+
+        use_unit = any(abs(s - 1.0) < 1e-9 for s in scales)
+        other_scales = [s for s in scales if abs(s - 1.0) >= 1e-9]
+
+        best = 0.0
+        rotations = [rotate_crop(crop, a) for a in ROTATION_ANGLES]
+
+        # Pas 1 (vectorizat): scala 1.0 pentru toate rotațiile / template-urile
+        if use_unit:
+            for rot in rotations:
+                for g in self.groups:
+                    h, w = g.shape
+                    resized = cv2.resize(rot, (w, h)).astype(np.float32).ravel()
+                    resized -= resized.mean()
+                    norm = float(np.linalg.norm(resized))
+                    if norm < 1e-6:
+                        scores = np.where(g.constant, 1.0, 0.0)
+                    else:
+                        scores = np.where(g.constant, 1.0, g.stack @ (resized / norm))
+                    best = max(best, float(scores.max()))
+                    if stop_above is not None and best >= stop_above:
+                        return best, False
+
+        # Pas 2, grosier: limita pe blocuri pentru fiecare (scală, rotație, template).
+        # La scale < 1 crop-ul e mai mic decât template-ul și matchTemplate inversează
+        # rolurile (crop-ul alunecă peste template) – păstrăm exact același calcul.
+        pending: list[tuple[float, np.ndarray, np.ndarray]] = []   # (limită, big, small)
+        for scale in other_scales:
+            for rot in rotations:
+                for g in self.groups:
+                    h, w = g.shape
+                    try:
+                        resized = cv2.resize(rot, (int(w * scale), int(h * scale)))
+                    except cv2.error:
+                        continue
+                    for i, bound in enumerate(g.upper_bounds(resized, scale)):
+                        big, small = (resized, g.images[i]) if scale > 1.0 else (g.images[i], resized)
+                        pending.append((float(bound), big, small))
+        if not pending:
+            return best, True
+        pending.sort(key=lambda t: -t[0])
+
+        # decizia "reject" e sigură: nici cea mai bună limită nu ajunge la prag
+        if stop_below is not None and max(best, pending[0][0]) < stop_below:
+            return best, False
+
+        # Pas 2, fin: matchTemplate în ordinea limitelor, cât o limită mai poate bate maximul
+        for bound, big, small in pending:
+            if bound <= best:
+                break
+            try:
+                sim = float(cv2.minMaxLoc(cv2.matchTemplate(big, small, cv2.TM_CCOEFF_NORMED))[1])
+            except cv2.error:
+                continue
+            if sim > best:
+                best = sim
+                if stop_above is not None and best >= stop_above:
+                    return best, False
+
+        return best, True
+
+
+_BANK_CACHE: dict[str, TemplateBank] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def regression_report(plans: list[tuple[Path, Path]], max_pairs: int | None = None) -> dict:
+    """
+    Compară bank-ul compilat cu match_with_rotation pe unul sau mai multe planuri
+    etichetate (plan.jpg, detections.json); template-urile fiecărui plan sunt
+    extrase din propriile detecții, ca în producție:
+      - "value_mismatches": best_similarity (maximul real) diferit de legacy
+      - "decision_mismatches": decizia cu ieșire anticipată (bounded_similarity)
+        diferită de decizia legacy
+    max_pairs: limită de perechi (tip, predicție) per plan – legacy e lent.
+    """
+    import time
+
+    from .template_extraction import TYPE_FOLDERS, extract_type_templates
+    from .template_matching import match_with_rotation
+
+    rows = []
+    t_legacy = t_exact = t_bounded = 0.0
+    for plan_image, detections_json in plans:
+        bgr = cv2.imread(str(plan_image), cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError(f"Imagine invalidă: {plan_image}")
+        gray = cv2.equalizeHist(cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY))
+        preds = json.loads(Path(detections_json).read_text(encoding="utf-8")).get("predictions", [])
+
+        n_plan = 0
+        for folder in TYPE_FOLDERS.values():
+            templates = extract_type_templates(bgr, preds, folder)
+            if not templates:
+                continue
+            bank = TemplateBank.compile(templates)
+            for p in preds:
+                if max_pairs is not None and n_plan >= max_pairs:
+                    break
+                x, y = int(p.get("x", 0)), int(p.get("y", 0))
+                w, h = int(p.get("width", 0)), int(p.get("height", 0))
+                conf = float(p.get("confidence", 0.0))
+                crop = gray[max(0, y - h // 2): y + h // 2, max(0, x - w // 2): x + w // 2]
+                if crop.size == 0:
+                    continue
+                n_plan += 1
+
+                t0 = time.perf_counter()
+                legacy = match_with_rotation(crop, templates)
+                t_legacy += time.perf_counter() - t0
+
+                t0 = time.perf_counter()
+                exact = bank.best_similarity(crop)
+                t_exact += time.perf_counter() - t0
+
+                t0 = time.perf_counter()
+                bounded, is_exact = bank.bounded_similarity(
+                    crop, stop_above=decisive_similarity(conf), stop_below=reject_similarity(conf)
+                )
+                t_bounded += time.perf_counter() - t0
+
+                rows.append({
+                    "plan": str(plan_image),
+                    "type": folder,
+                    "class": p.get("class"),
+                    "conf": round(conf, 3),
+                    "legacy_sim": round(legacy, 4),
+                    "bank_sim": round(exact, 4),
+                    "bounded_sim": round(bounded, 4),
+                    "bounded_exact": is_exact,
+                    "legacy_decision": decision_for(conf, legacy),
+                    "bank_decision": decision_for(conf, bounded),
+                })
+
+    return {
+        "plans": len(plans),
+        "pairs": len(rows),
+        # scorurile rotunjite la 4 zecimale; diferențe doar din float32 (produsul matricial la scala 1.0)
+        "value_mismatches": [r for r in rows if abs(r["legacy_sim"] - r["bank_sim"]) > 2e-4],
+        "decision_mismatches": [r for r in rows if r["legacy_decision"] != r["bank_decision"]],
+        "early_exits": sum(1 for r in rows if not r["bounded_exact"]),
+        "legacy_seconds": round(t_legacy, 2),
+        "bank_seconds": round(t_exact, 2),
+        "bounded_seconds": round(t_bounded, 2),
+        "rows": rows,
+    }
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Regresie TemplateBank vs match_with_rotation")
+    parser.add_argument("--plan", nargs=2, action="append", required=True,
+                        metavar=("PLAN_IMAGE", "DETECTIONS_JSON"), help="plan etichetat (se poate repeta)")
+    parser.add_argument("--max-pairs", type=int, default=None)
+    args = parser.parse_args()
+
+    report = regression_report([(Path(a), Path(b)) for a, b in args.plan], max_pairs=args.max_pairs)
+    print(json.dumps({k: v for k, v in report.items() if k != "rows"}, indent=2, ensure_ascii=False))
@@ -0,0 +1,161 @@
+# new/runner/count_objects/template_extraction.py
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .config import TEMPLATE_EXPORT_DEBUG, LIBRARY_SUPPLEMENT_BELOW
+from .preprocessing import rotate_variants
+from .template_bank import TemplateBank
+
+# Extragerea template-urilor direct în memorie, din plan.jpg + detections.json.
+#
+# Înlocuiește drumul vechi: detections/crop_scripts scriau 16 PNG-uri per detecție
+# (4 rotații × 4 flip-uri), apoi load_templates le citea înapoi și le rotea încă
+# de 4 ori. Aici:
+#   - planul e citit o singură dată (sau primit deja citit), crop-urile sunt vederi numpy
+#   - equalizeHist o dată per crop (e invariant la rotații / flip-uri)
+#   - doar cele 8 variante distincte D4 (flipHV = rotație 180°, deci 8 din 16 erau dubluri)
+#   - aceleași rotații ca load_templates, apoi TemplateBank.compile elimină
+#     variantele identice / aproape identice
+# Exportul pe disc (aceleași nume ca înainte) rămâne doar pentru debugging.
+
+# folder de export / tip → filtrul de clasă din crop_scripts
+TYPE_FOLDERS = {
+    "door": "door",
+    "double-door": "double_door",
+    "window": "window",
+    "double-window": "double_window",
+}
+
+
+def class_matches(folder: str, cls: str) -> bool:
+    """Filtrul de clasă al scriptului crop_<folder>.py."""
+    cls = (cls or "").lower()
+    if folder == "door":
+        return "door" in cls and "double" not in cls
+    if folder == "double_door":
+        return "double-door" in cls
+    if folder == "window":
+        return "window" in cls and "double" not in cls
+    if folder == "double_window":
+        return "double-window" in cls
+    return False
+
+
+def crop_box(pred: dict, img_width: int, img_height: int) -> tuple[int, int, int, int]:
+    """Box-ul din crop_from_pred (cxcywh → x1,y1,x2,y2, trunchiere + clamp)."""
+    x, y = pred["x"], pred["y"]
+    w, h = pred["width"], pred["height"]
+    x1, y1 = max(0, int(x - w / 2)), max(0, int(y - h / 2))
+    x2, y2 = min(img_width, int(x + w / 2)), min(img_height, int(y + h / 2))
+    return x1, y1, x2, y2
+
+
+def d4_variants(img: np.ndarray) -> list[tuple[str, np.ndarray]]:
+    """
+    Cele 8 variante distincte (rotații 0/90/180/270 × fără / cu flip orizontal),
+    cu numele primei combinații echivalente din export_rotations.
+    """
+    out = []
+    for k, ang in enumerate((0, 90, 180, 270)):
+        rot = np.rot90(img, k)  # PIL rotate(ang, expand=True) = rotație trigonometrică
+        out.append((f"{ang}_none", rot))
+        out.append((f"{ang}_flipH", rot[:, ::-1]))
+    return [(name, np.ascontiguousarray(im)) for name, im in out]
+
+
+def extract_type_templates(plan_bgr: np.ndarray, predictions: list[dict], folder: str) -> list[dict]:
+    """Template-urile unui tip (același format ca load_templates), fără disc."""
+    h, w = plan_bgr.shape[:2]
+    preds = [p for p in predictions if class_matches(folder, str(p.get("class", "")))]
+
+    templates: list[dict] = []
+    for i, pred in enumerate(preds):
+        x1, y1, x2, y2 = crop_box(pred, w, h)
+        crop = plan_bgr[y1:y2, x1:x2]
+        if crop.size == 0:
+            continue
+        base = cv2.equalizeHist(png_gray(crop))
+        for suffix, variant in d4_variants(base):
+            for t in rotate_variants(variant, f"{folder}_{i:03d}_{suffix}.png"):
+                t["box"] = (x1, y1, x2, y2)   # sursa în plan (vezi TemplateBank.source_boxes)
+                templates.append(t)
+    return templates
+
+
+def png_gray(bgr: np.ndarray) -> np.ndarray:
+    """
+    Gri identic cu cv2.imread(png, IMREAD_GRAYSCALE) pe crop-urile exportate
+    (BT.601 în virgulă fixă, trunchiat), ca template-urile să fie aceleași ca pe
+    vechiul drum prin disc (cvtColor rotunjește și diferă cu ±1).
+    """
+    b, g, r = (bgr[..., i].astype(np.uint32) for i in range(3))
+    return ((r * 9798 + g * 19235 + b * 3735) >> 15).astype(np.uint8)
+
+
+def banks_from_detections(
+    plan_image: Path,
+    detections_json: Path,
+    plan_bgr: np.ndarray | None = None,
+    debug_export_dir: Path | None = None,
+    library=None,
+) -> dict[str, TemplateBank]:
+    """
+    TemplateBank per tip (cheile din TYPE_FOLDERS), construit în memorie.
+    plan_bgr: planul deja citit (detectorul îl are oricum), altfel e citit din plan_image.
+    debug_export_dir: dacă e dat (sau TEMPLATE_EXPORT_DEBUG), scrie și variantele pe disc.
+    library: TemplateLibrary – tipurile cu sub LIBRARY_SUPPLEMENT_BELOW detecții în plan
+             primesc și bank-ul precompilat din bibliotecă (vezi template_library.py).
+    """
+    data = json.loads(Path(detections_json).read_text(encoding="utf-8"))
+    predictions = data.get("predictions", []) if isinstance(data, dict) else data
+    if plan_bgr is None:
+        plan_bgr = cv2.imread(str(plan_image), cv2.IMREAD_COLOR)
+        if plan_bgr is None:
+            raise ValueError(f"Imagine invalidă: {plan_image}")
+
+    if debug_export_dir is None and template_export_debug():
+        debug_export_dir = Path(detections_json).parent / "exports"
+
+    banks: dict[str, TemplateBank] = {}
+    for label, folder in TYPE_FOLDERS.items():
+        templates = extract_type_templates(plan_bgr, predictions, folder)
+        if debug_export_dir is not None:
+            export_templates(templates, Path(debug_export_dir) / folder)
+        bank = TemplateBank.compile(templates)
+
+        n_plan = sum(1 for p in predictions if class_matches(folder, str(p.get("class", ""))))
+        if library is not None and n_plan < LIBRARY_SUPPLEMENT_BELOW:
+            lib_bank = library.bank_for(label)
+            if lib_bank.n_unique:
+                print(f"       [LIBRARY] {label}: {n_plan} detecții în plan → +{lib_bank.n_unique} template-uri din bibliotecă")
+                bank = TemplateBank.merge(bank, lib_bank)
+        banks[label] = bank
+    return banks
+
+
+def export_templates(templates: list[dict], out_dir: Path) -> int:
+    """
+    Export pentru debugging: câte un PNG per augmentare D4 (varianta 0° din rotate_variants),
+    cu numele vechilor crop_scripts. Imaginile sunt deja egalizate.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    seen: set[str] = set()
+    for t in templates:
+        if t["name"] in seen:
+            continue
+        seen.add(t["name"])
+        cv2.imwrite(str(out_dir / t["name"]), t["image"])
+    return len(seen)
+
+
+def template_export_debug() -> bool:
+    env = os.getenv("COUNT_OBJECTS_EXPORT_TEMPLATES")
+    if env is not None:
+        return env not in ("0", "", "false", "False")
+    return TEMPLATE_EXPORT_DEBUG
@@ -0,0 +1,476 @@
+# new/runner/count_objects/template_library.py
+# ------------------------------------------------------------
+# Bibliotecă persistentă de template-uri, comună tuturor run-urilor.
+#
+# - intrări = crop-uri de bază (egalizate, neaugmentate) per tip, cu contoare
+#   de verificare: confirmed (detecții confirmate de template / Gemini) și
+#   rejected (candidați respinși de verificare care seamănă cu intrarea)
+# - curare: crop-urile confirmate aproape identice cu o intrare existentă
+#   (descriptor ≥ LIBRARY_MATCH_COS) doar îi cresc contorul; intrările cu
+#   scor mic / nefolosite ies primele când se depășește LIBRARY_MAX_PER_TYPE
+# - fișier .npz versionat (fără pickle): pixeli într-un buffer uint8 + offset-uri,
+#   descriptorii de rotație (float16) și bank-urile per tip deja compilate
+#   (variantele augmentate, deduplicate) → încărcarea la pornirea worker-ului
+#   e doar np.load + normalizare, fără augmentare / dedup; limitele pe blocuri
+#   pentru scalele 0.9 / 1.1 (template_bank.upper_bounds) se calculează la prima
+#   utilizare, nu se stochează
+# - se folosește ALĂTURI de template-urile planului: tipurile cu puține
+#   detecții în planul curent primesc și cele mai bune intrări din bibliotecă
+# - scrieri între procese: lock pe fișier (<nume>.lock) + înlocuire atomică;
+#   actualizările doar de contoare merg într-un jurnal JSONL (<nume>.journal.jsonl),
+#   .npz-ul se rescrie doar la intrări noi / eliminate sau când jurnalul e plin
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+from .config import (
+    TEMPLATE_LIBRARY_ENABLED,
+    LIBRARY_PATH,
+    LIBRARY_MAX_PER_TYPE,
+    LIBRARY_TEMPLATES_PER_TYPE,
+    LIBRARY_MATCH_COS,
+    LIBRARY_MAX_AGE_DAYS,
+    LIBRARY_JOURNAL_MAX,
+)
+from .preprocessing import rotate_variants
+from .rotation_verifier import rotation_descriptor
+from .template_bank import TemplateBank, TemplateGroup
+
+LIBRARY_VERSION = 1
+
+# numele template-urilor din bibliotecă sortează după cele ale planului
+# ('~' > litere), deci TemplateBank.sample_image() rămâne un exemplu din plan
+LIBRARY_NAME_PREFIX = "~lib_"
+
+
+@dataclass
+class LibraryEntry:
+    key: str              # sha1 al pixelilor
+    label: str            # door / double-door / window / double-window
+    shape: tuple[int, int]
+    offset: int           # în bufferul de pixeli
+    confirmed: int = 0
+    rejected: int = 0
+    source: str = ""      # planul din care provine
+    added_at: str = ""
+    last_seen: str = ""
+
+    @property
+    def score(self) -> float:
+        """Scor Laplace: (confirmări + 1) / (verificări + 2)."""
+        return (self.confirmed + 1) / (self.confirmed + self.rejected + 2)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def library_enabled() -> bool:
+    env = os.getenv("COUNT_OBJECTS_TEMPLATE_LIBRARY")
+    if env is not None:
+        return env not in ("0", "", "false", "False")
+    return TEMPLATE_LIBRARY_ENABLED
+
+
+class TemplateLibrary:
+    """Intrările + pixelii + descriptorii; bank-urile compilate sunt ținute separat."""
+
+    def __init__(
+        self,
+        entries: list[LibraryEntry] | None = None,
+        pixels: np.ndarray | None = None,
+        descriptors: np.ndarray | None = None,
+        banks: dict[str, TemplateBank] | None = None,
+    ) -> None:
+        self.entries = entries or []
+        self.pixels = pixels if pixels is not None else np.zeros(0, dtype=np.uint8)
+        self.descriptors = descriptors if descriptors is not None else np.zeros((0, 0), dtype=np.float16)
+        self._banks = banks or {}
+
+    # ------------------------------------------------------------------
+    # Acces
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def image(self, entry: LibraryEntry) -> np.ndarray:
+        h, w = entry.shape
+        return self.pixels[entry.offset: entry.offset + h * w].reshape(h, w)
+
+    def top_entries(self, label: str, k: int = LIBRARY_TEMPLATES_PER_TYPE) -> list[LibraryEntry]:
+        """Cele mai bune k intrări ale unui tip (scor, confirmări, cheie – determinist)."""
+        entries = [e for e in self.entries if e.label == label]
+        entries.sort(key=lambda e: (-e.score, -e.confirmed, e.key))
+        return entries[:k]
+
+    def bank_for(self, label: str) -> TemplateBank:
+        """Bank-ul compilat al unui tip (din fișier sau compilat la cerere)."""
+        bank = self._banks.get(label)
+        if bank is None:
+            bank = self._compile_bank(label)
+            self._banks[label] = bank
+        return bank
+
+    def _compile_bank(self, label: str) -> TemplateBank:
+        from .template_extraction import d4_variants  # evităm import circular
+
+        templates: list[dict] = []
+        for e in self.top_entries(label):
+            for suffix, variant in d4_variants(self.image(e)):
+                templates += rotate_variants(variant, f"{LIBRARY_NAME_PREFIX}{label}_{e.key[:10]}_{suffix}.png")
+        return TemplateBank.compile(templates)
+
+    # ------------------------------------------------------------------
+    # Curare
+    # ------------------------------------------------------------------
+
+    def _match(self, label: str, desc: np.ndarray) -> int | None:
+        """Indicele intrării de același tip cu descriptorul cel mai apropiat (peste prag)."""
+        if not len(self.entries):
+            return None
+        idx = [i for i, e in enumerate(self.entries) if e.label == label]
+        if not idx:
+            return None
+        sims = self.descriptors[idx].astype(np.float32) @ desc
+        j = int(np.argmax(sims))
+        return idx[j] if float(sims[j]) >= LIBRARY_MATCH_COS else None
+
+    def update(self, label: str, crops: list[np.ndarray], confirmed: bool, source: str = "") -> dict:
+        """
+        Crop-uri egalizate + rezultatul verificării lor:
+          - confirmed=True: crește contorul intrării similare sau adaugă o intrare nouă
+          - confirmed=False: crește `rejected` pentru intrarea similară (nu se adaugă nimic)
+        """
+        stats = {"added": 0, "credited": 0, "debited": 0}
+        now = _now()
+        pixels = [self.pixels]
+        offset = len(self.pixels)
+        descs = [self.descriptors] if len(self.descriptors) else []
+
+        for crop in crops:
+            if crop.size == 0:
+                continue
+            desc = rotation_descriptor(crop)
+            if not np.any(desc):
+                continue
+            hit = self._match(label, desc)
+            if hit is not None:
+                e = self.entries[hit]
+                if confirmed:
+                    e.confirmed += 1
+                    stats["credited"] += 1
+                else:
+                    e.rejected += 1
+                    stats["debited"] += 1
+                e.last_seen = now
+                continue
+            if not confirmed:
+                continue
+
+            crop = np.ascontiguousarray(crop, dtype=np.uint8)
+            key = hashlib.sha1(crop.tobytes() + str(crop.shape).encode()).hexdigest()
+            self.entries.append(LibraryEntry(
+                key=key, label=label, shape=tuple(crop.shape[:2]), offset=offset,
+                confirmed=1, source=source, added_at=now, last_seen=now,
+            ))
+            pixels.append(crop.ravel())
+            offset += crop.size
+            descs.append(desc[None, :].astype(np.float16))
+            # descriptorii trebuie să fie la zi pentru _match pe crop-urile următoare
+            self.pixels = np.concatenate(pixels)
+            pixels = [self.pixels]
+            self.descriptors = np.concatenate(descs)
+            descs = [self.descriptors]
+            stats["added"] += 1
+
+        if any(stats.values()):
+            self._banks.pop(label, None)
+        return stats
+
+    def counters(self) -> dict[str, tuple[int, int, str]]:
+        """cheie → (confirmed, rejected, last_seen) – pentru deltele din jurnal."""
+        return {e.key: (e.confirmed, e.rejected, e.last_seen) for e in self.entries}
+
+    def apply_journal(self, records: list[dict]) -> int:
+        """Aplică deltele de contoare din jurnal. RETURN: numărul de înregistrări aplicate."""
+        by_key = {e.key: e for e in self.entries}
+        applied = 0
+        for r in records:
+            e = by_key.get(r.get("key"))
+            if e is None:
+                continue
+            e.confirmed += int(r.get("confirmed", 0))
+            e.rejected += int(r.get("rejected", 0))
+            e.last_seen = max(e.last_seen, r.get("last_seen", ""))
+            # scorurile s-au schimbat → top_entries (și bank-ul) se recalculează la cerere
+            self._banks.pop(e.label, None)
+            applied += 1
+        return applied
+
+    def prune(self) -> int:
+        """Elimină intrările vechi și pe cele cu scor mic peste LIBRARY_MAX_PER_TYPE; compactează bufferul."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=LIBRARY_MAX_AGE_DAYS)).isoformat().replace("+00:00", "Z")
+        keep: list[int] = []
+        for label in sorted({e.label for e in self.entries}):
+            idx = [i for i, e in enumerate(self.entries) if e.label == label and e.last_seen >= cutoff]
+            idx.sort(key=lambda i: (-self.entries[i].score, -self.entries[i].confirmed, self.entries[i].key))
+            keep += idx[:LIBRARY_MAX_PER_TYPE]
+        keep.sort()
+
+        removed = len(self.entries) - len(keep)
+        if removed == 0:
+            return 0
+
+        images = [self.image(self.entries[i]) for i in keep]
+        entries, offset = [], 0
+        for i, im in zip(keep, images):
+            e = self.entries[i]
+            e.offset = offset
+            offset += im.size
+            entries.append(e)
+        self.pixels = np.concatenate([im.ravel() for im in images]) if images else np.zeros(0, dtype=np.uint8)
+        self.descriptors = self.descriptors[keep] if keep else np.zeros((0, 0), dtype=np.float16)
+        self.entries = entries
+        self._banks.clear()
+        return removed
+
+    # ------------------------------------------------------------------
+    # Persistență
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path = LIBRARY_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        labels = sorted({e.label for e in self.entries})
+        arrays: dict[str, np.ndarray] = {"pixels": self.pixels, "descriptors": self.descriptors}
+        bank_meta: dict[str, list] = {}
+        for label in labels:
+            bank = self.bank_for(label)
+            groups_meta = []
+            for gi, g in enumerate(bank.groups):
+                arrays[f"{label}/g{gi}"] = g.images
+                groups_meta.append(g.names)
+            bank_meta[label] = [bank.n_source, groups_meta]
+
+        meta = {
+            "version": LIBRARY_VERSION,
+            "saved_at": _now(),
+            "entries": [dict(asdict(e), shape=list(e.shape)) for e in self.entries],
+            "banks": bank_meta,
+        }
+        # nume temporar unic per proces; os.replace e atomic (cititorii văd fișierul vechi sau pe cel nou)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = LIBRARY_PATH) -> "TemplateLibrary":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != LIBRARY_VERSION:
+                raise ValueError("versiune bibliotecă incompatibilă")
+            entries = [LibraryEntry(**dict(e, shape=tuple(e["shape"]))) for e in meta["entries"]]
+            banks = {}
+            for label, (n_source, groups_meta) in meta["banks"].items():
+                groups = []
+                for gi, names in enumerate(groups_meta):
+                    images = data[f"{label}/g{gi}"]
+                    groups.append(TemplateGroup(
+                        shape=tuple(images.shape[1:3]),
+                        names=names,
+                        images=images,
+                    ))
+                banks[label] = TemplateBank(groups, n_source=int(n_source))
+            return cls(entries, data["pixels"], data["descriptors"], banks)
+
+    def stats(self) -> dict:
+        per_type: dict[str, dict] = {}
+        for e in self.entries:
+            s = per_type.setdefault(e.label, {"entries": 0, "confirmed": 0, "rejected": 0})
+            s["entries"] += 1
+            s["confirmed"] += e.confirmed
+            s["rejected"] += e.rejected
+        return {"entries": len(self.entries), "bytes": int(self.pixels.nbytes), "per_type": per_type}
+
+
+# ------------------------------------------------------------------
+# Instanța comună per proces (încărcată o dată, reîncărcată dacă fișierul s-a schimbat)
+# ------------------------------------------------------------------
+
+_library: tuple[tuple, TemplateLibrary] | None = None
+_lock = threading.Lock()
+
+
+def _journal_path(path: Path) -> Path:
+    return path.with_suffix(".journal.jsonl")
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Lock exclusiv între procese (job-uri / workeri paraleli) pe <path>.lock."""
+    lock_path = path.with_suffix(".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_journal(path: Path) -> list[dict]:
+    journal = _journal_path(path)
+    if not journal.exists():
+        return []
+    records = []
+    for line in journal.read_text(encoding="utf-8").splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue      # linie scrisă parțial de un proces oprit
+    return records
+
+
+def _state(path: Path) -> tuple:
+    """Versiunea fișierelor de pe disc (.npz + jurnal) – cheia cache-ului din proces."""
+    journal = _journal_path(path)
+    return path.stat().st_mtime_ns, journal.stat().st_size if journal.exists() else 0
+
+
+def _load_current(path: Path) -> TemplateLibrary:
+    lib = TemplateLibrary.load(path)
+    lib.apply_journal(_read_journal(path))
+    return lib
+
+
+def get_library(path: Path = LIBRARY_PATH) -> TemplateLibrary | None:
+    """Biblioteca curentă (None dacă e dezactivată sau goală / invalidă)."""
+    global _library
+    if not library_enabled() or not path.exists():
+        return None
+    state = _state(path)
+    with _lock:
+        if _library is not None and _library[0] == state:
+            return _library[1]
+        try:
+            lib = _load_current(path)
+        except Exception as e:
+            print(f"       [LIBRARY] Bibliotecă invalidă ({path}): {e}. O ignor.")
+            return None
+        _library = (state, lib)
+        return lib
+
+
+def update_library(
+    outcomes: dict[str, dict[str, list[np.ndarray]]],
+    source: str = "",
+    path: Path = LIBRARY_PATH,
+) -> dict:
+    """
+    outcomes: {label: {"confirmed": [crop, ...], "rejected": [crop, ...]}} – crop-uri egalizate.
+    Sub lock (thread + fișier, deci și între procese): reîncarcă .npz + jurnal, aplică.
+      - intrări noi / jurnal plin → curăță și rescrie .npz-ul, golește jurnalul
+      - doar contoare schimbate → o linie per intrare în jurnal (fără rescrierea .npz)
+    """
+    global _library
+    if not library_enabled():
+        return {}
+    with _lock, _file_lock(path):
+        lib = TemplateLibrary()
+        journal = _read_journal(path)
+        if path.exists():
+            try:
+                lib = TemplateLibrary.load(path)
+                lib.apply_journal(journal)
+            except Exception as e:
+                print(f"       [LIBRARY] Bibliotecă invalidă ({path}): {e}. O reconstruiesc.")
+                lib, journal = TemplateLibrary(), []
+
+        before = lib.counters()
+        stats: dict[str, dict] = {}
+        for label, by_outcome in outcomes.items():
+            a = lib.update(label, by_outcome.get("confirmed", []), True, source)
+            b = lib.update(label, by_outcome.get("rejected", []), False, source)
+            stats[label] = {k: a[k] + b[k] for k in a}
+
+        removed = 0
+        added = sum(s["added"] for s in stats.values())
+        if added or not path.exists() or len(journal) >= LIBRARY_JOURNAL_MAX:
+            removed = lib.prune()
+            lib.save(path)
+            _journal_path(path).unlink(missing_ok=True)
+        else:
+            deltas = []
+            for e in lib.entries:
+                c, r, _ = before[e.key]
+                if (e.confirmed, e.rejected) != (c, r):
+                    deltas.append({"key": e.key, "label": e.label, "confirmed": e.confirmed - c,
+                                   "rejected": e.rejected - r, "last_seen": e.last_seen})
+            if deltas:
+                with open(_journal_path(path), "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(d) + "\n" for d in deltas))
+        if path.exists():
+            _library = (_state(path), lib)
+    if removed:
+        stats["_pruned"] = {"removed": removed}
+    return stats
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Bibliotecă persistentă de template-uri (count_objects)")
+    parser.add_argument("command", choices=["stats", "seed"])
+    parser.add_argument("--plan", help="seed: plan.jpg")
+    parser.add_argument("--detections", help="seed: detections.json")
+    parser.add_argument("--path", default=str(LIBRARY_PATH))
+    args = parser.parse_args()
+
+    lib_path = Path(args.path)
+    if args.command == "seed":
+        from .template_extraction import TYPE_FOLDERS, class_matches, crop_box, png_gray
+
+        plan_bgr = cv2.imread(args.plan, cv2.IMREAD_COLOR)
+        preds = json.loads(Path(args.detections).read_text(encoding="utf-8")).get("predictions", [])
+        h, w = plan_bgr.shape[:2]
+        outcomes = {}
+        for label, folder in TYPE_FOLDERS.items():
+            crops = []
+            for p in preds:
+                if class_matches(folder, str(p.get("class", ""))):
+                    x1, y1, x2, y2 = crop_box(p, w, h)
+                    crops.append(cv2.equalizeHist(png_gray(plan_bgr[y1:y2, x1:x2])))
+            outcomes[label] = {"confirmed": crops}
+        print(json.dumps(update_library(outcomes, source=args.plan, path=lib_path), indent=2))
+
+    t0 = time.perf_counter()
+    lib = _load_current(lib_path)
+    load_ms = (time.perf_counter() - t0) * 1000
+    print(json.dumps(dict(lib.stats(), load_ms=round(load_ms, 2)), indent=2))
@@ -3,18 +3,20 @@ from __future__ import annotations
 
 import cv2
 import numpy as np
-from typing import Tuple, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple, List, TYPE_CHECKING
 
 from .config import (
     SCALES, 
     ROTATION_ANGLES, 
-    MAX_TEMPLATE_WORKERS, 
-    MAX_DETECTION_WORKERS,
-    STAIRS_OVERLAP_THRESHOLD,
-    DETECTION_OVERLAP_THRESHOLD
+    STAIRS_OVERLAP_THRESHOLD
 )
 
+from .executor import map_cpu, submit_cpu, in_cpu_worker
+from .template_bank import decisive_similarity, reject_similarity
+
+if TYPE_CHECKING:
+    from .template_bank import TemplateBank
+
 
 def _match_single_rotation(crop: np.ndarray, template: dict, scale: float, angle: int) -> float:
     """Verifică o singură combinație (rotație + template + scale)."""
@@ -42,7 +44,7 @@ def _match_single_rotation(crop: np.ndarray, template: dict, scale: float, angle
 
 
 def match_with_rotation(crop: np.ndarray, templates: list[dict], scales: list[float] = SCALES) -> float:
-    """Template matching cu rotație crop + scale variations - PARALELIZAT COMPLET."""
+    """Template matching cu rotație crop + scale variations (varianta brută, fără TemplateBank)."""
     if not templates:
         return 0.0
     
@@ -52,21 +54,17 @@ def match_with_rotation(crop: np.ndarray, templates: list[dict], scales: list[fl
             for scale in scales:
                 tasks.append((crop, template, scale, angle))
     
-    best_sim = 0.0
-    max_workers = min(MAX_TEMPLATE_WORKERS, len(tasks))
+    # din interiorul executorului comun rulăm secvențial (fără pool-uri imbricate)
+    if in_cpu_worker():
+        return max([0.0] + [_match_single_rotation(c, t, s, a) for c, t, s, a in tasks])
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(_match_single_rotation, c, t, s, a): None
-            for c, t, s, a in tasks
-        }
-        
-        for future in as_completed(futures):
-            try:
-                sim = future.result()
-                best_sim = max(best_sim, sim)
-            except Exception:
-                pass
+    best_sim = 0.0
+    futures = [submit_cpu(_match_single_rotation, c, t, s, a) for c, t, s, a in tasks]
+    for future in futures:
+        try:
+            best_sim = max(best_sim, future.result())
+        except Exception:
+            pass
     
     return best_sim
 
@@ -91,20 +89,25 @@ def overlap(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float
 def process_detections_parallel(
     detections: List[dict],
     gray_image: np.ndarray,
-    templates: list[dict],
-    used_boxes: list[Tuple[int, int, int, int]],
+    templates: "list[dict] | TemplateBank",
     img_width: int,
     img_height: int,
-    has_stairs: bool = False
+    stairs_box: Optional[Tuple[int, int, int, int]] = None,
 ) -> List[dict]:
     """
     Procesează toate detecțiile în paralel (template matching simultan).
-    
+
+    Faza paralelă nu citește / scrie stare comună: suprapunerea cu alte
+    detecții acceptate se decide ulterior, în commit-ul determinist
+    (BoxIndex, ordonat după confidence) din detector.
+
     Args:
-        has_stairs: True dacă primul element din used_boxes e scara
-    
+        templates: TemplateBank compilat (rapid, cu ieșire anticipată) sau
+                   lista brută din load_templates (match_with_rotation)
+        stairs_box: box-ul scării (dacă există) – verificare statică, mai strictă
+
     Returns:
-        List de dicționare cu results pentru fiecare detecție
+        List de dicționare cu results pentru fiecare detecție (ordonată după idx)
     """
     def process_one(det_data):
         """Helper pentru procesare paralelă."""
@@ -124,8 +127,7 @@ def process_detections_parallel(
         bbox = (x1, y1, x2, y2)
         
         # Check overlap cu scara (mai strict)
-        if has_stairs and used_boxes:
-            stairs_box = used_boxes[0]
+        if stairs_box is not None:
             overlap_ratio = overlap(bbox, stairs_box)
             if overlap_ratio > STAIRS_OVERLAP_THRESHOLD:
                 return {
@@ -138,21 +140,6 @@ def process_detections_parallel(
                     "skip_reason": f"stairs_overlap_{overlap_ratio:.2f}"
                 }
         
-        # Check overlap cu alte detecții (mai permisiv)
-        other_boxes = used_boxes[1:] if has_stairs else used_boxes
-        for other_box in other_boxes:
-            overlap_ratio = overlap(bbox, other_box)
-            if overlap_ratio > DETECTION_OVERLAP_THRESHOLD:
-                return {
-                    "idx": idx,
-                    "bbox": bbox,
-                    "conf": conf,
-                    "best_sim": 0.0,
-                    "combined": 0.0,
-                    "skip": True,
-                    "skip_reason": f"detection_overlap_{overlap_ratio:.2f}"
-                }
-        
         # Extract crop
         crop = gray_image[y1:y2, x1:x2]
         if crop.size == 0:
@@ -166,8 +153,16 @@ def process_detections_parallel(
                 "skip_reason": "empty_crop"
             }
         
-        # Template matching (paralel intern)
-        best_sim = match_with_rotation(crop, templates)
+        # Template matching
+        sim_exact = True
+        if isinstance(templates, list):
+            best_sim = match_with_rotation(crop, templates)
+        else:
+            # bank compilat: se oprește când candidatul e sigur confirmat / respins
+            # (sim_exact=False → best_sim e doar o limită inferioară)
+            best_sim, sim_exact = templates.bounded_similarity(
+                crop, stop_above=decisive_similarity(conf), stop_below=reject_similarity(conf)
+            )
         combined = (0.6 * conf) + (0.4 * best_sim)
         
         return {
@@ -175,25 +170,25 @@ def process_detections_parallel(
             "bbox": bbox,
             "conf": conf,
             "best_sim": best_sim,
+            "sim_exact": sim_exact,
             "combined": combined,
             "skip": False
         }
     
-    results = []
-    
-    with ThreadPoolExecutor(max_workers=MAX_DETECTION_WORKERS) as executor:
-        indexed_detections = list(enumerate(detections, 1))
-        futures = {
-            executor.submit(process_one, det): det 
-            for det in indexed_detections
-        }
-        
-        for future in as_completed(futures):
-            try:
-                result = future.result()
-                results.append(result)
-            except Exception as e:
-                print(f"       [ERR] Processing detection: {e}")
+    # toate detecțiile → executorul CPU comun (mărginit la nivel de proces)
+    processed = _map_safe(process_one, list(enumerate(detections, 1)))
+    results = [r for r in processed if r is not None]
     
     results.sort(key=lambda r: r["idx"])
-    return results
\ No newline at end of file
+    return results
+
+
+def _map_safe(fn, items: list) -> list:
+    """map_cpu care loghează eroarea unui element fără să le piardă pe celelalte."""
+    def wrapped(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            print(f"       [ERR] Processing detection: {e}")
+            return None
+    return map_cpu(wrapped, items)
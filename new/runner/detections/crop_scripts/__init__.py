@@ -1,4 +0,0 @@
-# new/runner/detections/crop_scripts/__init__.py
-from . import crop_door, crop_double_door, crop_window, crop_double_window
-
-__all__ = ["crop_door", "crop_double_door", "crop_window", "crop_double_window"]
\ No newline at end of file
@@ -14,6 +14,7 @@ from ..config.settings import (
     PlanInfo,
 )
 
+from ..plan_index import reused_result
 from .roboflow_import import run_roboflow_import
 from .object_crops import run_object_crops
 
@@ -54,6 +55,14 @@ def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) ->
     work_dir = _prepare_workdir(plan)
     env = _build_env(run_id, plan.plan_id)
 
+    if reused_result(work_dir, "export_objects/detections.json"):
+        return DetectionJobResult(
+            plan_id=plan.plan_id,
+            work_dir=work_dir,
+            success=True,
+            message="Refolosit din indexul de planuri (fără Roboflow)",
+        )
+
     try:
         print(
             f"[{STAGE_NAME}] ({index}/{total}) {plan.plan_id} → roboflow_import "
@@ -1,20 +1,27 @@
 # new/runner/detections/object_crops.py
 from __future__ import annotations
 
-import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
 from pathlib import Path
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict
 
-# Import crop scripts (le vom crea mai jos)
-from .crop_scripts import crop_door, crop_double_door, crop_window, crop_double_window
+from ..count_objects.template_extraction import (
+    TYPE_FOLDERS,
+    banks_from_detections,
+    class_matches,
+    template_export_debug,
+)
 
 
 def run_object_crops(env: Dict[str, str], work_dir: Path) -> Tuple[bool, str]:
     """
-    Rulează crop-urile pentru toate tipurile de obiecte detectate.
+    Verifică exemplele de obiecte (template-uri) pentru toate tipurile detectate.
     - env: environment complet
     - work_dir: directorul în care avem plan.jpg și export_objects/detections.json
+
+    Template-urile sunt extrase și augmentate în memorie de count_objects
+    (template_extraction). Pe disc, în export_objects/exports/, se scriu doar
+    în modul debug (COUNT_OBJECTS_EXPORT_TEMPLATES=1).
     """
     plan_jpg = work_dir / "plan.jpg"
     detections_json = work_dir / "export_objects" / "detections.json"
@@ -26,48 +33,24 @@ def run_object_crops(env: Dict[str, str], work_dir: Path) -> Tuple[bool, str]:
     if not detections_json.exists():
         return False, f"Nu găsesc detections.json în {work_dir / 'export_objects'}"
 
-    exports_dir.mkdir(parents=True, exist_ok=True)
-
-    # Scripturile de crop (funcții, nu subprocess)
-    crop_functions = [
-        ("door", crop_door.process),
-        ("double_door", crop_double_door.process),
-        ("window", crop_window.process),
-        ("double_window", crop_double_window.process),
-    ]
-
-    results: List[Tuple[str, str, str]] = []
-
-    print(f"  ✂️  Rulez {len(crop_functions)} crop scripts în paralel...")
-
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {
-            executor.submit(
-                func,
-                image_path=plan_jpg,
-                json_path=detections_json,
-                out_root=exports_dir
-            ): name
-            for name, func in crop_functions
-        }
+    with open(detections_json, "r", encoding="utf-8") as f:
+        predictions = json.load(f).get("predictions", [])
 
-        for fut in as_completed(futures):
-            name = futures[fut]
-            try:
-                count = fut.result()
-                results.append((name, "OK", f"{count} crops"))
-                print(f"    ✅ {name}: {count} crops")
-            except Exception as e:
-                results.append((name, "ERR", str(e)))
-                print(f"    ❌ {name}: {e}")
+    counts = {
+        folder: sum(1 for p in predictions if class_matches(folder, str(p.get("class", ""))))
+        for folder in TYPE_FOLDERS.values()
+    }
+    for name, count in counts.items():
+        print(f"    ✅ {name}: {count} exemple")
 
-    # Verifică dacă au fost generate crop-uri
-    all_crops = list(exports_dir.rglob("*.png")) + list(exports_dir.rglob("*.jpg"))
-    total_crops = len(all_crops)
+    summary = "\n".join([f"  {name}: OK ({count} exemple)" for name, count in counts.items()])
+    total = sum(counts.values())
 
-    summary = "\n".join([f"  {name}: {status} ({msg})" for name, status, msg in results])
+    if total == 0:
+        return False, f"Niciun exemplu de obiect în detections.json!\n{summary}"
 
-    if total_crops == 0:
-        return False, f"Niciun crop generat!\n{summary}"
+    if template_export_debug():
+        banks_from_detections(plan_jpg, detections_json, debug_export_dir=exports_dir)
+        return True, f"{total} exemple (export debug în {exports_dir.relative_to(work_dir)})\n{summary}"
 
-    return True, f"{total_crops} crop-uri generate în {exports_dir.relative_to(work_dir)}\n{summary}"
\ No newline at end of file
+    return True, f"{total} exemple (template-uri extrase în memorie în count_objects)\n{summary}"
@@ -3,12 +3,13 @@ from __future__ import annotations
 
 import json
 import os
-import time
 from pathlib import Path
 from typing import Tuple, Dict
 
 import requests
 
+from ..count_objects.roboflow_upload import detections_result, infer_prepared, roboflow_urls
+
 
 def run_roboflow_import(env: Dict[str, str], work_dir: Path) -> Tuple[bool, str]:
     """
@@ -29,8 +30,8 @@ def run_roboflow_import(env: Dict[str, str], work_dir: Path) -> Tuple[bool, str]
     if not plan_jpg.exists():
         return False, f"Nu găsesc plan.jpg în {work_dir}"
 
-    # Endpoint Roboflow
-    url = f"https://detect.roboflow.com/{PROJECT}/{VERSION}"
+    # Endpoint Roboflow (override: ROBOFLOW_DETECT_URL, ex. server local de test)
+    url = f"{roboflow_urls()[1]}/{PROJECT}/{VERSION}"
     params = {
         "api_key": API_KEY,
         "confidence": CONF,
@@ -38,27 +39,29 @@ def run_roboflow_import(env: Dict[str, str], work_dir: Path) -> Tuple[bool, str]
     }
 
     print(f"  🔍 Roboflow API: {url} (conf={CONF}, overlap={OVERLAP})")
-    start = time.time()
 
+    responses: list[dict] = []  # răspunsurile complete (cheile top-level ajung în detections.json)
+
+    def post(img_bytes: bytes) -> list:
+        files = {"file": ("plan.jpg", img_bytes, "image/jpeg")}
+        r = requests.post(url, params=params, files=files, timeout=120)
+        if r.status_code != 200:
+            raise RuntimeError(f"Roboflow HTTP {r.status_code}: {r.text[:400]}")
+        try:
+            data = r.json()
+        except Exception:
+            raise RuntimeError(f"Răspuns non-JSON: {r.text[:400]}")
+        responses.append(data)
+        return data.get("predictions", [])
+
+    # Planul e micșorat / împărțit în tile-uri; coordonatele revin la rezoluția completă
     try:
-        with open(plan_jpg, "rb") as f:
-            files = {"file": ("plan.jpg", f, "image/jpeg")}
-            r = requests.post(url, params=params, files=files, timeout=120)
+        preds, stats = infer_prepared(plan_jpg, post)
     except Exception as e:
         return False, f"Request eșuat: {e}"
 
-    elapsed = time.time() - start
-
-    if r.status_code != 200:
-        return False, f"Roboflow HTTP {r.status_code}: {r.text[:400]}"
-
-    try:
-        result = r.json()
-    except Exception:
-        return False, f"Răspuns non-JSON: {r.text[:400]}"
-
-    preds = result.get("predictions", [])
-    print(f"  ✅ {len(preds)} detecții în {elapsed:.2f}s")
+    print(f"  ✅ {len(preds)} detecții în {stats.total_s:.2f}s")
+    result = detections_result(preds, stats, responses[0] if responses else None)
 
     # Salvează detections.json în export_objects/ (ca în scriptul vechi)
     detections_dir = work_dir / "export_objects"
@@ -1,10 +1,14 @@
-# new/runner/exterior_doors/classify.py (VERSIUNEA CORECTĂ - CU OVERLAY)
+# new/runner/exterior_doors/classify.py
 from __future__ import annotations
 from pathlib import Path
 import json
 import cv2
 import numpy as np
 
+from ..plan_geometry import PlanGeometry, plan_geometry
+from ..count_objects.detection_index import plan_detections
+from .config import BLUE_SEARCH_MARGIN
+
 
 def _load_gray(path: Path) -> np.ndarray:
     m = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
@@ -13,32 +17,6 @@ def _load_gray(path: Path) -> np.ndarray:
     return m
 
 
-def _extract_blue_mask_from_overlay(overlay_path: Path) -> np.ndarray:
-    """
-    Extrage masca binară a zonelor ALBASTRE din blue_overlay.jpg.
-    
-    Blue overlay = planul original + overlay ALBASTRU (BGR: 255,0,0) pe exterior
-    
-    Returns:
-        Mască binară: 255 = ALBASTRU (exterior), 0 = REST
-    """
-    overlay = cv2.imread(str(overlay_path))
-    if overlay is None:
-        raise FileNotFoundError(f"Lipsește/invalid: {overlay_path}")
-    
-    # Extragem canalul ALBASTRU (BGR: B=255, G=0, R=0)
-    # Pixelii albaștri pur au B=255, G=0, R=0
-    
-    b_channel = overlay[:, :, 0]  # Blue channel
-    g_channel = overlay[:, :, 1]  # Green channel
-    r_channel = overlay[:, :, 2]  # Red channel
-    
-    # Mască: ALBASTRU pur (B=255 și G<50 și R<50)
-    blue_mask = ((b_channel > 200) & (g_channel < 50) & (r_channel < 50)).astype(np.uint8) * 255
-    
-    return blue_mask
-
-
 def _bbox_diagonal(bbox: tuple[int, int, int, int]) -> float:
     """Calculează lungimea diagonalei bbox."""
     x1, y1, x2, y2 = bbox
@@ -47,74 +25,18 @@ def _bbox_diagonal(bbox: tuple[int, int, int, int]) -> float:
     return np.sqrt(w**2 + h**2)
 
 
-def _distance_to_blue(mask_blue: np.ndarray, bbox: tuple[int, int, int, int]) -> float:
+def distance_to_blue_map(mask_blue: np.ndarray, dist_type: int = cv2.DIST_L2) -> np.ndarray:
     """
-    Calculează distanța minimă de la bbox la cea mai apropiată zonă ALBASTRĂ.
-    
-    Args:
-        mask_blue: Mască binară (255 = albastru/exterior, 0 = rest)
-        bbox: (x1, y1, x2, y2)
-    
-    Returns:
-        Distanța în pixeli (inf dacă nu găsește albastru)
+    Distanța de la fiecare pixel la cel mai apropiat pixel ALBASTRU (exterior),
+    calculată O SINGURĂ DATĂ per plan (un distanceTransform global).
+    dist_type: cv2.DIST_L2 (euclidiană) sau cv2.DIST_C (Chebyshev – fereastra
+    pătrată de căutare din jurul bbox-ului).
+    Fără albastru în plan → totul inf.
     """
-    H, W = mask_blue.shape[:2]
-    x1, y1, x2, y2 = map(int, bbox)
-    
-    # Verifică dacă bbox e valid
-    if x1 >= W or x2 <= 0 or y1 >= H or y2 <= 0:
-        return float('inf')
-    
-    # Clamp bbox
-    x1 = max(0, min(x1, W-1))
-    x2 = max(0, min(x2, W-1))
-    y1 = max(0, min(y1, H-1))
-    y2 = max(0, min(y2, H-1))
-    
-    if x2 <= x1 or y2 <= y1:
-        return float('inf')
-    
-    # Expandăm bbox pentru căutare
-    margin = 50
-    x1_exp = max(0, x1 - margin)
-    x2_exp = min(W - 1, x2 + margin)
-    y1_exp = max(0, y1 - margin)
-    y2_exp = min(H - 1, y2 + margin)
-    
-    # Extragem regiunea
-    region = mask_blue[y1_exp:y2_exp+1, x1_exp:x2_exp+1]
-    
-    if region.size == 0:
-        return float('inf')
-    
-    # Verificăm dacă există albastru în regiune
-    if cv2.countNonZero(region) == 0:
-        return float('inf')
-    
-    # Distance transform
-    # mask_blue are 255 = ALBASTRU (destinație)
-    # Inversăm: 0 = destinație, 255 = obstacol
-    inv_region = cv2.bitwise_not(region)
-    
-    dist_transform = cv2.distanceTransform(inv_region, cv2.DIST_L2, 5)
-    
-    # Extragem zona bbox-ului ORIGINAL (fără margin)
-    y_start = y1 - y1_exp
-    y_end = y2 - y1_exp
-    x_start = x1 - x1_exp
-    x_end = x2 - x1_exp
-    
-    y_start = max(0, y_start)
-    y_end = min(dist_transform.shape[0], y_end)
-    x_start = max(0, x_start)
-    x_end = min(dist_transform.shape[1], x_end)
-    
-    bbox_region = dist_transform[y_start:y_end, x_start:x_end]
-    
-    if bbox_region.size == 0:
-        return float('inf')
-    
-    return float(np.min(bbox_region))
+    if cv2.countNonZero(mask_blue) == 0:
+        return np.full(mask_blue.shape[:2], np.inf, dtype=np.float32)
+    # mask_blue: 255 = ALBASTRU (destinație) → inversăm: 0 = destinație
+    return cv2.distanceTransform(cv2.bitwise_not(mask_blue), dist_type, 5 if dist_type == cv2.DIST_L2 else 3)
 
 
 def classify_exterior_doors(
@@ -123,7 +45,9 @@ def classify_exterior_doors(
     detections_all_json: Path,
     out_dir: Path,
     job_root: Path | None = None,
-    original_plan_name: str | None = None
+    original_plan_name: str | None = None,
+    mask_blue: np.ndarray | None = None,
+    geometry: PlanGeometry | None = None
 ) -> tuple[Path, Path, Path]:
     """
     Clasifică ușile ca exterior/interior.
@@ -132,6 +56,10 @@ def classify_exterior_doors(
     Pentru fiecare ușă:
       - distanță ≤ diagonală/2 → EXTERIOR
       - distanță > diagonală/2 → INTERIOR
+    
+    mask_blue: masca exactă din compute_blue_mask (în memorie); altfel e citită
+    din blue_mask_path (PNG, fără pierderi).
+    geometry: raster-ele planului (comune între etape); implicit plan_geometry(plan_image).
     """
     try:
         out_dir.mkdir(parents=True, exist_ok=True)
@@ -140,22 +68,20 @@ def classify_exterior_doors(
         out_flood_marked = out_dir / "exterior_doors_flood_marked.jpg"
         
         # Load plan
-        plan = cv2.imread(str(plan_image))
-        if plan is None:
+        geometry = geometry or plan_geometry(plan_image)
+        try:
+            plan = geometry.bgr
+        except ValueError:
             raise RuntimeError(f"plan.jpg invalid: {plan_image}")
         
         H, W = plan.shape[:2]
         
         # ==========================================
-        # IMPORTANT: EXTRAGEM MASCA DIN BLUE_OVERLAY.JPG
+        # MASCA EXTERIOR: exactă (memorie / PNG), nu reconstruită din JPEG
         # ==========================================
-        blue_overlay_path = out_dir / "blue_overlay.jpg"
-        
-        if not blue_overlay_path.exists():
-            raise FileNotFoundError(f"Nu găsesc blue_overlay.jpg: {blue_overlay_path}")
-        
-        print(f"       📐 Extrag mască ALBASTRĂ din blue_overlay.jpg...")
-        mask_blue = _extract_blue_mask_from_overlay(blue_overlay_path)
+        if mask_blue is None:
+            print(f"       📐 Citesc masca ALBASTRĂ din {blue_mask_path.name}...")
+            mask_blue = _load_gray(blue_mask_path)
         
         # Verifică câte pixeli albastre sunt
         total_blue = cv2.countNonZero(mask_blue)
@@ -163,13 +89,23 @@ def classify_exterior_doors(
         print(f"       📐 Pixeli albaștri: {total_blue:,} ({blue_percent:.1f}%)")
         
         if total_blue == 0:
-            print(f"       ❌ ATENȚIE: Nu există zone albastre în overlay!")
+            print(f"       ❌ ATENȚIE: Nu există zone albastre în mască!")
+        
+        # O singură hartă de distanțe per plan; fiecare ușă e doar un lookup
+        # (ușile vin din indexul comun al detecțiilor, fără "rejected")
+        dist_map = distance_to_blue_map(mask_blue)
+        window_map = distance_to_blue_map(mask_blue, cv2.DIST_C)
         
-        dets = json.loads(detections_all_json.read_text(encoding="utf-8"))
+        detections = plan_detections(detections_all_json)
+        doors = detections.of_kind("door", "double_door")
+        distances = detections.mask_distances(dist_map, doors)
+        # albastru în fereastra bbox ± BLUE_SEARCH_MARGIN (pătrat, ~70 px pe diagonală)
+        window_distances = detections.mask_distances(window_map, doors)
         
         # Prepare overlays
         overlay_doors = plan.copy()
-        overlay_flood = cv2.imread(str(blue_overlay_path))  # Pornim de la blue_overlay
+        overlay_flood = plan.copy()  # = blue_overlay, fără artefacte JPEG
+        overlay_flood[mask_blue > 0] = [255, 0, 0]
         
         # ==========================================
         # PROCESEAZĂ FIECARE UȘĂ
@@ -178,23 +114,17 @@ def classify_exterior_doors(
         results = []
         idx = 0
         
-        for d in dets:
-            typ = (d.get("type") or "").lower()
-            status_det = (d.get("status") or "").lower()
-            
-            if "door" not in typ:
-                continue
-            if status_det == "rejected":
-                continue
-            
+        for d in doors:
+            typ = d.type
             idx += 1
             
-            x1, y1, x2, y2 = int(d["x1"]), int(d["y1"]), int(d["x2"]), int(d["y2"])
-            bbox = (x1, y1, x2, y2)
+            x1, y1, x2, y2 = bbox = d.box
             
-            # Calculează distanță și diagonală
+            # Calculează distanță și diagonală (fără albastru în fereastra ± BLUE_SEARCH_MARGIN = inf)
             diagonal = _bbox_diagonal(bbox)
-            distance = _distance_to_blue(mask_blue, bbox)
+            distance = distances[d.idx]
+            if window_distances[d.idx] > BLUE_SEARCH_MARGIN:
+                distance = float('inf')
             
             # REGULA:
             max_allowed_distance = diagonal / 2.0
@@ -1,6 +1,16 @@
 # new/runner/exterior_doors/config.py
 from __future__ import annotations
 
+# Exterior = componente conexe albe care ating marginea (vezi flood_blue.exterior_from_border)
+EXTERIOR_DOWNSCALE = 1.0  # < 1.0: umplere pe copie micșorată (mai rapid, conservator); 1.0 = exact
+EXTERIOR_THRESHOLD = 200         # gri ≥ prag = hârtie
+EXTERIOR_OPEN_KERNEL = 7         # elimină insulițele mici din mască
+EXTERIOR_ERODE_KERNEL = 5        # erodare agresivă a exteriorului
+EXTERIOR_ERODE_ITERATIONS = 2
+
+# Ușile fără exterior în fereastra bbox ± atâția pixeli (pe x și pe y) au distanța "infinity"
+BLUE_SEARCH_MARGIN = 50
+
 # Dilatare ușoară a măștii flood pentru contact mai robust
 BLUE_MASK_DILATE_RATIO = 0.002   # ~0.2% din min(H,W), min 1 px
 
@@ -5,15 +5,114 @@ import cv2
 import numpy as np
 from pathlib import Path
 
+from ..plan_geometry import PlanGeometry, plan_geometry
+from .config import (
+    EXTERIOR_DOWNSCALE,
+    EXTERIOR_THRESHOLD,
+    EXTERIOR_OPEN_KERNEL,
+    EXTERIOR_ERODE_KERNEL,
+    EXTERIOR_ERODE_ITERATIONS,
+)
 
-def compute_blue_mask(plan_image: Path, out_dir: Path) -> tuple[Path, Path]:
+# Parametrii derivării măștii exterior (intră în cheia din PlanGeometry)
+EXTERIOR_MASK_PARAMS = {
+    "threshold": EXTERIOR_THRESHOLD,
+    "downscale": EXTERIOR_DOWNSCALE,
+    "open": EXTERIOR_OPEN_KERNEL,
+    "erode": EXTERIOR_ERODE_KERNEL,
+    "erode_iterations": EXTERIOR_ERODE_ITERATIONS,
+}
+
+
+def exterior_from_border(binary: np.ndarray, downscale: float = 1.0) -> np.ndarray:
+    """
+    Zonele albe (255) conectate cu marginea imaginii, într-o singură trecere.
+
+    Imaginea primește un cadru alb de 1 px și se face UN singur floodFill din colț
+    (4-conectivitate): cadrul atinge fiecare pixel alb de pe margine, deci rezultatul
+    e exact reuniunea componentelor conexe albe care ating marginea – fără stride
+    între seed-uri. (Etichetarea cu connectedComponents + filtrul pe etichetele de
+    margine dă aceeași mască, dar e de ~8× mai lentă pe planurile mari.)
+
+    downscale < 1: umplerea se face pe o copie micșorată în care un pixel e alb
+    doar dacă tot blocul e alb (pereții subțiri nu dispar), apoi masca e mărită
+    înapoi și intersectată cu binary. Rezultat conservator (exteriorul poate fi
+    puțin mai mic lângă pereți), nu exact.
+
+    RETURN: mască uint8 (255 = exterior).
     """
-    Generează masca ALBASTRĂ (EXTERIOR) prin flood fill de la margini.
+    H, W = binary.shape[:2]
+    white = cv2.compare(binary, 255, cv2.CMP_EQ)
+    work = white
+    if downscale < 1.0:
+        w, h = max(1, round(W * downscale)), max(1, round(H * downscale))
+        small = cv2.resize(white, (w, h), interpolation=cv2.INTER_AREA)
+        work = cv2.compare(small, 255, cv2.CMP_EQ)
+
+    padded = cv2.copyMakeBorder(work, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=255)
+    flood_mask = np.zeros((padded.shape[0] + 2, padded.shape[1] + 2), np.uint8)
+    cv2.floodFill(padded, flood_mask, seedPoint=(0, 0), newVal=128, loDiff=0, upDiff=0,
+                  flags=4 | cv2.FLOODFILL_FIXED_RANGE)
+    mask = cv2.compare(padded[1:-1, 1:-1], 128, cv2.CMP_EQ)
+
+    if downscale < 1.0:
+        mask = cv2.resize(mask, (W, H), interpolation=cv2.INTER_NEAREST)
+        mask = cv2.bitwise_and(mask, white)
+    return mask
+
+
+def exterior_mask(geometry: PlanGeometry) -> np.ndarray:
+    """
+    Masca exterior finală a planului (255 = exterior), derivată din geometry:
+    threshold 200 → exterior_from_border → open 7×7 + erode 5×5 ×2.
+    """
+    # ==========================================
+    # THRESHOLD: detectăm pereții (negru/întunecat)
+    # ==========================================
+    
+    binary = geometry.binary(EXTERIOR_THRESHOLD)
+    
+    # ==========================================
+    # EXTERIOR: componente conexe albe care ating marginea
+    # ==========================================
+    
+    blue_mask = exterior_from_border(binary, EXTERIOR_DOWNSCALE)
+    
+    # ==========================================
+    # POST-PROCESSING: Erodare MAI AGRESIVĂ
+    # ==========================================
+    
+    # Eliminăm insulițe mici
+    kernel_open = cv2.getStructuringElement(cv2.MORPH_RECT, (EXTERIOR_OPEN_KERNEL, EXTERIOR_OPEN_KERNEL))  # era (5,5)
+    blue_mask = cv2.morphologyEx(blue_mask, cv2.MORPH_OPEN, kernel_open)
+    
+    # Erodăm MAI MULT
+    kernel_erode = cv2.getStructuringElement(cv2.MORPH_RECT, (EXTERIOR_ERODE_KERNEL, EXTERIOR_ERODE_KERNEL))  # era (2,2)
+    return cv2.erode(blue_mask, kernel_erode, iterations=EXTERIOR_ERODE_ITERATIONS)  # era iterations=1
+
+
+def shared_exterior_mask(geometry: PlanGeometry) -> np.ndarray:
+    """Masca exterior memoizată în geometry – aceeași cheie pentru toate etapele."""
+    return geometry.get("exterior_mask", exterior_mask, params=EXTERIOR_MASK_PARAMS)
+
+
+def compute_blue_mask(
+    plan_image: Path,
+    out_dir: Path,
+    geometry: PlanGeometry | None = None
+) -> tuple[Path, Path, np.ndarray]:
+    """
+    Generează masca ALBASTRĂ (EXTERIOR): zonele albe conectate cu marginile planului.
     
     IMPORTANT: Flood fill-ul rămâne DOAR în exterior, NU modifică culorile din plan.
     
+    geometry: raster-ele planului (comune între etape); implicit plan_geometry(plan_image).
+    
     Returns:
-        (blue_mask_path, blue_overlay_path)
+        (blue_mask_path, blue_overlay_path, blue_mask)
+        
+        blue_mask (în memorie, identic cu blue_mask.png) se dă direct clasificării,
+        fără să mai treacă prin blue_overlay.jpg.
         
         blue_mask.png:
           - Alb (255) = EXTERIOR (zona accesibilă de la margini)
@@ -27,69 +126,17 @@ def compute_blue_mask(plan_image: Path, out_dir: Path) -> tuple[Path, Path]:
     out_overlay = out_dir / "blue_overlay.jpg"
     
     # Load plan
-    plan = cv2.imread(str(plan_image))
-    if plan is None:
+    geometry = geometry or plan_geometry(plan_image)
+    try:
+        plan = geometry.bgr
+    except ValueError:
         raise RuntimeError(f"plan.jpg invalid: {plan_image}")
     
     H, W = plan.shape[:2]
-    gray = cv2.cvtColor(plan, cv2.COLOR_BGR2GRAY)
     
     print(f"       🖼️  Plan: {W}×{H}px")
     
-    # ==========================================
-    # THRESHOLD: detectăm pereții (negru/întunecat)
-    # ==========================================
-    
-    _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
-    
-    # ==========================================
-    # FLOOD FILL de la margini (AJUSTAT)
-    # ==========================================
-    
-    flood_work = binary.copy()
-    flood_mask = np.zeros((H + 2, W + 2), np.uint8)
-    
-    # Seed points MAI RARI (step mai mare = mai puține puncte)
-    seed_points = []
-    step = 30  # ← mai rar (era 15)
-    
-    for x in range(0, W, step):
-        seed_points.append((x, 0))
-        seed_points.append((x, H - 1))
-    
-    for y in range(0, H, step):
-        seed_points.append((0, y))
-        seed_points.append((W - 1, y))
-    
-    flooded_count = 0
-    for (x, y) in seed_points:
-        if 0 <= x < W and 0 <= y < H:
-            if flood_work[y, x] == 255:
-                cv2.floodFill(
-                    flood_work, 
-                    flood_mask, 
-                    seedPoint=(x, y), 
-                    newVal=128,
-                    loDiff=10,
-                    upDiff=10
-                )
-                flooded_count += 1
-    
-    print(f"       🌊 Flood fill: {flooded_count}/{len(seed_points)} seed points active")
-    
-    blue_mask = (flood_work == 128).astype(np.uint8) * 255
-    
-    # ==========================================
-    # POST-PROCESSING: Erodare MAI AGRESIVĂ
-    # ==========================================
-    
-    # Eliminăm insulițe mici
-    kernel_open = cv2.getStructuringElement(cv2.MORPH_RECT, (7, 7))  # era (5,5)
-    blue_mask = cv2.morphologyEx(blue_mask, cv2.MORPH_OPEN, kernel_open)
-    
-    # Erodăm MAI MULT
-    kernel_erode = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))  # era (2,2)
-    blue_mask = cv2.erode(blue_mask, kernel_erode, iterations=2)  # era iterations=1
+    blue_mask = shared_exterior_mask(geometry)
     
     print(f"       🔧 Post-processing: eliminare zgomot + erodare agresivă")
     
@@ -110,4 +157,4 @@ def compute_blue_mask(plan_image: Path, out_dir: Path) -> tuple[Path, Path]:
     print(f"       📄 {out_mask.name}")
     print(f"       🖼️  {out_overlay.name} (ALBASTRU = exterior)")
     
-    return out_mask, out_overlay
\ No newline at end of file
+    return out_mask, out_overlay, blue_mask
\ No newline at end of file
@@ -3,6 +3,8 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Tuple
 
+from ..plan_geometry import plan_geometry
+
 from .flood_blue import compute_blue_mask
 from .classify import classify_exterior_doors
 
@@ -23,15 +25,20 @@ def run_exterior_doors_for_plan(
     try:
         work_dir.mkdir(parents=True, exist_ok=True)
         
+        # planul decodat + raster-ele derivate, comune cu celelalte etape
+        geometry = plan_geometry(plan_image)
+        
         # Step 1: Generează blue mask
-        blue_mask_path, blue_overlay_path = compute_blue_mask(plan_image, work_dir)
+        blue_mask_path, blue_overlay_path, blue_mask = compute_blue_mask(plan_image, work_dir, geometry)
         
-        # Step 2: Clasifică uși
+        # Step 2: Clasifică uși (masca exactă, direct din memorie)
         out_json, out_overlay, out_flood_marked = classify_exterior_doors(
             plan_image, 
             blue_mask_path, 
             detections_all_json, 
-            work_dir
+            work_dir,
+            mask_blue=blue_mask,
+            geometry=geometry
         )
         
         # ✅ Check dacă a returnat None (eroare în classify)
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 
@@ -102,7 +102,7 @@ def run_floor_classification(
                 "estimated_area_m2": classification.get("estimated_area_m2"),
                 "door_count_exterior": classification.get("door_count_exterior"),
                 "stair_direction": classification.get("stair_direction"),
-                "classified_at": datetime.utcnow().isoformat() + "Z"
+                "classified_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
             },
             # Placeholder-e pentru etapele următoare
             "scale": None,
@@ -148,7 +148,7 @@ def run_floor_classification(
     summary_data = {
         **ai_result,
         "metadata_files": [str(r.metadata_file) for r in results],
-        "generated_at": datetime.utcnow().isoformat() + "Z"
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     }
     
     with open(summary_file, "w", encoding="utf-8") as f:
@@ -0,0 +1,132 @@
+# new/runner/logistic_model.py
+# ------------------------------------------------------------
+# Regresie logistică (multinomială) evaluată direct în numpy, salvată ca JSON
+# (fără pickle). Comună pentru:
+#   - segmenter/local_model.py   (clasificarea locală a crop-urilor)
+#   - count_objects/gemini_gate.py (gate-ul din fața verificării Gemini)
+# Fiecare model își păstrează propriul vector de feature-uri și versiune.
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+
+@dataclass
+class LogisticModel:
+    """
+    Softmax peste feature-uri standardizate. Binarul e stocat simetric
+    (2 rânduri), deci p(clasa 1) = sigmoid(w·x + b) ca în sklearn.
+    """
+    classes: list[str]
+    mean: np.ndarray
+    std: np.ndarray
+    coef: np.ndarray       # (n_classes, n_features)
+    intercept: np.ndarray  # (n_classes,)
+    trained_on: int = 0
+
+    def predict_proba(self, x: np.ndarray) -> dict[str, float]:
+        z = (x - self.mean) / self.std
+        logits = self.coef @ z + self.intercept
+        logits = logits - logits.max()
+        p = np.exp(logits)
+        p = p / p.sum()
+        return {c: float(v) for c, v in zip(self.classes, p)}
+
+    def to_json(self, version: int, features: list[str]) -> dict:
+        return {
+            "version": version,
+            "features": features,
+            "classes": self.classes,
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept.tolist(),
+            "trained_on": self.trained_on,
+            "trained_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict, version: int, features: list[str]) -> "LogisticModel":
+        if data.get("version") != version or data.get("features") != features:
+            raise ValueError("model incompatibil (versiune / feature-uri diferite)")
+        return cls(
+            classes=[str(c) for c in data["classes"]],
+            mean=np.asarray(data["mean"], dtype=np.float64),
+            std=np.asarray(data["std"], dtype=np.float64),
+            coef=np.asarray(data["coef"], dtype=np.float64),
+            intercept=np.asarray(data["intercept"], dtype=np.float64),
+            trained_on=int(data.get("trained_on", 0)),
+        )
+
+
+def fit_logistic(X: np.ndarray, y: list) -> LogisticModel:
+    """Standardizare + LogisticRegression (sklearn, doar la antrenare offline)."""
+    from sklearn.linear_model import LogisticRegression
+
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std < 1e-6] = 1.0
+
+    clf = LogisticRegression(max_iter=2000, C=1.0)
+    clf.fit((X - mean) / std, y)
+
+    coef = np.asarray(clf.coef_, dtype=np.float64)
+    intercept = np.asarray(clf.intercept_, dtype=np.float64)
+    if len(clf.classes_) == 2:
+        # sklearn întoarce un singur rând pentru binar → îl facem simetric (softmax echivalent)
+        coef = np.vstack([-coef[0] / 2.0, coef[0] / 2.0])
+        intercept = np.array([-intercept[0] / 2.0, intercept[0] / 2.0])
+
+    return LogisticModel(
+        classes=[str(c) for c in clf.classes_],
+        mean=mean,
+        std=std,
+        coef=coef,
+        intercept=intercept,
+        trained_on=len(y),
+    )
+
+
+def save_model(model: LogisticModel, path: str | Path, version: int, features: list[str]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(model.to_json(version, features), indent=2), encoding="utf-8")
+    return path
+
+
+_MODEL_CACHE: dict[Path, tuple[float, LogisticModel | None]] = {}
+_model_lock = threading.Lock()
+
+
+def load_model(path: str | Path, version: int, features: list[str], invalid_note: str = "") -> LogisticModel | None:
+    """
+    Modelul din path dacă există (cache după mtime), altfel None.
+    Un fișier invalid / incompatibil e raportat o singură dată și întoarce None.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    mtime = path.stat().st_mtime
+    with _model_lock:
+        cached = _MODEL_CACHE.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            model: LogisticModel | None = LogisticModel.from_json(
+                json.loads(path.read_text(encoding="utf-8")), version, features
+            )
+        except Exception as e:
+            print(f"⚠️ Model invalid ({path}): {e}. {invalid_note}".rstrip())
+            model = None
+
+        _MODEL_CACHE[path] = (mtime, model)
+        return model
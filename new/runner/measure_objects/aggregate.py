@@ -4,6 +4,8 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from ..count_objects.detection_index import plan_detections
+
 
 def create_openings_all(
     detections_all_json: Path,
@@ -17,67 +19,37 @@ def create_openings_all(
     Returns:
         Numărul de obiecte în lista finală (fără scări)
     """
-    # Load inputs
-    with open(detections_all_json, "r", encoding="utf-8") as f:
-        detections = json.load(f)
+    # Detecțiile din indexul comun (încărcat o dată per plan, fără "rejected")
+    detections = plan_detections(detections_all_json)
     
     with open(measurements_json, "r", encoding="utf-8") as f:
         meas_data = json.load(f)
     
     measurements = meas_data.get("measurements", {})
     
-    # exterior_doors.json e opțional
+    # exterior_doors.json e opțional; statusul se atașează pe uși prin index
+    # (potrivire pe grilă cu toleranță ±15px, nu comparație ușă × ușă)
     if exterior_doors_json.exists():
         with open(exterior_doors_json, "r", encoding="utf-8") as f:
             exterior_data = json.load(f)
-        
-        door_status_map = {}
-        for d in exterior_data:
-            bbox = tuple(map(int, d["bbox"]))
-            door_status_map[bbox] = d["status"]
+        detections.attach_exterior(exterior_data)
     else:
         print("       ℹ️  Lipsă exterior_doors.json — toate ușile vor fi 'unknown'")
-        door_status_map = {}
+        detections.attach_exterior([])
     
     # Helper: extrage lățime pentru un tip
     def get_width_for_type(obj_type: str) -> float | None:
-        normalized = obj_type.lower().replace("-", "_")
-        meas = measurements.get(normalized)
+        meas = measurements.get(obj_type)
         if not meas:
             return None
         return float(meas.get("real_width_meters", 0.0))
     
-    # Construiește lista finală
+    # Construiește lista finală (doar uși/ferestre; scările nu intră în openings_all.json)
     openings = []
     id_counter = 1
     
-    for det in detections:
-        obj_type = det.get("type", "").lower()
-        status_det = det.get("status", "").lower()
-        
-        # Skip obiecte respinse
-        if status_det == "rejected":
-            continue
-        
-        # Skip scările (nu intră în openings_all.json)
-        if "stair" in obj_type:
-            continue
-        
-        # Filtrează doar uși/ferestre
-        if not any(k in obj_type for k in ["door", "window"]):
-            continue
-        
-        # Mapare tip standard
-        if "double" in obj_type and "door" in obj_type:
-            standard_type = "double_door"
-        elif "double" in obj_type and "window" in obj_type:
-            standard_type = "double_window"
-        elif "door" in obj_type:
-            standard_type = "door"
-        elif "window" in obj_type:
-            standard_type = "window"
-        else:
-            continue
+    for det in detections.of_kind("door", "double_door", "window", "double_window"):
+        standard_type = det.kind
         
         # Extrage lățime
         width_m = get_width_for_type(standard_type)
@@ -86,16 +58,12 @@ def create_openings_all(
             continue
         
         # Determină status (interior/exterior) doar pentru uși
-        status = "exterior" if "window" in standard_type else "unknown"
-        
-        if "door" in standard_type:
-            bbox = tuple(map(int, [det["x1"], det["y1"], det["x2"], det["y2"]]))
-            
-            # Căutăm match în exterior_doors.json (cu toleranță ±15px)
-            for door_bbox, door_status in door_status_map.items():
-                if all(abs(a - b) < 15 for a, b in zip(door_bbox, bbox)):
-                    status = door_status
-                    break
+        if "window" in standard_type:
+            status = "exterior"
+        elif det.exterior is None:
+            status = "unknown"
+        else:
+            status = "exterior" if det.exterior else "interior"
         
         openings.append({
             "id": id_counter,
@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Dict, List
 import statistics
 
+from ..count_objects.detection_index import plan_detections, KINDS
+
 
 def calculate_widths_from_detections(
     detections_all_json: Path,
@@ -31,9 +33,8 @@ def calculate_widths_from_detections(
           }
         }
     """
-    # Load inputs
-    with open(detections_all_json, "r", encoding="utf-8") as f:
-        detections = json.load(f)
+    # Detecțiile din indexul comun (încărcat o dată per plan, fără "rejected")
+    detections = plan_detections(detections_all_json)
     
     with open(scale_json, "r", encoding="utf-8") as f:
         scale_data = json.load(f)
@@ -46,52 +47,27 @@ def calculate_widths_from_detections(
     print(f"       📐 Calcul lățimi + arii (scala: {meters_per_pixel:.6f} m/px)")
     
     # Grupează pe tipuri
-    grouped: Dict[str, List[dict]] = {
-        "door": [],
-        "double_door": [],
-        "window": [],
-        "double_window": [],
-        "stairs": []  # ← NOU pentru scări
-    }
+    grouped: Dict[str, List[dict]] = {kind: [] for kind in KINDS}
     
-    for det in detections:
-        obj_type = str(det.get("type", "")).lower()
-        status = str(det.get("status", "")).lower()
-        
-        # Skip obiecte respinse
-        if status == "rejected":
-            continue
-        
-        # Extrage bbox
-        try:
-            x1 = int(det["x1"])
-            y1 = int(det["y1"])
-            x2 = int(det["x2"])
-            y2 = int(det["y2"])
-        except (KeyError, ValueError):
-            continue
-        
-        # Calculează dimensiuni în pixeli
-        width_px = abs(x2 - x1)
-        height_px = abs(y2 - y1)
-        
-        # ==========================================
-        # TRATARE SCĂRI (aria, nu lățimea)
-        # ==========================================
-        if "stair" in obj_type:
-            area_px2 = width_px * height_px
-            area_m2 = area_px2 * (meters_per_pixel ** 2)
-            
-            grouped["stairs"].append({
-                "area_m2": area_m2,
-                "area_px2": area_px2,
-                "bbox_dims_px": (width_px, height_px)
-            })
-            continue
+    # ==========================================
+    # TRATARE SCĂRI (aria, nu lățimea)
+    # ==========================================
+    for det in detections.of_kind("stairs"):
+        area_px2 = det.width_px * det.height_px
+        area_m2 = area_px2 * (meters_per_pixel ** 2)
+        
+        grouped["stairs"].append({
+            "area_m2": area_m2,
+            "area_px2": area_px2,
+            "bbox_dims_px": (det.width_px, det.height_px)
+        })
+    
+    # ==========================================
+    # UȘI/FERESTRE: Lățime = dimensiunea MAI MARE
+    # ==========================================
+    for det in detections.of_kind("door", "double_door", "window", "double_window"):
+        width_px, height_px = det.width_px, det.height_px
         
-        # ==========================================
-        # UȘI/FERESTRE: Lățime = dimensiunea MAI MARE
-        # ==========================================
         # Geamurile/ușile sunt dreptunghiuri alungite → partea LUNGĂ = lățimea reală
         actual_width_px = max(width_px, height_px)
         
@@ -105,21 +81,12 @@ def calculate_widths_from_detections(
         width_m = actual_width_px * meters_per_pixel
         
         # Grupează pe tip cu date detaliate
-        measurement_data = {
+        grouped[det.kind].append({
             "width_m": width_m,
             "width_px": actual_width_px,
             "bbox_dims_px": (width_px, height_px),
             "orientation": orientation
-        }
-        
-        if "double" in obj_type and "door" in obj_type:
-            grouped["double_door"].append(measurement_data)
-        elif "double" in obj_type and "window" in obj_type:
-            grouped["double_window"].append(measurement_data)
-        elif "door" in obj_type:
-            grouped["door"].append(measurement_data)
-        elif "window" in obj_type:
-            grouped["window"].append(measurement_data)
+        })
     
     # ==========================================
     # CALCULEAZĂ STATISTICI
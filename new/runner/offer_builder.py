@@ -2,7 +2,7 @@
 from __future__ import annotations
 import json
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
 def build_final_offer(
     pricing_data: dict, 
@@ -47,7 +47,7 @@ def build_final_offer(
     
     final_json = {
         "meta": {
-            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "offer_level": offer_level
         },
         "summary": {
@@ -7,10 +7,11 @@ import shutil
 import os
 import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from .config.settings import build_job_root, RUNS_ROOT, RUNNER_ROOT
-from .segmenter import segment_document, classify_segmented_plans
+from .segmenter import SegmentationContext, segment_document, classify_segmented_plans
 from .segmenter.classifier import ClassificationResult
 from .floor_classifier import run_floor_classification, FloorClassificationResult
 from .detections.jobs import run_detections_for_run, DetectionJobResult
@@ -18,9 +19,11 @@ from .scale import run_scale_detection_for_run, ScaleJobResult
 from .count_objects import run_count_objects_for_run, CountObjectsJobResult
 from .exterior_doors.jobs import run_exterior_doors_for_run, ExteriorDoorsJobResult
 from .measure_objects.jobs import run_measure_objects_for_run, MeasureObjectsJobResult
-from .perimeter.jobs import run_perimeter_for_run, PerimeterJobResult
-from .area.jobs import run_area_for_run, AreaJobResult
+from .perimeter.jobs import run_perimeter_for_run, prefetch_wall_pixels_for_run, PerimeterJobResult
+from .area.jobs import run_area_for_run, prefetch_house_outline_for_run, AreaJobResult
+from .combined_analysis import run_combined_analysis_for_run
 from .roof.jobs import run_roof_for_run, RoofJobResult
+from .plan_index import apply_plan_reuse_for_run, fanout_duplicates_for_run, register_run_plans
 
 # Importuri noi pentru Pricing & Offer
 from .pricing.jobs import run_pricing_for_run, PricingJobResult
@@ -132,13 +135,18 @@ class ClassifiedPlanInfo:
     job_root: Path
     image_path: Path
     label: str  # house_blueprint | site_blueprint | side_view | text_area
+    duplicate_of: Path | None = None  # plan aproape identic deja procesat (dedup)
 
 
 # =========================================================
 # Helper pentru legat segmenter ↔ pipeline complet
 # =========================================================
 
-def _create_run_for_detections(job_root: Path, house_plans: list[ClassifiedPlanInfo]) -> str:
+def _create_run_for_detections(
+    job_root: Path,
+    house_plans: list[ClassifiedPlanInfo],
+    duplicates: list[ClassifiedPlanInfo] | None = None,
+) -> str:
     """
     Creează un RUN în carpeta runs/ astfel încât codul din etapele ulterioare
     să poată fi refolosit fără modificări.
@@ -151,6 +159,14 @@ def _create_run_for_detections(job_root: Path, house_plans: list[ClassifiedPlanI
     run_dir.mkdir(parents=True, exist_ok=True)
 
     payload = {"plans": [str(p.image_path) for p in house_plans]}
+
+    # duplicatele nu trec prin etapele scumpe: primesc rezultatele reprezentantului
+    # după perimeter (fanout_duplicates_for_run) și sunt prețuite ca etaje separate
+    if duplicates:
+        dup_map: dict[str, list[str]] = {}
+        for d in duplicates:
+            dup_map.setdefault(str(d.duplicate_of), []).append(str(d.image_path))
+        payload["duplicates"] = dup_map
     (run_dir / "plans_list.json").write_text(
         json.dumps(payload, indent=2),
         encoding="utf-8",
@@ -164,7 +180,7 @@ def _create_run_for_detections(job_root: Path, house_plans: list[ClassifiedPlanI
     return run_id
 
 
-def _load_frontend_data(job_root: Path) -> dict:
+def load_frontend_data(job_root: Path) -> dict:
     """
     Încarcă datele din frontend.
     Prioritate: 
@@ -210,7 +226,11 @@ def run_segmentation_for_document(
     segmentation_out.mkdir(parents=True, exist_ok=True)
 
     with Timer("SEGMENTATION - Extract plans from document") as t:
-        plan_paths = segment_document(input_path, segmentation_out)
+        plan_paths = list(segment_document(
+            input_path,
+            segmentation_out,
+            ctx=SegmentationContext(output_dir=segmentation_out),
+        ))
     
     pipeline_timer.add_step("Segmentation", t.end_time - t.start_time)
 
@@ -243,34 +263,35 @@ def run_segmentation_and_classification_for_document(
     job_root = build_job_root(job_id=job_id, prefix="segmentation_job")
 
     # =========================================================
-    # STEP 1: SEGMENTATION
+    # STEP 1+2: SEGMENTATION + CLASSIFICATION (pipeline pe pagini)
     # =========================================================
-    with Timer("STEP 1: Segmentation - Extract plans from document") as t:
+    # segment_document e generator: fiecare crop e clasificat imediat ce pagina
+    # lui e gata, în timp ce paginile următoare încă se randează / segmentează.
+    with Timer("STEP 1+2: Segmentation + Classification - Extract & identify plans (streamed)") as t:
         segmentation_out = job_root / "segmentation"
         segmentation_out.mkdir(parents=True, exist_ok=True)
-        plan_paths = segment_document(input_path, segmentation_out)
+        # contextul jobului: fără stare globală → mai multe documente pot rula în paralel
+        seg_ctx = SegmentationContext(output_dir=segmentation_out)
+        cls_results: list[ClassificationResult] = classify_segmented_plans(
+            segmentation_out,
+            crops=segment_document(input_path, segmentation_out, ctx=seg_ctx),
+            ctx=seg_ctx,
+        )
     
-    pipeline_timer.add_step("1. Segmentation", t.end_time - t.start_time)
+    pipeline_timer.add_step("1+2. Segmentation + Classification", t.end_time - t.start_time)
 
-    if not plan_paths:
+    if not cls_results:
         print("⚠️ Nu s-au găsit planuri în documentul uploadat.")
         pipeline_timer.finish()
         pipeline_timer.print_summary()
         return job_root, [], []
 
-    # =========================================================
-    # STEP 2: CLASSIFICATION
-    # =========================================================
-    with Timer("STEP 2: Classification - Identify plan types (GPT-4o + local)") as t:
-        cls_results: list[ClassificationResult] = classify_segmented_plans(segmentation_out)
-    
-    pipeline_timer.add_step("2. Classification", t.end_time - t.start_time)
-
     plans: list[ClassifiedPlanInfo] = [
         ClassifiedPlanInfo(
             job_root=job_root,
             image_path=r.image_path,
             label=r.label,
+            duplicate_of=r.duplicate_of,
         )
         for r in cls_results
     ]
@@ -287,6 +308,7 @@ def run_segmentation_and_classification_for_document(
     # STEP 3: FLOOR CLASSIFICATION
     # =========================================================
     with Timer("STEP 3: Floor Classification - Identify floor levels (GPT-4o)") as t:
+        # și duplicatele: același desen poate fi parter și etaj (floor_type diferit)
         floor_results = run_floor_classification(job_root, plans)
     
     pipeline_timer.add_step("3. Floor Classification", t.end_time - t.start_time)
@@ -294,10 +316,17 @@ def run_segmentation_and_classification_for_document(
     # =========================================================
     # PIPELINE COMPLET (doar pe house_blueprint)
     # =========================================================
-    house_plans = [p for p in plans if p.label == "house_blueprint"]
+    house_plans = [p for p in plans if p.label == "house_blueprint" and p.duplicate_of is None]
+    house_duplicates = [p for p in plans if p.label == "house_blueprint" and p.duplicate_of is not None]
 
     if house_plans:
-        run_id = _create_run_for_detections(job_root, house_plans)
+        run_id = _create_run_for_detections(job_root, house_plans, house_duplicates)
+
+        # planuri de catalog deja procesate într-o ofertă anterioară
+        try:
+            apply_plan_reuse_for_run(run_id)
+        except Exception as e:
+            print(f"⚠️ Indexul de refolosire a eșuat ({e}) – rulez toate etapele.")
 
         print("\n🚀 Rulez pipeline-ul complet de detecție și calcul...")
         
@@ -309,11 +338,28 @@ def run_segmentation_and_classification_for_document(
         pipeline_timer.add_step("4. Detections (YOLO)", t.end_time - t.start_time)
         
         # =========================================================
-        # STEP 5: SCALE DETECTION
+        # STEP 5: SCALE DETECTION (în fundal)
         # =========================================================
-        with Timer("STEP 5: Scale Detection - Extract meters/pixel (GPT-4o)") as t:
-            run_scale_detection_for_run(run_id)
-        pipeline_timer.add_step("5. Scale Detection", t.end_time - t.start_time)
+        # Apelurile LLM de perimetru / arie cer măsurători în pixeli (fără scară),
+        # deci pornesc în paralel cu scale; count_objects / exterior_doors nu
+        # folosesc scara și rulează între timp. Se așteaptă scara înainte de
+        # measure_objects, iar măsurătorile în pixeli înainte de perimeter / area.
+        # Cu COMBINED_ANALYSIS, un singur apel per plan rulează primul și umple
+        # cache-urile; scale / prefetch-urile fac apeluri doar pentru câmpurile respinse.
+        print("\n⏱️  START (fundal): STEP 5: Scale Detection + măsurători LLM în pixeli")
+        metric_pool = ThreadPoolExecutor(max_workers=4)
+        combined_future = metric_pool.submit(run_combined_analysis_for_run, run_id)
+
+        def _timed(fn, *args):
+            combined_future.exception()      # eșecul analizei combinate = apelurile separate
+            t0 = time.time()
+            return fn(*args), time.time() - t0
+
+        scale_future = metric_pool.submit(_timed, run_scale_detection_for_run, run_id)
+        prefetch_futures = [
+            metric_pool.submit(_timed, prefetch_wall_pixels_for_run, run_id),
+            metric_pool.submit(_timed, prefetch_house_outline_for_run, run_id),
+        ]
         
         # =========================================================
         # STEP 6: COUNT OBJECTS
@@ -329,6 +375,10 @@ def run_segmentation_and_classification_for_document(
             run_exterior_doors_for_run(run_id)
         pipeline_timer.add_step("7. Exterior Doors", t.end_time - t.start_time)
         
+        with Timer("STEP 5: Scale Detection - așteptare rezultat") as t:
+            _, scale_s = scale_future.result()
+        pipeline_timer.add_step("5. Scale Detection (paralel)", scale_s)
+        
         # =========================================================
         # STEP 8: MEASURE OBJECTS
         # =========================================================
@@ -339,8 +389,13 @@ def run_segmentation_and_classification_for_document(
         # =========================================================
         # STEP 9: PERIMETER
         # =========================================================
-        with Timer("STEP 9: Perimeter - Measure wall lengths (GPT-4o)") as t:
+        with Timer("STEP 9: Perimeter - Measure wall lengths (local / GPT-4o)") as t:
+            for fut in prefetch_futures:
+                fut.result()
+            metric_pool.shutdown()
             run_perimeter_for_run(run_id)
+            # etajele identice: rezultatele reprezentantului, aliniate pe fiecare duplicat
+            fanout_duplicates_for_run(run_id)
         pipeline_timer.add_step("9. Perimeter", t.end_time - t.start_time)
         
         # =========================================================
@@ -362,7 +417,7 @@ def run_segmentation_and_classification_for_document(
         # =========================================================
         
         # MODIFICARE: Încărcăm datele AICI, înainte de pricing!
-        frontend_data = _load_frontend_data(job_root)
+        frontend_data = load_frontend_data(job_root)
         
         with Timer("STEP 12: Pricing - Calculate all costs (raw)") as t:
             pricing_results: list[PricingJobResult] = run_pricing_for_run(
@@ -434,6 +489,11 @@ def run_segmentation_and_classification_for_document(
         
         pipeline_timer.add_step("14. PDF Generation", t.end_time - t.start_time)
 
+        try:
+            register_run_plans(run_id)
+        except Exception as e:
+            print(f"⚠️ Nu am putut actualiza indexul de refolosire: {e}")
+
     else:
         print("\nℹ️ Niciun plan house_blueprint – sar peste pipeline-ul complet.")
 
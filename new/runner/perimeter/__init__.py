@@ -1,4 +1,4 @@
 # new/runner/perimeter/__init__.py
-from .jobs import run_perimeter_for_run, PerimeterJobResult
+from .jobs import run_perimeter_for_run, prefetch_wall_pixels_for_run, PerimeterJobResult
 
-__all__ = ["run_perimeter_for_run", "PerimeterJobResult"]
\ No newline at end of file
+__all__ = ["run_perimeter_for_run", "prefetch_wall_pixels_for_run", "PerimeterJobResult"]
\ No newline at end of file
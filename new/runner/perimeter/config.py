@@ -12,4 +12,36 @@ MIN_EXTERIOR_WALLS_M = 15.0
 MAX_EXTERIOR_WALLS_M = 100.0
 
 MIN_PERIMETER_M = 20.0
-MAX_PERIMETER_M = 60.0
\ No newline at end of file
+MAX_PERIMETER_M = 60.0
+
+# ------------------------------------------------------------
+# Motor de măsurare
+#   "local"       – schelet pe masca pereților (local_walls.py); GPT-4o doar dacă
+#                   încrederea locală e în PERIMETER_LLM_FALLBACK_CONFIDENCE
+#   "cross_check" – local + GPT-4o, diferențele se salvează alături (rezultatul rămâne cel local)
+#   "llm"         – doar GPT-4o (comportamentul vechi)
+# Override: PERIMETER_MODE=local|cross_check|llm
+# ------------------------------------------------------------
+PERIMETER_MODE = "local"
+
+# Încrederea locală (local_walls._confidence) la care rezultatul vine de la GPT-4o
+# (în "local" și "cross_check"; măsurătoarea locală rămâne la "local_measurement")
+PERIMETER_LLM_FALLBACK_CONFIDENCE = ("low",)
+
+# Masca pereților (fracțiuni din latura mică a planului)
+WALL_INK_THRESHOLD = 200          # gri < prag = cerneală
+WALL_CLOSE_RATIO = 0.006          # umple hașura / contururile duble ale pereților
+WALL_OPEN_RATIO = 0.006           # elimină liniile subțiri (cote, uși, mobilier)
+WALL_TEXT_RATIO = 0.02           # componente de cerneală mai mici = litere / cifre
+WALL_MIN_COMPONENT_RATIO = 0.03   # componente (după închidere) mai scurte = simboluri
+
+# Amprenta clădirii: pereții închiși peste golurile de uși / ferestre (inclusiv uși de balcon)
+WALL_FOOTPRINT_CLOSE_M = 2.5
+
+# Golurile de uși din pereții drepți (închise înainte de schelet)
+WALL_OPENING_BRIDGE_M = 1.1
+
+# Scheletul se calculează pe o copie micșorată: pereții tipici la ~SKELETON_WALL_PX
+# pixeli, cei mai subțiri la cel puțin SKELETON_MIN_WALL_PX
+SKELETON_WALL_PX = 6.0
+SKELETON_MIN_WALL_PX = 3.0
@@ -8,73 +8,56 @@ import math
 from pathlib import Path
 
 from openai import OpenAI
+from PIL import Image
 
 
 PERIMETER_PROMPT = """
 You are analyzing an architectural floor plan (top-down view).
+The image is {width}×{height} pixels. All coordinates and lengths you return are in
+PIXELS of THIS image (origin top-left, x to the right, y down). Do NOT convert to meters.
 
-Your task is to estimate:
-1. Total length of INTERIOR walls (walls between rooms, excluding exterior walls)
-2. Total length of EXTERIOR walls (building perimeter/outline)
-3. Total building PERIMETER (outer boundary length)
+Your task is to trace:
+1. EXTERIOR outline: one closed polygon along the outer face of the exterior walls
+   (building perimeter/outline), as a list of vertices [x, y]
+2. INTERIOR walls: one polyline per interior wall (walls between rooms, excluding
+   exterior walls), along the wall centre, as lists of vertices [x, y]
+3. Total lengths in pixels for each category (interior walls, exterior walls, perimeter)
 
-Use BOTH methods:
-
-METHOD 1 - Pixel-based:
-- Identify wall lines on the plan
-- Estimate total length in pixels for each category
-- Convert using scale: {meters_per_pixel:.6f} m/pixel
-- Formula: length_m = length_px × meters_per_pixel
-
-METHOD 2 - Proportion-based:
-- Identify room dimensions (if labeled)
-- Estimate wall lengths from building shape and proportions
-- Calculate perimeter from total area: P ≈ 4√A
-
-METHOD 3 - Calculate AVERAGE of both methods.
+Separately, ONLY if the plan has dimension labels (e.g. "12,49", "3,76"):
+- Read the overall building dimensions from the labels, in METERS as written
+- Derive exterior walls length and perimeter from them (null if not possible)
 
 DEFINITIONS:
 - Interior walls = walls between rooms (bathrooms, bedrooms, kitchen)
 - Exterior walls = building outer walls
 - Perimeter = total length of outer boundary
 
-VALIDATION (typical single-family home 80-120 m²):
-- Interior walls: 30-60 m
-- Exterior walls: 30-50 m
-- Perimeter: 30-45 m
-
 CRITICAL: You MUST respond with ONLY valid JSON. No markdown, no explanations, ONLY JSON.
 
 OUTPUT FORMAT (STRICT JSON ONLY):
 {{
-  "scale_meters_per_pixel": {meters_per_pixel:.6f},
-  "estimations": {{
-    "by_pixels": {{
-      "interior_meters": <float>,
-      "exterior_meters": <float>,
-      "total_perimeter_meters": <float>,
-      "method_notes": "<string: explain measurement approach>"
-    }},
-    "by_proportion": {{
-      "interior_meters": <float>,
-      "exterior_meters": <float>,
-      "total_perimeter_meters": <float>,
-      "method_notes": "<string: explain logic>"
-    }},
-    "average_result": {{
-      "interior_meters": <float>,
-      "exterior_meters": <float>,
-      "total_perimeter_meters": <float>
-    }}
+  "image_width_px": {width},
+  "image_height_px": {height},
+  "exterior_outline_px": [[<x>, <y>], ...],
+  "interior_walls_px": [[[<x>, <y>], [<x>, <y>], ...], ...],
+  "lengths_px": {{
+    "interior": <float>,
+    "exterior": <float>,
+    "perimeter": <float>
+  }},
+  "by_labels_m": {{
+    "interior_meters": <float or null>,
+    "exterior_meters": <float or null>,
+    "total_perimeter_meters": <float or null>,
+    "method_notes": "<string: which labels were used>"
   }},
   "confidence": "high | medium | low",
   "verification_notes": "<string: consistency check>"
 }}
 
-REMEMBER: 
+REMEMBER:
 - Perimeter MUST be ≤ exterior walls length
-- Interior walls typically 0.8-1.5× exterior walls
-- ALL values MUST be realistic for a single-family home
+- Coordinates MUST be inside the image ({width}×{height})
 - Output MUST be valid JSON ONLY (no markdown blocks, no text before/after)
 """
 
@@ -114,31 +97,63 @@ def _fallback_estimation(meters_per_pixel: float, house_area_m2: float = 100.0)
     }
 
 
-def measure_perimeter_with_gemini(
-    plan_image: Path,
-    scale_data: dict
-) -> dict:
+def image_size(plan_image: Path) -> tuple[int, int]:
+    """(lățime, înălțime) în pixeli, doar din header-ul imaginii."""
+    with Image.open(plan_image) as im:
+        return im.size
+
+
+def points_in_image(raw: dict, key: str, size: tuple[int, int]) -> list:
     """
-    Trimite planul la GPT-4o pentru măsurarea lungimilor pereților.
-    
-    Args:
-        plan_image: Path către plan.jpg
-        scale_data: Dict cu scale_result.json (conține meters_per_pixel)
-    
-    Returns:
-        Dict cu structura de estimări perimetru
+    Coordonatele din răspuns, aduse la pixelii planului: dacă modelul a lucrat pe o
+    copie redimensionată (image_width_px / image_height_px diferite), se rescalează.
+    """
+    sx = size[0] / float(raw.get("image_width_px") or size[0])
+    sy = size[1] / float(raw.get("image_height_px") or size[1])
+
+    def conv(obj):
+        if isinstance(obj, (list, tuple)) and len(obj) == 2 and all(isinstance(v, (int, float)) for v in obj):
+            return (float(obj[0]) * sx, float(obj[1]) * sy)
+        if isinstance(obj, (list, tuple)):
+            return [c for c in (conv(o) for o in obj) if c is not None]
+        return None
+
+    return conv(raw.get(key) or []) or []
+
+
+def polyline_length(points: list, closed: bool = False) -> float:
+    """Lungimea unei polilinii (px); closed → include latura de închidere."""
+    if len(points) < 2:
+        return 0.0
+    pts = list(points) + ([points[0]] if closed else [])
+    return sum(math.dist(a, b) for a, b in zip(pts, pts[1:]))
+
+
+def polygon_area(points: list) -> float:
+    """Aria unui poligon (px², formula Gauss / shoelace)."""
+    if len(points) < 3:
+        return 0.0
+    return abs(sum(
+        x1 * y2 - x2 * y1
+        for (x1, y1), (x2, y2) in zip(points, list(points[1:]) + [points[0]])
+    )) / 2.0
+
+
+def request_wall_pixels(plan_image: Path) -> dict | None:
+    """
+    Cere de la GPT-4o conturul exterior și pereții interiori în PIXELI (fără scară),
+    deci apelul poate rula în paralel cu etapa scale. Scara se aplică apoi local
+    (walls_from_pixels), iar o scară corectată nu mai cere un apel nou.
+    RETURN: răspunsul brut (+ "image_size_px") sau None dacă API-ul refuză / eșuează.
     """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY lipsește din environment")
     
     client = OpenAI(api_key=api_key)
+    width, height = image_size(plan_image)
     
-    meters_per_pixel = float(scale_data.get("meters_per_pixel", 0.0))
-    if meters_per_pixel <= 0:
-        raise ValueError("Scara invalidă în scale_result.json")
-    
-    print(f"       📐 Măsurare pereți cu GPT-4o (scala: {meters_per_pixel:.6f} m/px)...")
+    print(f"       📐 Măsurare pereți în pixeli cu GPT-4o ({width}×{height}px)...")
     
     # Codificare imagine
     with open(plan_image, "rb") as f:
@@ -157,7 +172,7 @@ def measure_perimeter_with_gemini(
                     "content": [
                         {
                             "type": "text", 
-                            "text": PERIMETER_PROMPT.format(meters_per_pixel=meters_per_pixel)
+                            "text": PERIMETER_PROMPT.format(width=width, height=height)
                         },
                         {
                             "type": "image_url",
@@ -170,21 +185,19 @@ def measure_perimeter_with_gemini(
                 }
             ],
             temperature=0,
-            max_tokens=2000,
+            max_tokens=4000,
             response_format={"type": "json_object"}  # Forțează JSON
         )
     except Exception as e:
         print(f"       ⚠️  Eroare la apelul OpenAI: {e}")
-        print(f"       🔄 Folosesc fallback estimation...")
-        return _fallback_estimation(meters_per_pixel)
+        return None
     
     reply = response.choices[0].message.content.strip()
     
     # Verificare refuz explicit
     if "unable to analyze" in reply.lower() or "cannot analyze" in reply.lower() or "i'm unable" in reply.lower():
         print(f"       ⚠️  GPT-4o a refuzat analiza imagini")
-        print(f"       🔄 Folosesc fallback estimation...")
-        return _fallback_estimation(meters_per_pixel)
+        return None
     
     # Curăță JSON (elimină markdown dacă există)
     if reply.startswith("```"):
@@ -198,23 +211,115 @@ def measure_perimeter_with_gemini(
     except json.JSONDecodeError as e:
         print(f"       ⚠️  Răspuns invalid de la GPT-4o:")
         print(reply[:500])
-        print(f"       🔄 Folosesc fallback estimation...")
-        return _fallback_estimation(meters_per_pixel)
+        return None
     
     # Validare structură
-    if "estimations" not in result:
-        print(f"       ⚠️  Răspunsul GPT-4o nu conține cheia 'estimations'")
+    if not isinstance(result, dict) or not (result.get("exterior_outline_px") or result.get("lengths_px")):
+        print(f"       ⚠️  Răspunsul GPT-4o nu conține măsurători în pixeli")
+        return None
+    
+    # fără dimensiuni raportate, coordonatele sunt în pixelii imaginii trimise
+    result.setdefault("image_width_px", width)
+    result.setdefault("image_height_px", height)
+    result["image_size_px"] = [width, height]
+    return result
+
+
+def walls_from_pixels(raw: dict, meters_per_pixel: float) -> dict:
+    """
+    Răspunsul în pixeli → structura walls_measurements_gemini.json, la scara dată:
+      by_pixels     – lungimile geometrice (contur / polilinii, altfel totalurile px) × m/px
+      by_proportion – cotele citite de model (metri), altfel P ≈ 4√A din aria conturului
+      average_result – media celor două
+    """
+    size = tuple(raw.get("image_size_px") or (raw.get("image_width_px"), raw.get("image_height_px")))
+    lengths = raw.get("lengths_px") or {}
+    # totalurile px raportate sunt în coordonatele modelului, ca și conturul
+    k = (size[0] / float(raw.get("image_width_px") or size[0]) + size[1] / float(raw.get("image_height_px") or size[1])) / 2.0
+
+    outline = points_in_image(raw, "exterior_outline_px", size)
+    interior_walls = points_in_image(raw, "interior_walls_px", size)
+    perimeter_px = polyline_length(outline, closed=True) or float(lengths.get("perimeter") or 0.0) * k
+    exterior_px = max(float(lengths.get("exterior") or 0.0) * k, perimeter_px)
+    interior_px = sum(polyline_length(w) for w in interior_walls) or float(lengths.get("interior") or 0.0) * k
+
+    by_pixels = {
+        "interior_meters": interior_px * meters_per_pixel,
+        "exterior_meters": exterior_px * meters_per_pixel,
+        "total_perimeter_meters": perimeter_px * meters_per_pixel,
+        "method_notes": (
+            f"Pixeli × scară: contur {len(outline)} vârfuri, {len(interior_walls)} pereți interiori "
+            f"({meters_per_pixel:.6f} m/px aplicat local)"
+        ),
+    }
+
+    labels = raw.get("by_labels_m") or {}
+    area_m2 = polygon_area(outline) * meters_per_pixel ** 2
+    by_proportion = {}
+    for key in ("interior_meters", "exterior_meters", "total_perimeter_meters"):
+        value = labels.get(key)
+        by_proportion[key] = float(value) if isinstance(value, (int, float)) and value > 0 else None
+    if by_proportion["total_perimeter_meters"] is None and area_m2 > 0:
+        by_proportion["total_perimeter_meters"] = 4.0 * math.sqrt(area_m2)
+    if by_proportion["exterior_meters"] is None:
+        by_proportion["exterior_meters"] = by_proportion["total_perimeter_meters"]
+    if by_proportion["interior_meters"] is None:
+        by_proportion["interior_meters"] = by_pixels["interior_meters"]
+    by_proportion["method_notes"] = labels.get("method_notes") or f"P ≈ 4√A, A = {area_m2:.1f} m² din contur"
+
+    average = {}
+    for key in ("interior_meters", "exterior_meters", "total_perimeter_meters"):
+        values = [v for v in (by_pixels[key], by_proportion[key]) if v]
+        average[key] = sum(values) / len(values) if values else 0.0
+
+    return {
+        "scale_meters_per_pixel": meters_per_pixel,
+        "estimations": {
+            "by_pixels": by_pixels,
+            "by_proportion": by_proportion,
+            "average_result": average,
+        },
+        "confidence": raw.get("confidence", "medium"),
+        "verification_notes": raw.get("verification_notes", ""),
+    }
+
+
+def measure_perimeter_with_gemini(
+    plan_image: Path,
+    scale_data: dict,
+    raw: dict | None = None
+) -> dict:
+    """
+    Măsurarea lungimilor pereților cu GPT-4o: pixeli de la model, scara aplicată local.
+    
+    Args:
+        plan_image: Path către plan.jpg
+        scale_data: Dict cu scale_result.json (conține meters_per_pixel)
+        raw: răspunsul în pixeli deja obținut (request_wall_pixels); None → apel nou,
+             {} → apelul a eșuat deja (direct fallback)
+    
+    Returns:
+        Dict cu structura de estimări perimetru
+    """
+    meters_per_pixel = float(scale_data.get("meters_per_pixel", 0.0))
+    if meters_per_pixel <= 0:
+        raise ValueError("Scara invalidă în scale_result.json")
+    
+    if raw is None:
+        raw = request_wall_pixels(plan_image)
+    if not raw:
         print(f"       🔄 Folosesc fallback estimation...")
         return _fallback_estimation(meters_per_pixel)
     
-    avg = result["estimations"].get("average_result", {})
+    result = walls_from_pixels(raw, meters_per_pixel)
+    avg = result["estimations"]["average_result"]
     int_m = avg.get("interior_meters", 0)
     ext_m = avg.get("exterior_meters", 0)
     per_m = avg.get("total_perimeter_meters", 0)
     
-    print(f"       ✅ Măsurare completă:")
+    print(f"       ✅ Măsurare completă (scala: {meters_per_pixel:.6f} m/px):")
     print(f"          • Pereți interiori: {int_m:.1f} m")
     print(f"          • Pereți exteriori: {ext_m:.1f} m")
     print(f"          • Perimetru: {per_m:.1f} m")
     
-    return result
\ No newline at end of file
+    return result
@@ -5,7 +5,7 @@ import json
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 
@@ -15,8 +15,12 @@ from ..config.settings import (
     PlanInfo,
 )
 
-from .gemini_measure import measure_perimeter_with_gemini
+from ..plan_index import reused_result
+from .gemini_measure import measure_perimeter_with_gemini, request_wall_pixels
+from .local_walls import measure_walls_local, local_result_as_estimations
 from .config import (
+    PERIMETER_MODE,
+    PERIMETER_LLM_FALLBACK_CONFIDENCE,
     MIN_INTERIOR_WALLS_M,
     MAX_INTERIOR_WALLS_M,
     MIN_EXTERIOR_WALLS_M,
@@ -28,6 +32,11 @@ from .config import (
 
 STAGE_NAME = "perimeter"
 
+_MODES = ("local", "cross_check", "llm")
+
+# răspunsul GPT-4o în pixeli (fără scară); scara se aplică la fiecare rulare
+WALL_PIXELS_FILE = "walls_measurements_px.json"
+
 
 @dataclass
 class PerimeterJobResult:
@@ -37,6 +46,90 @@ class PerimeterJobResult:
     message: str
 
 
+def perimeter_mode() -> str:
+    """local | cross_check | llm (override cu PERIMETER_MODE)."""
+    mode = os.getenv("PERIMETER_MODE", PERIMETER_MODE).strip().lower()
+    return mode if mode in _MODES else PERIMETER_MODE
+
+
+def _relative_diff(local: float, other: float) -> float | None:
+    if local <= 0:
+        return None
+    return round((other - local) / local, 3)
+
+
+def wall_pixels(work_dir: Path, plan_image: Path) -> dict:
+    """
+    Măsurătorile GPT-4o în pixeli: din WALL_PIXELS_FILE dacă există deja (prefetch în
+    paralel cu scale, sau o rulare anterioară), altfel apel nou salvat acolo.
+    RETURN: răspunsul brut sau {} dacă apelul a eșuat.
+    """
+    cached = work_dir / WALL_PIXELS_FILE
+    if cached.exists():
+        with open(cached, "r", encoding="utf-8") as f:
+            return json.load(f)
+    raw = request_wall_pixels(plan_image)
+    if not raw:
+        return {}
+    work_dir.mkdir(parents=True, exist_ok=True)
+    with open(cached, "w", encoding="utf-8") as f:
+        json.dump(raw, f, indent=2, ensure_ascii=False)
+    return raw
+
+
+def measure_walls(plan_image: Path, scale_data: dict, mode: str, work_dir: Path) -> dict:
+    """
+    Rezultatul în formatul walls_measurements_gemini.json, după modul ales:
+      local       – motorul local; dacă eșuează sau are încredere mică → GPT-4o
+                    (care are propriul fallback)
+      cross_check – local + GPT-4o salvat la "llm_cross_check" cu diferențele relative
+                    (încredere locală mică → rezultatul GPT-4o, ca în local)
+      llm         – doar GPT-4o
+    """
+    def llm() -> dict:
+        return measure_perimeter_with_gemini(plan_image, scale_data, raw=wall_pixels(work_dir, plan_image))
+
+    if mode == "llm":
+        return llm()
+
+    meters_per_pixel = float(scale_data.get("meters_per_pixel", 0.0))
+    try:
+        if meters_per_pixel <= 0:
+            raise ValueError(f"meters_per_pixel invalid: {meters_per_pixel}")
+        local = measure_walls_local(plan_image, meters_per_pixel)
+    except Exception as e:
+        print(f"       ⚠️  Măsurare locală eșuată ({e}) → GPT-4o")
+        return llm()
+
+    print(
+        f"       📐 Local: interior {local['interior_meters']:.1f}m, exterior {local['exterior_meters']:.1f}m, "
+        f"perimetru {local['total_perimeter_meters']:.1f}m ({local['confidence']}, {local['elapsed_s']:.2f}s)"
+    )
+    result = local_result_as_estimations(local)
+
+    if local["confidence"] in PERIMETER_LLM_FALLBACK_CONFIDENCE:
+        print(f"       ⚠️  Încredere locală {local['confidence']} → GPT-4o")
+        llm_result = llm()
+        # fallback-ul GPT-4o (P ≈ 4√A, confidence "low") nu e mai bun decât măsurătoarea locală
+        if llm_result.get("confidence") != "low":
+            llm_result["local_measurement"] = result
+            return llm_result
+        print("       ⚠️  GPT-4o fără măsurătoare → păstrez rezultatul local")
+        return result
+
+    if mode == "cross_check":
+        llm_result = llm()
+        llm_avg = llm_result.get("estimations", {}).get("average_result", {})
+        result["llm_cross_check"] = {
+            "result": llm_result,
+            "relative_diff": {
+                key: _relative_diff(float(local[key]), float(llm_avg.get(key, 0.0)))
+                for key in ("interior_meters", "exterior_meters", "total_perimeter_meters")
+            },
+        }
+    return result
+
+
 def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) -> PerimeterJobResult:
     """
     Măsoară lungimile pereților pentru un singur plan.
@@ -57,6 +150,21 @@ def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) ->
             message=f"Nu găsesc {scale_json.name}"
         )
     
+    reused = reused_result(work_dir, "walls_measurements_gemini.json")
+    if reused:
+        with open(reused, "r", encoding="utf-8") as f:
+            avg = json.load(f)["estimations"]["average_result"]
+        return PerimeterJobResult(
+            plan_id=plan.plan_id,
+            work_dir=work_dir,
+            success=True,
+            message=(
+                f"Refolosit din index → Interior: {float(avg['interior_meters']):.1f}m, "
+                f"Exterior: {float(avg['exterior_meters']):.1f}m, "
+                f"Perimetru: {float(avg['total_perimeter_meters']):.1f}m"
+            )
+        )
+    
     try:
         print(
             f"[{STAGE_NAME}] ({index}/{total}) {plan.plan_id} → measure walls "
@@ -68,8 +176,9 @@ def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) ->
         with open(scale_json, "r", encoding="utf-8") as f:
             scale_data = json.load(f)
         
-        # Call GPT-4o
-        result = measure_perimeter_with_gemini(plan.plan_image, scale_data)
+        # Local (schelet pereți) / GPT-4o, după PERIMETER_MODE
+        mode = perimeter_mode()
+        result = measure_walls(plan.plan_image, scale_data, mode, work_dir)
         
         # Validare rezultate
         avg = result["estimations"]["average_result"]
@@ -95,8 +204,9 @@ def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) ->
         result["meta"] = {
             "plan_id": plan.plan_id,
             "plan_image": str(plan.plan_image),
-            "generated_at": datetime.utcnow().isoformat() + "Z",
-            "stage": STAGE_NAME
+            "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "stage": STAGE_NAME,
+            "mode": mode
         }
         
         if warnings:
@@ -135,6 +245,39 @@ def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) ->
         )
 
 
+def prefetch_wall_pixels_for_run(run_id: str, max_parallel: int = 4) -> int:
+    """
+    Apelurile GPT-4o în pixeli pentru toate planurile, înainte să existe scara
+    (rulează în paralel cu etapa scale). Doar în modurile care folosesc sigur
+    GPT-4o (llm / cross_check); în "local" apelul e doar rezervă.
+    RETURN: numărul de planuri cu măsurători în pixeli disponibile.
+    """
+    if perimeter_mode() == "local":
+        return 0
+    try:
+        plans: List[PlanInfo] = load_plan_infos(run_id, stage_name=STAGE_NAME)
+    except PlansListError as e:
+        print(f"❌ [{STAGE_NAME}] {e}")
+        return 0
+    
+    todo = [p for p in plans if not reused_result(p.stage_work_dir, "walls_measurements_gemini.json")]
+    if not todo:
+        return 0
+    
+    print(f"📐 [{STAGE_NAME}] prefetch pereți în pixeli pentru {len(todo)} planuri (fără scară)", flush=True)
+    
+    def _fetch(p: PlanInfo) -> dict:
+        try:
+            return wall_pixels(p.stage_work_dir, p.plan_image)
+        except Exception as e:
+            print(f"⚠️ [{STAGE_NAME}] prefetch {p.plan_id} eșuat: {e}")
+            return {}
+    
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(todo))) as executor:
+        raws = list(executor.map(_fetch, todo))
+    return sum(1 for r in raws if r)
+
+
 def run_perimeter_for_run(run_id: str, max_parallel: int | None = None) -> List[PerimeterJobResult]:
     """
     Punct de intrare pentru etapa „perimeter" (măsurare lungimi pereți).
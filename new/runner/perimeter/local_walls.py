@@ -0,0 +1,402 @@
+# new/runner/perimeter/local_walls.py
+# ------------------------------------------------------------
+# Măsurare locală (CPU, fără LLM) a lungimilor de pereți.
+#
+#   1) masca pereților: cerneala (gri < 200) fără componentele mici (litere, cifre)
+#      → închidere (umple hașura / contururile duble) → deschidere (scoate liniile
+#      subțiri: cote, uși, mobilier) → doar componentele lungi din bbox-ul clădirii
+#   2) amprenta clădirii: pereții închiși peste goluri (WALL_FOOTPRINT_CLOSE_M) +
+#      contururile exterioare umplute; perimetrul = conturul axului pereților
+#      exteriori (amprenta erodată cu o jumătate de grosime)
+#   3) schelet (Zhang–Suen cu LUT pe codul vecinătății) pe o copie micșorată,
+#      după ce golurile ușilor din pereții drepți au fost închise
+#   4) vectorizare: pixelii cu 2 vecini formează ramuri (segmente), capetele /
+#      joncțiunile le separă; lungimea = muchii ortogonale (1) + diagonale (√2);
+#      cioturile scurte (colțuri, tocuri) nu se numără
+#   5) exterior / interior per ramură: axul la cel mult o grosime de perete de
+#      masca exterior din exterior_doors (aceeași, prin plan_geometry)
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import math
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..exterior_doors.flood_blue import shared_exterior_mask
+from ..plan_geometry import PlanGeometry, plan_geometry
+from .config import (
+    WALL_INK_THRESHOLD,
+    WALL_CLOSE_RATIO,
+    WALL_OPEN_RATIO,
+    WALL_TEXT_RATIO,
+    WALL_MIN_COMPONENT_RATIO,
+    WALL_FOOTPRINT_CLOSE_M,
+    WALL_OPENING_BRIDGE_M,
+    SKELETON_WALL_PX,
+    SKELETON_MIN_WALL_PX,
+    MIN_INTERIOR_WALLS_M,
+    MAX_INTERIOR_WALLS_M,
+    MIN_EXTERIOR_WALLS_M,
+    MAX_EXTERIOR_WALLS_M,
+    MIN_PERIMETER_M,
+    MAX_PERIMETER_M,
+)
+
+SQRT2 = math.sqrt(2.0)
+
+# Parametrii derivării măștii pereților (intră în cheia din PlanGeometry)
+WALL_MASK_PARAMS = {
+    "ink_threshold": WALL_INK_THRESHOLD,
+    "close": WALL_CLOSE_RATIO,
+    "open": WALL_OPEN_RATIO,
+    "text": WALL_TEXT_RATIO,
+    "min_component": WALL_MIN_COMPONENT_RATIO,
+}
+
+
+# ------------------------------------------------------------
+# 1) Masca pereților
+# ------------------------------------------------------------
+
+def wall_mask(geometry: PlanGeometry) -> np.ndarray:
+    """Masca solidificată a pereților (255 = perete), memoizată în geometry."""
+    return geometry.get("wall_mask", _compute_wall_mask, params=WALL_MASK_PARAMS)
+
+
+def _drop_small(mask: np.ndarray, min_side: float) -> np.ndarray:
+    """Scoate componentele (8-conectate) cu latura bbox-ului mai mică decât min_side."""
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    keep = np.where(np.maximum(stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]) >= min_side, 255, 0)
+    keep = keep.astype(np.uint8)
+    keep[0] = 0
+    return keep[labels]
+
+
+def _compute_wall_mask(geometry: PlanGeometry) -> np.ndarray:
+    ink = cv2.bitwise_not(geometry.binary(WALL_INK_THRESHOLD))
+    h, w = ink.shape
+    side = min(h, w)
+
+    # literele / cifrele sunt componente mici de cerneală; pereții (contur + hașură) sunt legați
+    ink = _drop_small(ink, WALL_TEXT_RATIO * side)
+
+    # închiderea umple hașura / contururile duble ale pereților, deschiderea
+    # scoate liniile subțiri (cote, uși, mobilier, hașura terasei)
+    kc = max(3, int(side * WALL_CLOSE_RATIO))
+    ko = max(3, int(side * WALL_OPEN_RATIO))
+    walls = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (kc, kc)))
+    walls = cv2.morphologyEx(walls, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (ko, ko)))
+    walls = _drop_small(walls, WALL_MIN_COMPONENT_RATIO * side)
+
+    # clădirea = bbox-ul componentelor mari (≥ 10% din cea mai mare);
+    # ce rămâne în afara lui (titlu, legendă, săgeți de secțiune) → afară
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(walls, connectivity=8)
+    if n <= 1:
+        return walls
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    core = stats[1:][areas >= 0.1 * areas.max()]
+    x1, y1 = core[:, 0].min(), core[:, 1].min()
+    x2, y2 = (core[:, 0] + core[:, 2]).max(), (core[:, 1] + core[:, 3]).max()
+    inside = (
+        (stats[:, 0] >= x1) & (stats[:, 1] >= y1)
+        & (stats[:, 0] + stats[:, 2] <= x2) & (stats[:, 1] + stats[:, 3] <= y2)
+    )
+    keep = np.where(inside, 255, 0).astype(np.uint8)
+    keep[0] = 0
+    return keep[labels]
+
+
+# ------------------------------------------------------------
+# 2) Amprenta clădirii
+# ------------------------------------------------------------
+
+def building_footprint(walls: np.ndarray, close_px: int) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Pereții închiși (deschiderile ușilor / ferestrelor) + contururile exterioare umplute."""
+    h, w = walls.shape
+    close_px = max(3, min(int(close_px), int(0.2 * min(h, w))))
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (close_px, close_px))
+    closed = cv2.morphologyEx(walls, cv2.MORPH_CLOSE, kernel)
+
+    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return np.zeros_like(walls), []
+    areas = [cv2.contourArea(c) for c in contours]
+    largest = max(areas)
+    contours = [c for c, a in zip(contours, areas) if a >= 0.05 * largest]
+
+    footprint = np.zeros_like(walls)
+    cv2.drawContours(footprint, contours, -1, 255, thickness=cv2.FILLED)
+    return footprint, contours
+
+
+def bridge_openings(walls: np.ndarray, gap_px: float) -> np.ndarray:
+    """Închide golurile (uși) până la gap_px din pereții drepți, pe orizontală și verticală."""
+    k = max(3, int(round(gap_px)))
+    bridged_h = cv2.morphologyEx(walls, cv2.MORPH_CLOSE, np.ones((1, k), np.uint8))
+    bridged_v = cv2.morphologyEx(walls, cv2.MORPH_CLOSE, np.ones((k, 1), np.uint8))
+    return cv2.bitwise_or(bridged_h, bridged_v)
+
+
+# ------------------------------------------------------------
+# 3) Schelet (Zhang–Suen, vectorizat pe tot raster-ul)
+# ------------------------------------------------------------
+
+def skeletonize(mask: np.ndarray, max_iter: int = 200) -> np.ndarray:
+    """Schelet 8-conectat (bool) al unei măști binare (subțierea rulează doar pe bbox-ul ei)."""
+    out = np.zeros(mask.shape, bool)
+    pts = cv2.findNonZero(mask)
+    if pts is None:
+        return out
+    x, y, w, h = cv2.boundingRect(pts)
+    out[y:y + h, x:x + w] = _zhang_suen(mask[y:y + h, x:x + w], max_iter)
+    return out
+
+
+# vecinii p2..p9 (sus, dreapta-sus, dreapta, ... stânga-sus) codificați pe 8 biți;
+# filter2D e corelație, deci kernel[ky, kx] înmulțește pixelul (y + ky - 1, x + kx - 1)
+_NEIGHBOUR_CODE = np.array([[128, 1, 2], [64, 0, 4], [32, 16, 8]], np.float32)
+
+
+def _zhang_suen_luts() -> tuple[np.ndarray, np.ndarray]:
+    """Pentru fiecare cod de vecinătate: se șterge pixelul în sub-iterația 0 / 1?"""
+    luts = np.zeros((2, 256), np.uint8)
+    for code in range(256):
+        p = [(code >> i) & 1 for i in range(8)]          # p2..p9
+        b = sum(p)
+        a = sum(p[i] == 0 and p[(i + 1) % 8] == 1 for i in range(8))
+        p2, p4, p6, p8 = p[0], p[2], p[4], p[6]
+        if 2 <= b <= 6 and a == 1:
+            luts[0, code] = 255 * (p2 * p4 * p6 == 0 and p4 * p6 * p8 == 0)
+            luts[1, code] = 255 * (p2 * p4 * p8 == 0 and p2 * p6 * p8 == 0)
+    return luts[0], luts[1]
+
+
+_ZS_LUTS = _zhang_suen_luts()
+
+
+def _zhang_suen(mask: np.ndarray, max_iter: int) -> np.ndarray:
+    img = cv2.compare(mask, 0, cv2.CMP_GT)
+    for _ in range(max_iter):
+        changed = False
+        for lut in _ZS_LUTS:
+            code = cv2.filter2D(img // 255, cv2.CV_8U, _NEIGHBOUR_CODE, borderType=cv2.BORDER_CONSTANT)
+            delete = cv2.bitwise_and(cv2.LUT(code, lut), img)
+            if cv2.countNonZero(delete):
+                img = cv2.subtract(img, delete)
+                changed = True
+        if not changed:
+            break
+    return img > 0
+
+
+# ------------------------------------------------------------
+# 4) Vectorizare + lungimi
+# ------------------------------------------------------------
+
+def _edge_lengths(sk: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Muchiile scheletului ca (y, x, lungime) ale primului pixel:
+    ortogonale = 1, diagonale = √2 doar dacă nu există deja drumul ortogonal.
+    """
+    ys, xs, ls = [], [], []
+
+    def add(edges, dy, dx, length):
+        y, x = np.nonzero(edges)
+        ys.append(y + dy)
+        xs.append(x + dx)
+        ls.append(np.full(len(y), length))
+
+    add(sk[:, :-1] & sk[:, 1:], 0, 0, 1.0)
+    add(sk[:-1, :] & sk[1:, :], 0, 0, 1.0)
+    add(sk[:-1, :-1] & sk[1:, 1:] & ~sk[:-1, 1:] & ~sk[1:, :-1], 0, 0, SQRT2)
+    add(sk[:-1, 1:] & sk[1:, :-1] & ~sk[:-1, :-1] & ~sk[1:, 1:], 0, 1, SQRT2)
+    return np.concatenate(ys), np.concatenate(xs), np.concatenate(ls)
+
+
+def vectorize_skeleton(sk: np.ndarray, exterior_px: np.ndarray, min_spur_px: float = 0.0) -> dict:
+    """
+    Ramuri (segmente) + lungimi per clasă.
+    exterior_px: bool per pixel (apropiat de zona exterioară).
+    min_spur_px: ramurile cu capăt liber mai scurte de atât (colțuri, tocurile
+    ferestrelor) sunt artefacte ale scheletului și nu se numără.
+    """
+    sk8 = sk.astype(np.uint8)
+    neighbours = cv2.filter2D(sk8, cv2.CV_16S, np.ones((3, 3), np.float32), borderType=cv2.BORDER_CONSTANT) - sk8
+    branches = (sk & (neighbours == 2)).astype(np.uint8)
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(branches, connectivity=8)
+
+    # clasa fiecărei ramuri = majoritatea pixelilor ei
+    flat_labels = labels[sk]
+    ext_votes = np.bincount(flat_labels, weights=exterior_px[sk].astype(np.float64), minlength=n)
+    sizes = np.bincount(flat_labels, minlength=n).astype(np.float64)
+    branch_ext = ext_votes > 0.5 * np.maximum(sizes, 1)
+
+    ey, ex, el = _edge_lengths(sk)
+    edge_label = labels[ey, ex]
+    # muchiile din joncțiuni / capete (eticheta 0) urmează pixelul lor
+    edge_ext = np.where(edge_label > 0, branch_ext[edge_label], exterior_px[ey, ex])
+    branch_len = np.bincount(edge_label, weights=el, minlength=n)
+
+    # ramuri-ciot: ating un capăt liber (pixel cu un singur vecin) și sunt scurte
+    ends = (sk & (neighbours <= 1)).astype(np.uint8)
+    touching = np.unique(labels[cv2.dilate(ends, np.ones((3, 3), np.uint8)) > 0])
+    spur = np.zeros(n, bool)
+    spur[touching] = True
+    spur &= branch_len < min_spur_px
+    spur[0] = False
+    counted = ~spur[edge_label]
+    edge_ext &= counted
+
+    segments = []
+    for i in range(1, n):
+        if spur[i]:
+            continue
+        x, y, w, h = stats[i, :4]
+        segments.append({
+            "x1": int(x), "y1": int(y), "x2": int(x + w), "y2": int(y + h),
+            "length_px": float(branch_len[i]),
+            "kind": "exterior" if branch_ext[i] else "interior",
+        })
+
+    return {
+        "exterior_px": float(el[edge_ext].sum()),
+        "interior_px": float(el[counted & ~edge_ext].sum()),
+        "segments": segments,
+    }
+
+
+# ------------------------------------------------------------
+# Motor complet
+# ------------------------------------------------------------
+
+def _confidence(int_m: float, ext_m: float, per_m: float) -> tuple[str, float]:
+    score = 1.0
+    if not (MIN_INTERIOR_WALLS_M <= int_m <= MAX_INTERIOR_WALLS_M):
+        score -= 0.25
+    if not (MIN_EXTERIOR_WALLS_M <= ext_m <= MAX_EXTERIOR_WALLS_M):
+        score -= 0.25
+    if not (MIN_PERIMETER_M <= per_m <= MAX_PERIMETER_M):
+        score -= 0.25
+    # scheletul pereților exteriori trebuie să acopere cea mai mare parte a conturului
+    if per_m > 0 and abs(ext_m - per_m) / per_m > 0.35:
+        score -= 0.2
+    score = max(0.0, score)
+    label = "high" if score >= 0.75 else "medium" if score >= 0.5 else "low"
+    return label, round(score, 2)
+
+
+def measure_walls_local(plan_image: Path, meters_per_pixel: float, geometry: PlanGeometry | None = None) -> dict:
+    """
+    Lungimile pereților (pixeli + metri) fără LLM.
+    RETURN: dict cu interior/exterior/perimetru, grosimea peretelui, segmente, încredere.
+    """
+    t0 = time.perf_counter()
+    geometry = geometry or plan_geometry(plan_image)
+    walls = wall_mask(geometry)
+    if not cv2.countNonZero(walls):
+        raise ValueError("Nu am găsit pereți în plan")
+
+    # grosimea pereților: 2 × distanța maximă tipică până la margine
+    dist = cv2.distanceTransform(walls, cv2.DIST_L2, 3)
+    thickness_px = 2.0 * float(np.percentile(dist[dist > 0], 95))
+
+    # amprenta; perimetrul se măsoară pe axul pereților exteriori (amprenta
+    # erodată cu o jumătate de grosime), deci rămâne ≤ lungimea pereților exteriori
+    close_px = int(round(WALL_FOOTPRINT_CLOSE_M / meters_per_pixel)) if meters_per_pixel > 0 else 0
+    footprint, _ = building_footprint(walls, close_px or int(0.05 * min(walls.shape)))
+    half = max(1, int(round(thickness_px / 2)))
+    axis = cv2.erode(footprint, cv2.getStructuringElement(cv2.MORPH_RECT, (2 * half + 1, 2 * half + 1)))
+    axis_contours, _ = cv2.findContours(axis, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    perimeter_px = float(sum(
+        cv2.arcLength(cv2.approxPolyDP(c, max(1.0, half / 2), True), True) for c in axis_contours
+    ))
+
+    # exteriorul: masca din exterior_doors (comună prin geometry), limitată la afara
+    # amprentei erodate – dacă flood-ul intră pe o ușă deschisă, nu marchează pereții interiori
+    outside = shared_exterior_mask(geometry)
+    outside = cv2.bitwise_and(outside, cv2.bitwise_not(axis))
+    outside = cv2.bitwise_or(outside, cv2.bitwise_not(footprint))
+
+    # schelet pe copie micșorată: peretele tipic ajunge la ~SKELETON_WALL_PX pixeli
+    # (numărul de iterații de subțiere ~ grosimea / 2), dar cel mai subțire perete
+    # păstrat de mască (latura kernel-ului de deschidere) rămâne ≥ SKELETON_MIN_WALL_PX
+    h, w = walls.shape
+    thinnest = max(3, int(min(h, w) * WALL_OPEN_RATIO))
+    s = min(1.0, max(SKELETON_WALL_PX / max(thickness_px, 1.0), SKELETON_MIN_WALL_PX / thinnest))
+    if s < 1.0:
+        size = (max(1, round(w * s)), max(1, round(h * s)))
+        small_walls = cv2.compare(cv2.resize(walls, size, interpolation=cv2.INTER_AREA), 128, cv2.CMP_GE)
+        small_out = cv2.compare(cv2.resize(outside, size, interpolation=cv2.INTER_AREA), 128, cv2.CMP_GE)
+    else:
+        small_walls, small_out = walls, outside
+    # golurile ușilor din pereți drepți se închid pe orizontală / verticală: lungimile
+    # sunt brute (area scade separat suprafața deschiderilor)
+    if meters_per_pixel > 0:
+        small_walls = bridge_openings(small_walls, WALL_OPENING_BRIDGE_M / meters_per_pixel * s)
+    sk = skeletonize(small_walls)
+
+    # exterior = axul e la cel mult o grosime de perete de zona exterioară
+    to_outside = cv2.distanceTransform(cv2.bitwise_not(small_out), cv2.DIST_L2, 3)
+    exterior_px = to_outside <= s * thickness_px
+
+    vec = vectorize_skeleton(sk, exterior_px, min_spur_px=s * thickness_px)
+    interior_px = vec["interior_px"] / s
+    exterior_len_px = vec["exterior_px"] / s
+    for seg in vec["segments"]:
+        for k in ("x1", "y1", "x2", "y2"):
+            seg[k] = int(round(seg[k] / s))
+        seg["length_px"] = round(seg["length_px"] / s, 1)
+        seg["length_m"] = round(seg["length_px"] * meters_per_pixel, 3)
+
+    int_m = interior_px * meters_per_pixel
+    ext_skeleton_m = exterior_len_px * meters_per_pixel
+    per_m = perimeter_px * meters_per_pixel
+    confidence, score = _confidence(int_m, ext_skeleton_m, per_m)
+    # ferestrele / ușile exterioare late rămân goluri în schelet; axul amprentei
+    # le include, deci pereții exteriori au cel puțin lungimea perimetrului
+    ext_m = max(ext_skeleton_m, per_m)
+
+    return {
+        "engine": "local",
+        "meters_per_pixel": meters_per_pixel,
+        "wall_thickness_px": round(thickness_px, 2),
+        "wall_thickness_m": round(thickness_px * meters_per_pixel, 3),
+        "interior_px": round(interior_px, 1),
+        "exterior_px": round(exterior_len_px, 1),
+        "perimeter_px": round(perimeter_px, 1),
+        "interior_meters": round(int_m, 2),
+        "exterior_meters": round(ext_m, 2),
+        "exterior_skeleton_meters": round(ext_skeleton_m, 2),
+        "total_perimeter_meters": round(per_m, 2),
+        "confidence": confidence,
+        "confidence_score": score,
+        "skeleton_scale": round(s, 4),
+        "segments": vec["segments"],
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+    }
+
+
+def local_result_as_estimations(local: dict) -> dict:
+    """Rezultatul local în formatul walls_measurements_gemini.json (citit de area / roof)."""
+    values = {
+        "interior_meters": local["interior_meters"],
+        "exterior_meters": local["exterior_meters"],
+        "total_perimeter_meters": local["total_perimeter_meters"],
+    }
+    return {
+        "scale_meters_per_pixel": local["meters_per_pixel"],
+        "estimations": {
+            "by_pixels": dict(values, method_notes=(
+                f"Local: schelet mască pereți ({len(local['segments'])} segmente, "
+                f"grosime {local['wall_thickness_px']:.1f}px), exterior după masca exterior, perimetru pe axul amprentei"
+            )),
+            "average_result": values,
+        },
+        "confidence": local["confidence"],
+        "verification_notes": f"Motor local (scor {local['confidence_score']:.2f}, {local['elapsed_s']:.2f}s)",
+        "local": local,
+    }
@@ -0,0 +1,9 @@
+from .geometry import PlanGeometry, plan_geometry, clear_plan_geometry, cache_name, evict_disk_cache
+
+__all__ = [
+    "PlanGeometry",
+    "plan_geometry",
+    "clear_plan_geometry",
+    "cache_name",
+    "evict_disk_cache",
+]
@@ -0,0 +1,87 @@
+# new/runner/plan_geometry/bench.py
+# ------------------------------------------------------------
+# Benchmark: timpul cumulat de decodare + preprocesare per plan, pe etapele
+# care citesc plan.jpg (upload Roboflow, count_objects, exterior_doors):
+#   - "separate":   fiecare etapă decodează și își recalculează raster-ele (ca înainte)
+#   - "shared":     un singur PlanGeometry în proces (cache în memorie)
+#   - "disk_warm":  proces nou, cache .npy memory-mapped deja scris
+#
+#   python -m runner.plan_geometry.bench plan.jpg [plan2.jpg ...] [--repeat 3]
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+from .geometry import PlanGeometry, clear_plan_geometry
+
+
+def _separate(plan_image: Path) -> float:
+    """Drumul vechi: fiecare etapă cu propriul imread + preprocesare."""
+    from ..exterior_doors.flood_blue import exterior_from_border
+    from ..exterior_doors.config import EXTERIOR_DOWNSCALE
+
+    t0 = time.perf_counter()
+    # roboflow_upload.prepare_upload
+    img = cv2.imread(str(plan_image), cv2.IMREAD_COLOR)
+    # count_objects/detector
+    img = cv2.imread(str(plan_image))
+    cv2.equalizeHist(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+    # exterior_doors (pipeline + flood_blue)
+    img = cv2.imread(str(plan_image))
+    _, binary = cv2.threshold(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), 200, 255, cv2.THRESH_BINARY)
+    blue = exterior_from_border(binary, EXTERIOR_DOWNSCALE)
+    blue = cv2.morphologyEx(blue, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (7, 7)))
+    cv2.erode(blue, cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5)), iterations=2)
+    return time.perf_counter() - t0
+
+
+def _shared(plan_image: Path, disk_cache: bool) -> float:
+    """Aceleași raster-e prin PlanGeometry (cum le cer acum etapele)."""
+    from ..exterior_doors.flood_blue import shared_exterior_mask
+
+    t0 = time.perf_counter()
+    geom = PlanGeometry(plan_image, disk_cache=disk_cache)
+    geom.bgr                                   # roboflow_upload
+    geom.bgr, geom.gray_eq                     # count_objects/detector
+    geom.bgr                                   # exterior_doors
+    shared_exterior_mask(geom)
+    return time.perf_counter() - t0
+
+
+def run_benchmark(plans: list[Path], repeat: int = 3) -> dict:
+    import os
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PLAN_GEOMETRY_CACHE_DIR"] = tmp
+        for plan in plans:
+            clear_plan_geometry()
+            separate = [_separate(plan) for _ in range(repeat)]
+            shared = [_shared(plan, disk_cache=False) for _ in range(repeat)]
+            _shared(plan, disk_cache=True)     # scrie cache-ul
+            warm = [_shared(plan, disk_cache=True) for _ in range(repeat)]
+            h, w = cv2.imread(str(plan), cv2.IMREAD_UNCHANGED).shape[:2]
+            report[str(plan)] = {
+                "size": f"{w}x{h}",
+                "separate_s": round(statistics.median(separate), 4),
+                "shared_s": round(statistics.median(shared), 4),
+                "disk_warm_s": round(statistics.median(warm), 4),
+            }
+        os.environ.pop("PLAN_GEOMETRY_CACHE_DIR", None)
+    return report
+
+
+if __name__ == "__main__":  # pragma: no cover
+    parser = argparse.ArgumentParser(description="Benchmark decodare + preprocesare per plan")
+    parser.add_argument("plans", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark([Path(p) for p in args.plans], args.repeat), indent=2))
@@ -0,0 +1,13 @@
+# new/runner/plan_geometry/config.py
+from __future__ import annotations
+
+from ..config.settings import RUNNER_ROOT
+
+# Raster-e derivate din plan.jpg, calculate o singură dată per plan (vezi geometry.py)
+GEOMETRY_MAX_PLANS = 4          # planuri ținute în memorie per proces (LRU)
+
+# Cache opțional pe disc: .npy citite memory-mapped (np.load(mmap_mode="r"))
+GEOMETRY_DISK_CACHE = False     # override: PLAN_GEOMETRY_DISK_CACHE=1
+GEOMETRY_CACHE_DIR = RUNNER_ROOT / "cache" / "plan_geometry"   # override: PLAN_GEOMETRY_CACHE_DIR
+GEOMETRY_CACHE_VERSION = 2      # crește la schimbarea unei derivări built-in
+GEOMETRY_CACHE_MAX_PLANS = 64   # foldere (planuri) păstrate pe disc; cele mai vechi sunt șterse
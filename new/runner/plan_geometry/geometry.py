@@ -0,0 +1,229 @@
+# new/runner/plan_geometry/geometry.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from .config import (
+    GEOMETRY_MAX_PLANS,
+    GEOMETRY_DISK_CACHE,
+    GEOMETRY_CACHE_DIR,
+    GEOMETRY_CACHE_VERSION,
+    GEOMETRY_CACHE_MAX_PLANS,
+)
+
+# Un singur obiect per plan.jpg, comun tuturor etapelor din proces:
+#   - decodarea JPEG și raster-ele derivate (gri, gri egalizat, threshold-uri,
+#     masca exterior, hărți de distanță...) se calculează la prima cerere și se țin
+#   - etapele își pot înregistra propriile derivări prin get(name, compute, params);
+#     parametrii derivării intră (hash) în numele raster-ului, deci o schimbare în
+#     config nu citește un .npy vechi
+#   - opțional, fiecare raster e salvat ca .npy și citit memory-mapped la rulările
+#     următoare (același fișier = aceeași semnătură path + dimensiune + mtime);
+#     cache-ul păstrează ultimele GEOMETRY_CACHE_MAX_PLANS planuri
+# Toate array-urile întoarse sunt read-only (sunt partajate între etape);
+# cine vrea să deseneze pe ele face .copy().
+
+
+def _disk_cache_enabled() -> bool:
+    env = os.getenv("PLAN_GEOMETRY_DISK_CACHE")
+    if env is not None:
+        return env not in ("0", "", "false", "False")
+    return GEOMETRY_DISK_CACHE
+
+
+def _cache_root() -> Path:
+    env = os.getenv("PLAN_GEOMETRY_CACHE_DIR")
+    return Path(env) if env else GEOMETRY_CACHE_DIR
+
+
+def cache_name(name: str, params: dict | None = None) -> str:
+    """Numele raster-ului cu hash-ul parametrilor derivării (ex. "wall_mask_3f9a01c2d4")."""
+    if not params:
+        return name
+    blob = json.dumps(params, sort_keys=True, default=repr)
+    return f"{name}_{hashlib.sha1(blob.encode()).hexdigest()[:10]}"
+
+
+def evict_disk_cache(root: Path, keep: int = GEOMETRY_CACHE_MAX_PLANS) -> int:
+    """
+    Șterge folderele de plan cele mai vechi (după mtime, atins la fiecare citire)
+    peste limita `keep`. RETURN: câte foldere au fost șterse.
+    """
+    try:
+        dirs = sorted((d for d in root.iterdir() if d.is_dir()), key=lambda d: d.stat().st_mtime, reverse=True)
+    except OSError:
+        return 0
+    removed = 0
+    for d in dirs[keep:]:
+        shutil.rmtree(d, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def _signature(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+class PlanGeometry:
+    """Raster-ele unui plan, calculate leneș și memoizate."""
+
+    def __init__(self, plan_image: Path, disk_cache: bool | None = None) -> None:
+        self.path = Path(plan_image).resolve()
+        self.signature = _signature(self.path)
+        self.disk_cache = _disk_cache_enabled() if disk_cache is None else disk_cache
+
+        digest = hashlib.sha1(f"v{GEOMETRY_CACHE_VERSION}|{self.path}|{self.signature}".encode())
+        self.key = digest.hexdigest()[:20]
+
+        self._values: dict[str, np.ndarray] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        # secunde petrecute per raster ("compute" / "disk") – pentru benchmark / log
+        self.timings: dict[str, tuple[str, float]] = {}
+
+    # ------------------------------------------------------------------
+    # Memoizare
+    # ------------------------------------------------------------------
+
+    @property
+    def cache_dir(self) -> Path:
+        return _cache_root() / self.key
+
+    def get(
+        self,
+        name: str,
+        compute: Callable[["PlanGeometry"], np.ndarray],
+        persist: bool = True,
+        params: dict | None = None,
+    ) -> np.ndarray:
+        """
+        Raster-ul `name` (calculat o singură dată, apoi din memorie / de pe disc).
+        params: parametrii derivării (praguri, kernel-uri...); hash-ul lor intră în
+        numele din memorie și de pe disc (vezi cache_name).
+        """
+        name = cache_name(name, params)
+        value = self._values.get(name)
+        if value is not None:
+            return value
+
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            value = self._values.get(name)
+            if value is not None:
+                return value
+
+            t0 = time.perf_counter()
+            cache_file = self.cache_dir / f"{name}.npy"
+            if self.disk_cache and persist and cache_file.exists():
+                try:
+                    value = np.load(cache_file, mmap_mode="r")
+                    self.timings[name] = ("disk", time.perf_counter() - t0)
+                    os.utime(self.cache_dir)   # folder folosit recent (vezi evict_disk_cache)
+                except (OSError, ValueError):
+                    value = None
+
+            if value is None:
+                value = np.asarray(compute(self))
+                self.timings[name] = ("compute", time.perf_counter() - t0)
+                if self.disk_cache and persist:
+                    self._save(cache_file, value)
+
+            value.flags.writeable = False
+            self._values[name] = value
+            return value
+
+    def _save(self, cache_file: Path, value: np.ndarray) -> None:
+        try:
+            if not cache_file.parent.exists():
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                evict_disk_cache(cache_file.parent.parent)
+            tmp = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+            np.save(tmp, value)
+            tmp.replace(cache_file)
+        except OSError as e:
+            print(f"       [GEOMETRY] Nu pot scrie cache-ul {cache_file}: {e}")
+
+    def has(self, name: str) -> bool:
+        return name in self._values
+
+    # ------------------------------------------------------------------
+    # Raster-e comune
+    # ------------------------------------------------------------------
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """Planul decodat (BGR, ca cv2.imread)."""
+        def decode(_):
+            img = cv2.imread(str(self.path), cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError(f"Imagine invalidă: {self.path}")
+            return img
+        return self.get("bgr", decode)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """(H, W)."""
+        return self.bgr.shape[:2]
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.get("gray", lambda g: cv2.cvtColor(g.bgr, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def gray_eq(self) -> np.ndarray:
+        """Gri egalizat (template matching în count_objects)."""
+        return self.get("gray_eq", lambda g: cv2.equalizeHist(g.gray))
+
+    def binary(self, thresh: int) -> np.ndarray:
+        """threshold(gray, thresh, 255, BINARY): 255 = hârtie, 0 = desen."""
+        return self.get(
+            f"binary_{int(thresh)}",
+            lambda g: cv2.threshold(g.gray, int(thresh), 255, cv2.THRESH_BINARY)[1],
+        )
+
+    def summary(self) -> str:
+        parts = [f"{name}={src}:{dt * 1000:.0f}ms" for name, (src, dt) in self.timings.items()]
+        return ", ".join(parts)
+
+
+# ------------------------------------------------------------------
+# Registru per proces (LRU); un fișier modificat primește un obiect nou
+# ------------------------------------------------------------------
+
+_REGISTRY: "OrderedDict[Path, PlanGeometry]" = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def plan_geometry(plan_image: Path, disk_cache: bool | None = None) -> PlanGeometry:
+    """Obiectul comun pentru plan_image (creat la prima cerere)."""
+    path = Path(plan_image).resolve()
+    signature = _signature(path)
+    with _registry_lock:
+        geom = _REGISTRY.get(path)
+        if geom is not None and geom.signature == signature:
+            _REGISTRY.move_to_end(path)
+            return geom
+        geom = PlanGeometry(path, disk_cache)
+        _REGISTRY[path] = geom
+        while len(_REGISTRY) > GEOMETRY_MAX_PLANS:
+            _REGISTRY.popitem(last=False)
+        return geom
+
+
+def clear_plan_geometry() -> None:
+    """Golește registrul (ex. între run-uri sau în benchmark)."""
+    with _registry_lock:
+        _REGISTRY.clear()
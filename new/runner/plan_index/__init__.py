@@ -0,0 +1,12 @@
+# new/runner/plan_index/__init__.py
+from .index import PlanReuseIndex, PlanMatch
+from .reuse import apply_plan_reuse_for_run, fanout_duplicates_for_run, register_run_plans, reused_result
+
+__all__ = [
+    "PlanReuseIndex",
+    "PlanMatch",
+    "apply_plan_reuse_for_run",
+    "fanout_duplicates_for_run",
+    "register_run_plans",
+    "reused_result",
+]
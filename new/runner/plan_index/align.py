@@ -0,0 +1,237 @@
+# new/runner/plan_index/align.py
+# ------------------------------------------------------------
+# Alinierea a două randări ale aceluiași desen (alt run / duplicat din același
+# document): scară + offset estimate din conturul desenului, nu din dimensiunile
+# imaginii (un crop cu altă margine are aceeași scară, dar coordonatele deplasate).
+#
+#   x_nou = x_vechi · sx + tx,   y_nou = y_vechi · sy + ty
+#
+# Rezultatele copiate (box-uri, contururi LLM, scara) se rescriu cu aceeași
+# transformare; box-urile se re-validează pe desenul nou (densitate + structură).
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..segmenter.dedup import struct_corr
+from .config import (
+    REUSED_STAGES,
+    ALIGN_CONTENT_QUANTILE,
+    ALIGN_MAX_ANISOTROPY,
+    ALIGN_MIN_SCALE,
+    ALIGN_MAX_SCALE,
+    BOX_PATCH_SIZE,
+    BOX_MAX_DENSITY_DIFF,
+    BOX_MIN_CORR,
+)
+
+
+@dataclass(frozen=True)
+class Alignment:
+    """Transformarea din pixelii planului sursă în pixelii planului nou."""
+    sx: float
+    sy: float
+    tx: float
+    ty: float
+    width: int      # dimensiunile planului nou
+    height: int
+
+    @property
+    def scale(self) -> float:
+        return (self.sx + self.sy) / 2.0
+
+    @property
+    def is_identity(self) -> bool:
+        return (abs(self.sx - 1.0) < 1e-6 and abs(self.sy - 1.0) < 1e-6
+                and abs(self.tx) < 0.5 and abs(self.ty) < 0.5)
+
+    def point(self, x: float, y: float) -> tuple[float, float]:
+        return x * self.sx + self.tx, y * self.sy + self.ty
+
+    def box(self, box) -> tuple[int, int, int, int]:
+        x1, y1 = self.point(box[0], box[1])
+        x2, y2 = self.point(box[2], box[3])
+        return int(round(x1)), int(round(y1)), int(round(x2)), int(round(y2))
+
+    def to_json(self) -> dict:
+        return {"sx": round(self.sx, 6), "sy": round(self.sy, 6), "tx": round(self.tx, 2), "ty": round(self.ty, 2)}
+
+
+def ink_mask(gray: np.ndarray) -> np.ndarray:
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return ink
+
+
+def content_box(gray: np.ndarray) -> tuple[float, float, float, float] | None:
+    """
+    Conturul desenului (fără punctele izolate): cuantilele coordonatelor cernelii,
+    deci un crop cu altă margine sau câteva pete nu îl mută.
+    """
+    ink = cv2.morphologyEx(ink_mask(gray), cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+    ys, xs = np.nonzero(ink)
+    if len(xs) < 100:
+        return None
+    q = ALIGN_CONTENT_QUANTILE
+    x1, x2 = np.quantile(xs, [q, 1.0 - q])
+    y1, y2 = np.quantile(ys, [q, 1.0 - q])
+    if x2 - x1 < 10 or y2 - y1 < 10:
+        return None
+    return float(x1), float(y1), float(x2), float(y2)
+
+
+def estimate_alignment(src_gray: np.ndarray, dst_gray: np.ndarray) -> Alignment | None:
+    """
+    Scara și offset-ul care suprapun desenul sursă peste cel nou.
+    RETURN: None dacă desenele nu se pot alinia (scară anizotropă / în afara plajei).
+    """
+    a, b = content_box(src_gray), content_box(dst_gray)
+    if a is None or b is None:
+        return None
+    sx = (b[2] - b[0]) / (a[2] - a[0])
+    sy = (b[3] - b[1]) / (a[3] - a[1])
+    if abs(sx - sy) > ALIGN_MAX_ANISOTROPY * max(sx, sy):
+        return None
+    if not (ALIGN_MIN_SCALE <= (sx + sy) / 2.0 <= ALIGN_MAX_SCALE):
+        return None
+    h, w = dst_gray.shape[:2]
+    return Alignment(sx=sx, sy=sy, tx=b[0] - a[0] * sx, ty=b[1] - a[1] * sy, width=w, height=h)
+
+
+# ------------------------------------------------------------
+# Re-validare: box-urile refolosite trebuie să cadă peste ACELAȘI desen
+# ------------------------------------------------------------
+
+def _patch(ink: np.ndarray, box) -> np.ndarray | None:
+    h, w = ink.shape[:2]
+    x1, y1, x2, y2 = max(0, box[0]), max(0, box[1]), min(w, box[2]), min(h, box[3])
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return None
+    return cv2.resize(ink[y1:y2, x1:x2], (BOX_PATCH_SIZE, BOX_PATCH_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+
+def box_matches(src_ink: np.ndarray, dst_ink: np.ndarray, src_box, align: Alignment) -> bool:
+    """
+    Același conținut în box pe ambele planuri: densitatea cernelii (±BOX_MAX_DENSITY_DIFF
+    relativ) și structura patch-ului (corelație ≥ BOX_MIN_CORR).
+    """
+    a = _patch(src_ink, tuple(int(v) for v in src_box))
+    b = _patch(dst_ink, align.box(src_box))
+    if a is None or b is None:
+        return False
+    da, db = float(a.mean()), float(b.mean())
+    if abs(da - db) > BOX_MAX_DENSITY_DIFF * max(da, db, 0.05):
+        return False
+    if a.std() < 1e-3 or b.std() < 1e-3:
+        # patch uniform (plin / gol) pe ambele: densitatea de mai sus decide
+        return True
+    return struct_corr(a, b) >= BOX_MIN_CORR
+
+
+def box_match_ratio(src_gray: np.ndarray, dst_gray: np.ndarray, boxes: list, align: Alignment) -> float:
+    """Fracțiunea din box-uri (coordonate sursă) cu același conținut pe planul nou."""
+    if not boxes:
+        return 1.0
+    src_ink, dst_ink = ink_mask(src_gray), ink_mask(dst_gray)
+    return sum(box_matches(src_ink, dst_ink, b, align) for b in boxes) / len(boxes)
+
+
+# ------------------------------------------------------------
+# Rescrierea rezultatelor copiate în coordonatele planului nou
+# ------------------------------------------------------------
+
+def _align_box_dict(d: dict, align: Alignment) -> None:
+    for kx in ("x1", "x2", "x"):
+        if kx in d:
+            v = d[kx] * align.sx + align.tx
+            d[kx] = int(round(v)) if isinstance(d[kx], int) else v
+    for ky in ("y1", "y2", "y"):
+        if ky in d:
+            v = d[ky] * align.sy + align.ty
+            d[ky] = int(round(v)) if isinstance(d[ky], int) else v
+    if "width" in d:
+        d["width"] = d["width"] * align.sx
+    if "height" in d:
+        d["height"] = d["height"] * align.sy
+
+
+def _align_points(obj, align: Alignment, kx: float, ky: float):
+    """Liste (imbricate) de puncte [x, y] din spațiul modelului → pixelii planului nou."""
+    if isinstance(obj, (list, tuple)) and len(obj) == 2 and all(isinstance(v, (int, float)) for v in obj):
+        return [round(v, 1) for v in align.point(float(obj[0]) * kx, float(obj[1]) * ky)]
+    if isinstance(obj, (list, tuple)):
+        return [_align_points(o, align, kx, ky) for o in obj]
+    return obj
+
+
+def align_pixel_cache(data: dict, align: Alignment) -> dict:
+    """
+    Răspuns LLM în pixeli: coordonatele sunt în spațiul modelului (image_width_px /
+    image_height_px) al planului sursă (image_size_px) → pixelii planului nou.
+    """
+    size = data.get("image_size_px") or [data.get("image_width_px"), data.get("image_height_px")]
+    if not size or not size[0]:
+        return data
+    kx = size[0] / float(data.get("image_width_px") or size[0])
+    ky = size[1] / float(data.get("image_height_px") or size[1])
+    for key in ("exterior_outline_px", "interior_walls_px", "outline_px"):
+        if key in data:
+            data[key] = _align_points(data[key], align, kx, ky)
+    for key, value in (data.get("lengths_px") or {}).items():
+        if isinstance(value, (int, float)):
+            data["lengths_px"][key] = value * (kx + ky) / 2.0 * align.scale
+    for ref in data.get("references") or []:
+        if ref.get("length_px"):
+            ref["length_px"] = ref["length_px"] * align.scale
+    data["image_width_px"], data["image_height_px"] = align.width, align.height
+    data["image_size_px"] = [align.width, align.height]
+    return data
+
+
+def _rewrite(path: Path, fn) -> None:
+    if path.exists():
+        data = json.loads(path.read_text(encoding="utf-8"))
+        path.write_text(json.dumps(fn(data), indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def align_outputs(output_root: Path, plan_id: str, align: Alignment) -> None:
+    """
+    Rescrie rezultatele copiate pentru plan_id în coordonatele planului nou.
+    Lungimile / ariile în metri rămân neschimbate; scara se împarte la scara alinierii.
+    """
+    def detections(data: dict) -> dict:
+        for p in data.get("predictions", []):
+            _align_box_dict(p, align)
+        if isinstance(data.get("image"), dict):
+            data["image"]["width"], data["image"]["height"] = align.width, align.height
+        return data
+
+    def boxes(data: list) -> list:
+        for d in data:
+            _align_box_dict(d, align)
+            if "bbox" in d:
+                d["bbox"] = list(align.box(d["bbox"]))
+        return data
+
+    def scale(data: dict) -> dict:
+        if data.get("meters_per_pixel"):
+            # pixel mai mic (desen mărit) → mai puțini metri per pixel
+            data["meters_per_pixel"] = float(data["meters_per_pixel"]) / align.scale
+        data["image_width_px"], data["image_height_px"] = align.width, align.height
+        return data
+
+    _rewrite(output_root / "detections" / plan_id / REUSED_STAGES["detections"], detections)
+    _rewrite(output_root / "count_objects" / plan_id / REUSED_STAGES["count_objects"], boxes)
+    _rewrite(output_root / "exterior_doors" / plan_id / "exterior_doors.json", boxes)
+    _rewrite(output_root / "scale" / plan_id / REUSED_STAGES["scale"], scale)
+    for stage, name in (
+        ("perimeter", "walls_measurements_px.json"),
+        ("area", "house_area_px.json"),
+        ("scale", "scale_evidence_px.json"),
+    ):
+        _rewrite(output_root / stage / plan_id / name, lambda d: align_pixel_cache(d, align))
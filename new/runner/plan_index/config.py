@@ -0,0 +1,54 @@
+# new/runner/plan_index/config.py
+from __future__ import annotations
+
+from ..config.settings import RUNNER_ROOT
+
+# Index persistent (SQLite) cu semnăturile planurilor deja procesate
+INDEX_PATH = RUNNER_ROOT / "cache" / "plan_index.sqlite"
+
+# Limite index
+MAX_ENTRIES = 500         # peste limită se evacuează intrările cele mai puțin folosite
+MAX_AGE_DAYS = 180        # intrări nefolosite de atâta timp sunt șterse
+
+# Potrivire „aproape identic" (mai strictă decât deduplicarea din segmenter)
+PHASH_MAX_DISTANCE = 6
+STRUCT_MIN_CORR = 0.95
+SIZE_MAX_DIFF = 0.02      # 2% diferență de dimensiuni (px)
+
+# Alinierea planului nou pe cel sursă (scară + offset din conturul desenului, vezi align.py)
+ALIGN_CONTENT_QUANTILE = 0.002  # cuantila coordonatelor cernelii (ignoră pete izolate)
+ALIGN_MAX_ANISOTROPY = 0.02     # sx / sy diferite cu mai mult = alt desen / deformat
+ALIGN_MIN_SCALE = 0.25
+ALIGN_MAX_SCALE = 4.0
+
+# Re-validarea detecțiilor refolosite: fiecare box comparat cu același box pe planul sursă
+BOX_PATCH_SIZE = 24             # patch-urile se compară la această rezoluție
+BOX_MAX_DENSITY_DIFF = 0.25     # diferența relativă maximă a densității cernelii
+BOX_MIN_CORR = 0.6              # corelația minimă a structurii din box
+MIN_BOX_MATCH_RATIO = 0.9       # cel puțin 90% din box-uri trebuie să se potrivească
+MIN_METERS_PER_PIXEL = 0.0005
+MAX_METERS_PER_PIXEL = 0.1
+
+# Marker scris în folderul unei etape restaurate din index
+REUSE_MARKER = "reused_from.json"
+
+# Etapele (și fișierele cheie) copiate dintr-un run anterior la un match
+REUSED_STAGES = {
+    "detections": "export_objects/detections.json",
+    "scale": "scale_result.json",
+    "count_objects": "detections_all.json",
+    "perimeter": "walls_measurements_gemini.json",
+    "area": "house_area_gemini.json",
+}
+
+# Duplicatele din același document (segmenter/dedup.py, politica "fanout"):
+# primesc rezultatele reprezentantului până la perimeter; area / roof / pricing
+# rulează per plan (fiecare etaj are floor_type propriu din clasificare)
+DUPLICATE_STAGES = {
+    "detections": "export_objects/detections.json",
+    "scale": "scale_result.json",
+    "count_objects": "detections_all.json",
+    "exterior_doors": "exterior_doors.json",
+    "measure_objects": "openings_all.json",
+    "perimeter": "walls_measurements_gemini.json",
+}
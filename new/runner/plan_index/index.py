@@ -0,0 +1,230 @@
+# new/runner/plan_index/index.py
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from ..segmenter.dedup import PlanSignature, STRUCT_GRID, struct_corr
+from .config import (
+    INDEX_PATH,
+    MAX_ENTRIES,
+    MAX_AGE_DAYS,
+    PHASH_MAX_DISTANCE,
+    STRUCT_MIN_CORR,
+    SIZE_MAX_DIFF,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    phash TEXT NOT NULL,
+    structure BLOB NOT NULL,
+    aspect REAL NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    run_id TEXT NOT NULL,
+    plan_id TEXT NOT NULL,
+    output_root TEXT NOT NULL,
+    plan_image TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (run_id, plan_id)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass
+class PlanMatch:
+    """Un plan dintr-un run anterior, aproape identic cu planul nou."""
+    entry_id: int
+    run_id: str
+    plan_id: str
+    output_root: Path
+    width: int
+    height: int
+    phash_distance: int
+    structure_corr: float
+
+
+class PlanReuseIndex:
+    """
+    Index persistent (SQLite) de planuri house_blueprint deja procesate.
+
+    - lookup(): găsește un run anterior cu geometrie aproape identică
+    - register(): adaugă / reîmprospătează un plan după un run reușit
+    - evict(): șterge intrările vechi, cele cu output-uri lipsă și surplusul LRU
+    - stats(): lookups / hits / misses / evictions + hit rate
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: str | Path = INDEX_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con, con:
+            con.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # folosită ca `closing(self._connect()) as con, con`: tranzacția se
+        # confirmă la ieșire, iar conexiunea se închide (nu doar commit)
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    @staticmethod
+    def _bump(con: sqlite3.Connection, key: str, n: int = 1) -> None:
+        con.execute(
+            "INSERT INTO metrics(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+            (key, n),
+        )
+
+    def lookup(self, sig: PlanSignature, width: int, height: int) -> PlanMatch | None:
+        """
+        Caută cel mai apropiat plan indexat. Întoarce None dacă nu există
+        un match suficient de sigur (pHash + structură + dimensiuni).
+        """
+        best: PlanMatch | None = None
+        with self._lock, closing(self._connect()) as con, con:
+            rows = con.execute(
+                "SELECT id, phash, structure, aspect, width, height, run_id, plan_id, output_root FROM plans"
+            ).fetchall()
+
+            for (eid, phash, structure, aspect, w, h, run_id, plan_id, output_root) in rows:
+                if abs(w - width) > SIZE_MAX_DIFF * max(w, width):
+                    continue
+                if abs(h - height) > SIZE_MAX_DIFF * max(h, height):
+                    continue
+                hamming = bin(int(phash, 16) ^ sig.phash).count("1")
+                if hamming > PHASH_MAX_DISTANCE:
+                    continue
+                grid = np.frombuffer(structure, dtype=np.float32).reshape(STRUCT_GRID, STRUCT_GRID)
+                corr = struct_corr(grid, sig.structure)
+                if corr < STRUCT_MIN_CORR:
+                    continue
+                if best is None or (hamming, -corr) < (best.phash_distance, -best.structure_corr):
+                    best = PlanMatch(
+                        entry_id=eid,
+                        run_id=run_id,
+                        plan_id=plan_id,
+                        output_root=Path(output_root),
+                        width=w,
+                        height=h,
+                        phash_distance=hamming,
+                        structure_corr=corr,
+                    )
+
+            self._bump(con, "lookups")
+            if best is not None:
+                self._bump(con, "hits")
+                con.execute(
+                    "UPDATE plans SET hits = hits + 1, last_used_at = ? WHERE id = ?",
+                    (time.time(), best.entry_id),
+                )
+            else:
+                self._bump(con, "misses")
+
+        return best
+
+    def record_rejected_hit(self) -> None:
+        """Un match găsit, dar respins la re-validare (contează ca miss)."""
+        with self._lock, closing(self._connect()) as con, con:
+            self._bump(con, "hits", -1)
+            self._bump(con, "misses")
+            self._bump(con, "revalidation_failures")
+
+    def register(
+        self,
+        sig: PlanSignature,
+        width: int,
+        height: int,
+        run_id: str,
+        plan_id: str,
+        output_root: Path,
+        plan_image: Path,
+    ) -> None:
+        now = time.time()
+        with self._lock, closing(self._connect()) as con, con:
+            con.execute(
+                "INSERT INTO plans(phash, structure, aspect, width, height, run_id, plan_id, "
+                "output_root, plan_image, created_at, last_used_at) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(run_id, plan_id) DO UPDATE SET "
+                "phash = excluded.phash, structure = excluded.structure, aspect = excluded.aspect, "
+                "width = excluded.width, height = excluded.height, output_root = excluded.output_root, "
+                "plan_image = excluded.plan_image, last_used_at = excluded.last_used_at",
+                (
+                    f"{sig.phash:016x}",
+                    np.ascontiguousarray(sig.structure, dtype=np.float32).tobytes(),
+                    float(sig.aspect),
+                    int(width),
+                    int(height),
+                    run_id,
+                    plan_id,
+                    str(output_root),
+                    str(plan_image),
+                    now,
+                    now,
+                ),
+            )
+            self._bump(con, "registrations")
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Evacuare: intrări expirate, intrări ale căror output-uri nu mai există,
+        apoi cele mai vechi (LRU) peste MAX_ENTRIES.
+        """
+        removed = 0
+        cutoff = time.time() - MAX_AGE_DAYS * 86400
+        with self._lock, closing(self._connect()) as con, con:
+            removed += con.execute("DELETE FROM plans WHERE last_used_at < ?", (cutoff,)).rowcount
+
+            stale = [
+                (eid,)
+                for eid, output_root in con.execute("SELECT id, output_root FROM plans").fetchall()
+                if not Path(output_root).exists()
+            ]
+            if stale:
+                con.executemany("DELETE FROM plans WHERE id = ?", stale)
+                removed += len(stale)
+
+            count = con.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            if count > MAX_ENTRIES:
+                removed += con.execute(
+                    "DELETE FROM plans WHERE id IN ("
+                    "SELECT id FROM plans ORDER BY last_used_at ASC LIMIT ?)",
+                    (count - MAX_ENTRIES,),
+                ).rowcount
+
+            if removed:
+                self._bump(con, "evictions", removed)
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock, closing(self._connect()) as con, con:
+            metrics = dict(con.execute("SELECT key, value FROM metrics").fetchall())
+            entries = con.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+        lookups = metrics.get("lookups", 0)
+        hits = metrics.get("hits", 0)
+        return {
+            "entries": entries,
+            "max_entries": MAX_ENTRIES,
+            "lookups": lookups,
+            "hits": hits,
+            "misses": metrics.get("misses", 0),
+            "revalidation_failures": metrics.get("revalidation_failures", 0),
+            "registrations": metrics.get("registrations", 0),
+            "evictions": metrics.get("evictions", 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,322 @@
+# new/runner/plan_index/reuse.py
+from __future__ import annotations
+
+import json
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..config.settings import (
+    get_run_dir,
+    load_plan_infos,
+    get_output_root_for_run,
+    PlansListError,
+    PlanInfo,
+)
+from ..segmenter.dedup import compute_plan_signature
+from .config import (
+    REUSED_STAGES,
+    DUPLICATE_STAGES,
+    REUSE_MARKER,
+    MIN_BOX_MATCH_RATIO,
+    MIN_METERS_PER_PIXEL,
+    MAX_METERS_PER_PIXEL,
+)
+from .index import PlanReuseIndex
+from .align import Alignment, estimate_alignment, box_match_ratio, align_outputs, align_pixel_cache
+
+
+STAGE_NAME = "plan_index"
+
+
+def reused_result(work_dir: Path, filename: str) -> Path | None:
+    """
+    Returnează fișierul rezultat dacă etapa a fost restaurată din index
+    (există marker-ul în work_dir), altfel None – etapa rulează normal.
+    """
+    if not (work_dir / REUSE_MARKER).exists():
+        return None
+    path = work_dir / filename
+    return path if path.exists() else None
+
+
+def _load_gray(path: Path) -> np.ndarray | None:
+    arr = np.fromfile(str(path), np.uint8)
+    return cv2.imdecode(arr, cv2.IMREAD_GRAYSCALE)
+
+
+def source_plan_image(output_root: Path, plan_id: str) -> Path:
+    """plan.jpg în spațiul căruia sunt coordonatele detecțiilor (etapa detections)."""
+    return output_root / "detections" / plan_id / "plan.jpg"
+
+
+def _revalidate(
+    src_root: Path,
+    src_plan_id: str,
+    src_gray: np.ndarray,
+    gray: np.ndarray,
+    align: Alignment,
+) -> tuple[bool, str]:
+    """
+    Verificări pe planul nou, înainte de copiere:
+      - scara refolosită (după aliniere) e plauzibilă
+      - box-urile uși/ferestre cad peste ACELAȘI desen ca pe planul sursă
+        (densitatea cernelii + structura din box, vezi align.box_matches)
+    """
+    scale_json = src_root / "scale" / src_plan_id / REUSED_STAGES["scale"]
+    try:
+        mpp = float(json.loads(scale_json.read_text(encoding="utf-8"))["meters_per_pixel"]) / align.scale
+    except Exception as e:
+        return False, f"scale_result.json invalid: {e}"
+    if not (MIN_METERS_PER_PIXEL <= mpp <= MAX_METERS_PER_PIXEL):
+        return False, f"scară neplauzibilă: {mpp:.6f} m/px"
+
+    all_json = src_root / "count_objects" / src_plan_id / REUSED_STAGES["count_objects"]
+    try:
+        dets = json.loads(all_json.read_text(encoding="utf-8"))
+    except Exception as e:
+        return False, f"detections_all.json invalid: {e}"
+
+    boxes = [
+        (int(d["x1"]), int(d["y1"]), int(d["x2"]), int(d["y2"]))
+        for d in dets if d.get("status") != "rejected" and "x1" in d
+    ]
+    ratio = box_match_ratio(src_gray, gray, boxes, align)
+    if ratio < MIN_BOX_MATCH_RATIO:
+        return False, f"doar {ratio:.0%} din box-uri au același desen pe planul nou"
+    return True, "OK"
+
+
+def copy_plan_outputs(
+    src_root: Path,
+    src_plan_id: str,
+    output_root: Path,
+    plan: PlanInfo,
+    align: Alignment,
+    stages: dict[str, str],
+    marker: dict,
+) -> list[Path]:
+    """
+    Copiază etapele (stage → fișier cheie) ale planului sursă în
+    output/<run_id>/<stage>/<plan_id>/, scrie marker-ul și aliniază coordonatele
+    pe planul nou. Returnează folderele create (pentru rollback).
+    """
+    created: list[Path] = []
+    for stage, key_file in stages.items():
+        src = src_root / stage / src_plan_id
+        if not (src / key_file).exists():
+            continue
+        dst = output_root / stage / plan.plan_id
+        if dst.exists():
+            shutil.rmtree(dst)
+        shutil.copytree(src, dst, ignore=shutil.ignore_patterns(REUSE_MARKER))
+        (dst / REUSE_MARKER).write_text(
+            json.dumps(
+                {**marker, "alignment": align.to_json(), "reused_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")},
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        created.append(dst)
+
+    # planul nou devine plan.jpg al etapei detections (citit de count_objects / exterior_doors)
+    det_dir = output_root / "detections" / plan.plan_id
+    if det_dir in created:
+        shutil.copy2(plan.plan_image, det_dir / "plan.jpg")
+
+    if not align.is_identity:
+        align_outputs(output_root, plan.plan_id, align)
+    return created
+
+
+def apply_plan_reuse_for_run(run_id: str, index: PlanReuseIndex | None = None) -> dict[str, str]:
+    """
+    Caută fiecare plan al run-ului în index și, la un match sigur și re-validat,
+    restaurează rezultatele etapelor scumpe (Roboflow, GPT-4o, Gemini).
+
+    Returns:
+        {plan_id_nou: "<run_id>/<plan_id>" sursă}
+    """
+    try:
+        plans = load_plan_infos(run_id, stage_name=STAGE_NAME)
+    except PlansListError as e:
+        print(f"❌ [{STAGE_NAME}] {e}")
+        return {}
+
+    index = index or PlanReuseIndex()
+    output_root = get_output_root_for_run(run_id)
+    reused: dict[str, str] = {}
+
+    for plan in plans:
+        gray = _load_gray(plan.plan_image)
+        if gray is None:
+            continue
+        height, width = gray.shape[:2]
+
+        match = index.lookup(compute_plan_signature(gray), width, height)
+        if match is None:
+            print(f"🔎 [{STAGE_NAME}] {plan.plan_id}: niciun plan identic în index")
+            continue
+
+        def reject(reason: str) -> None:
+            index.record_rejected_hit()
+            print(f"⚠️ [{STAGE_NAME}] {plan.plan_id}: match respins ({reason}) → rulez normal")
+
+        # alinierea și re-validarea se fac pe planul sursă, înainte de copiere
+        src_gray = _load_gray(source_plan_image(match.output_root, match.plan_id))
+        if src_gray is None:
+            reject("plan.jpg sursă lipsă")
+            continue
+        align = estimate_alignment(src_gray, gray)
+        if align is None:
+            reject("desenele nu se pot alinia")
+            continue
+        if not all((match.output_root / s / match.plan_id / f).exists()
+                   for s, f in REUSED_STAGES.items() if s != "area"):
+            reject("etape incomplete în run-ul sursă")
+            continue
+        ok, reason = _revalidate(match.output_root, match.plan_id, src_gray, gray, align)
+        if not ok:
+            reject(reason)
+            continue
+
+        created = copy_plan_outputs(
+            match.output_root, match.plan_id, output_root, plan, align, REUSED_STAGES,
+            marker={
+                "run_id": match.run_id,
+                "plan_id": match.plan_id,
+                "phash_distance": match.phash_distance,
+                "structure_corr": round(match.structure_corr, 4),
+                "reused_by": {"run_id": run_id, "plan_id": plan.plan_id},
+            },
+        )
+        stages = {p.parent.name for p in created}
+
+        reused[plan.plan_id] = f"{match.run_id}/{match.plan_id}"
+        print(
+            f"♻️  [{STAGE_NAME}] {plan.plan_id} ≈ {match.run_id}/{match.plan_id} "
+            f"(pHash Δ={match.phash_distance}, struct={match.structure_corr:.3f}) "
+            f"→ refolosesc {', '.join(sorted(stages))}"
+        )
+
+    stats = index.stats()
+    print(
+        f"📊 [{STAGE_NAME}] index: {stats['entries']}/{stats['max_entries']} intrări, "
+        f"hit rate {stats['hit_rate']:.0%} ({stats['hits']}/{stats['lookups']})"
+    )
+    return reused
+
+
+def fanout_duplicates_for_run(run_id: str) -> list[str]:
+    """
+    Duplicatele din plans_list.json ("duplicates": {reprezentant: [duplicate]})
+    devin planuri ale run-ului: sunt adăugate la sfârșitul listei "plans" (plan_id-urile
+    existente rămân aceleași) și primesc rezultatele reprezentantului până la perimeter,
+    aliniate pe desenul lor. Aria / acoperișul / prețul rulează apoi per plan, deci un
+    etaj identic (alt floor_type) e inclus în ofertă.
+
+    Returns:
+        plan_id-urile duplicatelor adăugate
+    """
+    plans_json = get_run_dir(run_id) / "plans_list.json"
+    try:
+        data = json.loads(plans_json.read_text(encoding="utf-8"))
+        reps = load_plan_infos(run_id, stage_name=STAGE_NAME)
+    except (OSError, ValueError, PlansListError) as e:
+        print(f"❌ [{STAGE_NAME}] {e}")
+        return []
+
+    dup_map: dict[str, list[str]] = data.get("duplicates") or {}
+    by_image = {str(p.source_path): p for p in reps}
+    todo = [
+        (by_image[rep], dup)
+        for rep, dups in dup_map.items() if rep in by_image
+        for dup in dups if dup not in data["plans"] and Path(dup).exists()
+    ]
+    if not todo:
+        return []
+
+    data["plans"] = list(data["plans"]) + [dup for _, dup in todo]
+    plans_json.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    output_root = get_output_root_for_run(run_id)
+    added = load_plan_infos(run_id, stage_name=STAGE_NAME)[len(reps):]
+    fanned: list[str] = []
+
+    for (rep, _), plan in zip(todo, added):
+        src_gray = _load_gray(source_plan_image(output_root, rep.plan_id))
+        gray = _load_gray(plan.plan_image)
+        if src_gray is None or gray is None:
+            print(f"⚠️ [{STAGE_NAME}] {plan.plan_id}: imagine lipsă, duplicatul nu intră în ofertă")
+            continue
+        h, w = gray.shape[:2]
+        align = estimate_alignment(src_gray, gray)
+        if align is None:
+            # dedup a confirmat același desen (aspect ±5%) → scara din dimensiunile imaginii
+            sh, sw = src_gray.shape[:2]
+            align = Alignment(sx=w / sw, sy=h / sh, tx=0.0, ty=0.0, width=w, height=h)
+            print(f"⚠️ [{STAGE_NAME}] {plan.plan_id}: aliniere din contur eșuată → scalez după dimensiuni")
+
+        copy_plan_outputs(
+            output_root, rep.plan_id, output_root, plan, align, DUPLICATE_STAGES,
+            marker={"run_id": run_id, "plan_id": rep.plan_id, "duplicate_of": rep.plan_id},
+        )
+
+        # conturul Gemini în pixeli: aria rulează pe duplicat fără un apel nou
+        src_px = output_root / "area" / rep.plan_id / "house_area_px.json"
+        if src_px.exists():
+            dst_dir = output_root / "area" / plan.plan_id
+            dst_dir.mkdir(parents=True, exist_ok=True)
+            px = align_pixel_cache(json.loads(src_px.read_text(encoding="utf-8")), align)
+            (dst_dir / src_px.name).write_text(json.dumps(px, indent=2, ensure_ascii=False), encoding="utf-8")
+
+        fanned.append(plan.plan_id)
+        print(f"♻️  [{STAGE_NAME}] {plan.plan_id}: duplicat al {rep.plan_id} → rezultate copiate până la perimeter")
+
+    return fanned
+
+
+def register_run_plans(run_id: str, index: PlanReuseIndex | None = None) -> int:
+    """
+    După un run reușit, adaugă în index planurile procesate complet
+    (cele restaurate din index sunt deja acolo).
+    """
+    try:
+        plans = load_plan_infos(run_id, stage_name=STAGE_NAME)
+    except PlansListError as e:
+        print(f"❌ [{STAGE_NAME}] {e}")
+        return 0
+
+    index = index or PlanReuseIndex()
+    output_root = get_output_root_for_run(run_id)
+    registered = 0
+
+    for plan in plans:
+        stage_dirs = {stage: output_root / stage / plan.plan_id for stage in REUSED_STAGES}
+        if any((d / REUSE_MARKER).exists() for d in stage_dirs.values()):
+            continue
+        # area poate lipsi (fallback pe metadata) – restul etapelor sunt obligatorii
+        if not all((stage_dirs[s] / f).exists() for s, f in REUSED_STAGES.items() if s != "area"):
+            continue
+
+        gray = _load_gray(plan.plan_image)
+        if gray is None:
+            continue
+        height, width = gray.shape[:2]
+        index.register(
+            compute_plan_signature(gray),
+            width,
+            height,
+            run_id=run_id,
+            plan_id=plan.plan_id,
+            output_root=output_root,
+            plan_image=plan.plan_image,
+        )
+        registered += 1
+
+    if registered:
+        print(f"🗃  [{STAGE_NAME}] {registered} planuri adăugate în indexul de refolosire")
+    return registered
@@ -4,7 +4,7 @@ from __future__ import annotations
 import json
 import math
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict
 
 from .config import (
@@ -172,7 +172,7 @@ def calculate_roof_price(
     # ==========================================
     result = {
         "meta": {
-            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "currency": currency,
             "perimeter_source": perimeter_source,
             "total_floors": total_floors
@@ -0,0 +1,56 @@
+# new/runner/scale/config.py
+from __future__ import annotations
+
+# ------------------------------------------------------------
+# Motor de detectare a scării
+#   "local"       – cote (text + linii de cotă) citite local (local_scale.py);
+#                   GPT-4o doar dacă încrederea locală e sub SCALE_MIN_LOCAL_CONFIDENCE
+#   "cross_check" – local + GPT-4o pentru fiecare plan, în fundal (vezi mai jos)
+#   "openai"      – doar GPT-4o (comportamentul vechi)
+# Override: SCALE_MODE=local|cross_check|openai
+# ------------------------------------------------------------
+SCALE_MODE = "local"
+
+# Verificarea GPT-4o a scării locale (validare: python -m runner.scale.local_scale <run_id>...)
+# rulează în fundal, după ce scale_result.json e scris, și se salvează separat
+# (SCALE_CROSS_CHECK_FILE) – etapa nu o așteaptă și rezultatul rămâne cel local.
+# În "local" se verifică doar o fracțiune din planuri (alese determinist după plan_id),
+# în "cross_check" toate. Override: SCALE_CROSS_CHECK_SAMPLE=0..1
+SCALE_CROSS_CHECK_SAMPLE = 0.1
+SCALE_CROSS_CHECK_FILE = "scale_cross_check.json"
+SCALE_CROSS_CHECK_WORKERS = 2
+
+# Sub acest scor local (0..1) se cere scara de la GPT-4o
+SCALE_MIN_LOCAL_CONFIDENCE = 0.6
+
+# Plaja plauzibilă pentru planurile randate (m/px)
+SCALE_MIN_MPP = 0.001
+SCALE_MAX_MPP = 0.1
+
+# Liniile de cotă (fracțiuni din latura mare a planului)
+DIM_INK_THRESHOLD = 160           # gri < prag = cerneală
+DIM_LINE_MIN_RATIO = 0.08         # linii orizontale / verticale mai scurte nu sunt lanțuri de cote
+DIM_TICK_RATIO = 0.004            # jumătatea unui marcaj (tick / linie ajutătoare) peste linia de cotă
+DIM_TEXT_BAND_RATIO = 0.025       # textul cotei stă în banda asta deasupra liniei
+
+# Segmentele mai scurte (px) au eroare relativă mare la capete (ticks duble, text lipit)
+DIM_MIN_SEGMENT_PX = 80
+
+# Consens: candidații la ±SCALE_INLIER_TOLERANCE de mediană sunt inlieri;
+# sub SCALE_MIN_INLIERS inlieri încrederea scade proporțional
+SCALE_INLIER_TOLERANCE = 0.03
+SCALE_MIN_INLIERS = 4
+
+# Scara locală e acceptată doar cu inlieri pe ambele direcții (cote orizontale ȘI
+# verticale): câteva numere citite greșit pe o singură axă pot concorda din întâmplare
+SCALE_REQUIRE_BOTH_DIRECTIONS = True
+
+# Cotele în centimetri fără zecimale: sub această valoare (numere de cameră,
+# indici) textul nu e considerat cotă
+DIM_MIN_CM = 10
+
+# Validarea pe run-uri înregistrate: local „corect" la ±SCALE_VALIDATION_TOLERANCE de GPT-4o
+SCALE_VALIDATION_TOLERANCE = 0.05
+
+# OCR local (șabloane de cifre): scorul minim de corelație pentru o cifră
+OCR_MIN_DIGIT_SCORE = 0.55
@@ -1,11 +1,14 @@
 # new/runner/scale/jobs.py
 from __future__ import annotations
 
+import hashlib
 import json
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import statistics
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 
@@ -15,11 +18,30 @@ from ..config.settings import (
     PlanInfo,
 )
 
+from ..plan_index import reused_result
 from .openai_scale import detect_scale_with_openai
+from .local_scale import detect_scale_local, is_reliable
+from .config import (
+    SCALE_MODE,
+    SCALE_MIN_MPP,
+    SCALE_MAX_MPP,
+    SCALE_CROSS_CHECK_SAMPLE,
+    SCALE_CROSS_CHECK_FILE,
+    SCALE_CROSS_CHECK_WORKERS,
+)
 
 
 STAGE_NAME = "scale"
 
+_MODES = ("local", "cross_check", "openai")
+
+# dovezile de scară din analiza combinată (cote cu capete în pixeli), dacă a rulat
+SCALE_EVIDENCE_FILE = "scale_evidence_px.json"
+
+# verificările GPT-4o din fundal (vezi SCALE_CROSS_CHECK_SAMPLE)
+_cross_check_executor: ThreadPoolExecutor | None = None
+_cross_check_lock = threading.Lock()
+
 
 @dataclass
 class ScaleJobResult:
@@ -30,9 +52,149 @@ class ScaleJobResult:
     meters_per_pixel: float | None
 
 
+def scale_mode() -> str:
+    """local | cross_check | openai (override cu SCALE_MODE)."""
+    mode = os.getenv("SCALE_MODE", SCALE_MODE).strip().lower()
+    return mode if mode in _MODES else SCALE_MODE
+
+
+def cross_check_sample() -> float:
+    """Fracțiunea de planuri verificate cu GPT-4o în "local" (override cu SCALE_CROSS_CHECK_SAMPLE)."""
+    try:
+        value = float(os.getenv("SCALE_CROSS_CHECK_SAMPLE", SCALE_CROSS_CHECK_SAMPLE))
+    except ValueError:
+        return SCALE_CROSS_CHECK_SAMPLE
+    return min(max(value, 0.0), 1.0)
+
+
+def wants_cross_check(mode: str, plan_id: str) -> bool:
+    """cross_check: toate planurile; local: eșantion determinist după plan_id; openai: niciunul."""
+    if mode == "cross_check":
+        return True
+    if mode != "local":
+        return False
+    bucket = int(hashlib.sha1(plan_id.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+    return bucket < cross_check_sample()
+
+
+def scale_from_evidence(evidence: dict) -> dict | None:
+    """
+    Scara din referințele analizei combinate (SCALE_EVIDENCE_FILE): mediana
+    real / lungime_px, în formatul scale_result.json.
+    RETURN: None dacă nu există referințe sau scara iese din plaja plauzibilă.
+    """
+    refs = [r for r in evidence.get("references") or [] if r.get("length_px") and r.get("real_length_meters")]
+    if not refs:
+        return None
+    mpp = statistics.median(float(r["real_length_meters"]) / float(r["length_px"]) for r in refs)
+    if not (SCALE_MIN_MPP <= mpp <= SCALE_MAX_MPP):
+        return None
+    ref = min(refs, key=lambda r: abs(float(r["real_length_meters"]) / float(r["length_px"]) - mpp))
+    width, height = evidence.get("image_size_px") or (None, None)
+    return {
+        "image_width_px": width,
+        "image_height_px": height,
+        "reference_measurement": {
+            "segment_label": ref.get("label", ""),
+            "pixel_length_estimated": round(float(ref["length_px"]), 1),
+            "real_length_meters": float(ref["real_length_meters"]),
+        },
+        "meters_per_pixel": mpp,
+        "confidence": evidence.get("confidence", "medium"),
+        "combined_references": len(refs),
+    }
+
+
+def _llm_scale(plan_image: Path, work_dir: Path | None) -> tuple[dict, str]:
+    """Scara LLM: din analiza combinată dacă a dat o scară validă, altfel apel GPT-4o separat."""
+    if work_dir is not None and (work_dir / SCALE_EVIDENCE_FILE).exists():
+        with open(work_dir / SCALE_EVIDENCE_FILE, "r", encoding="utf-8") as f:
+            result = scale_from_evidence(json.load(f))
+        if result:
+            return result, "combined"
+    return detect_scale_with_openai(plan_image), "openai"
+
+
+def detect_scale(plan_image: Path, mode: str, work_dir: Path | None = None) -> tuple[dict, str]:
+    """
+    Rezultatul în formatul scale_result.json, după modul ales:
+      local / cross_check – cotele citite local; GPT-4o dacă încrederea locală e mică
+                    sau inlierii sunt pe o singură direcție (local_scale.is_reliable).
+                    Verificarea GPT-4o a scării locale nu se face aici (submit_cross_check).
+      openai      – doar GPT-4o
+    work_dir: dacă conține SCALE_EVIDENCE_FILE, scara LLM vine din analiza combinată
+    (fără apel separat).
+    RETURN: (rezultat, sursa scării: "local" | "combined" | "openai")
+    """
+    if mode == "openai":
+        return _llm_scale(plan_image, work_dir)
+
+    local = None
+    try:
+        local = detect_scale_local(plan_image)
+    except Exception as e:
+        print(f"  ⚠️  Scară locală eșuată ({e}) → GPT-4o")
+
+    if local and is_reliable(local):
+        print(
+            f"  📐 Scară locală: {local['meters_per_pixel']:.6f} m/px "
+            f"({len(local['local']['inliers'])} cote concordante, încredere {local['confidence']})"
+        )
+        return local, "local"
+
+    if local:
+        print(
+            f"  ⚠️  Scară locală nesigură (scor {local['local']['confidence_score']}, "
+            f"ambele direcții: {local['local']['both_directions']}) → GPT-4o"
+        )
+    result, source = _llm_scale(plan_image, work_dir)
+    if local:
+        result["local"] = local["local"]     # diagnostic: ce a găsit motorul local
+    return result, source
+
+
+def _cross_check(plan_image: Path, work_dir: Path, local_mpp: float) -> None:
+    """Scara GPT-4o comparată cu cea locală → work_dir / SCALE_CROSS_CHECK_FILE."""
+    try:
+        llm, llm_source = _llm_scale(plan_image, work_dir)
+        llm_mpp = float(llm["meters_per_pixel"])
+        check = {
+            "source": llm_source,
+            "meters_per_pixel": llm_mpp,
+            "local_meters_per_pixel": local_mpp,
+            "relative_diff": round((llm_mpp - local_mpp) / local_mpp, 3),
+        }
+    except Exception as e:
+        check = {"error": str(e)}
+    check["generated_at"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    try:
+        tmp = work_dir / f"{SCALE_CROSS_CHECK_FILE}.tmp"
+        tmp.write_text(json.dumps(check, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(work_dir / SCALE_CROSS_CHECK_FILE)
+    except Exception as e:
+        print(f"  ⚠️  Verificare GPT-4o nesalvată ({work_dir.name}): {e}")
+
+
+def submit_cross_check(plan_image: Path, work_dir: Path, local_mpp: float) -> Future:
+    """
+    Verificarea GPT-4o a scării locale, în fundal (executor propriu, creat la prima
+    utilizare). Etapa nu așteaptă rezultatul; thread-urile termină înainte de ieșirea
+    procesului.
+    """
+    global _cross_check_executor
+    with _cross_check_lock:
+        if _cross_check_executor is None:
+            _cross_check_executor = ThreadPoolExecutor(
+                max_workers=SCALE_CROSS_CHECK_WORKERS,
+                thread_name_prefix="scale_cross_check",
+            )
+        return _cross_check_executor.submit(_cross_check, plan_image, work_dir, local_mpp)
+
+
 def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) -> ScaleJobResult:
     """
-    Detectează scala pentru un singur plan folosind GPT-4o.
+    Detectează scala pentru un singur plan: local din cote, GPT-4o doar ca rezervă
+    (vezi detect_scale / SCALE_MODE).
     """
     work_dir = plan.stage_work_dir
     work_dir.mkdir(parents=True, exist_ok=True)
@@ -40,21 +202,35 @@ def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) ->
     output_file = work_dir / "scale_result.json"
     
     try:
+        if reused_result(work_dir, output_file.name):
+            with open(output_file, "r", encoding="utf-8") as f:
+                meters_per_pixel = float(json.load(f)["meters_per_pixel"])
+            return ScaleJobResult(
+                plan_id=plan.plan_id,
+                work_dir=work_dir,
+                success=True,
+                message=f"Scară refolosită din index: {meters_per_pixel:.6f} m/px",
+                meters_per_pixel=meters_per_pixel
+            )
+        
         print(
             f"[{STAGE_NAME}] ({index}/{total}) {plan.plan_id} → scale detection "
             f"(cwd={work_dir})",
             flush=True,
         )
         
-        # Apel AI pentru detectare scară
-        result = detect_scale_with_openai(plan.plan_image)
+        # Scară locală din cote; GPT-4o doar dacă încrederea locală e mică
+        mode = scale_mode()
+        result, source = detect_scale(plan.plan_image, mode, work_dir)
         
         # Adaugă metadata
         result["meta"] = {
             "plan_id": plan.plan_id,
             "plan_image": str(plan.plan_image),
-            "generated_at": datetime.utcnow().isoformat() + "Z",
-            "stage": STAGE_NAME
+            "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "stage": STAGE_NAME,
+            "mode": mode,
+            "scale_source": source,
         }
         
         # Salvează rezultatul
@@ -63,11 +239,15 @@ def _run_for_single_plan(run_id: str, index: int, total: int, plan: PlanInfo) ->
         
         meters_per_pixel = float(result["meters_per_pixel"])
         
+        # Verificarea GPT-4o a scării locale: în fundal, în afara drumului critic
+        if source == "local" and wants_cross_check(mode, plan.plan_id):
+            submit_cross_check(plan.plan_image, work_dir, meters_per_pixel)
+        
         return ScaleJobResult(
             plan_id=plan.plan_id,
             work_dir=work_dir,
             success=True,
-            message=f"Scară detectată: {meters_per_pixel:.6f} m/px",
+            message=f"Scară detectată ({source}): {meters_per_pixel:.6f} m/px",
             meters_per_pixel=meters_per_pixel
         )
     
@@ -99,7 +279,7 @@ def run_scale_detection_for_run(run_id: str, max_parallel: int | None = None) ->
     
     if max_parallel is None:
         cpu_count = os.cpu_count() or 4
-        # Scale detection e I/O bound (API calls), putem fi mai agresivi
+        # Scara locală e scurtă (cv2 eliberează GIL-ul), iar rezerva GPT-4o e I/O bound
         max_parallel = min(cpu_count * 2, total, 10)  # max 10 concurrent
     
     print(f"⚙️  [{STAGE_NAME}] rulez cu max_parallel = {max_parallel}\n", flush=True)
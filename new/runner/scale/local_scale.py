@@ -0,0 +1,619 @@
+# new/runner/scale/local_scale.py
+# ------------------------------------------------------------
+# Scara planului calculată local (offline), din cote:
+#
+#   - liniile de cotă: linii subțiri orizontale / verticale lungi, cu marcaje
+#     (tick-uri / linii ajutătoare) care le traversează; între două marcaje
+#     consecutive e un segment de cotă, cu lungimea lui în pixeli
+#   - textul cotelor ("3,76", "12.49", "40", "12⁵"):
+#       * din stratul de text al PDF-ului (pdftotext -bbox), mapat în pixelii
+#         planului prin CROPS_MANIFEST-ul segmenter-ului, când există
+#       * altfel OCR local pe cifre: componentele de deasupra fiecărui segment,
+#         comparate cu șabloane de cifre randate (fără tesseract / API)
+#   - fiecare pereche (text, segment) dă un candidat m/px = valoare / lungime;
+#     scara = consensul robust (mediană → inlieri → raport ponderat cu lungimea)
+#
+# Cotele verticale se citesc pe planul rotit 90° orar (textul devine orizontal,
+# deasupra liniei), deci același cod tratează ambele direcții.
+#
+# Rezultatul are aceeași structură ca răspunsul GPT-4o (meters_per_pixel +
+# reference_measurement), plus detaliile locale la "local".
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import statistics
+import subprocess
+import time
+import argparse
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..config.settings import get_output_root_for_run
+from ..plan_geometry import PlanGeometry, plan_geometry
+from ..segmenter.common import CROPS_MANIFEST
+from .config import (
+    SCALE_MIN_MPP,
+    SCALE_MAX_MPP,
+    DIM_INK_THRESHOLD,
+    DIM_LINE_MIN_RATIO,
+    DIM_TICK_RATIO,
+    DIM_TEXT_BAND_RATIO,
+    DIM_MIN_SEGMENT_PX,
+    SCALE_INLIER_TOLERANCE,
+    SCALE_MIN_INLIERS,
+    SCALE_MIN_LOCAL_CONFIDENCE,
+    SCALE_REQUIRE_BOTH_DIRECTIONS,
+    SCALE_VALIDATION_TOLERANCE,
+    SCALE_CROSS_CHECK_FILE,
+    DIM_MIN_CM,
+    OCR_MIN_DIGIT_SCORE,
+)
+
+# cadre: "h" = planul, "v" = planul rotit 90° orar (cotele verticale devin orizontale)
+_FRAMES = ("h", "v")
+
+_METERS_RE = re.compile(r"^(\d{1,2})[.,](\d{2,3})$")
+_CM_RE = re.compile(r"^([1-9]\d{0,2})$")
+
+_GLYPH_H, _GLYPH_W = 24, 18
+
+
+@dataclass
+class DimensionSegment:
+    frame: str
+    x1: float           # capetele (marcajele) în cadru
+    x2: float
+    y0: int             # rândurile liniei de cotă în cadru
+    y1: int
+
+    @property
+    def length_px(self) -> float:
+        return self.x2 - self.x1
+
+
+@dataclass
+class DimensionToken:
+    text: str
+    value_m: float
+    frame: str
+    box: tuple[float, float, float, float]   # x1, y1, x2, y2 în cadru
+    source: str                              # "pdf_text" | "ocr"
+
+
+def parse_dimension(main: str, superscript: str = "") -> float | None:
+    """
+    Textul unei cote → metri. "3,76" / "12.49" = metri, "40" = centimetri;
+    cifra la exponent adaugă o zecimală ("2,96⁵" = 2.965 m, "12⁵" = 0.125 m).
+    """
+    main = main.strip()
+    sup = superscript.strip()
+    if sup and not sup.isdigit():
+        return None
+    m = _METERS_RE.match(main)
+    if m:
+        decimals = m.group(2) + sup
+        return int(m.group(1)) + int(decimals) / 10 ** len(decimals)
+    m = _CM_RE.match(main)
+    if m and int(m.group(1)) >= DIM_MIN_CM:
+        cm = int(m.group(1)) + (int(sup) / 10 ** len(sup) if sup else 0.0)
+        return cm / 100.0
+    return None
+
+
+# ------------------------------------------------------------
+# Linii de cotă
+# ------------------------------------------------------------
+
+def _frame_ink(gray: np.ndarray) -> dict[str, np.ndarray]:
+    ink = cv2.compare(gray, DIM_INK_THRESHOLD, cv2.CMP_LT)
+    return {"h": ink, "v": cv2.rotate(ink, cv2.ROTATE_90_CLOCKWISE)}
+
+
+def _to_frame(box: tuple[float, float, float, float], frame: str, plan_h: int) -> tuple[float, float, float, float]:
+    """Box în pixelii planului → box în cadru (rotația 90° orar: (x, y) → (H-1-y, x))."""
+    x1, y1, x2, y2 = box
+    if frame == "h":
+        return box
+    return (plan_h - 1 - y2, x1, plan_h - 1 - y1, x2)
+
+
+def _runs(flags: np.ndarray) -> list[tuple[int, int]]:
+    d = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(d == 1), np.flatnonzero(d == -1)))
+
+
+def find_dimension_segments(ink: np.ndarray, frame: str) -> list[DimensionSegment]:
+    """
+    Segmentele de cotă orizontale din cadru: linii subțiri lungi, tăiate de marcaje
+    (cerneală și deasupra, și dedesubtul liniei, la mai puțin de un tick).
+    """
+    side = max(ink.shape)
+    tick = max(6, round(DIM_TICK_RATIO * side))
+    min_len = max(40, round(DIM_LINE_MIN_RATIO * side))
+    lines = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((1, min_len), np.uint8))
+    n, _, stats, _ = cv2.connectedComponentsWithStats(lines, connectivity=8)
+
+    # tick-urile oblice sunt decalate stânga / dreapta față de linie
+    spread = np.ones((1, max(3, tick // 2)), np.uint8)
+    segments = []
+    for i in range(1, n):
+        x, y, w, h, _ = stats[i]
+        if h > max(3, tick // 2) or y < tick or y + h + tick >= ink.shape[0]:
+            continue
+        above = np.any(ink[y - tick:y - 1, x:x + w], axis=0).astype(np.uint8)[None]
+        below = np.any(ink[y + h + 1:y + h + tick, x:x + w], axis=0).astype(np.uint8)[None]
+        crossing = cv2.dilate(above, spread)[0] & cv2.dilate(below, spread)[0]
+        ticks = [x + (a + b - 1) / 2.0 for a, b in _runs(crossing > 0)]
+        for a, b in zip(ticks, ticks[1:]):
+            segments.append(DimensionSegment(frame, a, b, int(y), int(y + h - 1)))
+    return segments
+
+
+# ------------------------------------------------------------
+# OCR local pe cifre
+# ------------------------------------------------------------
+
+def _glyph_vector(mask: np.ndarray) -> np.ndarray | None:
+    """Cifra (mască) → vector normalizat: înălțime fixă, proporții păstrate, centrată."""
+    ys, xs = np.nonzero(mask)
+    if ys.size == 0:
+        return None
+    crop = mask[ys.min():ys.max() + 1, xs.min():xs.max() + 1].astype(np.float32)
+    h, w = crop.shape
+    scale = _GLYPH_H / h
+    nw = int(min(_GLYPH_W, max(1, round(w * scale))))
+    glyph = cv2.resize(crop, (nw, _GLYPH_H), interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((_GLYPH_H, _GLYPH_W), np.float32)
+    x0 = (_GLYPH_W - nw) // 2
+    canvas[:, x0:x0 + nw] = glyph
+    canvas = cv2.GaussianBlur(canvas, (3, 3), 0).ravel()
+    canvas -= canvas.mean()
+    norm = np.linalg.norm(canvas)
+    return canvas / norm if norm > 0 else None
+
+
+def _rendered_digits() -> list[tuple[str, np.ndarray]]:
+    """Cifrele 0–9 randate cu fonturile disponibile local (sans-serif, grosimi diferite)."""
+    out = []
+    for font in (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX):
+        for thickness in (2, 3, 4):
+            for d in "0123456789":
+                img = np.zeros((80, 60), np.uint8)
+                cv2.putText(img, d, (8, 62), font, 1.8, 255, thickness, cv2.LINE_AA)
+                out.append((d, img > 127))
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+        for size in (32, 48):
+            font = ImageFont.load_default(size=size)   # Pillow ≥ 10.1 (font vectorial)
+            for d in "0123456789":
+                img = Image.new("L", (size * 2, size * 2), 0)
+                ImageDraw.Draw(img).text((size // 2, size // 4), d, fill=255, font=font)
+                out.append((d, np.asarray(img) > 127))
+    except Exception:
+        pass
+    return out
+
+
+@lru_cache(maxsize=1)
+def _digit_templates() -> tuple[np.ndarray, list[str]]:
+    vectors, labels = [], []
+    for d, mask in _rendered_digits():
+        mask = mask.astype(np.uint8)
+        for variant in (mask, cv2.dilate(mask, np.ones((2, 2), np.uint8))):
+            v = _glyph_vector(variant)
+            if v is not None:
+                vectors.append(v)
+                labels.append(d)
+    return np.stack(vectors), labels
+
+
+def read_digit(mask: np.ndarray) -> tuple[str | None, float]:
+    """Cea mai apropiată cifră-șablon (corelație); None sub OCR_MIN_DIGIT_SCORE."""
+    v = _glyph_vector(mask)
+    if v is None:
+        return None, 0.0
+    templates, labels = _digit_templates()
+    scores = templates @ v
+    best = int(np.argmax(scores))
+    score = float(scores[best])
+    return (labels[best] if score >= OCR_MIN_DIGIT_SCORE else None), score
+
+
+def _read_label(labels: np.ndarray, stats: np.ndarray, comps: list[int]) -> tuple[str, str] | None:
+    """
+    Componentele de deasupra unui segment → (text principal, exponent) sau None.
+    Cifrele principale au înălțimea maximă; separatorul (virgulă / punct) e mic,
+    pe linia de bază; exponentul e mai mic și ridicat.
+    """
+    hm = max(int(stats[i, cv2.CC_STAT_HEIGHT]) for i in comps)
+    comps = sorted(comps, key=lambda i: stats[i, cv2.CC_STAT_LEFT])
+
+    # grupul compact cu cele mai multe cifre mari (etichetele vecine sunt separate de spații)
+    groups, current = [], [comps[0]]
+    for prev, i in zip(comps, comps[1:]):
+        gap = stats[i, cv2.CC_STAT_LEFT] - (stats[prev, cv2.CC_STAT_LEFT] + stats[prev, cv2.CC_STAT_WIDTH])
+        if gap > 0.8 * hm:
+            groups.append(current)
+            current = []
+        current.append(i)
+    groups.append(current)
+    group = max(groups, key=lambda g: sum(stats[i, cv2.CC_STAT_HEIGHT] >= 0.65 * hm for i in g))
+
+    tall = [i for i in group if stats[i, cv2.CC_STAT_HEIGHT] >= 0.65 * hm]
+    baseline = statistics.median(int(stats[i, cv2.CC_STAT_TOP] + stats[i, cv2.CC_STAT_HEIGHT]) for i in tall)
+    main, sup = "", ""
+    for i in group:
+        x, y, w, h = (int(v) for v in stats[i, :4])
+        bottom = y + h
+        if h >= 0.65 * hm:
+            if sup or w > 0.95 * hm or abs(bottom - baseline) > 0.2 * hm:
+                return None
+            kind = "main"
+        elif h <= 0.45 * hm and bottom >= baseline - 0.25 * hm:
+            if not main or "," in main:
+                return None
+            main += ","
+            continue
+        elif 0.35 * hm <= h < 0.85 * hm and bottom < baseline - 0.3 * hm:
+            kind = "sup"
+        else:
+            return None
+        digit, _ = read_digit(labels[y:bottom, x:x + w] == i)
+        if digit is None:
+            return None
+        if kind == "main":
+            main += digit
+        else:
+            sup += digit
+    return (main, sup) if main and not main.endswith(",") else None
+
+
+def ocr_candidates(ink: np.ndarray, segments: list[DimensionSegment]) -> list[dict]:
+    """Citește cota de deasupra fiecărui segment (OCR local) → candidați m/px."""
+    side = max(ink.shape)
+    band = max(10, round(DIM_TEXT_BAND_RATIO * side))
+    tick = max(6, round(DIM_TICK_RATIO * side))
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    x, y, w, h = (stats[:, k] for k in range(4))
+    cx = x + w / 2.0
+    small = (h < 0.9 * band) & (w < 4 * band) & (np.arange(n) > 0)
+
+    out = []
+    for seg in segments:
+        if seg.length_px < DIM_MIN_SEGMENT_PX:
+            continue
+        sel = np.flatnonzero(
+            small
+            & (y + h <= seg.y0) & (y >= seg.y0 - band)
+            & (cx > seg.x1 + tick) & (cx < seg.x2 - tick)
+        )
+        if sel.size == 0 or sel.size > 12:
+            continue
+        label = _read_label(labels, stats, sel.tolist())
+        if label is None:
+            continue
+        value = parse_dimension(*label)
+        if value is None:
+            continue
+        text = label[0] + (f"^{label[1]}" if label[1] else "")
+        out.append(_candidate(text, value, seg, "ocr"))
+    return out
+
+
+# ------------------------------------------------------------
+# Stratul de text al PDF-ului
+# ------------------------------------------------------------
+
+def crop_source(plan_image: Path) -> dict | None:
+    """Intrarea din CROPS_MANIFEST pentru plan (căutată în folderele părinte ale imaginii)."""
+    plan_image = Path(plan_image)
+    for root in list(plan_image.parents)[:4]:
+        manifest = root / CROPS_MANIFEST
+        if manifest.exists():
+            try:
+                return json.loads(manifest.read_text(encoding="utf-8")).get(plan_image.name)
+            except Exception:
+                return None
+    return None
+
+
+_PAGE_RE = re.compile(r'<page width="([\d.]+)" height="([\d.]+)">')
+_WORD_RE = re.compile(
+    r'<word xMin="([\d.]+)" yMin="([\d.]+)" xMax="([\d.]+)" yMax="([\d.]+)">([^<]*)</word>'
+)
+
+
+def pdf_text_words(pdf_path: Path, page: int) -> tuple[float, list[tuple[float, float, float, float, str]]] | None:
+    """
+    Cuvintele paginii cu box-urile lor în puncte (pdftotext -bbox, din poppler – deja
+    necesar pentru pdf2image). RETURN: (lățimea paginii în pt, cuvinte) sau None.
+    """
+    if shutil.which("pdftotext") is None or not Path(pdf_path).exists():
+        return None
+    try:
+        xhtml = subprocess.run(
+            ["pdftotext", "-bbox", "-f", str(page), "-l", str(page), str(pdf_path), "-"],
+            capture_output=True, text=True, timeout=60, check=True,
+        ).stdout
+    except Exception:
+        return None
+    page_m = _PAGE_RE.search(xhtml)
+    if not page_m:
+        return None
+    words = [
+        (float(a), float(b), float(c), float(d), t.strip())
+        for a, b, c, d, t in _WORD_RE.findall(xhtml)
+    ]
+    return float(page_m.group(1)), words
+
+
+def pdf_text_tokens(plan_image: Path, plan_shape: tuple[int, int]) -> list[DimensionToken] | None:
+    """
+    Cotele din stratul de text al PDF-ului, în cadrele planului.
+    None dacă planul nu vine dintr-un PDF cu text (sau crop-ul nu corespunde imaginii).
+    """
+    source = crop_source(plan_image)
+    if not source or not source.get("pdf"):
+        return None
+    page = pdf_text_words(Path(source["pdf"]), int(source.get("pdf_page", 1)))
+    if page is None:
+        return None
+    page_w_pt, words = page
+
+    bx1, by1, bx2, by2 = source["box"]
+    k = source["page_size_px"][0] / page_w_pt          # px pagină / pt
+    s = float(source.get("crop_scale", 1.0))          # px plan / px pagină
+    H, W = plan_shape
+    if abs((bx2 - bx1) * s - W) > 2 or abs((by2 - by1) * s - H) > 2:
+        return None
+
+    placed: dict[str, list[tuple[tuple[float, float, float, float], str]]] = {f: [] for f in _FRAMES}
+    for xa, ya, xb, yb, text in words:
+        box = ((xa * k - bx1) * s, (ya * k - by1) * s, (xb * k - bx1) * s, (yb * k - by1) * s)
+        if box[2] < 0 or box[3] < 0 or box[0] > W or box[1] > H or not text:
+            continue
+        w, h = box[2] - box[0], box[3] - box[1]
+        frame = "v" if len(text) > 1 and h > 1.3 * w else "h"
+        placed[frame].append((_to_frame(box, frame, H), text))
+
+    tokens = []
+    for frame, items in placed.items():
+        # exponentul e un cuvânt separat: o cifră mai mică, lipită în dreapta, ridicată
+        sups: dict[int, int] = {}
+        for j, (b2, t2) in enumerate(items):
+            if len(t2) != 1 or not t2.isdigit():
+                continue
+            for i, (b1, _) in enumerate(items):
+                h1 = b1[3] - b1[1]
+                if (i != j and i not in sups and (b2[3] - b2[1]) < 0.85 * h1
+                        and 0 <= b2[0] - b1[2] < 0.6 * h1
+                        and b2[1] < b1[1] + 0.3 * h1 and b2[3] > b1[1]):
+                    sups[i] = j
+                    break
+        used = set(sups.values())
+        for i, (box, text) in enumerate(items):
+            if i in used:
+                continue
+            sup = items[sups[i]][1] if i in sups else ""
+            value = parse_dimension(text, sup)
+            if value is not None:
+                tokens.append(DimensionToken(text + (f"^{sup}" if sup else ""), value, frame, box, "pdf_text"))
+    return tokens
+
+
+def pair_tokens(tokens: list[DimensionToken], segments: list[DimensionSegment], band: float, tick: float) -> list[dict]:
+    """Fiecare text → segmentul de sub el (centrul între marcaje); un segment = un text."""
+    best: dict[int, tuple[float, DimensionToken]] = {}
+    for tok in tokens:
+        cx = (tok.box[0] + tok.box[2]) / 2.0
+        for si, seg in enumerate(segments):
+            if seg.frame != tok.frame or not (seg.x1 < cx < seg.x2):
+                continue
+            dist = seg.y0 - tok.box[3]
+            if -tick / 2 <= dist <= band and (si not in best or dist < best[si][0]):
+                best[si] = (dist, tok)
+    return [
+        _candidate(tok.text, tok.value_m, segments[si], tok.source)
+        for si, (_, tok) in best.items()
+        if segments[si].length_px >= DIM_MIN_SEGMENT_PX
+    ]
+
+
+# ------------------------------------------------------------
+# Consens
+# ------------------------------------------------------------
+
+def _candidate(text: str, value_m: float, seg: DimensionSegment, source: str) -> dict:
+    return {
+        "text": text,
+        "value_m": round(value_m, 4),
+        "length_px": round(seg.length_px, 1),
+        "meters_per_pixel": value_m / seg.length_px,
+        "frame": seg.frame,
+        "source": source,
+    }
+
+
+def scale_consensus(candidates: list[dict]) -> dict:
+    """
+    Mediană → inlieri (±SCALE_INLIER_TOLERANCE) → m/px = Σ valori / Σ lungimi pe inlieri
+    (segmentele lungi cântăresc mai mult: eroarea de capăt e relativ mai mică).
+    """
+    valid = [c for c in candidates if SCALE_MIN_MPP <= c["meters_per_pixel"] <= SCALE_MAX_MPP]
+    if not valid:
+        return {"meters_per_pixel": None, "inliers": [], "outliers": candidates, "confidence_score": 0.0, "both_directions": False}
+
+    med = statistics.median(c["meters_per_pixel"] for c in valid)
+    inliers = [c for c in valid if abs(c["meters_per_pixel"] / med - 1.0) <= SCALE_INLIER_TOLERANCE]
+    outliers = [c for c in candidates if c not in inliers]
+    mpp = sum(c["value_m"] for c in inliers) / sum(c["length_px"] for c in inliers)
+
+    score = len(inliers) / len(valid) * min(1.0, len(inliers) / SCALE_MIN_INLIERS)
+    both_directions = len({c["frame"] for c in inliers}) == len(_FRAMES)
+    if not both_directions:
+        score *= 0.9      # o singură direcție: o eventuală distorsiune pe o axă nu se vede
+    return {
+        "meters_per_pixel": mpp,
+        "inliers": inliers,
+        "outliers": outliers,
+        "confidence_score": round(score, 2),
+        "both_directions": both_directions,
+    }
+
+
+def _confidence_label(score: float) -> str:
+    return "high" if score >= 0.75 else "medium" if score >= 0.5 else "low"
+
+
+def is_reliable(result: dict) -> bool:
+    """
+    Scara locală poate fi folosită fără GPT-4o: scor ≥ SCALE_MIN_LOCAL_CONFIDENCE
+    și (cu SCALE_REQUIRE_BOTH_DIRECTIONS) inlieri pe ambele direcții.
+    """
+    local = result.get("local") or {}
+    if not result.get("meters_per_pixel") or local.get("confidence_score", 0.0) < SCALE_MIN_LOCAL_CONFIDENCE:
+        return False
+    return local.get("both_directions", False) or not SCALE_REQUIRE_BOTH_DIRECTIONS
+
+
+def detect_scale_local(plan_image: Path, geometry: PlanGeometry | None = None) -> dict:
+    """
+    Scara planului din cote, fără API.
+    Textul vine din stratul PDF (dacă există); dacă nu ajunge pentru un consens
+    sigur, se adaugă cotele citite cu OCR-ul local.
+    RETURN: dict în formatul scale_result.json (meters_per_pixel poate fi None)
+            + detaliile locale la "local".
+    """
+    t0 = time.perf_counter()
+    geometry = geometry or plan_geometry(plan_image)
+    gray = geometry.gray
+    H, W = gray.shape[:2]
+    side = max(H, W)
+    band = max(10, round(DIM_TEXT_BAND_RATIO * side))
+    tick = max(6, round(DIM_TICK_RATIO * side))
+
+    inks = _frame_ink(gray)
+    segments = {f: find_dimension_segments(inks[f], f) for f in _FRAMES}
+    all_segments = segments["h"] + segments["v"]
+
+    sources = []
+    candidates: list[dict] = []
+    tokens = pdf_text_tokens(plan_image, (H, W))
+    if tokens:
+        candidates = pair_tokens(tokens, all_segments, band, tick)
+        sources.append("pdf_text")
+    consensus = scale_consensus(candidates)
+    if consensus["confidence_score"] < 0.75:
+        for f in _FRAMES:
+            candidates += ocr_candidates(inks[f], segments[f])
+        sources.append("ocr")
+        consensus = scale_consensus(candidates)
+
+    mpp = consensus["meters_per_pixel"]
+    score = consensus["confidence_score"]
+    inliers = sorted(consensus["inliers"], key=lambda c: -c["length_px"])
+    reference = inliers[0] if inliers else None
+    for c in candidates:
+        c["meters_per_pixel"] = round(c["meters_per_pixel"], 7)
+
+    return {
+        "image_width_px": W,
+        "image_height_px": H,
+        "reference_measurement": {
+            "segment_label": reference["text"],
+            "pixel_length_estimated": reference["length_px"],
+            "real_length_meters": reference["value_m"],
+        } if reference else None,
+        "meters_per_pixel": round(mpp, 7) if mpp else None,
+        "confidence": _confidence_label(score),
+        "local": {
+            "engine": "local",
+            "text_sources": sources,
+            "segments": len(all_segments),
+            "candidates": len(candidates),
+            "inliers": inliers,
+            "outliers": consensus["outliers"][:30],
+            "confidence_score": score,
+            "both_directions": consensus["both_directions"],
+            "elapsed_s": round(time.perf_counter() - t0, 3),
+        },
+    }
+
+
+# ------------------------------------------------------------
+# Validare pe run-uri înregistrate
+# ------------------------------------------------------------
+
+def _stored_llm_scale(scale_result: dict) -> float | None:
+    """Scara GPT-4o / analiză combinată salvată în scale_result.json (None dacă nu există)."""
+    source = (scale_result.get("meta") or {}).get("scale_source", "openai")
+    if source in ("openai", "combined") and scale_result.get("meters_per_pixel"):
+        return float(scale_result["meters_per_pixel"])
+    check = scale_result.get("openai_cross_check") or {}
+    return float(check["meters_per_pixel"]) if check.get("meters_per_pixel") else None
+
+
+def cross_check_runs(run_ids: list[str]) -> dict:
+    """
+    Pentru fiecare plan cu o scară GPT-4o salvată în run-urile date: scara locală
+    (plan.jpg din detections) comparată cu ea. "reliable" = planurile pe care
+    SCALE_MODE="local" n-ar fi cerut GPT-4o; pe ele se judecă motorul local.
+    """
+    rows = []
+    for run_id in run_ids:
+        output_root = get_output_root_for_run(run_id)
+        for scale_json in sorted((output_root / "scale").glob("*/scale_result.json")):
+            plan_id = scale_json.parent.name
+            row = {"run_id": run_id, "plan_id": plan_id}
+            try:
+                scale_result = json.loads(scale_json.read_text(encoding="utf-8"))
+                check_json = scale_json.parent / SCALE_CROSS_CHECK_FILE
+                if check_json.exists():
+                    scale_result["openai_cross_check"] = json.loads(check_json.read_text(encoding="utf-8"))
+                llm_mpp = _stored_llm_scale(scale_result)
+                if llm_mpp is None:
+                    continue
+                local = detect_scale_local(output_root / "detections" / plan_id / "plan.jpg")
+                row.update({
+                    "llm_mpp": llm_mpp,
+                    "local_mpp": local["meters_per_pixel"],
+                    "confidence_score": local["local"]["confidence_score"],
+                    "both_directions": local["local"]["both_directions"],
+                    "reliable": is_reliable(local),
+                })
+                if local["meters_per_pixel"]:
+                    row["relative_diff"] = round((local["meters_per_pixel"] - llm_mpp) / llm_mpp, 4)
+            except Exception as e:
+                row["error"] = str(e)
+            rows.append(row)
+
+    def summary(subset: list[dict]) -> dict:
+        diffs = [abs(r["relative_diff"]) for r in subset if r.get("relative_diff") is not None]
+        return {
+            "plans": len(subset),
+            "compared": len(diffs),
+            "median_abs_rel_diff": round(statistics.median(diffs), 4) if diffs else None,
+            "within_tolerance": sum(d <= SCALE_VALIDATION_TOLERANCE for d in diffs),
+        }
+
+    return {
+        "plans": rows,
+        "all": summary(rows),
+        "reliable": summary([r for r in rows if r.get("reliable")]),
+        "tolerance": SCALE_VALIDATION_TOLERANCE,
+    }
+
+
+if __name__ == "__main__":  # pragma: no cover
+    parser = argparse.ArgumentParser(description="Scara locală vs. GPT-4o pe run-uri înregistrate")
+    parser.add_argument("run_ids", nargs="+")
+    args = parser.parse_args()
+    print(json.dumps(cross_check_runs(args.run_ids), indent=2, ensure_ascii=False))
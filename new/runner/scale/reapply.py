@@ -0,0 +1,163 @@
+# new/runner/scale/reapply.py
+# ------------------------------------------------------------
+# Re-aplică scara (eventual corectată) pe un run existent:
+#
+#   - scale_result.json primește noul meters_per_pixel (cel vechi rămâne la
+#     "previous_meters_per_pixel")
+#   - measure_objects, perimeter, area și roof se recalculează: motoarele locale
+#     rulează din nou (secunde), iar răspunsurile LLM sunt deja în pixeli
+#     (walls_measurements_px.json / house_area_px.json) și primesc doar noua scară.
+#     Apeluri API noi doar dacă un motor local are încredere mică și răspunsul
+#     LLM în pixeli lipsește (fallback-ul din perimeter / area)
+#   - pricing, ofertele finale și PDF-ul se refac cu noile cantități (pașii 12–14
+#     din orchestrator). Până reușesc toate, output/<run>/offer_stale.json marchează
+#     oferta existentă ca neactualizată.
+#
+#   python -m runner.scale.reapply RUN_ID [--set PLAN_ID=0.00985 ...]
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+from ..config.settings import load_plan_infos, get_output_root_for_run, JOBS_ROOT
+from ..plan_index.config import REUSE_MARKER
+from ..measure_objects.jobs import run_measure_objects_for_run
+from ..perimeter.jobs import run_perimeter_for_run, perimeter_mode, WALL_PIXELS_FILE
+from ..area.jobs import run_area_for_run, area_mode, HOUSE_PIXELS_FILE
+from ..roof.jobs import run_roof_for_run
+from ..pricing.jobs import run_pricing_for_run
+from ..offer_builder import build_final_offer
+from ..pdf_generator import generate_complete_offer_pdf
+from .jobs import STAGE_NAME
+
+OFFER_STALE_FILE = "offer_stale.json"
+
+
+def _set_scale(scale_json, meters_per_pixel: float) -> float:
+    data = json.loads(scale_json.read_text(encoding="utf-8"))
+    previous = float(data.get("meters_per_pixel") or 0.0)
+    data["previous_meters_per_pixel"] = previous
+    data["meters_per_pixel"] = meters_per_pixel
+    data.setdefault("meta", {})["corrected_at"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    scale_json.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    return previous
+
+
+def _release_reused(stage_dir, pixels_file: str, local_mode: bool) -> bool:
+    """
+    Etapa restaurată din index are rezultatul în metri la scara veche: marker-ul se
+    șterge dacă etapa se poate recalcula offline (motor local sau pixeli salvați).
+    """
+    marker = stage_dir / REUSE_MARKER
+    if not marker.exists():
+        return True
+    if local_mode or (stage_dir / pixels_file).exists():
+        marker.unlink()
+        return True
+    return False
+
+
+def _mark_offer_stale(output_root, reason: str) -> None:
+    (output_root / OFFER_STALE_FILE).write_text(
+        json.dumps({"reason": reason, "since": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")}, indent=2, ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+
+def _rebuild_offer(run_id: str, output_root) -> dict:
+    """
+    Pricing + oferte finale + PDF cu noile cantități (ca pașii 12–14 din orchestrator).
+    Marker-ul offer_stale.json se șterge doar dacă toate reușesc.
+    """
+    from ..orchestrator import load_frontend_data  # import târziu: orchestrator importă toate etapele
+
+    frontend_data = load_frontend_data(JOBS_ROOT / run_id)
+    offer_level = frontend_data.get("nivelOferta", "Structură + ferestre")
+    offer = {"plans": {}, "total_price_eur": 0.0, "pdf": None}
+    failed = []
+
+    for res in run_pricing_for_run(run_id, frontend_data_override=frontend_data):
+        if not res.success or not res.result_data:
+            print(f"   ❌ {res.plan_id}: Pricing failed - {res.message}")
+            failed.append(res.plan_id)
+            continue
+        final_offer = build_final_offer(
+            pricing_data=res.result_data,
+            offer_level=offer_level,
+            output_path=res.work_dir / "final_offer.json",
+        )
+        cost = final_offer["summary"]["total_price_eur"]
+        offer["plans"][res.plan_id] = cost
+        offer["total_price_eur"] += cost
+
+    try:
+        offer["pdf"] = str(generate_complete_offer_pdf(run_id=run_id))
+    except Exception as e:
+        print(f"⚠️ EROARE la generarea PDF: {e}")
+        failed.append("pdf")
+
+    if failed:
+        _mark_offer_stale(output_root, f"refacere eșuată după corecția scării: {', '.join(failed)}")
+    else:
+        (output_root / OFFER_STALE_FILE).unlink(missing_ok=True)
+    offer["stale"] = bool(failed)
+    return offer
+
+
+def reapply_scale(run_id: str, corrections: dict[str, float] | None = None) -> dict:
+    """
+    corrections: plan_id → meters_per_pixel nou; None / {} → doar recalculează
+    etapele metrice cu scara existentă (ex. după o corecție manuală în fișier).
+    RETURN: rezumat (scările vechi / noi, etapele care n-au putut fi recalculate
+            offline și oferta refăcută).
+    """
+    corrections = corrections or {}
+    output_root = get_output_root_for_run(run_id)
+    plans = load_plan_infos(run_id, stage_name=STAGE_NAME)
+    unknown = set(corrections) - {p.plan_id for p in plans}
+    if unknown:
+        raise ValueError(f"Planuri necunoscute în {run_id}: {sorted(unknown)}")
+
+    summary = {"run_id": run_id, "plans": {}, "kept_reused": []}
+    for plan in plans:
+        scale_json = plan.stage_work_dir / "scale_result.json"
+        entry = {}
+        if plan.plan_id in corrections and scale_json.exists():
+            entry["previous"] = _set_scale(scale_json, float(corrections[plan.plan_id]))
+            entry["meters_per_pixel"] = float(corrections[plan.plan_id])
+        summary["plans"][plan.plan_id] = entry
+
+        for stage, pixels_file, local_mode in (
+            ("perimeter", WALL_PIXELS_FILE, perimeter_mode() == "local"),
+            ("area", HOUSE_PIXELS_FILE, area_mode() == "local"),
+        ):
+            stage_dir = output_root / stage / plan.plan_id
+            if stage_dir.exists() and not _release_reused(stage_dir, pixels_file, local_mode):
+                summary["kept_reused"].append(f"{stage}/{plan.plan_id}")
+
+    # oferta existentă e calculată cu scara veche până la refacerea completă
+    _mark_offer_stale(output_root, "scara re-aplicată, oferta în curs de refacere")
+
+    print(f"\n📏 [{STAGE_NAME}] re-aplic scara pe {len(plans)} planuri (RUN_ID={run_id})", flush=True)
+    run_measure_objects_for_run(run_id)
+    run_perimeter_for_run(run_id)
+    run_area_for_run(run_id)
+    run_roof_for_run(run_id)
+    summary["offer"] = _rebuild_offer(run_id, output_root)
+    return summary
+
+
+if __name__ == "__main__":  # pragma: no cover
+    parser = argparse.ArgumentParser(description="Re-aplică scara pe un run existent și reface oferta")
+    parser.add_argument("run_id")
+    parser.add_argument("--set", action="append", default=[], metavar="PLAN_ID=MPP",
+                        help="scară corectată pentru un plan (m/px); se poate repeta")
+    args = parser.parse_args()
+    fixes = {}
+    for item in args.set:
+        plan_id, _, value = item.partition("=")
+        fixes[plan_id] = float(value)
+    print(json.dumps(reapply_scale(args.run_id, fixes), indent=2, ensure_ascii=False))
@@ -1,6 +1,7 @@
 # file: engine/new/runner/segmenter/__init__.py
 
+from .common import SegmentationContext
 from .detector import segment_document, segment_page_image
 from .classifier import classify_segmented_plans
 
-__all__ = ["segment_document", "segment_page_image", "classify_segmented_plans"]
+__all__ = ["SegmentationContext", "segment_document", "segment_page_image", "classify_segmented_plans"]
@@ -9,16 +9,28 @@ from __future__ import annotations
 import os
 import math
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import Iterable, Literal
 
 import cv2
 import numpy as np
 from dotenv import load_dotenv
 from PIL import Image, ImageFilter, ImageFile
 
-from .common import STEP_DIRS, get_output_dir, debug_print, safe_imread
+from .common import (
+    STEP_DIRS,
+    DUPLICATES_MANIFEST,
+    LOCAL_CONFIDENCE_THRESHOLD,
+    CLASSIFY_MAX_WORKERS,
+    SegmentationContext,
+    debug_print,
+    safe_imread,
+)
+from .local_model import load_local_model
+from .dedup import load_duplicate_groups
 
 Image.MAX_IMAGE_PIXELS = None
 ImageFile.LOAD_TRUNCATED_IMAGES = True
@@ -47,6 +59,9 @@ class ClassificationResult:
     """
     image_path: Path
     label: LabelType
+    confidence: float | None = None
+    source: str = "openai"  # openai | local | local_fallback | duplicate
+    duplicate_of: Path | None = None  # setat pentru duplicatele „fanout” (vezi dedup.py)
 
 
 # ==============================
@@ -154,16 +169,26 @@ def _count_rect_rooms_and_lines(img_gray: np.ndarray) -> tuple[int, float, float
     return rooms_like, float(ortho), float(diag), int(cc_small)
 
 
-def local_classify(img_path: str | Path) -> LabelType:
+def extract_local_features(img_path: str | Path) -> dict:
+    """
+    Feature-urile heuristicii locale pentru un crop (camere, linii, text).
+    """
     im = safe_imread(img_path)
     g = cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
     rooms_like, ortho_ratio, diag_ratio, cc_small = _count_rect_rooms_and_lines(g)
+    return {
+        "rooms_like": rooms_like,
+        "ortho_ratio": ortho_ratio,
+        "diag_ratio": diag_ratio,
+        "cc_small": cc_small,
+    }
 
-    debug_print(
-        f"🧪 LOCAL {Path(img_path).name}: "
-        f"rooms={rooms_like} ortho={ortho_ratio:.2f} "
-        f"diag={diag_ratio:.2f} textCC={cc_small}"
-    )
+
+def _rule_label(f: dict) -> LabelType:
+    rooms_like = f["rooms_like"]
+    ortho_ratio = f["ortho_ratio"]
+    diag_ratio = f["diag_ratio"]
+    cc_small = f["cc_small"]
 
     # logică din scriptul tău
     if rooms_like <= 1 and cc_small >= 1800 and ortho_ratio <= 0.55:
@@ -177,6 +202,97 @@ def local_classify(img_path: str | Path) -> LabelType:
     return "side_view"
 
 
+def _ramp(x: float, lo: float, hi: float) -> float:
+    """0 la lo, 1 la hi, liniar între (hi < lo => rampă descrescătoare)."""
+    if hi == lo:
+        return 1.0 if x >= hi else 0.0
+    t = (x - lo) / (hi - lo)
+    return float(min(1.0, max(0.0, t)))
+
+
+def _rule_scores(f: dict) -> dict[str, float]:
+    """
+    Variantă „soft” a regulilor din _rule_label: cât de bine (0..1) sunt
+    satisfăcute condițiile fiecărui label, cu margini în jurul pragurilor.
+    """
+    rooms = float(f["rooms_like"])
+    ortho = float(f["ortho_ratio"])
+    diag = float(f["diag_ratio"])
+    cc = float(f["cc_small"])
+
+    few_rooms_1 = _ramp(rooms, 3, 1)
+    few_rooms_2 = _ramp(rooms, 4, 2)
+
+    return {
+        "text_area": min(few_rooms_1, _ramp(cc, 1200, 2400), _ramp(ortho, 0.65, 0.45)),
+        "house_blueprint": min(_ramp(rooms, 3, 8), _ramp(ortho, 0.45, 0.70), _ramp(diag, 0.35, 0.15)),
+        "side_view": min(few_rooms_2, _ramp(diag, 0.25, 0.45)),
+        "site_blueprint": min(few_rooms_2, max(_ramp(cc, 250, 500), _ramp(ortho, 0.55, 0.35))),
+    }
+
+
+@dataclass
+class LocalClassification:
+    """
+    Rezultatul clasificării locale: label + încredere (0..1) + feature-uri.
+    """
+    label: LabelType
+    confidence: float
+    features: dict
+    source: str = "rules"  # rules | rules+model
+
+
+def local_classify_scored(img_path: str | Path, model=None) -> LocalClassification:
+    """
+    Clasificare locală cu scor de încredere.
+
+    - label-ul vine din regulile originale (local_classify);
+    - încrederea = cât de clar e satisfăcută regula câștigătoare față de cea mai
+      apropiată alternativă;
+    - dacă există un model antrenat (local_model.json), e combinat cu regulile:
+      acord → încrederea crește, dezacord → încredere mică (se cere VLM).
+    """
+    features = extract_local_features(img_path)
+    label = _rule_label(features)
+    scores = _rule_scores(features)
+
+    best = scores[label]
+    runner_up = max((v for k, v in scores.items() if k != label), default=0.0)
+    confidence = best * (1.0 - runner_up)
+
+    source = "rules"
+    if model is not None:
+        probs = model.predict_proba(features)
+        model_label = max(probs, key=probs.get)
+        p = probs[model_label]
+        source = "rules+model"
+        if model_label == label:
+            confidence = max(confidence, p)
+        else:
+            if p > confidence:
+                label = model_label  # type: ignore[assignment]
+            confidence = 0.5 * min(confidence, p)
+
+    return LocalClassification(
+        label=label,
+        confidence=float(confidence),
+        features=features,
+        source=source,
+    )
+
+
+def local_classify(img_path: str | Path) -> LabelType:
+    features = extract_local_features(img_path)
+
+    debug_print(
+        f"🧪 LOCAL {Path(img_path).name}: "
+        f"rooms={features['rooms_like']} ortho={features['ortho_ratio']:.2f} "
+        f"diag={features['diag_ratio']:.2f} textCC={features['cc_small']}"
+    )
+
+    return _rule_label(features)
+
+
 # ==============================
 # Clasificare cu OpenAI
 # ==============================
@@ -313,7 +429,98 @@ def _classify_one_with_openai(client, use_responses_api: bool, img_path: str | P
 # Funcția principală de clasificare
 # ==============================
 
-def classify_segmented_plans(segmentation_out: str | Path) -> list[ClassificationResult]:
+class _LazyOpenAIClient:
+    """
+    Clientul OpenAI, creat o singură dată (thread-safe) la primul crop nesigur.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ready = False
+        self.client = None
+        self.use_responses_api = False
+
+    def get(self):
+        with self._lock:
+            if not self._ready:
+                self.client, self.use_responses_api = _build_openai_client()
+                self._ready = True
+        return self.client, self.use_responses_api
+
+
+def _classify_one_crop(
+    img_file: Path,
+    dirs: dict[str, Path],
+    openai_client: _LazyOpenAIClient,
+    local_model,
+) -> tuple[ClassificationResult, LocalClassification]:
+    """
+    Clasifică un singur crop (local → OpenAI doar dacă e nesigur) și îl copiază
+    în folderul clasei. Rulează în thread-urile de clasificare.
+    """
+    img_path = img_file
+    # 1) clasificare locală cu scor
+    local = local_classify_scored(img_path, model=local_model)
+    debug_print(
+        f"🧪 LOCAL {img_file.name}: {local.label} conf={local.confidence:.2f} ({local.source}) "
+        f"rooms={local.features['rooms_like']} ortho={local.features['ortho_ratio']:.2f} "
+        f"diag={local.features['diag_ratio']:.2f} textCC={local.features['cc_small']}"
+    )
+
+    confidence: float | None = local.confidence
+    if local.confidence >= LOCAL_CONFIDENCE_THRESHOLD:
+        label = local.label
+        source = "local"
+    else:
+        # 2) încredere mică → întrebăm OpenAI
+        client, use_responses_api = openai_client.get()
+        label = _classify_one_with_openai(client, use_responses_api, img_path)
+        source = "openai"
+        confidence = None
+        # 3) dacă nu reușește, fallback pe label-ul local
+        if not label:
+            label = local.label
+            source = "local_fallback"
+            confidence = local.confidence
+
+    # mapare în foldere
+    if label == "house_blueprint":
+        dst = dirs["blueprints"] / img_file.name
+        shutil.copy(str(img_path), str(dst))
+        print(f"🏗 house_blueprint: {img_file.name}")
+    elif label == "site_blueprint":
+        dst = dirs["siteplan"] / img_file.name
+        shutil.copy(str(img_path), str(dst))
+        print(f"🗺 site_blueprint: {img_file.name}")
+    elif label == "side_view":
+        dst = dirs["side_views"] / img_file.name
+        shutil.copy(str(img_path), str(dst))
+        print(f"🏠 side_view: {img_file.name}")
+    elif label == "text_area":
+        dst = dirs["text"] / img_file.name
+        shutil.copy(str(img_path), str(dst))
+        print(f"📝 text_area: {img_file.name}")
+    else:
+        dst = dirs["text"] / img_file.name
+        shutil.copy(str(img_path), str(dst))
+        print(f"📝 text_area*(fallback): {img_file.name}")
+        label = "text_area"
+
+    result = ClassificationResult(
+        image_path=dst,
+        label=label,  # type: ignore[arg-type]
+        confidence=confidence,
+        source=source,
+    )
+    return result, local
+
+
+def classify_segmented_plans(
+    segmentation_out: str | Path,
+    crops: Iterable[str | Path] | None = None,
+    max_workers: int = CLASSIFY_MAX_WORKERS,
+    ctx: SegmentationContext | None = None,
+) -> list[ClassificationResult]:
     """
     Clasifică planurile decupate de segmenter (clusters/plan_crops) în:
       - house_blueprint
@@ -322,21 +529,29 @@ def classify_segmented_plans(segmentation_out: str | Path) -> list[Classificatio
       - text_area
 
     Folosește:
-      - OpenAI Vision (gpt-4o-mini) dacă există OPENAI_API_KEY
-      - fallback local_classify(...) + post-validare pe folderul 'blueprints'
+      - clasificarea locală cu scor (reguli + model antrenat, dacă există);
+        dacă încrederea >= LOCAL_CONFIDENCE_THRESHOLD nu mai apelăm VLM-ul
+      - OpenAI Vision (gpt-4o-mini) doar pentru crop-urile nesigure
+      - fallback pe label-ul local + post-validare pe folderul 'blueprints'
 
     segmentation_out:
       - trebuie să fie același output_dir pe care l-ai dat lui segment_document(...)
         (de ex: job_root / 'segmentation').
 
-    Returnează lista de ClassificationResult.
-    """
-    segmentation_out = Path(segmentation_out).resolve()
+    crops:
+      - opțional, stream-ul de crop-uri (ex. generatorul segment_document(...)).
+        Fiecare crop e clasificat în thread-pool imediat ce apare, în timp ce
+        paginile următoare încă se randează / segmentează.
+      - None → se listează clusters/plan_crops (comportamentul vechi)
 
-    # nu resetăm nimic aici, doar spunem segmenter-ului că OUTPUT_DIR este segmentation_out
-    from .common import set_output_dir  # evităm import circular în top
+    ctx:
+      - contextul jobului; dacă e dat, are prioritate față de segmentation_out.
+        Nu se folosește / modifică OUTPUT_DIR global.
 
-    set_output_dir(segmentation_out)
+    Returnează lista de ClassificationResult.
+    """
+    ctx = ctx or SegmentationContext(output_dir=Path(segmentation_out))
+    segmentation_out = ctx.output_dir.resolve()
 
     # directoare
     crops_dir = segmentation_out / STEP_DIRS["clusters"]["crops"]
@@ -349,53 +564,42 @@ def classify_segmented_plans(segmentation_out: str | Path) -> list[Classificatio
     for d in (bp_dir, sp_dir, sv_dir, tx_dir):
         d.mkdir(parents=True, exist_ok=True)
 
-    if not crops_dir.is_dir():
-        print(f"ℹ️ Nu există crops_dir cu planuri: {crops_dir}")
-        return []
+    if crops is None:
+        if not crops_dir.is_dir():
+            print(f"ℹ️ Nu există crops_dir cu planuri: {crops_dir}")
+            return []
+        crops = sorted(crops_dir.iterdir())
 
-    client, use_responses_api = _build_openai_client()
+    dirs = {"blueprints": bp_dir, "siteplan": sp_dir, "side_views": sv_dir, "text": tx_dir}
 
-    results: list[ClassificationResult] = []
+    # clientul OpenAI se creează doar dacă avem nevoie de el
+    openai_client = _LazyOpenAIClient()
+    local_model = load_local_model()
 
-    print("\n[STEP 8] Clasificare cu OpenAI (gpt-4o-mini) + fallback local + post-validare...")
+    print(
+        "\n[STEP 8] Clasificare locală (reguli"
+        + (" + model" if local_model is not None else "")
+        + f", prag {LOCAL_CONFIDENCE_THRESHOLD:.2f}) → OpenAI (gpt-4o-mini) doar pentru cazurile nesigure..."
+    )
 
-    for img_file in sorted(crops_dir.iterdir()):
-        if img_file.suffix.lower() not in (".jpg", ".jpeg", ".png"):
-            continue
+    # consumăm stream-ul în thread-ul curent (aici rulează segmentarea, dacă e generator)
+    # și trimitem fiecare crop în pool imediat ce apare
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = []
+        for crop in crops:
+            img_file = Path(crop).resolve()
+            if img_file.suffix.lower() not in (".jpg", ".jpeg", ".png"):
+                continue
+            futures.append(executor.submit(_classify_one_crop, img_file, dirs, openai_client, local_model))
 
-        img_path = img_file
-        # 1) încercăm cu OpenAI
-        label = _classify_one_with_openai(client, use_responses_api, img_path)
-        # 2) dacă nu reușește, fallback local
-        if not label:
-            label = local_classify(img_path)
-
-        # mapare în foldere
-        if label == "house_blueprint":
-            dst = bp_dir / img_file.name
-            shutil.copy(str(img_path), str(dst))
-            print(f"🏗 house_blueprint: {img_file.name}")
-        elif label == "site_blueprint":
-            dst = sp_dir / img_file.name
-            shutil.copy(str(img_path), str(dst))
-            print(f"🗺 site_blueprint: {img_file.name}")
-        elif label == "side_view":
-            dst = sv_dir / img_file.name
-            shutil.copy(str(img_path), str(dst))
-            print(f"🏠 side_view: {img_file.name}")
-        elif label == "text_area":
-            dst = tx_dir / img_file.name
-            shutil.copy(str(img_path), str(dst))
-            print(f"📝 text_area: {img_file.name}")
-        else:
-            dst = tx_dir / img_file.name
-            shutil.copy(str(img_path), str(dst))
-            print(f"📝 text_area*(fallback): {img_file.name}")
-            label = "text_area"
+        # ordinea rezultatelor = ordinea crop-urilor (deterministă)
+        classified = [f.result() for f in futures]
 
-        results.append(ClassificationResult(image_path=dst, label=label))  # type: ignore[arg-type]
+    results: list[ClassificationResult] = [r for r, _ in classified]
+    local_by_name: dict[str, LocalClassification] = {r.image_path.name: local for r, local in classified}
+    local_hits = sum(1 for r in results if r.source == "local")
 
-    print("✅ Clasificare inițială finalizată!\n")
+    print(f"✅ Clasificare inițială finalizată! (local: {local_hits}/{len(results)}, fără apel VLM)\n")
 
     # ==========================
     # STEP 8B – Post-validare
@@ -407,7 +611,14 @@ def classify_segmented_plans(segmentation_out: str | Path) -> list[Classificatio
         if img_file.suffix.lower() not in (".jpg", ".jpeg", ".png"):
             continue
         img_path = img_file
-        lbl = local_classify(img_path)
+        result = next((r for r in results if r.image_path == img_path), None)
+        if result is not None and result.source == "local":
+            # deja decis local cu încredere mare – nu-l mai re-verificăm
+            continue
+
+        # refolosim feature-urile calculate la pasul 8 (fără a re-citi imaginea)
+        local = local_by_name.get(img_file.name)
+        lbl = _rule_label(local.features) if local is not None else local_classify(img_path)
 
         if lbl in ("side_view", "site_blueprint", "text_area"):
             if lbl == "side_view":
@@ -431,4 +642,28 @@ def classify_segmented_plans(segmentation_out: str | Path) -> list[Classificatio
 
     print(f"✅ Post-validare terminată. Mutate din blueprints: {moved}\n")
 
+    # ==========================
+    # STEP 8C – Fan-out duplicate
+    # ==========================
+    policy, dup_groups = load_duplicate_groups(segmentation_out / DUPLICATES_MANIFEST)
+    if policy == "fanout" and dup_groups:
+        fanned: list[ClassificationResult] = []
+        for r in results:
+            for dup_path in dup_groups.get(r.image_path.name, []):
+                if not dup_path.exists():
+                    continue
+                dst = r.image_path.parent / dup_path.name
+                shutil.copy(str(dup_path), str(dst))
+                fanned.append(
+                    ClassificationResult(
+                        image_path=dst,
+                        label=r.label,
+                        confidence=r.confidence,
+                        source="duplicate",
+                        duplicate_of=r.image_path,
+                    )
+                )
+                print(f"♻️  {r.label}: {dup_path.name} (duplicat al {r.image_path.name})")
+        results.extend(fanned)
+
     return results
@@ -1,16 +1,30 @@
 # file: engine/runner/segmenter/clusters.py
 from __future__ import annotations
 
+import json
 import math
 from pathlib import Path
 
 import cv2
 import numpy as np
 
-from .common import STEP_DIRS, save_debug, resize_bgr_max_side, get_output_dir
-
-
-def split_large_cluster(region: np.ndarray, x1: int, y1: int, idx: int) -> list[list[int]]:
+from .common import (
+    STEP_DIRS,
+    CROPS_MANIFEST,
+    SegmentationContext,
+    save_debug,
+    resize_bgr_max_side,
+    get_output_dir,
+)
+
+
+def split_large_cluster(
+    region: np.ndarray,
+    x1: int,
+    y1: int,
+    idx: int,
+    ctx: SegmentationContext | None = None,
+) -> list[list[int]]:
     print(f"  🔹 Split check cluster #{idx}")
     h, w = region.shape
     area = h * w
@@ -35,7 +49,7 @@ def split_large_cluster(region: np.ndarray, x1: int, y1: int, idx: int) -> list[
         if len(big_gaps) > 0:
             mid = int(np.median(col_split))
             if 0.3 * w < mid < 0.7 * w:
-                save_debug(region, STEP_DIRS["clusters"]["split"], f"split_col_{idx}.jpg")
+                save_debug(region, STEP_DIRS["clusters"]["split"], f"split_col_{idx}.jpg", ctx)
                 for part, offset in [(region[:, :mid], 0), (region[:, mid:], mid)]:
                     num, _, stats, _ = cv2.connectedComponentsWithStats(part, 8)
                     for x, y, ww, hh, a in stats[1:]:
@@ -49,7 +63,7 @@ def split_large_cluster(region: np.ndarray, x1: int, y1: int, idx: int) -> list[
         if len(big_gaps) > 0:
             mid = int(np.median(row_split))
             if 0.3 * h < mid < 0.7 * h:
-                save_debug(region, STEP_DIRS["clusters"]["split"], f"split_row_{idx}.jpg")
+                save_debug(region, STEP_DIRS["clusters"]["split"], f"split_row_{idx}.jpg", ctx)
                 for part, offset in [(region[:mid, :], 0), (region[mid:, :], mid)]:
                     num, _, stats, _ = cv2.connectedComponentsWithStats(part, 8)
                     for x, y, ww, hh, a in stats[1:]:
@@ -128,9 +142,37 @@ def expand_cluster(mask: np.ndarray, x1: int, y1: int, x2: int, y2: int) -> list
     return [x1, y1, x2, y2]
 
 
-def detect_clusters(mask: np.ndarray, orig: np.ndarray) -> list[str]:
+def record_crops(out_root: Path, entries: dict[str, dict]) -> None:
+    """
+    Adaugă intrările (nume crop → proveniență) în CROPS_MANIFEST.
+    Paginile unui document sunt segmentate secvențial, deci read-modify-write e suficient.
+    """
+    path = out_root / CROPS_MANIFEST
+    data = {}
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            data = {}
+    data.update(entries)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def detect_clusters(
+    mask: np.ndarray,
+    orig: np.ndarray,
+    prefix: str = "",
+    ctx: SegmentationContext | None = None,
+    source: dict | None = None,
+) -> list[str]:
     """
     Detectează clusterele (planurile) și le salvează ca imagini.
+    prefix: prefix pentru numele crop-urilor (ex. "page_002_"), ca paginile
+            unui document să nu-și suprascrie crop-urile între ele.
+    ctx:    contextul jobului (output_dir); None → OUTPUT_DIR global (apeluri vechi).
+    source: proveniența paginii ({"page_image", "pdf", "pdf_page"}); se scrie în
+            CROPS_MANIFEST împreună cu box-ul și factorul de resize al fiecărui crop.
     RETURN: listă de path-uri (str) către toate planurile decupate.
     """
     print("\n[STEP 7] Detectare clustere...")
@@ -138,7 +180,7 @@ def detect_clusters(mask: np.ndarray, orig: np.ndarray) -> list[str]:
     inv = cv2.bitwise_not(gray)
     kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
     clean = cv2.morphologyEx(cv2.dilate(inv, kernel), cv2.MORPH_OPEN, kernel)
-    save_debug(clean, STEP_DIRS["clusters"]["initial"], "mask_clean.jpg")
+    save_debug(clean, STEP_DIRS["clusters"]["initial"], "mask_clean.jpg", ctx)
 
     num, _, stats, _ = cv2.connectedComponentsWithStats(clean, 8)
     boxes = [[x, y, x + bw, y + bh] for x, y, bw, bh, a in stats[1:] if a > 200]
@@ -149,11 +191,11 @@ def detect_clusters(mask: np.ndarray, orig: np.ndarray) -> list[str]:
         reg = clean[y1:y2, x1:x2]
         if reg.size == 0:
             continue
-        for sb in split_large_cluster(reg, x1, y1, i):
+        for sb in split_large_cluster(reg, x1, y1, i, ctx):
             refined.append(expand_cluster(clean, *sb))
 
     merged = merge_overlapping_boxes(refined, clean.shape)
-    save_debug(orig, STEP_DIRS["clusters"]["merged"], "after_merge.jpg")
+    save_debug(orig, STEP_DIRS["clusters"]["merged"], "after_merge.jpg", ctx)
 
     # eliminăm clustere complet conținute în altele
     filtered: list[list[int]] = []
@@ -182,27 +224,45 @@ def detect_clusters(mask: np.ndarray, orig: np.ndarray) -> list[str]:
 
     result = orig.copy()
     crop_paths: list[str] = []
-    crops_dir = get_output_dir() / STEP_DIRS["clusters"]["crops"]
+    out_root = ctx.output_dir if ctx is not None else get_output_dir()
+    crops_dir = out_root / STEP_DIRS["clusters"]["crops"]
     crops_dir.mkdir(parents=True, exist_ok=True)
 
+    manifest: dict[str, dict] = {}
     for i, (x1, y1, x2, y2) in enumerate(filtered, 1):
         cv2.rectangle(result, (x1, y1), (x2, y2), (0, 255, 0), 2)
         cv2.putText(result, str(i), (x1 + 5, y1 + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
         crop = orig[y1:y2, x1:x2]
+        crop_w = crop.shape[1]
         crop = resize_bgr_max_side(crop)
 
-        crop_path = crops_dir / f"cluster_{i}.jpg"
+        crop_path = crops_dir / f"{prefix}cluster_{i}.jpg"
         cv2.imwrite(str(crop_path), crop)
         crop_paths.append(str(crop_path))
+        manifest[crop_path.name] = {
+            **(source or {}),
+            "page_size_px": [int(orig.shape[1]), int(orig.shape[0])],
+            "box": [int(x1), int(y1), int(x2), int(y2)],
+            "crop_scale": crop.shape[1] / float(max(crop_w, 1)),
+        }
+
+    if manifest:
+        record_crops(out_root, manifest)
 
-    save_debug(result, STEP_DIRS["clusters"]["final"], "final_clusters.jpg")
+    save_debug(result, STEP_DIRS["clusters"]["final"], f"{prefix}final_clusters.jpg", ctx)
     print(f"✅ Clustere finale: {len(filtered)}")
 
     return crop_paths
 
 
-def detect_wall_zones(orig: np.ndarray, thick_mask: np.ndarray) -> list[str]:
+def detect_wall_zones(
+    orig: np.ndarray,
+    thick_mask: np.ndarray,
+    prefix: str = "",
+    ctx: SegmentationContext | None = None,
+    source: dict | None = None,
+) -> list[str]:
     """
     Construiește masca de pereți și scoate toate clusterele (planurile).
     RETURN: listă de path-uri către planuri.
@@ -218,6 +278,6 @@ def detect_wall_zones(orig: np.ndarray, thick_mask: np.ndarray) -> list[str]:
     cv2.floodFill(filled, flood, (0, 0), 0)
     walls = cv2.bitwise_not(filled)
 
-    save_debug(walls, STEP_DIRS["walls"], "filled_unified.jpg")
-    crop_paths = detect_clusters(walls, orig)
+    save_debug(walls, STEP_DIRS["walls"], "filled_unified.jpg", ctx)
+    crop_paths = detect_clusters(walls, orig, prefix=prefix, ctx=ctx, source=source)
     return crop_paths
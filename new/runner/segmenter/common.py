@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import os
 import shutil
+from dataclasses import dataclass
 from pathlib import Path
 
 import cv2
@@ -31,6 +32,18 @@ MAX_RENDER_DIM = 32750
 # Latura maximă a planurilor exportate (crop-uri)
 MAX_PLAN_EXPORT_LONG_EDGE = 2800  # px
 
+# Clasificare locală: sub acest prag de încredere se cere și părerea VLM-ului
+LOCAL_CONFIDENCE_THRESHOLD = 0.75
+
+# Thread-uri pentru clasificare (rulează în paralel cu segmentarea paginilor următoare)
+CLASSIFY_MAX_WORKERS = 4
+
+# Deduplicare planuri aproape identice în același document: fanout | drop | off
+DEDUP_POLICY = "fanout"
+
+# Modelul local (antrenat din crop-urile deja clasificate în jobs/*/segmentation/classified/)
+LOCAL_MODEL_PATH = Path(__file__).resolve().parent / "models" / "local_classifier.json"
+
 # ======================================================
 # Structură foldere – nume mai sugestive, fără "stepX"
 # ======================================================
@@ -63,6 +76,7 @@ STEP_DIRS = {
         "expanded": "clusters/expanded_boxes",     # după expand_cluster
         "final": "clusters/annotated_preview",     # preview cu dreptunghiuri numerotate
         "crops": "clusters/plan_crops",            # AICI se salvează planurile crop-uite
+        "duplicates": "clusters/duplicate_crops",  # crop-uri aproape identice cu un plan deja găsit
     },
 
     # clasificare (OpenAI + heuristici) – le vei folosi în classifier.py
@@ -82,7 +96,14 @@ STEP_DIRS = {
     },
 }
 
-# OUTPUT_DIR global al segmenter-ului (setat de reset_output_folders)
+# manifestul grupurilor de duplicate (relativ la OUTPUT_DIR)
+DUPLICATES_MANIFEST = "clusters/duplicates.json"
+
+# proveniența crop-urilor (pagina sursă, box-ul în pagină, factorul de resize),
+# citită de scale ca să mapeze stratul de text al PDF-ului în pixelii planului
+CROPS_MANIFEST = "clusters/crops_manifest.json"
+
+# OUTPUT_DIR global al segmenter-ului (doar pentru apelurile vechi, fără context)
 OUTPUT_DIR: Path = Path("segmenter_out")
 
 
@@ -91,6 +112,58 @@ def debug_print(msg: str) -> None:
         print(msg)
 
 
+@dataclass
+class SegmentationContext:
+    """
+    Contextul unui job de segmentare (un document).
+
+    Înlocuiește OUTPUT_DIR-ul global: fiecare document are propriul context,
+    transmis explicit prin preprocess → clusters → detector → classifier,
+    deci mai multe documente pot fi segmentate în paralel în același proces.
+    """
+    output_dir: Path
+    save_debug_images: bool = DEBUG
+
+    def __post_init__(self) -> None:
+        self.output_dir = Path(self.output_dir)
+
+    def path(self, subfolder: str) -> Path:
+        return self.output_dir / subfolder
+
+    def reset(self) -> "SegmentationContext":
+        """
+        Resetează complet structura de foldere pentru segmentare.
+        """
+        root = self.output_dir
+        if root.exists():
+            shutil.rmtree(root)
+        root.mkdir(parents=True, exist_ok=True)
+
+        for _, v in STEP_DIRS.items():
+            if isinstance(v, dict):
+                for sub in v.values():
+                    (root / sub).mkdir(parents=True, exist_ok=True)
+            else:
+                (root / v).mkdir(parents=True, exist_ok=True)
+
+        debug_print(f"🧹 Folderul de output '{root}' a fost resetat complet.\n")
+        return self
+
+    def save_debug(self, img: np.ndarray, subfolder: str, name: str) -> None:
+        """
+        Salvează imagini de debug în subfolder relativ la output_dir-ul jobului.
+        """
+        if not self.save_debug_images:
+            return
+
+        folder_path = self.output_dir / subfolder
+        folder_path.mkdir(parents=True, exist_ok=True)
+
+        out_path = folder_path / name
+        cv2.imwrite(str(out_path), img)
+        debug_print(f"📸 Saved: {out_path}")
+
+
 def set_output_dir(output_dir: str | Path) -> None:
     global OUTPUT_DIR
     OUTPUT_DIR = Path(output_dir)
@@ -100,42 +173,30 @@ def get_output_dir() -> Path:
     return OUTPUT_DIR
 
 
-def reset_output_folders(output_dir: str | Path) -> None:
+def _legacy_context() -> SegmentationContext:
+    return SegmentationContext(output_dir=get_output_dir())
+
+
+def reset_output_folders(output_dir: str | Path) -> SegmentationContext:
     """
-    Resetează complet structura de foldere pentru segmentare.
+    Compatibilitate: resetează folderele ȘI setează OUTPUT_DIR global.
+    Codul nou folosește direct SegmentationContext(output_dir).reset().
     """
     set_output_dir(output_dir)
-    root = get_output_dir()
-
-    if root.exists():
-        shutil.rmtree(root)
-    root.mkdir(parents=True, exist_ok=True)
-
-    for _, v in STEP_DIRS.items():
-        if isinstance(v, dict):
-            for sub in v.values():
-                (root / sub).mkdir(parents=True, exist_ok=True)
-        else:
-            (root / v).mkdir(parents=True, exist_ok=True)
+    return SegmentationContext(output_dir=output_dir).reset()
 
-    debug_print(f"🧹 Folderul de output '{root}' a fost resetat complet.\n")
 
-
-def save_debug(img: np.ndarray, subfolder: str, name: str) -> None:
+def save_debug(
+    img: np.ndarray,
+    subfolder: str,
+    name: str,
+    ctx: SegmentationContext | None = None,
+) -> None:
     """
-    Salvează imagini de debug în subfolder relativ la OUTPUT_DIR.
-    E folosit peste tot unde aveai save_debug înainte.
+    Salvează imagini de debug în subfolder relativ la output-ul jobului.
+    Fără ctx se folosește OUTPUT_DIR global (apeluri vechi).
     """
-    if not DEBUG:
-        return
-
-    root = get_output_dir()
-    folder_path = root / subfolder
-    folder_path.mkdir(parents=True, exist_ok=True)
-
-    out_path = folder_path / name
-    cv2.imwrite(str(out_path), img)
-    debug_print(f"📸 Saved: {out_path}")
+    (ctx or _legacy_context()).save_debug(img, subfolder, name)
 
 
 def safe_imread(path: str | Path) -> np.ndarray:
@@ -0,0 +1,221 @@
+# file: engine/new/runner/segmenter/dedup.py
+# ------------------------------------------------------------
+# Deduplicare planuri aproape identice într-un document:
+#   - hash perceptual (pHash pe DCT 32×32)
+#   - semnătură structurală ieftină (densitatea pereților pe o grilă 16×16)
+# Planul de parter + același plan mobilat, sau același plan la altă scară,
+# trec o singură dată prin clasificare / Roboflow / scale / perimeter / area.
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Literal
+
+import cv2
+import numpy as np
+
+from .common import debug_print
+
+DedupPolicy = Literal["fanout", "drop", "off"]
+
+# Praguri de similaritate
+# (etaje diferite cu același contur: pHash Δ≈6, corelație ≈0.88 – nu trebuie unite;
+#  același plan mobilat / rescalat: corelație ≥0.99)
+PHASH_MAX_DISTANCE = 8         # din 63 biți – aproape identice
+PHASH_LOOSE_DISTANCE = 14      # acceptat doar dacă structura confirmă
+STRUCT_MIN_CORR = 0.97         # corelația grilelor de pereți
+STRUCT_STRICT_CORR = 0.95      # corelația minimă și la pHash aproape identic
+ASPECT_MAX_DIFF = 0.05         # 5% diferență de aspect ratio
+
+STRUCT_GRID = 16
+
+
+@dataclass
+class PlanSignature:
+    """
+    Semnătura ieftină a unui crop: pHash + grilă de densitate pereți + aspect.
+    """
+    phash: int
+    structure: np.ndarray
+    aspect: float
+
+    def to_json(self) -> dict:
+        return {
+            "phash": f"{self.phash:016x}",
+            "structure": np.round(self.structure, 4).ravel().tolist(),
+            "aspect": round(self.aspect, 4),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "PlanSignature":
+        return cls(
+            phash=int(data["phash"], 16),
+            structure=np.asarray(data["structure"], dtype=np.float32).reshape(STRUCT_GRID, STRUCT_GRID),
+            aspect=float(data["aspect"]),
+        )
+
+
+def _phash(gray: np.ndarray) -> int:
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    dct = cv2.dct(small)[:8, :8].ravel()[1:]  # fără componenta DC
+    bits = dct > np.median(dct)
+    value = 0
+    for b in bits:
+        value = (value << 1) | int(b)
+    return value
+
+
+def _structure_grid(gray: np.ndarray) -> np.ndarray:
+    """
+    Densitatea liniilor groase (pereți) pe o grilă fixă. Mobilierul și textul,
+    desenate cu linii subțiri, dispar la deschiderea morfologică.
+    """
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    k = max(3, int(min(gray.shape[:2]) * 0.004))
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (k, k))
+    walls = cv2.morphologyEx(ink, cv2.MORPH_OPEN, kernel)
+    grid = cv2.resize(walls, (STRUCT_GRID, STRUCT_GRID), interpolation=cv2.INTER_AREA).astype(np.float32)
+    return grid / 255.0
+
+
+def compute_plan_signature(img: np.ndarray) -> PlanSignature:
+    """
+    Calculează semnătura pentru o imagine BGR sau grayscale.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    h, w = gray.shape[:2]
+    return PlanSignature(
+        phash=_phash(gray),
+        structure=_structure_grid(gray),
+        aspect=w / float(max(h, 1)),
+    )
+
+
+def struct_corr(a: np.ndarray, b: np.ndarray) -> float:
+    """Corelația Pearson între două grile de structură (-1..1; 0 dacă una e constantă)."""
+    va = a.ravel() - a.mean()
+    vb = b.ravel() - b.mean()
+    denom = float(np.linalg.norm(va) * np.linalg.norm(vb))
+    if denom < 1e-9:
+        return 0.0
+    return float(np.dot(va, vb) / denom)
+
+
+def signature_similarity(a: PlanSignature, b: PlanSignature) -> tuple[bool, int, float]:
+    """
+    Returns:
+        (sunt_duplicate, distanța_hamming_phash, corelația_structurală)
+    """
+    hamming = bin(a.phash ^ b.phash).count("1")
+    corr = struct_corr(a.structure, b.structure)
+
+    aspect_diff = abs(a.aspect - b.aspect) / max(a.aspect, b.aspect, 1e-6)
+    if aspect_diff > ASPECT_MAX_DIFF:
+        return False, hamming, corr
+
+    if hamming <= PHASH_MAX_DISTANCE and corr >= STRUCT_STRICT_CORR:
+        return True, hamming, corr
+    if hamming <= PHASH_LOOSE_DISTANCE and corr >= STRUCT_MIN_CORR:
+        return True, hamming, corr
+    return False, hamming, corr
+
+
+@dataclass
+class DuplicateGroup:
+    """
+    Un grup de crop-uri aproape identice; doar reprezentantul merge mai departe.
+    """
+    representative: Path
+    signature: PlanSignature
+    duplicates: list[Path] = field(default_factory=list)
+    matches: list[dict] = field(default_factory=list)
+
+
+class CropDeduplicator:
+    """
+    Deduplicare incrementală: crop-urile sunt adăugate pe măsură ce apar.
+
+    Politici:
+      - "fanout": duplicatele sunt scoase din plan_crops, iar după clasificare
+                  primesc rezultatul reprezentantului (duplicate_of)
+      - "drop":   duplicatele sunt scoase și ignorate complet
+      - "off":    nu se face deduplicare
+    """
+
+    def __init__(self, duplicates_dir: Path, policy: DedupPolicy = "fanout") -> None:
+        self.duplicates_dir = Path(duplicates_dir)
+        self.policy = policy
+        self.groups: list[DuplicateGroup] = []
+
+    def add(self, crop_path: str | Path, img: np.ndarray | None = None) -> Path | None:
+        """
+        Înregistrează un crop. Returnează reprezentantul dacă e duplicat
+        (crop-ul e mutat în duplicates_dir), altfel None.
+        """
+        crop_path = Path(crop_path)
+        if self.policy == "off":
+            return None
+
+        if img is None:
+            img = cv2.imread(str(crop_path), cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                return None
+        sig = compute_plan_signature(img)
+
+        for group in self.groups:
+            is_dup, hamming, corr = signature_similarity(group.signature, sig)
+            if not is_dup:
+                continue
+
+            self.duplicates_dir.mkdir(parents=True, exist_ok=True)
+            moved = self.duplicates_dir / crop_path.name
+            shutil.move(str(crop_path), str(moved))
+            group.duplicates.append(moved)
+            group.matches.append({"path": str(moved), "phash_distance": hamming, "structure_corr": round(corr, 4)})
+            debug_print(
+                f"♻️  Duplicat: {crop_path.name} ≈ {group.representative.name} "
+                f"(pHash Δ={hamming}, struct={corr:.3f})"
+            )
+            return group.representative
+
+        self.groups.append(DuplicateGroup(representative=crop_path, signature=sig))
+        return None
+
+    def to_json(self) -> dict:
+        return {
+            "policy": self.policy,
+            "groups": [
+                {
+                    "representative": str(g.representative),
+                    "signature": g.signature.to_json(),
+                    "duplicates": g.matches,
+                }
+                for g in self.groups
+                if g.duplicates
+            ],
+        }
+
+    def save(self, manifest_path: Path) -> None:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(self.to_json(), indent=2), encoding="utf-8")
+
+
+def load_duplicate_groups(manifest_path: Path) -> tuple[str, dict[str, list[Path]]]:
+    """
+    Citește manifestul de duplicate.
+
+    Returns:
+        (politica, {nume_reprezentant: [path-uri duplicate]})
+    """
+    if not manifest_path.exists():
+        return "off", {}
+    data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    groups = {
+        Path(g["representative"]).name: [Path(d["path"]) for d in g.get("duplicates", [])]
+        for g in data.get("groups", [])
+    }
+    return data.get("policy", "fanout"), groups
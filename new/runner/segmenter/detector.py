@@ -2,9 +2,18 @@
 from __future__ import annotations
 
 from pathlib import Path
-
-from .common import reset_output_folders, safe_imread
-from .pdf_utils import convert_pdf_to_png
+from typing import Iterator
+
+from .common import (
+    STEP_DIRS,
+    DEDUP_POLICY,
+    DUPLICATES_MANIFEST,
+    SegmentationContext,
+    get_output_dir,
+    safe_imread,
+)
+from .dedup import CropDeduplicator
+from .pdf_utils import iter_pdf_pages
 from .preprocess import (
     remove_text_regions,
     remove_hatched_areas,
@@ -15,22 +24,33 @@ from .preprocess import (
 from .clusters import detect_wall_zones
 
 
-def segment_page_image(page_path: str | Path) -> list[str]:
+def segment_page_image(
+    page_path: str | Path,
+    prefix: str = "",
+    ctx: SegmentationContext | None = None,
+    source: dict | None = None,
+) -> list[str]:
     """
     Rulează pipeline-ul de segmentare pe O singură imagine (pagini deja în PNG).
+    prefix: prefix pentru numele crop-urilor (paginile multiple nu se suprascriu).
+    ctx: contextul jobului; None → OUTPUT_DIR global (apeluri vechi).
+    source: PDF-ul și pagina din care vine imaginea (pentru CROPS_MANIFEST);
+            None → doar imaginea paginii.
     RETURN: listă de path-uri (str) către planurile decupate.
     """
+    ctx = ctx or SegmentationContext(output_dir=get_output_dir())
     page_path = Path(page_path)
     print(f"\n🖼 Procesare imagine pagină: {page_path}")
     img = safe_imread(page_path)
 
-    no_text = remove_text_regions(img)
+    no_text = remove_text_regions(img, ctx)
     gray = cv2.cvtColor(no_text, cv2.COLOR_BGR2GRAY)
-    no_hatch = remove_hatched_areas(gray)
-    outlines = detect_outlines(no_hatch)
-    thick = filter_thick_lines(outlines)
-    solid = solidify_walls(thick)
-    crop_paths = detect_wall_zones(img, solid)
+    no_hatch = remove_hatched_areas(gray, ctx)
+    outlines = detect_outlines(no_hatch, ctx)
+    thick = filter_thick_lines(outlines, ctx)
+    solid = solidify_walls(thick, ctx)
+    source = {"page_image": str(page_path.resolve()), **(source or {})}
+    crop_paths = detect_wall_zones(img, solid, prefix=prefix, ctx=ctx, source=source)
     print("🏁 Procesare pagină completă!\n")
     return crop_paths
 
@@ -39,7 +59,12 @@ def segment_page_image(page_path: str | Path) -> list[str]:
 import cv2  # noqa: E402
 
 
-def segment_document(input_path: str | Path, output_dir: str | Path) -> list[str]:
+def segment_document(
+    input_path: str | Path,
+    output_dir: str | Path,
+    dedup_policy: str = DEDUP_POLICY,
+    ctx: SegmentationContext | None = None,
+) -> Iterator[str]:
     """
     input_path poate fi:
       - path către o imagine (png/jpg/pdf)
@@ -47,44 +72,67 @@ def segment_document(input_path: str | Path, output_dir: str | Path) -> list[str
 
     output_dir:
       - folderul în care se vor crea TOATE subfolderele stepX_...
-      - planurile vor fi în: <output_dir>/step7_clusters/crops
-
-    return:
-      - listă de path-uri (str) către TOATE planurile decupate
+      - planurile vor fi în: <output_dir>/clusters/plan_crops
+
+    dedup_policy:
+      - "fanout" / "drop": planurile aproape identice (pHash + semnătură structurală)
+        sunt mutate în clusters/duplicate_crops, iar grupurile sunt scrise în
+        clusters/duplicates.json; doar reprezentanții merg la etapele scumpe
+      - "off": fără deduplicare
+
+    ctx:
+      - contextul jobului (SegmentationContext); implicit unul nou pe output_dir.
+        Nu se atinge nicio stare globală, deci mai multe documente pot fi
+        segmentate în paralel în același proces.
+
+    Generator: produce path-ul (str) fiecărui plan decupat (reprezentanți) imediat
+    ce pagina lui e segmentată, ca clasificarea să poată rula în paralel cu
+    randarea / segmentarea paginilor următoare. Manifestul de duplicate e scris
+    după ultima pagină (deci e complet când generatorul s-a epuizat).
     """
     input_path = Path(input_path)
 
-    # 1) pregătim OUTPUT_DIR pentru acest job
-    reset_output_folders(output_dir)
-
-    all_plan_paths: list[str] = []
+    # 1) pregătim folderele pentru acest job
+    ctx = ctx or SegmentationContext(output_dir=Path(output_dir))
+    ctx.reset()
 
     # 2) strângem fișierele de intrare
     if input_path.is_dir():
-        files = [
+        files = sorted(
             f for f in input_path.iterdir()
             if f.suffix.lower() in (".png", ".jpg", ".jpeg", ".pdf")
-        ]
+        )
     else:
         files = [input_path]
 
     # 3) rulăm pipeline-ul pe fiecare fișier
-    from .common import get_output_dir  # import local ca să evităm dependență circulară
-
-    for f in files:
-        ext = f.suffix.lower()
-        if ext == ".pdf":
-            pages_dir = get_output_dir() / "pdf_pages"
-            png_pages = convert_pdf_to_png(f, pages_dir)
-            for pth in png_pages:
-                plan_paths = segment_page_image(pth)
-                all_plan_paths.extend(plan_paths)
-        else:
-            plan_paths = segment_page_image(f)
-            all_plan_paths.extend(plan_paths)
-
-    print(f"📦 Total planuri detectate: {len(all_plan_paths)}")
-    return all_plan_paths
+    dedup = CropDeduplicator(ctx.path(STEP_DIRS["clusters"]["duplicates"]), policy=dedup_policy)  # type: ignore[arg-type]
+    total = 0
+
+    def _pages() -> Iterator[tuple[Path, str, dict | None]]:
+        for f in files:
+            ext = f.suffix.lower()
+            file_prefix = f"{f.stem}_" if len(files) > 1 else ""
+            if ext == ".pdf":
+                pages_dir = ctx.path("pdf_pages") / f.stem if len(files) > 1 else ctx.path("pdf_pages")
+                for page_idx, page_count, pth in iter_pdf_pages(f, pages_dir):
+                    prefix = f"{file_prefix}page_{page_idx:03d}_" if page_count > 1 else file_prefix
+                    yield pth, prefix, {"pdf": str(f.resolve()), "pdf_page": page_idx}
+            else:
+                yield f, file_prefix, None
+
+    for page_path, prefix, source in _pages():
+        for p in segment_page_image(page_path, prefix=prefix, ctx=ctx, source=source):
+            if dedup.add(p) is None:
+                total += 1
+                yield p
+
+    dedup.save(ctx.path(DUPLICATES_MANIFEST))
+    n_dups = sum(len(g.duplicates) for g in dedup.groups)
+    if n_dups:
+        print(f"♻️  Duplicate eliminate din pipeline: {n_dups} (politică: {dedup_policy})")
+
+    print(f"📦 Total planuri detectate: {total}")
 
 
 # CLI simplu pentru test local:
@@ -100,7 +148,7 @@ if __name__ == "__main__":  # pragma: no cover
     )
     args = parser.parse_args()
 
-    plans = segment_document(args.input, args.output_dir)
+    plans = list(segment_document(args.input, args.output_dir))
     print("\nPlanuri detectate:")
     for p in plans:
         print("  -", p)
@@ -0,0 +1,148 @@
+# file: engine/new/runner/segmenter/local_model.py
+# ------------------------------------------------------------
+# Model local (regresie logistică) peste feature-urile din local_classify.
+# Se antrenează offline din crop-urile deja clasificate în
+#   jobs/*/segmentation/classified/{blueprints,siteplan,side_views,text}
+# și se salvează ca JSON (fără pickle), ca să poată fi încărcat oriunde
+# (modelul / loader-ul / antrenarea comune sunt în runner/logistic_model.py).
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from ..logistic_model import LogisticModel, fit_logistic, load_model, save_model
+from .common import STEP_DIRS, LOCAL_MODEL_PATH, debug_print
+
+MODEL_VERSION = 1
+
+# ordinea feature-urilor din vectorul de intrare
+FEATURE_NAMES = ["rooms_like", "ortho_ratio", "diag_ratio", "cc_small_log", "rooms_like_log"]
+
+# folder din classified/ -> label
+FOLDER_LABELS = {
+    "blueprints": "house_blueprint",
+    "siteplan": "site_blueprint",
+    "side_views": "side_view",
+    "text": "text_area",
+}
+
+
+def feature_vector(features: dict) -> np.ndarray:
+    """
+    Transformă dict-ul de feature-uri (vezi extract_local_features) în vector numeric.
+    """
+    return np.array(
+        [
+            float(features["rooms_like"]),
+            float(features["ortho_ratio"]),
+            float(features["diag_ratio"]),
+            math.log1p(float(features["cc_small"])),
+            math.log1p(float(features["rooms_like"])),
+        ],
+        dtype=np.float64,
+    )
+
+
+@dataclass
+class LocalModel:
+    """
+    Regresie logistică multinomială peste feature_vector (vezi LogisticModel).
+    """
+    model: LogisticModel
+
+    @property
+    def classes(self) -> list[str]:
+        return self.model.classes
+
+    @property
+    def trained_on(self) -> int:
+        return self.model.trained_on
+
+    def predict_proba(self, features: dict) -> dict[str, float]:
+        return self.model.predict_proba(feature_vector(features))
+
+
+def load_local_model(path: str | Path = LOCAL_MODEL_PATH) -> LocalModel | None:
+    """
+    Încarcă modelul local dacă există (cache după mtime). Altfel None –
+    clasificarea rămâne doar pe reguli.
+    """
+    model = load_model(path, MODEL_VERSION, FEATURE_NAMES, "Folosesc doar regulile.")
+    return None if model is None else LocalModel(model)
+
+
+def collect_training_samples(jobs_roots: list[Path]) -> list[tuple[Path, str]]:
+    """
+    Strânge (imagine, label) din toate job-urile de segmentare existente.
+    """
+    samples: list[tuple[Path, str]] = []
+    for jobs_root in jobs_roots:
+        if not jobs_root.is_dir():
+            continue
+        for job_dir in sorted(jobs_root.iterdir()):
+            classified = job_dir / "segmentation" / STEP_DIRS["classified"]["root"]
+            if not classified.is_dir():
+                continue
+            for folder, label in FOLDER_LABELS.items():
+                d = classified / folder
+                if not d.is_dir():
+                    continue
+                for f in sorted(d.iterdir()):
+                    if f.suffix.lower() in (".jpg", ".jpeg", ".png"):
+                        samples.append((f, label))
+    return samples
+
+
+def train_local_model(
+    jobs_roots: list[Path],
+    out_path: str | Path = LOCAL_MODEL_PATH,
+) -> LocalModel:
+    """
+    Antrenează modelul local din crop-urile etichetate și îl salvează ca JSON.
+    """
+    from .classifier import extract_local_features  # evităm import circular
+
+    samples = collect_training_samples(jobs_roots)
+    if not samples:
+        raise ValueError(f"Nu am găsit crop-uri clasificate în {', '.join(map(str, jobs_roots))}")
+
+    X: list[np.ndarray] = []
+    y: list[str] = []
+    for img_path, label in samples:
+        try:
+            X.append(feature_vector(extract_local_features(img_path)))
+            y.append(label)
+        except Exception as e:
+            debug_print(f"⚠️ Skip {img_path}: {e}")
+
+    classes = sorted(set(y))
+    if len(classes) < 2:
+        raise ValueError(f"Am nevoie de cel puțin 2 clase pentru antrenare, am doar: {classes}")
+
+    model = fit_logistic(np.vstack(X), y)
+    out_path = save_model(model, out_path, MODEL_VERSION, FEATURE_NAMES)
+    print(f"✅ Model local antrenat pe {len(y)} crop-uri ({', '.join(classes)}) → {out_path}")
+    return LocalModel(model)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    from ..config.settings import JOBS_ROOT
+
+    parser = argparse.ArgumentParser(description="Antrenare model local pentru clasificarea crop-urilor")
+    parser.add_argument(
+        "jobs_roots",
+        nargs="*",
+        help="Foldere cu job-uri de segmentare (default: JOBS_ROOT)",
+    )
+    parser.add_argument("--out", default=str(LOCAL_MODEL_PATH), help="Path JSON pentru model")
+    args = parser.parse_args()
+
+    roots = [Path(p) for p in args.jobs_roots] or [JOBS_ROOT]
+    train_local_model(roots, args.out)
@@ -5,6 +5,7 @@ import math
 import subprocess
 import tempfile
 from pathlib import Path
+from typing import Iterator
 import shutil as _shutil
 
 from pdf2image import pdfinfo_from_path
@@ -112,10 +113,11 @@ def _render_with_ghostscript(pdf_path: Path, page_idx: int, dpi: int, out_png: P
     subprocess.check_call(cmd)
 
 
-def convert_pdf_to_png(pdf_path: str | Path, output_dir: str | Path) -> list[Path]:
+def iter_pdf_pages(pdf_path: str | Path, output_dir: str | Path) -> Iterator[tuple[int, int, Path]]:
     """
-    Convertește PDF-ul în PNG-uri de pagină și le pune în output_dir.
-    Returnează lista de path-uri PNG (în ordine).
+    Randează PDF-ul pagină cu pagină în output_dir.
+    Generator: produce (index_pagină, număr_pagini, path_png) imediat ce
+    o pagină e gata, ca segmentarea să poată începe înainte de restul randării.
     """
     pdf_path = Path(pdf_path)
     output_dir = Path(output_dir)
@@ -138,8 +140,6 @@ def convert_pdf_to_png(pdf_path: str | Path, output_dir: str | Path) -> list[Pat
     have_pdftoppm = _which("pdftoppm")
     have_gs = _which("gs")
 
-    out_paths: list[Path] = []
-
     for page_idx in range(1, page_count + 1):
         key = f"Page {page_idx} size"
         if key in info:
@@ -197,11 +197,19 @@ def convert_pdf_to_png(pdf_path: str | Path, output_dir: str | Path) -> list[Pat
                     else:
                         scale = None
                     _downsample_and_sharpen(raw_png, final_path, scale)
-                    out_paths.append(final_path)
                     break
 
         if not page_done:
             raise RuntimeError(f"Eșec conversie pagina {page_idx}. Ultima eroare: {last_error}")
 
+        yield page_idx, page_count, output_dir / f"page_{page_idx:03d}.png"
+
+
+def convert_pdf_to_png(pdf_path: str | Path, output_dir: str | Path) -> list[Path]:
+    """
+    Convertește PDF-ul în PNG-uri de pagină și le pune în output_dir.
+    Returnează lista de path-uri PNG (în ordine).
+    """
+    out_paths = [p for _, _, p in iter_pdf_pages(pdf_path, output_dir)]
     debug_print(f"📄 Conversie finalizată → {len(out_paths)} PNG-uri de calitate.")
     return out_paths
@@ -5,10 +5,10 @@ import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 
-from .common import STEP_DIRS, save_debug
+from .common import STEP_DIRS, SegmentationContext, save_debug
 
 
-def remove_text_regions(img: np.ndarray) -> np.ndarray:
+def remove_text_regions(img: np.ndarray, ctx: SegmentationContext | None = None) -> np.ndarray:
     print("\n[STEP 0] Eliminare text...")
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     binary = cv2.adaptiveThreshold(
@@ -27,12 +27,12 @@ def remove_text_regions(img: np.ndarray) -> np.ndarray:
 
     cleaned = img.copy()
     cleaned[mask == 255] = (255, 255, 255)
-    save_debug(mask, STEP_DIRS["text"], "mask.jpg")
-    save_debug(cleaned, STEP_DIRS["text"], "no_text.jpg")
+    save_debug(mask, STEP_DIRS["text"], "mask.jpg", ctx)
+    save_debug(cleaned, STEP_DIRS["text"], "no_text.jpg", ctx)
     return cleaned
 
 
-def remove_hatched_areas(gray: np.ndarray) -> np.ndarray:
+def remove_hatched_areas(gray: np.ndarray, ctx: SegmentationContext | None = None) -> np.ndarray:
     print("\n[STEP 1] Eliminare hașuri...")
     gray = cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
     blur = cv2.GaussianBlur(gray, (3, 3), 0)
@@ -59,19 +59,19 @@ def remove_hatched_areas(gray: np.ndarray) -> np.ndarray:
     result = gray.copy()
     result[hatch_mask > 0] = 255
 
-    save_debug(hatch_mask, STEP_DIRS["hatch"], "mask.jpg")
-    save_debug(result, STEP_DIRS["hatch"], "cleaned.jpg")
+    save_debug(hatch_mask, STEP_DIRS["hatch"], "mask.jpg", ctx)
+    save_debug(result, STEP_DIRS["hatch"], "cleaned.jpg", ctx)
     return result
 
 
-def detect_outlines(gray: np.ndarray) -> np.ndarray:
+def detect_outlines(gray: np.ndarray, ctx: SegmentationContext | None = None) -> np.ndarray:
     print("\n[STEP 2] Detectare contururi...")
     edges = cv2.Canny(gray, 40, 120)
-    save_debug(edges, STEP_DIRS["outline"], "edges.jpg")
+    save_debug(edges, STEP_DIRS["outline"], "edges.jpg", ctx)
     return edges
 
 
-def filter_thick_lines(mask: np.ndarray) -> np.ndarray:
+def filter_thick_lines(mask: np.ndarray, ctx: SegmentationContext | None = None) -> np.ndarray:
     print("\n[STEP 3] Filtrare grosimi...")
     dist = cv2.distanceTransform(mask, cv2.DIST_L2, 3)
     vals = dist[dist > 0].reshape(-1, 1)
@@ -85,11 +85,11 @@ def filter_thick_lines(mask: np.ndarray) -> np.ndarray:
     km.fit(vals)
     thick = (dist > 0.5 * max(km.cluster_centers_.flatten())).astype(np.uint8) * 255
 
-    save_debug(thick, STEP_DIRS["thick"], "thick_lines.jpg")
+    save_debug(thick, STEP_DIRS["thick"], "thick_lines.jpg", ctx)
     return thick
 
 
-def solidify_walls(mask: np.ndarray) -> np.ndarray:
+def solidify_walls(mask: np.ndarray, ctx: SegmentationContext | None = None) -> np.ndarray:
     print("\n[STEP 4] Solidificare pereți...")
     h, w = mask.shape
     k = max(3, int(min(h, w) * 0.002))
@@ -97,5 +97,5 @@ def solidify_walls(mask: np.ndarray) -> np.ndarray:
     closed = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
     dil = cv2.dilate(closed, kernel, iterations=2)
     ero = cv2.erode(dil, kernel)
-    save_debug(ero, STEP_DIRS["solid"], "solidified.jpg")
+    save_debug(ero, STEP_DIRS["solid"], "solidified.jpg", ctx)
     return ero
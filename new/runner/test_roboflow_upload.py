@@ -0,0 +1,99 @@
+"""
+test_roboflow_upload.py
+Script pentru testarea pregătirii upload-ului Roboflow (count_objects/roboflow_upload.py)
+fără rețea: un server local fals primește JPEG-ul trimis și „detectează" pătratele
+negre din el (componente conexe), exact ca un model care vede doar imaginea trimisă.
+Acoperă cele trei căi: imagine mică neschimbată, micșorare, tile-uri.
+"""
+from pathlib import Path
+import tempfile
+
+import cv2
+import numpy as np
+
+SYMBOL = 120          # latura unui simbol (pixeli plan complet)
+TOLERANCE = 0.02      # eroarea acceptată pe centru / latură (fracțiune din SYMBOL, × 1/scală)
+
+
+def fake_post(jpeg: bytes) -> list[dict]:
+    """Serverul local: o predicție (format Roboflow) per pată neagră din imaginea primită."""
+    img = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_GRAYSCALE)
+    n, _, stats, _ = cv2.connectedComponentsWithStats((img < 128).astype(np.uint8))
+    preds = []
+    for x, y, w, h, area in stats[1:n]:
+        if area < 4:
+            continue
+        preds.append({
+            "x": x + w / 2, "y": y + h / 2, "width": float(w), "height": float(h),
+            "class": "doors", "confidence": 0.9,
+        })
+    return preds
+
+
+def make_plan(path: Path, width: int, height: int, centers: list[tuple[int, int]]) -> None:
+    img = np.full((height, width, 3), 255, np.uint8)
+    for cx, cy in centers:
+        cv2.rectangle(img, (cx - SYMBOL // 2, cy - SYMBOL // 2), (cx + SYMBOL // 2 - 1, cy + SYMBOL // 2 - 1), (0, 0, 0), -1)
+    cv2.imwrite(str(path), img)
+
+
+def check_case(name: str, folder: Path, width: int, height: int, centers: list[tuple[int, int]], tiles: int) -> None:
+    from runner.count_objects.roboflow_upload import infer_prepared
+
+    print(f"\n📋 {name}: plan {width}×{height}, {len(centers)} simboluri")
+    path = folder / f"{name}.png"
+    make_plan(path, width, height, centers)
+
+    preds, stats = infer_prepared(path, fake_post)
+    print(f"   tile-uri: {stats.tiles}, scală: {stats.scale:.3f}, predicții: {len(preds)}")
+    assert stats.tiles == tiles, f"{name}: {stats.tiles} tile-uri, așteptat {tiles}"
+    assert (stats.full_width, stats.full_height) == (width, height)
+
+    # un singur hit per obiect (box-urile tăiate de margini interioare și dublurile din suprapunere dispar)
+    assert len(preds) == len(centers), f"{name}: {len(preds)} predicții pentru {len(centers)} obiecte"
+
+    # coordonatele aduse înapoi în planul complet
+    tol = SYMBOL * TOLERANCE / stats.scale + 1.0 / stats.scale
+    for cx, cy in centers:
+        p = min(preds, key=lambda p: (p["x"] - cx) ** 2 + (p["y"] - cy) ** 2)
+        err = max(abs(p["x"] - cx), abs(p["y"] - cy), abs(p["width"] - SYMBOL), abs(p["height"] - SYMBOL))
+        assert err <= tol, f"{name}: obiectul ({cx}, {cy}) → {p} (eroare {err:.1f} > {tol:.1f})"
+    print(f"   ✅ un hit per obiect, coordonate în planul complet (±{tol:.1f} px)")
+
+
+def test_roboflow_upload():
+    """Testează cele trei căi de upload împotriva serverului fals."""
+    from runner.count_objects.config import ROBOFLOW_MAX_SIDE, ROBOFLOW_MIN_SCALE, ROBOFLOW_TILE_SIZE
+
+    print("\n" + "="*70)
+    print("🧪 TEST: Roboflow upload (server local fals)")
+    print("="*70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+
+        # plan mic: fișierul original, o singură imagine, scală 1
+        check_case("single", folder, 1500, 1000, [(200, 200), (900, 500), (1400, 900)], tiles=1)
+
+        # plan mare: micșorat la ROBOFLOW_MAX_SIDE, o singură imagine
+        side = int(ROBOFLOW_MAX_SIDE * 1.4)
+        check_case("downscale", folder, side, side * 2 // 3, [(300, 300), (side // 2, 900), (side - 200, 1500)], tiles=1)
+
+        # plan foarte mare: ROBOFLOW_MIN_SCALE + 2 tile-uri orizontale.
+        #  - un simbol taie marginea interioară a primului tile (doar al doilea îl vede întreg)
+        #  - un simbol stă întreg în zona de suprapunere (ambele tile-uri îl văd → o singură predicție)
+        width = int((ROBOFLOW_TILE_SIZE * 1.5) / ROBOFLOW_MIN_SCALE)
+        height = int((ROBOFLOW_TILE_SIZE * 0.9) / ROBOFLOW_MIN_SCALE)
+        edge = int(ROBOFLOW_TILE_SIZE / ROBOFLOW_MIN_SCALE)                  # marginea dreaptă a tile-ului 0
+        inside_overlap = edge - 2 * SYMBOL                                   # în ambele tile-uri
+        check_case(
+            "tiles", folder, width, height,
+            [(300, 300), (edge, 1200), (inside_overlap, 2400), (width - 300, height - 300)],
+            tiles=2,
+        )
+
+    print("\n✅ TEST ROBOFLOW UPLOAD FINALIZAT")
+
+
+if __name__ == "__main__":
+    test_roboflow_upload()